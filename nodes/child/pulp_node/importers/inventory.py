@@ -32,6 +32,8 @@ class UniqueKey(object):
     :type uid: A tuple of: (type_id, unit_key)
     """
 
+    __slots__ = ('uid',)
+
     def __init__(self, unit):
         """
         :param unit: A content unit.
@@ -16,21 +16,28 @@ the strategies provided here.
 """
 
 
+import os
+
 from gettext import gettext as _
 from logging import getLogger
 
 from pulp.plugins.model import Unit
 from pulp.server.config import config as pulp_conf
+from pulp.server.db.model.criteria import Criteria
 
 from pulp_node import constants
 from pulp_node.manifest import Manifest
 from pulp_node.importers.reports import ImporterReport
-from pulp_node.importers.inventory import UnitInventory, unit_dictionary
+from pulp_node.importers.inventory import UnitInventory, UniqueKey, unit_dictionary
 from pulp_node.importers.download import Batch, DownloadListener
 
 
 log = getLogger(__name__)
 
+# The number of units looked up at a time when searching for units
+# already held by the child.
+UNITS_PER_QUERY = 100
+
 
 # --- i18n ------------------------------------------------------------------------------
 
@@ -107,6 +114,17 @@ class ImporterStrategy(object):
         self.conduit.save_unit(unit)
         self.progress.unit_added(details=unit.storage_path)
 
+    def associate_unit(self, unit):
+        """
+        Add the specified unit, the file of which is already held by the
+        child, to the child inventory using the conduit.  The file is not
+        downloaded and is reported as a skipped download.
+        :param unit: The unit to be added.
+        :type unit: Unit
+        """
+        self.conduit.save_unit(unit)
+        self.progress.unit_skipped(details=unit.storage_path)
+
     # --- protected ---------------------------------------------------------------------
 
     def _unit_inventory(self, repo_id):
@@ -150,8 +168,8 @@ class ImporterStrategy(object):
         new_units = []
         storage_dir = pulp_conf.get('server', 'storage_dir')
         for unit in unit_inventory.parent_only():
-            unit['metadata'].pop('_id')
-            unit['metadata'].pop('_ns')
+            unit['metadata'].pop('_id', None)
+            unit['metadata'].pop('_ns', None)
             type_id = unit['type_id']
             unit_key = unit['unit_key']
             metadata = unit['metadata']
@@ -163,6 +181,33 @@ class ImporterStrategy(object):
             new_units.append((unit, unit_in))
         return new_units
 
+    def _existing_units(self, units):
+        """
+        Determine which of the units to be added are already held by
+        the child, with the same unit key and storage path, in any
+        repository.  The units are looked up in bulk by type.
+        :param units: The list of units to be added.
+            Each item: (parent_unit, unit_to_be_added)
+        :type units: list
+        :return: The set of unique keys of the units already held.
+        :rtype: set
+        """
+        existing = set()
+        by_type = {}
+        for unit, child_unit in units:
+            if not unit.get('_download'):
+                continue
+            spec = dict(child_unit.unit_key)
+            spec['_storage_path'] = child_unit.storage_path
+            by_type.setdefault(child_unit.type_id, []).append(spec)
+        for type_id, specs in by_type.items():
+            for n in xrange(0, len(specs), UNITS_PER_QUERY):
+                criteria = Criteria(filters={'$or': specs[n:n + UNITS_PER_QUERY]})
+                for unit in self.conduit.search_all_units(type_id, criteria):
+                    if os.path.exists(unit.storage_path):
+                        existing.add(UniqueKey(unit))
+        return existing
+
     def _add_units(self, unit_inventory):
         """
         Determine the list of units contained in the parent inventory
@@ -173,7 +218,9 @@ class ImporterStrategy(object):
           3. Associate the unit to the repository.
         The unit is added only:
           1. If no file is associated with unit.
-          2. The file associated with the unit is successfully downloaded.
+          2. The file associated with the unit is already held by the child
+             for another repository.
+          3. The file associated with the unit is successfully downloaded.
         For units with files, the unit is added to the inventory as part of the
         transport callback.
         :param unit_inventory: The inventory of both parent and child content units.
@@ -185,6 +232,7 @@ class ImporterStrategy(object):
         failed = []
         units = self._missing_units(unit_inventory)
         self.progress.begin_adding_units(len(units))
+        existing = self._existing_units(units)
         batch = Batch()
         for unit, child_unit in units:
             if self.cancelled:
@@ -197,6 +245,13 @@ class ImporterStrategy(object):
                 except Exception, e:
                     failed.append((child_unit, e))
                 continue
+            # unit file already held by the child
+            if UniqueKey(child_unit) in existing:
+                try:
+                    self.associate_unit(child_unit)
+                except Exception, e:
+                    failed.append((child_unit, e))
+                continue
             url = download['url']
             batch.add(url, child_unit)
         if not self.cancelled:
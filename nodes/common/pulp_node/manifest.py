@@ -13,8 +13,11 @@
 Provides classes for managing the content unit manifest.
 The manifest is a json encoded file that defines content units
 associated with repository.  The total list of units is stored in separate
-json encoded files.  The manifest contains a list of those file names and
-the total count of units.  For performance reasons, the manifest and the unit
+files, each containing a json encoded list of units.  Since version 2, the
+list is written with one unit per line so it can be written and read one unit
+at a time, while children that load the whole list can still read it.  The
+manifest contains a list of those file names, the total count of units and
+the version of the format.  For performance reasons, the manifest and the unit
 files are compressed.
 """
 
@@ -38,39 +41,47 @@ class Manifest(object):
     """
     The manifest is a json encoded file that defines content units
     associated with repository.  The total list of units is stored in separate
-    json encoded files.  The manifest contains a list of those file names and
-    the total count of units.  For performance reasons, the manifest and the unit
-    files are compressed.
+    files, each containing a json encoded list of units with one unit per line.
+    The manifest contains a list of those file names, the total count of units
+    and the format version.
+    For performance reasons, the manifest and the unit files are compressed.
     :cvar FILE_NAME: The name of the manifest file.
     :type FILE_NAME: str
+    :cvar VERSION: The version of the manifest format written.
+    :type VERSION: int
     :cvar UNITS_PER_FILE: the number of units per file.
     :type UNITS_PER_FILE: int
     """
 
     FILE_NAME = 'manifest.json.gz'
+    VERSION = 2
     UNITS_PER_FILE = 1000
 
     def write(self, dir_path, units):
         """
         Write a manifest file as a json encoded file that defines content units
-        associated with repository.  The total list of units is stored in separate
-        json encoded files.  The manifest contains a list of those file names and
-        the total count of units.  For performance reasons, the manifest and the unit
-        files are compressed.
+        associated with repository.  The units are written to separate files
+        as they are consumed, one json encoded unit per line of a json list,
+        so the complete list of units is never held in memory.  The manifest contains a list of
+        those file names, the total count of units and the format version.
+        For performance reasons, the manifest and the unit files are compressed.
         :param dir_path: The fully qualified path to a directory.
             The directory will be created as necessary.
         :type dir_path: str
-        :param units: A list of content units. Each is a dictionary.
-        :type units: list
+        :param units: An iterable of content units. Each is a dictionary.
+        :type units: iterable
+        :return: The number of units written.
+        :rtype: int
         :raise IOError on I/O errors.
         :raise ValueError on json encoding errors
         """
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
-        unit_files = self._write_unit_files(dir_path, units)
-        manifest = dict(total_units=len(units), unit_files=unit_files)
+        total_units, unit_files = self._write_unit_files(dir_path, units)
+        manifest = dict(version=self.VERSION, total_units=total_units, unit_files=unit_files)
         path = os.path.join(dir_path, self.FILE_NAME)
         write_json_encoded(manifest, path)
+        return total_units
 
     def read(self, url, downloader):
         """
@@ -93,26 +104,41 @@ class Manifest(object):
 
     def _write_unit_files(self, dir_path, units):
         """
-        Write the list units into json encoded and compressed files.
-        The units list is split into sub-lists based on UNITS_PER_FILE.
+        Write the units into compressed files, each containing a json encoded
+        list of units with one unit per line.  A new file is started every
+        UNITS_PER_FILE units.
         :param dir_path: The directory path to where the files are to be written.
         :type dir_path: str
-        :param units: A list of content units.
-        :type units: list
-        :return: The list of file names created.
-        :rtype: list
+        :param units: An iterable of content units.
+        :type units: iterable
+        :return: The number of units written and the list of file names created.
+        :rtype: tuple(2)
         :raise IOError on I/O errors.
         :raise ValueError on json encoding errors
         """
-        n = 0
+        total_units = 0
         unit_files = []
-        for _units in split_list(units, self.UNITS_PER_FILE):
-            file_name = 'units-%d.json.gz' % n
-            path = os.path.join(dir_path, file_name)
-            write_json_encoded(_units, path)
-            unit_files.append(file_name)
-            n += 1
-        return unit_files
+        fp = None
+        try:
+            for unit in units:
+                if total_units % self.UNITS_PER_FILE == 0:
+                    if fp is not None:
+                        fp.write('\n]\n')
+                        fp.close()
+                    file_name = 'units-%d.json.gz' % len(unit_files)
+                    fp = gzip.open(os.path.join(dir_path, file_name), 'wb')
+                    unit_files.append(file_name)
+                    fp.write('[\n')
+                else:
+                    fp.write(',\n')
+                fp.write(json.dumps(unit))
+                total_units += 1
+            if fp is not None:
+                fp.write('\n]\n')
+        finally:
+            if fp is not None:
+                fp.close()
+        return total_units, unit_files
 
     def _read_manifest(self, url, downloader):
         """
@@ -162,15 +188,16 @@ class Manifest(object):
         downloader.download(request_list)
         unit_files = [r.destination for r in request_list]
         total_units = manifest['total_units']
-        return UnitsIterator(tmp_dir, total_units, unit_files)
+        version = manifest.get('version', 1)
+        return UnitsIterator(tmp_dir, total_units, unit_files, version)
 
 
 class UnitsIterator:
     """
-    Iterates a list of paths to files containing json encoded lists of units.
+    Iterates a list of paths to files containing json encoded units.
     """
 
-    def __init__(self, tmp_dir, total_units, unit_files):
+    def __init__(self, tmp_dir, total_units, unit_files, version=Manifest.VERSION):
         """
         :param tmp_dir:  The directory containing the files.
          :type tmp_dir: str
@@ -178,13 +205,15 @@ class UnitsIterator:
         :type total_units: int
         :param unit_files: A list of unit file names.
         :type unit_files: list
+        :param version: The manifest format version of the unit files.
+        :type version: int
         """
         self.tmp_dir = tmp_dir
         self.total_units = total_units
         self.unit_files = unit_files
-        self.units = []
+        self.version = version
+        self.units = iter([])
         self.file_index = 0
-        self.unit_index = 0
 
     def next(self):
         """
@@ -196,44 +225,47 @@ class UnitsIterator:
         :raise IOError on I/O errors.
         :raise ValueError on json decoding errors
         """
-        if self.unit_index < len(self.units):
-            unit = self.units[self.unit_index]
-            self.unit_index += 1
-            return unit
-        else:
-            self.load()
-            return self.next()
+        while True:
+            try:
+                return self.units.next()
+            except StopIteration:
+                self.load()
 
     def load(self):
         """
-        Load the next units file and populate the list of units.
+        Open the next units file.
         :raise StopIteration when empty.
         :raise IOError on I/O errors.
         :raise ValueError on json decoding errors
         """
-        self.units = []
-        self.unit_index = 0
         if self.file_index < len(self.unit_files):
             path = self.unit_files[self.file_index]
             self.units = self.read(path)
             self.file_index += 1
-        if not len(self.units):
+        else:
             shutil.rmtree(self.tmp_dir, ignore_errors=True)
             raise StopIteration()
 
     def read(self, path):
         """
-        Read and json un-encode the units file at the specified path.
-        :param path: Path to a json file containing a list of units.
+        Read the units file at the specified path.
+        Version 1 files may contain the json encoded list of units on any
+        number of lines and are read entirely.  Later versions contain one
+        unit per line and are read one unit at a time.
+        :param path: Path to a compressed units file.
         :type path: str
+        :return: An iterator of units.
+        :rtype: iterator
         :raise IOError on I/O errors.
         :raise ValueError on json decoding errors
         """
         fp = gzip.open(path)
-        try:
-            return json.load(fp)
-        finally:
-            fp.close()
+        if self.version < 2:
+            try:
+                return iter(json.load(fp))
+            finally:
+                fp.close()
+        return read_json_lines(fp)
 
     def __del__(self):
         shutil.rmtree(self.tmp_dir, ignore_errors=True)
@@ -248,17 +280,26 @@ class UnitsIterator:
 # --- utils -----------------------------------------------------------------------------
 
 
-def split_list(list_in, num_lists):
+def read_json_lines(fp):
     """
-    Split the list info into sub-lists.
-    :param list_in: The list to split.
-    :type list_in: list
-    :param num_lists: The number of requested stub-lists.
-    :type num_lists: int
-    :return: A list of sub-lists.
-    :rtype: list
+    Generate the json decoded objects in an open file containing one
+    json encoded object per line.  The lines may form a json encoded list,
+    with the brackets on lines of their own and the objects separated by
+    commas.  The file is closed once read.
+    :param fp: An open file.
+    :type fp: file-like
+    :return: A generator of the decoded objects.
+    :rtype: generator
+    :raise IOError on I/O errors.
+    :raise ValueError on json decoding errors
     """
-    return [list_in[x:x + num_lists] for x in xrange(0, len(list_in), num_lists)]
+    try:
+        for line in fp:
+            line = line.strip().rstrip(',')
+            if line and line not in ('[', ']'):
+                yield json.loads(line)
+    finally:
+        fp.close()
 
 
 def write_json_encoded(object_in, path, compressed=True):
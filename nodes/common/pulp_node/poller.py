@@ -11,7 +11,7 @@
 
 import httplib
 
-from time import sleep
+from time import sleep, time
 from gettext import gettext as _
 
 from pulp.server.dispatch.constants import CALL_COMPLETE_STATES, CALL_ERROR_STATE
@@ -38,23 +38,31 @@ class TaskPoller(object):
     The task poller is used to poll a running task by ID.
     :ivar binding: A pulp API binding.
     :type binding: pulp_node.handlers.model.PulpBinding
-    :ivar delay: The delay in seconds between each poll.
+    :ivar delay: The minimum delay in seconds between each poll.
     :type delay: int
+    :ivar wait: The maximum number of seconds the server is asked to hold
+        each poll waiting for the task to change.
+    :type wait: int
     :ivar poll: The main loop latch.
     :type poll: bool
     """
 
     DELAY = 1
+    WAIT = 30
 
-    def __init__(self, binding, delay=DELAY):
+    def __init__(self, binding, delay=DELAY, wait=WAIT):
         """
         :ivar binding: A pulp API binding.
         :type binding: pulp_node.handlers.model.PulpBinding
-        :ivar delay: The delay in seconds between each poll.
+        :ivar delay: The minimum delay in seconds between each poll.
         :type delay: int
+        :ivar wait: The maximum number of seconds the server is asked to hold
+            each poll waiting for the task to change.
+        :type wait: int
         """
         self.binding = binding
         self.delay = delay
+        self.wait = wait
         self.poll = True
 
     def abort(self):
@@ -67,6 +75,8 @@ class TaskPoller(object):
         """
         Begin polling the specified task.
         This call blocks until the task has completed.
+        Each poll is held by the server until the task changes so progress
+        is reported as it happens without polling an idle task repeatedly.
         :param task_id: A task ID.
         :type task_id: str
         :param progress: A progress reporting object.
@@ -74,16 +84,18 @@ class TaskPoller(object):
         :return: The task result.
         """
         last_hash = 0
+        revision = None
 
         while self.poll:
-            sleep(self.delay)
+            started = time()
 
-            http = self.binding.tasks.get_task(task_id)
+            http = self.binding.tasks.get_task(task_id, wait=self.wait, revision=revision)
             if http.response_code != httplib.OK:
                 msg = FETCH_TASK_FAILED % {'t': task_id, 'c': http.response_code}
                 raise Exception(msg)
 
             task = http.response_body
+            revision = task.revision
             last_hash = self._report_progress(progress, task, last_hash)
 
             if task.state == CALL_ERROR_STATE:
@@ -93,6 +105,11 @@ class TaskPoller(object):
             if task.state in CALL_COMPLETE_STATES:
                 return task.result
 
+            # the task may change faster than is useful to report
+            remaining = self.delay - (time() - started)
+            if remaining > 0:
+                sleep(remaining)
+
     def _report_progress(self, progress, task, last_hash):
         """
         Update the progress report only if the progress in the task has changed.
@@ -37,7 +37,7 @@ class RepositoryProgress(object):
         self.repo_id = repo_id
         self.listener = listener
         self.state = self.PENDING
-        self.unit_add = dict(total=0, completed=0, details=None)
+        self.unit_add = dict(total=0, completed=0, skipped=0, details=None)
 
     def begin_importing(self):
         """
@@ -78,6 +78,18 @@ class RepositoryProgress(object):
         self.unit_add['details'] = details
         self.updated()
 
+    def unit_skipped(self, skipped=1, details=None):
+        """
+        Update the report to reflect that one or more units have been added
+        without downloading their files because the files are already held.
+        :param skipped: The number of units added since last reported.
+        :type skipped: int
+        :param details: Details (optional) about the unit added.
+        :type details: object
+        """
+        self.unit_add['skipped'] += skipped
+        self.unit_added(skipped, details)
+
     def finished(self):
         """
         Update the report to reflect that the synchronization has finished.
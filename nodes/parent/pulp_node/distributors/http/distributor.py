@@ -15,8 +15,11 @@ from gettext import gettext as _
 from logging import getLogger
 
 from pulp.plugins.distributor import Distributor
+from pulp.plugins.types.database import TYPE_COLLECTION_PREFIX
 from pulp.server.managers import factory
 from pulp.server.config import config as pulp_conf
+from pulp.server.db.model.criteria import UnitAssociationCriteria
+from pulp.server.db.model.repository import RepoContentUnit
 
 from pulp_node import link
 from pulp_node import constants
@@ -25,6 +28,9 @@ from pulp_node.distributors.http.publisher import HttpPublisher
 
 _LOG = getLogger(__name__)
 
+# The number of units fetched from the conduit at a time while publishing.
+UNITS_PER_PAGE = 1000
+
 
 # --- i18n ------------------------------------------------------------------------------
 
@@ -142,30 +148,73 @@ class NodesHttpDistributor(Distributor):
         :return: report describing the publish run
         :rtype:  pulp.plugins.model.PublishReport
         """
-        units = conduit.get_units()
+        units = self._units(repo.id, conduit)
         publisher = self.publisher(repo, config)
         units = self._prepare_units(units)
-        publisher.publish(units)
-        details = dict(unit_count=len(units))
+        unit_count = publisher.publish(units)
+        details = dict(unit_count=unit_count)
         return conduit.build_success_report('succeeded', details)
 
+    def _units(self, repo_id, conduit):
+        """
+        Fetch the units associated with the repository, UNITS_PER_PAGE
+        at a time, so the complete list of units is never held in memory.
+        The units of each type are paged by unit ID, which together with the
+        repository and type ID is a prefix of the unique association index,
+        so no unit is skipped or returned twice and each page is an index
+        range scan. A unit associated more than once is yielded once.
+        :param repo_id: The repository ID.
+        :type repo_id: str
+        :param conduit: provides access to relevant Pulp functionality
+        :type  conduit: pulp.plugins.conduits.repo_publish.RepoPublishConduit
+        :return: A generator of units.
+        :rtype: generator
+        """
+        collection = RepoContentUnit.get_collection()
+        type_ids = collection.find({'repo_id': repo_id}).distinct('unit_type_id')
+        for type_id in sorted(type_ids):
+            last_id = None
+            while True:
+                filters = {}
+                if last_id is not None:
+                    filters['unit_id'] = {'$gt': last_id}
+                criteria = UnitAssociationCriteria(
+                    type_ids=[type_id],
+                    association_filters=filters,
+                    association_sort=[('unit_id', UnitAssociationCriteria.SORT_ASCENDING)],
+                    limit=UNITS_PER_PAGE)
+                units = conduit.get_units(criteria=criteria)
+                for unit in units:
+                    if unit.id == last_id:
+                        # another association of the same unit
+                        continue
+                    last_id = unit.id
+                    yield unit
+                if len(units) < UNITS_PER_PAGE:
+                    break
+
     def _prepare_units(self, units):
         """
         Prepare units to be published.
             - add _relative storage path.
-        :param units: A list of units to be published.
-        :type units: list
+            - add the _ns the unit documents were stored with before they
+              opted out of the NamespaceInjector; children that predate the
+              opt-out expect it in the metadata.
+        :param units: An iterable of units to be published.
+        :type units: iterable
+        :return: A generator of the prepared units.
+        :rtype: generator
         """
-        prepared = []
         storage_dir = pulp_conf.get('server', 'storage_dir')
         for unit in units:
-            _unit = unit.__dict__
+            _unit = unit.to_dict()
+            _unit['metadata'] = dict(_unit['metadata'])
+            _unit['metadata'].setdefault('_ns', TYPE_COLLECTION_PREFIX + _unit['type_id'])
             storage_path = _unit['storage_path']
             if storage_path:
                 relative_path = storage_path[len(storage_dir):]
                 _unit['_relative_path'] = relative_path
-            prepared.append(_unit)
-        return prepared
+            yield _unit
 
     def publisher(self, repo, config):
         """
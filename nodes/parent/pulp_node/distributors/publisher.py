@@ -95,19 +95,33 @@ class FilePublisher(Publisher):
         Publish the specified units.
         Writes the units.json file and symlinks each of the
         files associated to the unit.storage_path.
-        :param units: A list of units to publish.
-        :type units: list
+        The units are linked and written as they are consumed.
+        :param units: An iterable of units to publish.
+        :type units: iterable
+        :return: The number of units published.
+        :rtype: int
+        """
+        return self.write_manifest(self.linked(units))
+
+    def linked(self, units):
         """
-        self.link(units)
-        self.write_manifest(units)
+        Link the files associated with each unit as it is consumed.
+        :param units: An iterable of units to link.
+        :type units: iterable
+        :return: A generator of the linked units.
+        :rtype: generator
+        """
+        for unit in units:
+            self.link([unit])
+            yield unit
 
     def write_manifest(self, units):
         """
-        Write the manifest (units.json) for the specified list of units.
-        :param units: A list of units.
-        :type units: list
-        :return: The absolute path to the written manifest file.
-        :rtype: str
+        Write the manifest (units.json) for the specified units.
+        :param units: An iterable of units.
+        :type units: iterable
+        :return: The number of units written.
+        :rtype: int
         """
         manifest = Manifest()
         dir_path = join(self.publish_dir, self.repo_id)
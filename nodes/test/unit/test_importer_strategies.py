@@ -10,11 +10,17 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 
+import os
+import shutil
+import tempfile
+
 from unittest import TestCase
 from mock import Mock
 
 from pulp.plugins.model import Unit
+from pulp.server.config import config as pulp_conf
 from pulp_node.importers.strategies import ImporterStrategy
+from pulp_node.importers.inventory import UnitInventory, unit_dictionary
 from pulp_node.importers.reports import ProgressListener
 from pulp_node.progress import RepositoryProgress
 
@@ -59,3 +65,68 @@ class TestMirror(TestCase):
     def test_successful(self):
         # WORK IN PROGRESS
         pass
+
+
+class TestExistingUnits(TestCase):
+
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        pulp_conf.set('server', 'storage_dir', self.storage_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.storage_dir)
+
+    def parent_unit(self, n):
+        return {
+            'type_id': 'T',
+            'unit_key': {'n': n},
+            'metadata': {'_id': n, 'n': n},
+            'storage_path': '/parent/%d' % n,
+            '_relative_path': 'T/%d' % n,
+            '_download': {'url': 'http://parent/%d' % n},
+        }
+
+    def test_add_existing(self):
+        # Setup
+        path = os.path.join(self.storage_dir, 'T/1')
+        os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+        conduit = Mock()
+        conduit.search_all_units.return_value = [Unit('T', {'n': 1}, {}, path)]
+        downloader = Mock()
+        progress = RepositoryProgress('foo')
+        strategy = ImporterStrategy(conduit, None, downloader, progress)
+        parent = unit_dictionary([self.parent_unit(1), self.parent_unit(2)])
+        inventory = UnitInventory({}, parent)
+        # Test
+        failed = strategy._add_units(inventory)
+        # Verify
+        self.assertEqual(failed, [])
+        self.assertEqual(conduit.search_all_units.call_count, 1)
+        criteria = conduit.search_all_units.call_args[0][1]
+        specs = sorted(criteria.filters['$or'])
+        self.assertEqual(specs[0], {'n': 1, '_storage_path': path})
+        # the held unit is associated without downloading its file
+        self.assertEqual(conduit.save_unit.call_count, 1)
+        self.assertEqual(conduit.save_unit.call_args[0][0].unit_key, {'n': 1})
+        request_list = downloader.download.call_args[0][0]
+        self.assertEqual([r.url for r in request_list], ['http://parent/2'])
+        self.assertEqual(progress.unit_add['skipped'], 1)
+        self.assertEqual(progress.unit_add['completed'], 1)
+
+    def test_add_existing_file_missing(self):
+        # Setup
+        path = os.path.join(self.storage_dir, 'T/1')
+        conduit = Mock()
+        conduit.search_all_units.return_value = [Unit('T', {'n': 1}, {}, path)]
+        downloader = Mock()
+        progress = RepositoryProgress('foo')
+        strategy = ImporterStrategy(conduit, None, downloader, progress)
+        inventory = UnitInventory({}, unit_dictionary([self.parent_unit(1)]))
+        # Test
+        strategy._add_units(inventory)
+        # Verify
+        self.assertFalse(conduit.save_unit.called)
+        request_list = downloader.download.call_args[0][0]
+        self.assertEqual([r.url for r in request_list], ['http://parent/1'])
+        self.assertEqual(progress.unit_add['skipped'], 0)
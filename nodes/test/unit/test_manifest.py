@@ -20,7 +20,7 @@ from unittest import TestCase
 from pulp.common.download.downloaders.curl import HTTPSCurlDownloader
 from pulp.common.download.config import DownloaderConfig
 
-from pulp_node.manifest import Manifest
+from pulp_node.manifest import Manifest, write_json_encoded
 
 Manifest.UNITS_PER_FILE = 2
 
@@ -60,9 +60,26 @@ class TestManifest(TestCase):
         for unit_file in manifest['unit_files']:
             path = os.path.join(self.tmp_dir, unit_file)
             fp = gzip.open(path)
+            # each file is a json list, as read by older children
             units_in.extend(json.load(fp))
             fp.close()
+        self.assertEqual(manifest['version'], Manifest.VERSION)
         self.assertEqual(manifest['total_units'], self.NUM_UNITS)
+        self.assertEqual(len(manifest['unit_files']), self.NUM_UNITS / Manifest.UNITS_PER_FILE)
+        self.verify(units, units_in)
+
+    def test_write_iterator(self):
+        # Test
+        manifest = Manifest()
+        units = ({i: i + 1} for i in range(0, self.NUM_UNITS))
+        total_units = manifest.write(self.tmp_dir, units)
+        # Verify
+        self.assertEqual(total_units, self.NUM_UNITS)
+        cfg = DownloaderConfig()
+        downloader = HTTPSCurlDownloader(cfg)
+        path = os.path.join(self.tmp_dir, Manifest.FILE_NAME)
+        units_in = list(Manifest().read('file://%s' % path, downloader))
+        units = [{i: i + 1} for i in range(0, self.NUM_UNITS)]
         self.verify(units, units_in)
 
     def test_round_trip(self):
@@ -80,3 +97,23 @@ class TestManifest(TestCase):
         units_in = list(manifest.read(url, downloader))
         # Verify
         self.verify(units, units_in)
+
+    def test_read_version_1(self):
+        # Setup
+        units = []
+        for i in range(0, self.NUM_UNITS):
+            units.append({i: i + 1})
+        unit_files = []
+        for n in range(0, self.NUM_UNITS, Manifest.UNITS_PER_FILE):
+            file_name = 'units-%d.json.gz' % n
+            write_json_encoded(units[n:n + Manifest.UNITS_PER_FILE], os.path.join(self.tmp_dir, file_name))
+            unit_files.append(file_name)
+        path = os.path.join(self.tmp_dir, Manifest.FILE_NAME)
+        write_json_encoded(dict(total_units=self.NUM_UNITS, unit_files=unit_files), path)
+        # Test
+        cfg = DownloaderConfig()
+        downloader = HTTPSCurlDownloader(cfg)
+        manifest = Manifest()
+        units_in = list(manifest.read('file://%s' % path, downloader))
+        # Verify
+        self.verify(units, units_in)
@@ -251,6 +251,62 @@ class TestDistributor(PluginTestBase):
                     continue
                 self.assertEqual(created[p], v)
 
+    def test_publish_unit_dicts(self):
+        # Setup
+        self.populate()
+        pulp_conf.set('server', 'storage_dir', self.parentfs)
+        # Test
+        dist = NodesHttpDistributor()
+        repo = Repository(self.REPO_ID)
+        conduit = RepoPublishConduit(self.REPO_ID, constants.HTTP_DISTRIBUTOR)
+        report = dist.publish_repo(repo, conduit, self.dist_conf())
+        # Verify
+        self.assertEqual(self.NUM_UNITS, report.details['unit_count'])
+        conf = DownloaderConfig()
+        downloader = HTTPSCurlDownloader(conf)
+        manifest = Manifest()
+        pub = dist.publisher(repo, self.dist_conf())
+        url = '/'.join((pub.base_url, pub.manifest_path()))
+        units = list(manifest.read(url, downloader))
+        for n in range(0, self.NUM_UNITS):
+            unit = units[n]
+            unit_id = self.UNIT_ID % n
+            relative_path = '/'.join(('content', '.'.join((unit_id, self.UNIT_TYPE_ID))))
+            self.assertEqual(self.UNIT_TYPE_ID, unit['type_id'])
+            self.assertEqual(n, unit['unit_key']['N'])
+            self.assertEqual(self.units[n]['_storage_path'], unit['storage_path'])
+            self.assertEqual(relative_path, unit['_relative_path'].lstrip('/'))
+            # required by children that predate the _ns opt-out
+            self.assertEqual('units_' + self.UNIT_TYPE_ID, unit['metadata']['_ns'])
+
+    @patch('pulp_node.distributors.http.distributor.UNITS_PER_PAGE', 2)
+    def test_publish_paged(self):
+        # Setup
+        self.populate()
+        pulp_conf.set('server', 'storage_dir', self.parentfs)
+        # a second association of the unit at the end of the first page
+        manager = managers.repo_unit_association_manager()
+        manager.associate_unit_by_id(
+            self.REPO_ID,
+            self.UNIT_TYPE_ID,
+            self.UNIT_ID % 1,
+            RepoContentUnit.OWNER_TYPE_USER,
+            'admin')
+        # Test
+        dist = NodesHttpDistributor()
+        repo = Repository(self.REPO_ID)
+        conduit = RepoPublishConduit(self.REPO_ID, constants.HTTP_DISTRIBUTOR)
+        report = dist.publish_repo(repo, conduit, self.dist_conf())
+        # Verify
+        self.assertEqual(self.NUM_UNITS, report.details['unit_count'])
+        conf = DownloaderConfig()
+        downloader = HTTPSCurlDownloader(conf)
+        manifest = Manifest()
+        pub = dist.publisher(repo, self.dist_conf())
+        url = '/'.join((pub.base_url, pub.manifest_path()))
+        units = list(manifest.read(url, downloader))
+        self.assertEqual(range(0, self.NUM_UNITS), [u['unit_key']['N'] for u in units])
+
 
 class ImporterTest(PluginTestBase):
 
@@ -39,10 +39,38 @@ from pulp.bindings.bindings import Bindings
 
 log = getLogger(__name__)
 plugin = Plugin.find(__name__)
-dispatcher = Dispatcher()
 cfg = plugin.cfg()
 
 
+def coalesce_window():
+    """
+    Get the number of seconds content requests are held so that
+    compatible requests are dispatched to the handlers together.
+    :return: The configured window or 0 (disabled) when not configured.
+    :rtype: float
+    """
+    try:
+        return float(cfg.content.coalesce_window)
+    except Exception:
+        return 0
+
+
+dispatcher = Dispatcher(coalesce_window=coalesce_window())
+
+
+def request_compression_threshold():
+    """
+    Get the size in bytes at which REST request bodies, such as
+    package profiles, are gzip compressed.
+    :return: The configured threshold or None (disabled) when not configured.
+    :rtype: int
+    """
+    try:
+        return int(cfg.rest.request_compression_threshold)
+    except Exception:
+        return None
+
+
 # --- utils ------------------------------------------------------------------
 
 
@@ -94,7 +122,9 @@ class PulpBindings(Bindings):
         host = cfg.rest.host
         port = int(cfg.rest.port)
         cert = cfg.rest.clientcert
-        connection = PulpConnection(host, port, cert_filename=cert)
+        connection = PulpConnection(
+            host, port, cert_filename=cert,
+            request_compression_threshold=request_compression_threshold())
         Bindings.__init__(self, connection)
 
 
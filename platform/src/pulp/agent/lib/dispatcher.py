@@ -12,11 +12,17 @@
 #
 
 import os
+import json
 
+from copy import copy
+
+from threading import Lock, Event
+from time import sleep
 from logging import getLogger
 
 from pulp.agent.lib.container import Container
 from pulp.agent.lib.container import SYSTEM, CONTENT, BIND
+from pulp.agent.lib.conduit import Conduit
 from pulp.agent.lib.report import *
 
 
@@ -47,13 +53,21 @@ class Dispatcher:
     @type container: L{Container}
     """
 
-    def __init__(self, container=None):
+    def __init__(self, container=None, coalesce_window=0):
         """
         @param container: A handler container.
         @type container: L{Container}
+        @param coalesce_window: The number of seconds content requests
+            are held so that compatible requests arriving within that
+            time are dispatched to the handlers together.  0 disables.
+        @type coalesce_window: float
         """
         self.container = container or Container()
         self.container.load()
+        if coalesce_window > 0:
+            self.coalescer = Coalescer(coalesce_window)
+        else:
+            self.coalescer = None
 
     def install(self, conduit, units, options):
         """
@@ -68,24 +82,7 @@ class Dispatcher:
         @return: A dispatch report.
         @rtype: L{DispatchReport}
         """
-        dispatch_report = DispatchReport()
-        collated = Units(units)
-        for type_id, units in collated.items():
-            try:
-                handler = self.__handler(type_id, CONTENT)
-                report = handler.install(conduit, units, dict(options))
-                report.aggregation_key = type_id
-                report.update(dispatch_report)
-            except Exception:
-                log.exception('handler failed')
-                report = HandlerReport()
-                report.aggregation_key = type_id
-                report.set_failed(LastExceptionDetails())
-                report.update(dispatch_report)
-        mgr = RebootManager(conduit, self, options)
-        reboot_report = mgr.reboot(dispatch_report.num_changes)
-        reboot_report.update(dispatch_report)
-        return dispatch_report
+        return self.__content('install', conduit, units, options)
 
     def update(self, conduit, units, options):
         """
@@ -100,24 +97,7 @@ class Dispatcher:
         @return: A dispatch report.
         @rtype: L{DispatchReport}
         """
-        dispatch_report = DispatchReport()
-        collated = Units(units)
-        for type_id, units in collated.items():
-            try:
-                handler = self.__handler(type_id, CONTENT)
-                report = handler.update(conduit, units, dict(options))
-                report.aggregation_key = type_id
-                report.update(dispatch_report)
-            except Exception:
-                log.exception('handler failed')
-                report = HandlerReport()
-                report.aggregation_key = type_id
-                report.set_failed(LastExceptionDetails())
-                report.update(dispatch_report)
-        mgr = RebootManager(conduit, self, options)
-        reboot_report = mgr.reboot(dispatch_report.num_changes)
-        reboot_report.update(dispatch_report)
-        return dispatch_report
+        return self.__content('update', conduit, units, options)
 
     def uninstall(self, conduit, units, options):
         """
@@ -132,24 +112,106 @@ class Dispatcher:
         @return: A dispatch report.
         @rtype: L{DispatchReport}
         """
+        return self.__content('uninstall', conduit, units, options)
+
+    def __content(self, NAME, conduit, units, options):
+        """
+        Dispatch a content operation to the handlers, coalesced with
+        other compatible pending requests when enabled.
+        @param NAME: The name of the handler method.
+        @type NAME: str
+        @param conduit: A handler conduit.
+        @type conduit: L{pulp.agent.lib.conduit.Conduit}
+        @param units: A list of content units.
+        @type units: list
+        @param options: Unit operation options.
+        @type options: dict
+        @return: A dispatch report for the specified units.
+        @rtype: L{DispatchReport}
+        """
+        if self.coalescer is None:
+            reports, reboot_report, batched = \
+                self.__dispatch(NAME, conduit, units, options)
+        else:
+            reports, reboot_report, batched = \
+                self.coalescer.dispatch(self.__dispatch, NAME, conduit, units, options)
+        dispatch_report = DispatchReport()
+        for type_id, unit_keys in Units(units).items():
+            report = reports[type_id]
+            if len(batched[type_id]) > len(unit_keys):
+                # coalesced with the units of other requests
+                report = self.__caller_report(report, unit_keys, batched[type_id])
+            report.update(dispatch_report)
+        if dispatch_report.num_changes > 0:
+            reboot_report.update(dispatch_report)
+        return dispatch_report
+
+    def __caller_report(self, report, unit_keys, batched):
+        """
+        Get the part of a handler report for a coalesced batch that
+        concerns one of the requests.  Entries of the details that list
+        units and belong to the units of the other requests in the batch
+        are removed, and the number of changes is reduced by the number
+        of entries removed.  Entries that can't be attributed to any
+        request, such as dependencies the handler resolved, are kept in
+        the report of every request.
+        @param report: A handler report for the batch.
+        @type report: L{HandlerReport}
+        @param unit_keys: The unit keys of the request.
+        @type unit_keys: list
+        @param batched: The unit keys of all requests in the batch.
+        @type batched: list
+        @return: The handler report for the request.
+        @rtype: L{HandlerReport}
+        """
+        if not report.succeeded:
+            return report
+        other_keys = list(batched)
+        for unit_key in unit_keys:
+            if unit_key in other_keys:
+                other_keys.remove(unit_key)
+        details, removed = unit_details(report.details, unit_keys, other_keys)
+        caller_report = copy(report)
+        caller_report.details = details
+        caller_report.num_changes = max(report.num_changes - removed, 0)
+        return caller_report
+
+    def __dispatch(self, NAME, conduit, units, options):
+        """
+        Dispatch a content operation to the handlers.
+        A reboot is requested (when specified in the options) if the
+        handlers made changes.
+        @param NAME: The name of the handler method.
+        @type NAME: str
+        @param conduit: A handler conduit.
+        @type conduit: L{pulp.agent.lib.conduit.Conduit}
+        @param units: A list of content units.
+        @type units: list
+        @param options: Unit operation options.
+        @type options: dict
+        @return: The handler reports keyed by type_id, the reboot report
+            and the dispatched units collated by type_id.
+        @rtype: tuple
+        """
+        reports = {}
         dispatch_report = DispatchReport()
         collated = Units(units)
         for type_id, units in collated.items():
             try:
                 handler = self.__handler(type_id, CONTENT)
-                report = handler.uninstall(conduit, units, dict(options))
+                method = getattr(handler, NAME)
+                report = method(conduit, units, dict(options))
                 report.aggregation_key = type_id
-                report.update(dispatch_report)
             except Exception:
                 log.exception('handler failed')
                 report = HandlerReport()
                 report.aggregation_key = type_id
                 report.set_failed(LastExceptionDetails())
-                report.update(dispatch_report)
+            report.update(dispatch_report)
+            reports[type_id] = report
         mgr = RebootManager(conduit, self, options)
         reboot_report = mgr.reboot(dispatch_report.num_changes)
-        reboot_report.update(dispatch_report)
-        return dispatch_report
+        return reports, reboot_report, collated
 
     def profile(self, conduit):
         """
@@ -347,6 +409,52 @@ class Dispatcher:
             return handler
 
 
+def unit_details(details, unit_keys, other_keys):
+    """
+    Remove the entries for the units of other requests from handler
+    report details.  Lists of dicts found in the details are taken to be
+    lists of units.  A dict is removed when it contains all of the fields
+    of one of the other unit keys and none of the specified unit keys.
+    Other values are kept as they are.
+    @param details: Handler report details.
+    @type details: object
+    @param unit_keys: The unit keys of the request.
+    @type unit_keys: list
+    @param other_keys: The unit keys of the other requests.
+    @type other_keys: list
+    @return: The reduced details and the number of entries removed.
+    @rtype: tuple
+    """
+    if isinstance(details, dict):
+        reduced = {}
+        removed = 0
+        for key, value in details.items():
+            reduced[key], n = unit_details(value, unit_keys, other_keys)
+            removed += n
+        return reduced, removed
+    if isinstance(details, (list, tuple)) and details and isinstance(details[0], dict):
+        reduced = []
+        for entry in details:
+            if _matches(entry, other_keys) and not _matches(entry, unit_keys):
+                continue
+            reduced.append(entry)
+        return reduced, len(details) - len(reduced)
+    return details, 0
+
+
+def _matches(entry, unit_keys):
+    """
+    @return: True if the dict contains all of the fields of one of the unit keys.
+    @rtype: bool
+    """
+    for unit_key in unit_keys:
+        if not unit_key or not isinstance(entry, dict):
+            continue
+        if not [k for k, v in unit_key.items() if entry.get(k) != v]:
+            return True
+    return False
+
+
 class RebootManager:
     """
     Reboot Manager
@@ -388,6 +496,142 @@ class RebootManager:
         return report
 
 
+class Coalescer:
+    """
+    Coalesces content requests for the same operation and options that
+    arrive within a short window so that each handler is called once with
+    all of the units.  The first request of a batch waits for the window
+    to pass and dispatches the batch, the others wait for its result.
+    The handlers are passed a L{BatchConduit} that reports progress to
+    the conduits of all of the requests.
+    @ivar window: The number of seconds a batch is held open.
+    @type window: float
+    """
+
+    def __init__(self, window):
+        """
+        @param window: The number of seconds a batch is held open.
+        @type window: float
+        """
+        self.window = window
+        self.__lock = Lock()
+        self.__pending = {}
+
+    def dispatch(self, fn, NAME, conduit, units, options):
+        """
+        Add the units to the open batch for the operation and options
+        and wait for the batch to be dispatched.
+        @param fn: The function that dispatches a batch.
+            Called as: fn(NAME, conduit, units, options)
+        @type fn: callable
+        @param NAME: The name of the handler method.
+        @type NAME: str
+        @param conduit: A handler conduit.
+        @type conduit: L{pulp.agent.lib.conduit.Conduit}
+        @param units: A list of content units.
+        @type units: list
+        @param options: Unit operation options.
+        @type options: dict
+        @return: The value returned by fn for the batch.
+        """
+        key = (NAME, self.__key(options))
+        self.__lock.acquire()
+        try:
+            batch = self.__pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = Batch()
+                self.__pending[key] = batch
+            batch.units.extend(units)
+            batch.conduits.append(conduit)
+        finally:
+            self.__lock.release()
+        if not leader:
+            batch.done.wait()
+            if batch.exception is not None:
+                raise batch.exception
+            return batch.result
+        sleep(self.window)
+        self.__lock.acquire()
+        try:
+            del self.__pending[key]
+        finally:
+            self.__lock.release()
+        try:
+            try:
+                if len(batch.conduits) > 1:
+                    conduit = BatchConduit(batch.conduits)
+                batch.result = fn(NAME, conduit, batch.units, options)
+                return batch.result
+            except Exception, e:
+                batch.exception = e
+                raise
+        finally:
+            batch.done.set()
+
+    def __key(self, options):
+        """
+        Get a key for the options used to match compatible requests.
+        @param options: Unit operation options.
+        @type options: dict
+        @return: The key.
+        @rtype: str
+        """
+        try:
+            return json.dumps(options, sort_keys=True)
+        except (TypeError, ValueError):
+            return repr(options)
+
+
+class Batch:
+    """
+    Content requests coalesced by the L{Coalescer}.
+    @ivar units: The units of all requests.
+    @type units: list
+    @ivar conduits: The conduits of all requests.
+    @type conduits: list
+    @ivar done: Set once the batch has been dispatched.
+    @type done: L{Event}
+    @ivar result: The result of dispatching the batch.
+    @ivar exception: The exception raised dispatching the batch.
+    @type exception: Exception
+    """
+
+    def __init__(self):
+        self.units = []
+        self.conduits = []
+        self.done = Event()
+        self.result = None
+        self.exception = None
+
+
+class BatchConduit(Conduit):
+    """
+    The conduit passed to the handlers for a coalesced batch.
+    Progress is reported to the conduits of all of the requests in the
+    batch; everything else is delegated to the conduit of the first.
+    @ivar conduits: The conduits of the requests.
+    @type conduits: list
+    """
+
+    def __init__(self, conduits):
+        """
+        @param conduits: The conduits of the requests.
+        @type conduits: list
+        """
+        self.conduits = conduits
+
+    def get_consumer_config(self):
+        return self.conduits[0].get_consumer_config()
+
+    def update_progress(self, report):
+        for conduit in self.conduits:
+            conduit.update_progress(report)
+
+    def __getattr__(self, name):
+        return getattr(self.conduits[0], name)
+
+
 class Units(dict):
     """
     Collated content units
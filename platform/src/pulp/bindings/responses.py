@@ -79,6 +79,7 @@ class Task(object):
         "result": None,
         "progress": {},
         "response": None,
+        "revision": 0,
     }
     """
 
@@ -107,10 +108,15 @@ class Task(object):
 
         # Related to the callable being executed
         self.state = response_body['state']
-        self.progress = response_body['progress']
-        self.result = response_body['result']
         self.exception = response_body['exception']
-        self.traceback = response_body['traceback']
+
+        # Not included in the slim reports returned by a task search
+        self.progress = response_body.get('progress', None)
+        self.result = response_body.get('result', None)
+        self.traceback = response_body.get('traceback', None)
+
+        # Changes with every state or progress change; not provided by older servers
+        self.revision = response_body.get('revision', None)
 
     def is_rejected(self):
         """
@@ -15,6 +15,7 @@ import base64
 import locale
 import logging
 import urllib
+import zlib
 from types import NoneType
 
 from M2Crypto import SSL, httpslib
@@ -28,6 +29,9 @@ import pulp.bindings.exceptions as exceptions
 from pulp.bindings.responses import Response, Task
 from pulp.common.util import ensure_utf_8
 
+# zlib window bits selecting the gzip container rather than the zlib one
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
 # -- server connection --------------------------------------------------------
 
 class PulpConnection(object):
@@ -38,16 +42,22 @@ class PulpConnection(object):
     parameter can be used to pass in another mechanism to make the actual
     call to the server. The likely use of this is a duck-typed mock object
     for unit testing purposes.
+
+    Responses are requested gzip compressed. Request bodies of at least
+    request_compression_threshold bytes are gzip compressed; by default they
+    never are, as older servers don't accept them.
     """
 
     def __init__(self, host, port=443, path_prefix='/pulp/api', timeout=120,
                  logger=None, api_responses_logger=None,
-                 username=None, password=None, cert_filename=None, server_wrapper=None):
+                 username=None, password=None, cert_filename=None, server_wrapper=None,
+                 request_compression_threshold=None):
 
         self.host = host
         self.port = port
         self.path_prefix = path_prefix
         self.timeout = timeout
+        self.request_compression_threshold = request_compression_threshold
 
         self.log = logger or logging.getLogger(__name__)
         self.api_responses_logger = api_responses_logger
@@ -66,6 +76,7 @@ class PulpConnection(object):
 
         # Headers
         self.headers = {'Accept': 'application/json',
+                        'Accept-Encoding': 'gzip',
                         'Accept-Language': default_locale,
                         'Content-Type': 'application/json'}
 
@@ -249,6 +260,11 @@ class HTTPSServerWrapper(object):
             ssl_context.set_session_timeout(self.pulp_connection.timeout)
             ssl_context.load_cert(self.pulp_connection.cert_filename)
 
+        threshold = self.pulp_connection.request_compression_threshold
+        if threshold is not None and isinstance(body, str) and len(body) >= threshold:
+            body = compress(body)
+            headers['Content-Encoding'] = 'gzip'
+
         # Can't pass in None, so need to decide between two signatures (also lame)
         if ssl_context is not None:
             connection = httpslib.HTTPSConnection(self.pulp_connection.host, self.pulp_connection.port, ssl_context=ssl_context)
@@ -269,9 +285,24 @@ class HTTPSServerWrapper(object):
 
         # Attempt to deserialize the body (should pass unless the server is busted)
         response_body = response.read()
+        if (response.getheader('content-encoding') or '').lower() in ('gzip', 'x-gzip'):
+            response_body = zlib.decompress(response_body, GZIP_WBITS)
 
         try:
             response_body = json.loads(response_body)
         except:
             pass
         return response.status, response_body
+
+
+def compress(data):
+    """
+    Gzip compress a request body.
+
+    :param data: request body
+    :type  data: str
+    :return: gzip compressed body
+    :rtype:  str
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
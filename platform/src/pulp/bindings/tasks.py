@@ -34,17 +34,33 @@ class TasksAPI(PulpAPI):
         response = self.server.DELETE(path)
         return response
 
-    def get_task(self, task_id):
+    def get_task(self, task_id, wait=None, revision=None):
         """
         Retrieves the status of the given task if it exists.
 
+        If both wait and revision are specified, the server will hold the
+        request until the task's state or progress changes from the given
+        revision, the task completes, or the wait expires, whichever is first.
+        This should be used in place of repeatedly polling the task.
+
+        @param wait: maximum number of seconds the server should wait for the
+               task to change; the server may impose a lower limit
+        @type  wait: float or None
+
+        @param revision: revision of the task last retrieved by the caller;
+               see Task.revision
+        @type  revision: int or None
+
         @return: response with a Task object in the response_body
         @rtype:  Response
 
         @raise NotFoundException: if there is no task with the given ID
         """
         path = '/v2/tasks/%s/' % task_id
-        response = self.server.GET(path)
+        queries = ()
+        if wait is not None and revision is not None:
+            queries = (('wait', wait), ('revision', revision))
+        response = self.server.GET(path, queries=queries)
 
         # Since it was a 200, the connection parsed the response body into a
         # Document. We know this will be task data, so convert the object here.
@@ -77,6 +93,58 @@ class TasksAPI(PulpAPI):
         response.response_body = tasks
         return response
 
+    def search_tasks(self, task_ids=None, task_group_ids=None, tags=None, fields=None):
+        """
+        Retrieves the reports for many tasks in a single request. Each given
+        criterion narrows the search; tasks that are no longer queued on the
+        server are included when task_ids or task_group_ids are specified.
+
+        By default the server returns a slim report for each task that
+        excludes its progress, result and traceback.
+
+        @param task_ids: if specified, only tasks with one of these IDs are returned
+        @type  task_ids: list
+
+        @param task_group_ids: if specified, only tasks in one of these task
+               groups are returned
+        @type  task_group_ids: list
+
+        @param tags: if specified, only tasks that contain all of these tags
+               are returned
+        @type  tags: list
+
+        @param fields: if specified, the task report fields to return
+        @type  fields: list
+
+        @return: response with a list of task report dicts in the response_body
+        @rtype:  Response
+        """
+        path = '/v2/tasks/search/'
+        body = {}
+        for key, value in (('ids', task_ids), ('group_ids', task_group_ids),
+                           ('tags', tags), ('fields', fields)):
+            if value is not None:
+                body[key] = list(value)
+        return self.server.POST(path, body)
+
+    def get_tasks(self, task_ids):
+        """
+        Retrieves the status of all of the given tasks in a single request.
+        This should be used in place of calling get_task for each task. The
+        returned Task objects do not carry the progress, result or traceback
+        of the tasks; use get_task to retrieve those for a specific task.
+
+        @param task_ids: IDs of the tasks to retrieve
+        @type  task_ids: list
+
+        @return: response with a list of Task objects for the tasks that exist
+                 on the server; tasks that cannot be found are omitted
+        @rtype:  Response
+        """
+        response = self.search_tasks(task_ids=task_ids)
+        response.response_body = [Task(doc) for doc in response.response_body]
+        return response
+
     def get_repo_tasks(self, repo_id):
         """
         Retrieves all tasks for the given repository.
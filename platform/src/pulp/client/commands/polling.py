@@ -15,6 +15,8 @@
 Contains base classes for commands that poll the server for asynchronous tasks.
 """
 
+import sys
+import threading
 import time
 from gettext import gettext as _
 
@@ -35,6 +37,10 @@ DESC_BACKGROUND = _('if specified, the client process will end immediately (the
                     'continue to run on the server)')
 FLAG_BACKGROUND = PulpCliFlag('--bg', DESC_BACKGROUND)
 
+# Maximum number of seconds the server is asked to hold each poll waiting for
+# the task to change; the display is still refreshed at the poll frequency
+SERVER_WAIT_IN_SECONDS = 30
+
 
 class PollingCommand(PulpCliCommand):
     """
@@ -59,7 +65,8 @@ class PollingCommand(PulpCliCommand):
         :type  method: function
         :param context: client context
         :type  context: pulp.client.extensions.core.ClientContext
-        :param poll_frequency_in_seconds: time between polling calls to the server
+        :param poll_frequency_in_seconds: time between refreshes of the displayed task state,
+               which is also the minimum time between polling calls to the server
         :type  poll_frequency_in_seconds: float
         """
         PulpCliCommand.__init__(self, name, description, method)
@@ -178,21 +185,13 @@ class PollingCommand(PulpCliCommand):
         first_run = True
         while not task.is_completed():
 
-            # Postponed is a more specific version of waiting and must be checked first.
-            if task.is_postponed():
-                self.postponed(task, delayed_spinner)
-            elif task.is_waiting():
-                self.waiting(task, delayed_spinner)
-            else:
-                if first_run:
-                    self.prompt.render_spacer(1)
-                    first_run = False
-                self.progress(task, running_spinner)
-
-            time.sleep(self.poll_frequency_in_seconds)
+            if first_run and not task.is_waiting():
+                self.prompt.render_spacer(1)
+                first_run = False
+            self._render_state(task, delayed_spinner, running_spinner)
 
-            response = self.context.server.tasks.get_task(task.task_id)
-            task = response.response_body
+            refresh = lambda: self._render_state(task, delayed_spinner, running_spinner)
+            task = self._wait_for_change(task, refresh)
 
         # One final call to update the progress with the end state. It's possible the run state
         # was never hit in the loop above, so we check for first_run again for the missing blank space.
@@ -203,6 +202,77 @@ class PollingCommand(PulpCliCommand):
 
         return task
 
+    def _render_state(self, task, delayed_spinner, running_spinner):
+        """
+        Displays the current state of a task that has not completed.
+
+        :param task: full task report for the task being displayed
+        :type  task: pulp.bindings.responses.Task
+        :param delayed_spinner: spinner displayed while the task waits to begin
+        :type  delayed_spinner: okaara.progress.Spinner
+        :param running_spinner: spinner displayed while the task runs
+        :type  running_spinner: okaara.progress.Spinner
+        """
+        # Postponed is a more specific version of waiting and must be checked first.
+        if task.is_postponed():
+            self.postponed(task, delayed_spinner)
+        elif task.is_waiting():
+            self.waiting(task, delayed_spinner)
+        else:
+            self.progress(task, running_spinner)
+
+    def _wait_for_change(self, task, refresh=None):
+        """
+        Retrieves the next report for the given task. The server is asked to
+        hold the request for up to SERVER_WAIT_IN_SECONDS until the task
+        changes, so changes are displayed as soon as they happen. While the
+        request is held, refresh is called at the poll frequency to keep the
+        display moving. Requests are never made more often than the poll
+        frequency; servers that don't support waiting respond immediately, in
+        which case this behaves as a regular poll.
+
+        :param task: last retrieved report for the task
+        :type  task: pulp.bindings.responses.Task
+        :param refresh: called with no arguments to redisplay the task state
+        :type  refresh: callable
+
+        :return: the new task report
+        :rtype:  pulp.bindings.responses.Task
+        """
+        start = time.time()
+        result = {}
+
+        def get_task():
+            try:
+                response = self.context.server.tasks.get_task(task.task_id, wait=SERVER_WAIT_IN_SECONDS,
+                                                              revision=task.revision)
+                result['task'] = response.response_body
+            except Exception:
+                result['exc_info'] = sys.exc_info()
+
+        # the request is made in the background so the display can be
+        # refreshed, and so the user can abort, while the server holds it
+        request = threading.Thread(target=get_task)
+        request.setDaemon(True)
+        request.start()
+        while True:
+            request.join(self.poll_frequency_in_seconds or None)
+            if not request.isAlive():
+                break
+            if refresh is not None:
+                refresh()
+
+        if 'exc_info' in result:
+            exc_info = result['exc_info']
+            raise exc_info[0], exc_info[1], exc_info[2]
+        task = result['task']
+
+        remaining = self.poll_frequency_in_seconds - (time.time() - start)
+        if remaining > 0 and not task.is_completed():
+            time.sleep(remaining)
+
+        return task
+
     # -- polling rendering ----------------------------------------------------------------------------------
 
     def task_header(self, task):
@@ -15,6 +15,11 @@
 Functionality related to loading extensions from a set location. The client
 context is constructed ahead of time and provided to this module, which
 then uses it to instantiate the extension components.
+
+Loading every extension can dominate the run time of a short CLI invocation.
+When given an index file, a full load records the top-level sections each
+extension adds or modifies; load_section_extensions then uses the index to
+only initialize the extensions involved in a single section.
 """
 
 import copy
@@ -25,6 +30,8 @@ import sys
 
 import pkg_resources
 
+from pulp.common.compat import json
+
 _LOG = logging.getLogger(__name__)
 
 # -- constants ----------------------------------------------------------------
@@ -81,7 +88,7 @@ class InvalidExtensionConfig(ExtensionLoaderException): pass
 
 # -- loading ------------------------------------------------------------------
 
-def load_extensions(extensions_dir, context, role):
+def load_extensions(extensions_dir, context, role, index_filename=None):
     """
     @param extensions_dir: directory in which to find extension packs
     @type  extensions_dir: str
@@ -99,6 +106,83 @@ def load_extensions(extensions_dir, context, role):
     @param role:    name of a role, either "admin" or "consumer", so we know
                     which extensions to load
     @type  role:    str
+
+    @param index_filename: if specified, the sections touched by each extension
+                    are recorded in this file for use by load_section_extensions
+    @type  index_filename: str or None
+    """
+
+    sorted_extensions = _sorted_extensions(extensions_dir, role)
+
+    record_sections = index_filename is not None and context.cli is not None
+    sections = {} # key: top-level section name, value: list of extension names
+
+    def _load(name, load_func):
+        if record_sections:
+            before = _section_signatures(context.cli)
+        load_func()
+        if record_sections:
+            after = _section_signatures(context.cli)
+            for section_name, signature in after.items():
+                if before.get(section_name) != signature:
+                    sections.setdefault(section_name, []).append(name)
+
+    error_packs = _load_sorted(extensions_dir, sorted_extensions, context, _load)
+
+    if len(error_packs) > 0:
+        raise LoadFailed(error_packs)
+
+    if record_sections:
+        _write_index(index_filename, _fingerprint(extensions_dir, sorted_extensions), sections)
+
+def load_section_extensions(extensions_dir, context, role, section_name, index_filename):
+    """
+    Loads only the extensions that added or modified the given top-level
+    section the last time all extensions were loaded, as recorded in the index
+    file. If the index is missing, out of date or doesn't know the section,
+    all extensions are loaded and the index is rewritten.
+
+    @param section_name: name of the top-level section being invoked
+    @type  section_name: str
+
+    @param index_filename: file in which the sections touched by each extension
+                    are recorded
+    @type  index_filename: str
+
+    @return: True if only the extensions for the section were loaded; False
+             if all extensions were loaded
+    @rtype:  bool
+    """
+
+    sorted_extensions = _sorted_extensions(extensions_dir, role)
+
+    index = _read_index(index_filename)
+    fingerprint = _fingerprint(extensions_dir, sorted_extensions)
+    if index is None or index.get('fingerprint') != fingerprint or \
+            section_name not in index.get('sections', {}):
+        load_extensions(extensions_dir, context, role, index_filename=index_filename)
+        return False
+
+    section_extensions = set(index['sections'][section_name])
+
+    def _load(name, load_func):
+        if name in section_extensions:
+            load_func()
+
+    error_packs = _load_sorted(extensions_dir, sorted_extensions, context, _load)
+
+    if len(error_packs) > 0:
+        raise LoadFailed(error_packs)
+
+    return True
+
+def _sorted_extensions(extensions_dir, role):
+    """
+    Identifies the extension packs in the extensions directory and the entry
+    points for the role, sorted by priority.
+
+    @return: see load_extensions for a description of the structure
+    @rtype:  dict
     """
 
     # Validation
@@ -117,21 +201,31 @@ def load_extensions(extensions_dir, context, role):
         priority = getattr(extension, PRIORITY_VAR, DEFAULT_PRIORITY)
         sorted_extensions.setdefault(priority, {}).setdefault(_ENTRY_POINTS, []).append(extension)
 
+    return sorted_extensions
+
+def _load_sorted(extensions_dir, sorted_extensions, context, load):
+    """
+    Initializes the extensions in priority order, by passing the name of each
+    extension and a function initializing it to the given load function.
+
+    @return: names of the extension packs that failed to load
+    @rtype:  list
+    """
+
     error_packs = []
     for priority in sorted(sorted_extensions.keys()):
         for module in sorted_extensions[priority].get(_MODULES, []):
             try:
-                _load_pack(extensions_dir, module, context)
+                load(module.__name__, lambda: _load_pack(extensions_dir, module, context))
             except ExtensionLoaderException, e:
                 # Do a best-effort attempt to load all extensions. If any fail,
                 # the cause will be logged by _load_pack. This method should
                 # continue to load extensions so all of the errors are logged.
                 error_packs.append(module.__name__)
         for entry_point in sorted_extensions[priority].get(_ENTRY_POINTS, []):
-            entry_point.load()(context)
+            load(str(entry_point), lambda: entry_point.load()(context))
 
-    if len(error_packs) > 0:
-        raise LoadFailed(error_packs)
+    return error_packs
 
 def _load_pack_modules(extensions_dir):
     """
@@ -245,3 +339,74 @@ def _load_pack(extensions_dir, pack_module, context):
     except Exception, e:
         _LOG.exception(_('Module [%(m)s] could not be initialized' % {'m' : init_mod_name}))
         raise InitError(), None, sys.exc_info()[2]
+
+# -- section index ------------------------------------------------------------
+
+def _section_signatures(cli):
+    """
+    @return: dict of top-level section name to a value that changes when the
+             commands or subsections within the section change
+    @rtype:  dict
+    """
+
+    def _signature(section):
+        commands = sorted((n, id(c)) for n, c in section.commands.items())
+        subsections = sorted((n, id(s), _signature(s)) for n, s in section.subsections.items())
+        return commands, subsections
+
+    return dict((n, _signature(s)) for n, s in cli.root_section.subsections.items())
+
+def _fingerprint(extensions_dir, sorted_extensions):
+    """
+    Describes the installed extensions, such that the description changes when
+    an extension is added, removed, upgraded or its files are modified.
+
+    @rtype: list
+    """
+
+    fingerprint = []
+    for priority in sorted(sorted_extensions.keys()):
+        for module in sorted_extensions[priority].get(_MODULES, []):
+            pack_dir = os.path.join(extensions_dir, module.__name__)
+            modified = 0
+            if os.path.isdir(pack_dir):
+                for filename in os.listdir(pack_dir):
+                    # compiled modules are written as a side effect of loading
+                    if not filename.endswith('.py'):
+                        continue
+                    modified = max(modified, os.path.getmtime(os.path.join(pack_dir, filename)))
+            fingerprint.append([module.__name__, modified])
+        for entry_point in sorted_extensions[priority].get(_ENTRY_POINTS, []):
+            fingerprint.append([str(entry_point), str(entry_point.dist)])
+    return fingerprint
+
+def _read_index(index_filename):
+    """
+    @return: the contents of the index file or None if it cannot be read
+    @rtype:  dict or None
+    """
+
+    try:
+        f = open(index_filename, 'r')
+        try:
+            return json.load(f)
+        finally:
+            f.close()
+    except (IOError, ValueError):
+        _LOG.debug(_('Extension index [%(f)s] could not be read' % {'f' : index_filename}))
+        return None
+
+def _write_index(index_filename, fingerprint, sections):
+
+    # The index is only an optimization, so failing to write it is not fatal
+    try:
+        dirname = os.path.dirname(index_filename)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        f = open(index_filename, 'w')
+        try:
+            json.dump({'fingerprint' : fingerprint, 'sections' : sections}, f)
+        finally:
+            f.close()
+    except (IOError, OSError):
+        _LOG.exception(_('Extension index [%(f)s] could not be written' % {'f' : index_filename}))
@@ -95,8 +95,19 @@ def main(config_filenames, exception_handler_class=ExceptionHandler):
     extensions_dir = os.path.expanduser(extensions_dir)
 
     role = config['client']['role']
+
+    # If an index of the sections contributed by each extension is configured,
+    # only the extensions involved in the invoked section are loaded. Anything
+    # that renders more than one section needs all of them.
+    index_filename = None
+    if config.has_option('filesystem', 'extensions_index'):
+        index_filename = os.path.expanduser(config['filesystem']['extensions_index'])
+
     try:
-        extensions_loader.load_extensions(extensions_dir, context, role)
+        if index_filename is not None and not options.print_map and _is_section_invocation(args):
+            extensions_loader.load_section_extensions(extensions_dir, context, role, args[0], index_filename)
+        else:
+            extensions_loader.load_extensions(extensions_dir, context, role, index_filename=index_filename)
     except extensions_loader.LoadFailed, e:
         prompt.write(_('The following extensions failed to load: %(f)s' % {'f' : ', '.join(e.failed_packs)}))
         prompt.write(_('More information on the failures can be found in %(l)s' % {'l' : config['logging']['filename']}))
@@ -110,6 +121,14 @@ def main(config_filenames, exception_handler_class=ExceptionHandler):
         code = cli.run(args)
         return code
 
+def _is_section_invocation(args):
+    """
+    @return: True if the arguments invoke something within a single top-level
+             section, as opposed to the root of the CLI or its help
+    @rtype:  bool
+    """
+    return len(args) > 0 and not args[0].startswith('-')
+
 # -- configuration and logging ------------------------------------------------
 
 def _load_configuration(filenames):
@@ -189,8 +208,13 @@ def _create_bindings(config, logger, username, password):
         call_log.addHandler(handler)
         call_log.setLevel(logging.INFO)
 
+    compression_threshold = None
+    if config.has_option('server', 'request_compression_threshold'):
+        compression_threshold = int(config['server']['request_compression_threshold'])
+
     # Create the connection and bindings
-    conn = PulpConnection(hostname, port, username=username, password=password, cert_filename=cert_filename, logger=logger, api_responses_logger=call_log)
+    conn = PulpConnection(hostname, port, username=username, password=password, cert_filename=cert_filename, logger=logger, api_responses_logger=call_log,
+                          request_compression_threshold=compression_threshold)
     bindings = Bindings(conn)
 
     return bindings
@@ -319,6 +319,9 @@ class CurlDownloadProgressFunctor(object):
         self.progress_callback = progress_callback
 
     def __call__(self, download_t, download_d, upload_t, upload_d):
+        # curl calls this repeatedly while waiting for data; only report changes
+        if download_t == self.report.total_bytes and download_d == self.report.bytes_downloaded:
+            return
         self.report.total_bytes = download_t
         self.report.bytes_downloaded = download_d
         self.progress_callback(self.report)
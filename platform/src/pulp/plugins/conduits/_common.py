@@ -13,6 +13,14 @@
 
 from pulp.plugins.model import AssociatedUnit, Unit
 
+# Fields of a unit's database document that are not part of its metadata,
+# in addition to its unit key
+_UNIT_RESERVED_FIELDS = frozenset(('_id', '_storage_path'))
+_ASSOCIATED_UNIT_RESERVED_FIELDS = frozenset(('_storage_path',))
+
+# Cache of the sets of excluded fields, so units of the same type share one
+_EXCLUDED_FIELDS = {}
+
 def to_pulp_unit(plugin_unit):
     """
     Uses the values in the plugin's unit object to create the unit metadata
@@ -45,20 +53,19 @@ def to_plugin_unit(pulp_unit, type_def):
     @rtype:  pulp.plugins.model.Unit
     """
 
-    # Copy so we don't mangle the original unit
-    pulp_unit = dict(pulp_unit)
-
     key_list = type_def['unit_key']
 
     unit_key = {}
 
     for k in key_list:
-        unit_key[k] = pulp_unit.pop(k)
+        unit_key[k] = pulp_unit[k]
 
-    storage_path = pulp_unit.pop('_storage_path', None)
-    unit_id = pulp_unit.pop('_id', None)
+    storage_path = pulp_unit.get('_storage_path', None)
+    unit_id = pulp_unit.get('_id', None)
 
-    u = Unit(type_def['id'], unit_key, pulp_unit, storage_path)
+    # The metadata is only copied out of the document if it's accessed
+    u = Unit(type_def['id'], unit_key, None, storage_path)
+    u.defer_metadata(pulp_unit, _excluded_fields(key_list, _UNIT_RESERVED_FIELDS))
     u.id = unit_id
 
     return u
@@ -79,27 +86,45 @@ def to_plugin_associated_unit(pulp_unit, type_def):
     @rtype:  pulp.plugins.model.AssociatedUnit
     """
 
-    # Copy so we don't mangle the original unit
-    # pymongo on RHEL6 doesn't seem to like deepcopy, so do this instead
-    pulp_unit = dict(pulp_unit)
-    pulp_unit['metadata'] = dict(pulp_unit['metadata'])
+    metadata = pulp_unit['metadata']
 
     key_list = type_def['unit_key']
 
     unit_key = {}
 
     for k in key_list:
-        unit_key[k] = pulp_unit['metadata'].pop(k)
+        unit_key[k] = metadata[k]
 
-    storage_path = pulp_unit['metadata'].pop('_storage_path', None)
-    unit_id = pulp_unit.pop('unit_id', None)
-    created = pulp_unit.pop('created', None)
-    updated = pulp_unit.pop('updated', None)
-    owner_type = pulp_unit.pop('owner_type', None)
-    owner_id = pulp_unit.pop('owner_id', None)
+    storage_path = metadata.get('_storage_path', None)
+    unit_id = pulp_unit.get('unit_id', None)
+    created = pulp_unit.get('created', None)
+    updated = pulp_unit.get('updated', None)
+    owner_type = pulp_unit.get('owner_type', None)
+    owner_id = pulp_unit.get('owner_id', None)
 
-    u = AssociatedUnit(type_def['id'], unit_key, pulp_unit['metadata'], storage_path,
+    # The metadata is only copied out of the document if it's accessed
+    u = AssociatedUnit(type_def['id'], unit_key, None, storage_path,
                        created, updated, owner_type, owner_id)
+    u.defer_metadata(metadata, _excluded_fields(key_list, _ASSOCIATED_UNIT_RESERVED_FIELDS))
     u.id = unit_id
 
     return u
+
+
+def _excluded_fields(key_list, reserved_fields):
+    """
+    Returns the fields of a unit document that are not part of its metadata.
+
+    @param key_list: fields in the unit's key
+    @type  key_list: list
+
+    @param reserved_fields: other fields that aren't metadata
+    @type  reserved_fields: frozenset
+
+    @rtype: frozenset
+    """
+    cache_key = (tuple(key_list), reserved_fields)
+    excluded = _EXCLUDED_FIELDS.get(cache_key)
+    if excluded is None:
+        excluded = _EXCLUDED_FIELDS[cache_key] = frozenset(key_list) | reserved_fields
+    return excluded
@@ -466,7 +466,7 @@ class AddUnitMixin(object):
             try:
                 existing_unit = content_query_manager.get_content_unit_by_keys_dict(unit.type_id, unit.unit_key)
                 unit.id = existing_unit['_id']
-                content_manager.update_content_unit(unit.type_id, unit.id, pulp_unit)
+                content_manager.update_content_unit(unit.type_id, unit.id, pulp_unit, existing_unit)
                 self._updated_count += 1
             except MissingResource:
                 unit.id = content_manager.add_content_unit(unit.type_id, None, pulp_unit)
@@ -15,6 +15,7 @@
 Profiler conduits.
 """
 
+from pulp.server.db.model.criteria import Criteria, UnitAssociationCriteria
 from pulp.server.managers import factory as managers
 from pulp.plugins.conduits.mixins import MultipleRepoUnitsMixin
 from pulp.plugins.conduits.mixins import ProfilerConduitException
@@ -23,6 +24,10 @@ class ProfilerConduit(MultipleRepoUnitsMixin):
 
     def __init__(self):
         MultipleRepoUnitsMixin.__init__(self, ProfilerConduitException)
+        # consumer ID -> list of bound repository IDs
+        self.__bindings = {}
+        # (frozenset of repository IDs, unit type ID) -> list of units
+        self.__repo_set_units = {}
 
     def get_bindings(self, consumer_id):
         """
@@ -34,6 +39,54 @@ class ProfilerConduit(MultipleRepoUnitsMixin):
         @return: A list of bound repository IDs.
         @rtype: list
         """
+        if consumer_id in self.__bindings:
+            return list(self.__bindings[consumer_id])
         manager = managers.consumer_bind_manager()
         bindings = manager.find_by_consumer(consumer_id)
         return [b['repo_id'] for b in bindings]
+
+    def prefetch_bindings(self, consumer_ids):
+        """
+        Retrieve the bindings of the given consumers in a single query. They
+        are returned by get_bindings for the lifetime of the conduit.
+
+        @param consumer_ids: A list of consumer IDs.
+        @type consumer_ids: list
+        """
+        for consumer_id in consumer_ids:
+            self.__bindings[consumer_id] = []
+        manager = managers.consumer_bind_manager()
+        criteria = Criteria(filters={'consumer_id' : {'$in' : list(consumer_ids)}, 'deleted' : False},
+                            fields=['consumer_id', 'repo_id'])
+        for binding in manager.find_by_criteria(criteria):
+            self.__bindings[binding['consumer_id']].append(binding['repo_id'])
+
+    def get_repo_set_units(self, repo_ids, unit_type_id):
+        """
+        Get the units of the given type associated with any of the given
+        repositories, each unit listed once. The units are retrieved once per
+        set of repositories and type for the lifetime of the conduit, so
+        profilers evaluating many consumers bound to the same repositories
+        share them.
+
+        @param repo_ids: A list of repository IDs.
+        @type repo_ids: list
+
+        @param unit_type_id: The content type ID.
+        @type unit_type_id: str
+
+        @return: list of unit instances
+        @rtype:  list of L{AssociatedUnit}
+        """
+        key = (frozenset(repo_ids), unit_type_id)
+        if key not in self.__repo_set_units:
+            criteria = UnitAssociationCriteria(type_ids=[unit_type_id])
+            units = []
+            unit_ids = set()
+            for repo_id in sorted(key[0]):
+                for unit in self.get_units(repo_id, criteria):
+                    if unit.id not in unit_ids:
+                        unit_ids.add(unit.id)
+                        units.append(unit)
+            self.__repo_set_units[key] = units
+        return self.__repo_set_units[key]
@@ -23,6 +23,7 @@ from pulp.plugins.conduits.mixins import (DistributorConduitException, RepoScrat
     RepoScratchpadReadMixin, DistributorScratchPadMixin,
     RepoGroupDistributorScratchPadMixin, StatusMixin,
     SingleRepoUnitsMixin, MultipleRepoUnitsMixin, PublishReportMixin)
+from pulp.plugins.model import UnitChange
 import pulp.server.managers.factory as manager_factory
 
 # -- constants ---------------------------------------------------------------
@@ -84,6 +85,51 @@ class RepoPublishConduit(RepoScratchPadMixin, DistributorScratchPadMixin, Status
             _LOG.exception('Error getting last publish time for repo [%s]' % self.repo_id)
             raise DistributorConduitException(e), None, sys.exc_info()[2]
 
+    def last_published_sequence(self):
+        """
+        Returns the sequence number of the last repository change included in
+        this distributor's last successful publish. This value is meant to be
+        passed to get_changes_since to publish incrementally. If the
+        distributor was never successfully published, this call returns None
+        and a full publish should be done.
+
+        @return: sequence number of the last published change
+        @rtype:  int or None
+        """
+        try:
+            distributor = manager_factory.repo_distributor_manager().get_distributor(self.repo_id, self.distributor_id)
+            return distributor.get('last_published_sequence', None)
+        except Exception, e:
+            _LOG.exception('Error getting last published sequence for repo [%s]' % self.repo_id)
+            raise DistributorConduitException(e), None, sys.exc_info()[2]
+
+    def get_changes_since(self, last_published_seq):
+        """
+        Returns the changes made to the units in the repository after the
+        given change, in the order they were made. A unit may appear in more
+        than one change; the last change for a unit describes its current
+        state in the repository. Changes made while a publish is running may
+        be returned again by the next publish.
+
+        Changes are only kept until every distributor on the repository has
+        published them, so the value passed in should come from
+        last_published_sequence.
+
+        @param last_published_seq: sequence number of the last change already
+               published by the distributor
+        @type  last_published_seq: int
+
+        @return: list of changes after the given one
+        @rtype:  list of L{UnitChange}
+        """
+        try:
+            journal_manager = manager_factory.repo_journal_manager()
+            changes = journal_manager.get_changes_since(self.repo_id, last_published_seq)
+            return [UnitChange(c['sequence'], c['action'], c['unit_type_id'], c['unit_id']) for c in changes]
+        except Exception, e:
+            _LOG.exception('Error getting changes for repo [%s]' % self.repo_id)
+            raise DistributorConduitException(e), None, sys.exc_info()[2]
+
 
 class RepoGroupPublishConduit(RepoGroupDistributorScratchPadMixin, StatusMixin,
                               MultipleRepoUnitsMixin, PublishReportMixin,
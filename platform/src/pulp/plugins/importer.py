@@ -234,6 +234,57 @@ class Importer(object):
         """
         raise NotImplementedError()
 
+    def supports_bulk_copy(self, config):
+        """
+        Indicates if a copy into a repository using this importer is a plain
+        association of the source units. If so, Pulp will copy the association
+        documents in bulk inside the database instead of calling import_units,
+        and will call units_copied afterwards with the IDs of the units that
+        were associated.
+
+        Importers that need to inspect or alter units during the copy (for
+        instance, to resolve dependencies or create new units) must leave
+        this as False, which is the default.
+
+        @param config: plugin configuration
+        @type  config: L{pulp.server.plugins.config.PluginCallConfiguration}
+
+        @return: True if the bulk copy may be used; False otherwise
+        @rtype:  bool
+        """
+        return False
+
+    def units_copied(self, source_repo, dest_repo, import_conduit, config, unit_ids_by_type):
+        """
+        Called after Pulp has performed a bulk copy into the given repository
+        (see supports_bulk_copy). The associations have already been made by
+        the time this is called; this is purely informational and the default
+        implementation does nothing.
+
+        Only the unit IDs are provided so that a large copy does not require
+        the unit metadata to be loaded. The conduit can be used to retrieve
+        the units themselves if they are needed.
+
+        @param source_repo: metadata describing the repository containing the
+               copied units
+        @type  source_repo: L{pulp.server.plugins.model.Repository}
+
+        @param dest_repo: metadata describing the repository the units were
+               copied into
+        @type  dest_repo: L{pulp.server.plugins.model.Repository}
+
+        @param import_conduit: provides access to relevant Pulp functionality
+        @type  import_conduit: L{pulp.server.conduits.unit_import.ImportUnitConduit}
+
+        @param config: plugin configuration
+        @type  config: L{pulp.server.plugins.config.PluginCallConfiguration}
+
+        @param unit_ids_by_type: mapping of unit type ID to the list of IDs of
+               units of that type newly associated with the destination repository
+        @type  unit_ids_by_type: dict
+        """
+        pass
+
     def remove_units(self, repo, units, config):
         """
         Removes content units from the given repository.
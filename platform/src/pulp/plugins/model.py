@@ -123,6 +123,11 @@ class Unit(object):
     may not exist in Pulp; this is meant simply as a way of linking together
     a number of pieces of data.
 
+    Units are created in large numbers during syncs and publishes, so they
+    use slots instead of a per-instance dictionary. When built from a
+    database document, the metadata is only copied out of the document the
+    first time it is accessed (see defer_metadata).
+
     @ivar id: Pulp internal ID that refers to this unit; if the unit does not
               yet exist in Pulp, this will be None
     @type id: str
@@ -140,14 +145,46 @@ class Unit(object):
     @type storage_path: str
     """
 
+    __slots__ = ('type_id', 'unit_key', 'storage_path', 'id', '_metadata', '_metadata_source')
+
     def __init__(self, type_id, unit_key, metadata, storage_path):
         self.type_id = type_id
         self.unit_key = unit_key
-        self.metadata = metadata
+        self._metadata = metadata
+        self._metadata_source = None
         self.storage_path = storage_path
 
         self.id = None
 
+    def _get_metadata(self):
+        if self._metadata_source is not None:
+            document, excluded_keys = self._metadata_source
+            self._metadata = dict((k, v) for k, v in document.items() if k not in excluded_keys)
+            self._metadata_source = None
+        return self._metadata
+
+    def _set_metadata(self, metadata):
+        self._metadata = metadata
+        self._metadata_source = None
+
+    metadata = property(_get_metadata, _set_metadata)
+
+    def defer_metadata(self, document, excluded_keys):
+        """
+        Sets the unit's metadata to the given document minus the excluded
+        keys. The metadata dictionary is not built until it is first accessed,
+        so units whose metadata is never read only reference the document.
+        The document must not be modified afterwards.
+
+        @param document: database document holding the unit's metadata
+        @type  document: dict
+
+        @param excluded_keys: keys in the document that are not metadata
+        @type  excluded_keys: set
+        """
+        self._metadata = None
+        self._metadata_source = (document, excluded_keys)
+
     def to_id_dict(self):
         """
         Returns a dict with the identity information (type ID and unit key) for this unit. The
@@ -161,6 +198,35 @@ class Unit(object):
             }
         return d
 
+    def to_dict(self):
+        """
+        Returns a dict with the type ID, unit key, metadata and storage path of
+        this unit. Units use slots and so have no __dict__; this is the means
+        to convert them into a JSON serializable format.
+        """
+
+        d = {
+            'type_id' : self.type_id,
+            'unit_key' : self.unit_key,
+            'metadata' : self.metadata,
+            'storage_path' : self.storage_path,
+            }
+        return d
+
+    def __getstate__(self):
+        # slots aren't pickled by the default (pre-2) pickle protocols
+        self._get_metadata()
+        state = dict(getattr(self, '__dict__', {}))
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __eq__(self, other):
         return self.unit_key == other.unit_key
 
@@ -176,6 +242,8 @@ class AssociatedUnit(Unit):
     Adds association metadata on top of normal unit data.
     """
 
+    __slots__ = ('created', 'updated', 'owner_type', 'owner_id')
+
     def __init__(self, type_id, unit_key, metadata, storage_path, created, updated,
                  owner_type, owner_id):
         Unit.__init__(self, type_id, unit_key, metadata, storage_path)
@@ -243,6 +311,40 @@ class PublishReport(object):
         self.summary = summary
         self.details = details
 
+class UnitChange(object):
+    """
+    Describes a change to the units in a repository, as recorded in the
+    repository's change journal. Changes are retrieved by distributors to
+    publish only what changed since their last publish.
+
+    @ivar sequence: position of the change in the repository's journal; later
+                    changes have higher sequence numbers
+    @type sequence: int
+
+    @ivar action: what happened to the unit; one of the ACTION_* constants
+                  in this class
+    @type action: str
+
+    @ivar type_id: identifies the type of the changed unit
+    @type type_id: str
+
+    @ivar unit_id: database ID of the changed unit
+    @type unit_id: str
+    """
+
+    ACTION_ASSOCIATED = 'associated'
+    ACTION_UNASSOCIATED = 'unassociated'
+    ACTION_UPDATED = 'updated'
+
+    def __init__(self, sequence, action, type_id, unit_id):
+        self.sequence = sequence
+        self.action = action
+        self.type_id = type_id
+        self.unit_id = unit_id
+
+    def __str__(self):
+        return 'Unit Change [%s] [%s] [%s] [%s]' % (self.sequence, self.action, self.type_id, self.unit_id)
+
 class Consumer:
     """
     A profiled consumer.
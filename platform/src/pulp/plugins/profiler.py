@@ -290,4 +290,47 @@ class Profiler(object):
         """
         message = 'Applicability for: %s, not supported' % unit_type_id
         raise InvalidUnitTypeForApplicability(unit_type_id, message)
+
+    def units_applicable_many(self, consumers, repo_ids_by_consumer, unit_type_id,
+                              unit_keys_by_consumer, config, conduit):
+        """
+        Determine the applicability of content units to a batch of consumers.
+        This is the batch form of units_applicable, called by the server in its
+        place so the profiler can share work across consumers. For instance,
+        the candidate units for a set of repositories can be retrieved once
+        through the conduit's get_repo_set_units and compared against the
+        profiles of all consumers bound to that set.
+
+        The default implementation calls units_applicable for each consumer.
+
+        :param consumers: The consumers.
+        :type consumers: list of pulp.plugins.model.Consumer
+
+        :param repo_ids_by_consumer: List of repo ids to check for unit
+                                     applicability, keyed by consumer id
+        :type repo_ids_by_consumer: dict
+
+        :param unit_type_id: Common type id of all the units
+        :type unit_type_id: str
+
+        :param unit_keys_by_consumer: list of unit keys to identify units, keyed
+                                      by consumer id; consumers bound to the same
+                                      repos share the same list
+        :type unit_keys_by_consumer: dict
+
+        :param config: plugin configuration
+        :type config: pulp.plugins.config.PluginCallConfiguration
+
+        :param conduit: provides access to relevant Pulp functionality
+        :type conduit: pulp.plugins.conduits.profiler.ProfilerConduit
+
+        :return: List of applicability reports keyed by consumer id.
+        :rtype: dict
+        """
+        reports = {}
+        for consumer in consumers:
+            reports[consumer.id] = self.units_applicable(
+                consumer, repo_ids_by_consumer[consumer.id], unit_type_id,
+                unit_keys_by_consumer[consumer.id], config, conduit)
+        return reports
             
@@ -13,6 +13,8 @@
 
 import ldap
 import logging
+import threading
+import time
 
 import ldap.modlist
 
@@ -22,15 +24,30 @@ from pulp.server.managers import factory
 
 log = logging.getLogger(__name__)
 
+# seconds a pooled connection may sit idle before it's checked for liveness
+# when it's next taken from the pool
+LIVENESS_CHECK_INTERVAL = 60
+
+# maximum number of user lookups held in a lookup cache
+LOOKUP_CACHE_SIZE = 10000
+
+# connection pool shared by the authentication requests, created on first use
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
 class LDAPConnection:
     def __init__(self, admin=None, password=None,
                  server='ldap://localhost:389',
-                 tls=False):
+                 tls=False, lookup_cache=None):
         self.ldapserver =  server
         self.ldapadmin  =  admin
         self.ldappassword = password
         self.ldaptls = tls
+        self.lookup_cache = lookup_cache
         self.lconn = None
+        self.bound = False
+        self.last_used = time.time()
         self.user_manager = factory.user_manager()
         self.role_manager = factory.role_manager()
         
@@ -54,6 +71,14 @@ class LDAPConnection:
                     log.error("Could not start TLS: %s" % err)
                     return False
 
+        return self.bind()
+
+    def bind(self):
+        """
+         Bind the connection with its admin credentials, or anonymously
+         when there are none
+        """
+        self.bound = False
         try:
             if not self.ldapadmin or not self.ldappassword:
                 # do an anonymous bind
@@ -63,7 +88,21 @@ class LDAPConnection:
         except ldap.LDAPError, err:
             log.error("Unable to bind to LDAP server: %s" % err)
             return False
-                
+        self.bound = True
+        return True
+
+    def is_alive(self):
+        """
+         Check that the connection to the ldap server is still usable
+        """
+        if not self.bound:
+            return False
+        try:
+            self.lconn.whoami_s()
+        except ldap.LDAPError, err:
+            log.info("LDAP connection failed its liveness check: %s" % err)
+            return False
+        return True
 
     def disconnect(self):
         """
@@ -126,6 +165,9 @@ class LDAPConnection:
             except:
                 log.info("Invalid credentials for %s" % username)
                 return None
+            finally:
+                # restore the connection's own identity so it can be reused
+                self.bind()
 
         return self._add_from_ldap(username, user)
         
@@ -161,7 +203,21 @@ class LDAPConnection:
                        searching for the user. Ex: (gidNumber=200)
 
         If there is exactly one match, returns the user info list with
-        data in ldap server.  Otherwise returns None
+        data in ldap server.  Otherwise returns None. Both outcomes are
+        served from the lookup cache, when there is one, until they expire.
+        """
+        if self.lookup_cache is not None:
+            key = (baseDN, user, filter)
+            found, result = self.lookup_cache.get(key)
+            if not found:
+                result = self._lookup_user(baseDN, user, filter)
+                self.lookup_cache.put(key, result)
+            return result
+        return self._lookup_user(baseDN, user, filter)
+
+    def _lookup_user(self, baseDN, user, filter=None):
+        """
+        Search the ldap server for the user; see lookup_user
         """
         if filter:
             ldapfilter = "(&(uid=%s)%s)" % (user, filter)
@@ -178,6 +234,181 @@ class LDAPConnection:
             log.info("User %s Not Found." % user)
         return None
 
+
+class LookupCache:
+    """
+    Cache of user lookups. Users that were found are cached for the ttl and
+    users that weren't found for the, generally shorter, negative ttl.
+    """
+    def __init__(self, ttl, negative_ttl, size=LOOKUP_CACHE_SIZE):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.size = size
+        self.__lock = threading.Lock()
+        # key -> (expiration time, lookup result)
+        self.__entries = {}
+
+    def get(self, key):
+        """
+        @return: tuple of whether the key is cached and its cached lookup result
+        """
+        self.__lock.acquire()
+        try:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.time():
+                del self.__entries[key]
+                return False, None
+            return True, entry[1]
+        finally:
+            self.__lock.release()
+
+    def put(self, key, result):
+        """
+        Cache a lookup result, unless its ttl is 0
+        """
+        if result is None:
+            ttl = self.negative_ttl
+        else:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        self.__lock.acquire()
+        try:
+            if len(self.__entries) >= self.size:
+                self.__entries = dict((k, e) for k, e in self.__entries.items() if e[0] > now)
+                if len(self.__entries) >= self.size:
+                    self.__entries.clear()
+            self.__entries[key] = (now + ttl, result)
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        self.__lock.acquire()
+        try:
+            self.__entries.clear()
+        finally:
+            self.__lock.release()
+
+
+class LDAPConnectionPool:
+    """
+    Bounded pool of connections bound to the ldap server. Connections that
+    have been idle for longer than the liveness check interval are checked
+    before they're handed out again and replaced when they're no longer
+    usable. All connections share the pool's lookup cache.
+    """
+    def __init__(self, size, admin=None, password=None,
+                 server='ldap://localhost:389', tls=False, lookup_cache=None):
+        self.size = size
+        self.ldapserver = server
+        self.ldapadmin = admin
+        self.ldappassword = password
+        self.ldaptls = tls
+        self.lookup_cache = lookup_cache
+        self.__semaphore = threading.BoundedSemaphore(size)
+        self.__lock = threading.Lock()
+        self.__idle = []
+
+    def acquire(self):
+        """
+        Take a connection from the pool, waiting for one to be released when
+        all of them are in use.
+        @return: bound connection, or None if the ldap server can't be reached
+        """
+        self.__semaphore.acquire()
+        try:
+            while True:
+                self.__lock.acquire()
+                try:
+                    if not self.__idle:
+                        break
+                    connection = self.__idle.pop()
+                finally:
+                    self.__lock.release()
+                if time.time() - connection.last_used < LIVENESS_CHECK_INTERVAL or connection.is_alive():
+                    return connection
+                self._close(connection)
+
+            connection = LDAPConnection(self.ldapadmin, self.ldappassword,
+                                        self.ldapserver, self.ldaptls,
+                                        lookup_cache=self.lookup_cache)
+            if connection.connect():
+                return connection
+            self._close(connection)
+        except:
+            self.__semaphore.release()
+            raise
+        self.__semaphore.release()
+        return None
+
+    def release(self, connection, discard=False):
+        """
+        Return a connection taken from the pool.
+        @param discard: close the connection instead of keeping it for reuse
+        """
+        try:
+            if discard or not connection.bound:
+                self._close(connection)
+                return
+            connection.last_used = time.time()
+            self.__lock.acquire()
+            try:
+                self.__idle.append(connection)
+            finally:
+                self.__lock.release()
+        finally:
+            self.__semaphore.release()
+
+    def _close(self, connection):
+        if connection.lconn is None:
+            return
+        try:
+            connection.disconnect()
+        except ldap.LDAPError:
+            pass
+
+
+def authenticate_user(base, username, password=None, filter=None):
+    """
+    Authenticate a user with a connection from the shared connection pool;
+    see LDAPConnection.authenticate_user
+    """
+    pool = _pool()
+    connection = pool.acquire()
+    if connection is None:
+        return None
+    try:
+        user = connection.authenticate_user(base, username, password, filter=filter)
+    except ldap.LDAPError:
+        pool.release(connection, discard=True)
+        raise
+    pool.release(connection)
+    return user
+
+
+def _pool():
+    """
+    Get the shared connection pool, creating it from the ldap configuration
+    on first use
+    """
+    global _POOL
+    _POOL_LOCK.acquire()
+    try:
+        if _POOL is None:
+            lookup_cache = LookupCache(config.getint('ldap', 'lookup_cache_ttl'),
+                                       config.getint('ldap', 'negative_cache_ttl'))
+            _POOL = LDAPConnectionPool(config.getint('ldap', 'pool_size'),
+                                       server=config.get('ldap', 'uri'),
+                                       tls=config.getboolean('ldap', 'tls'),
+                                       lookup_cache=lookup_cache)
+        return _POOL
+    finally:
+        _POOL_LOCK.release()
+
+
 if __name__ == '__main__':
     ldapserv = LDAPConnection('cn=Directory Manager', \
                               'redhat',
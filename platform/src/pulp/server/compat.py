@@ -68,6 +68,22 @@ except ImportError:
 
 SON = _SON
 
+
+try:
+    from bson.binary import Binary as _Binary
+except ImportError:
+    from pymongo.binary import Binary as _Binary
+
+Binary = _Binary
+
+
+try:
+    from bson.dbref import DBRef as _DBRef
+except ImportError:
+    from pymongo.dbref import DBRef as _DBRef
+
+DBRef = _DBRef
+
 # functools wraps decorator ----------------------------------------------------
 
 def _update_wrapper(orig, wrapper):
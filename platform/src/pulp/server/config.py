@@ -26,6 +26,7 @@ _default_values = {
     },
     'coordinator': {
         'task_state_poll_interval': '0.1',
+        'inline_synchronous_calls': 'true',
     },
     'data_reaping': {
         'reaper_interval': '0.25',
@@ -39,6 +40,11 @@ _default_values = {
         'name': 'pulp_database',
         'seeds': 'localhost:27017',
         'operation_retries': '2',
+        'instrumentation': 'false',
+        'slow_operation_threshold': '1.0',
+        'replica_set': '',
+        'secondary_reads': 'false',
+        'secondary_read_tags': '',
     },
     'email': {
         'host': 'localhost',
@@ -53,6 +59,9 @@ _default_values = {
         'uri': 'ldap://localhost',
         'base': 'dc=localhost',
         'tls': 'false',
+        'pool_size': '5',
+        'lookup_cache_ttl': '300',
+        'negative_cache_ttl': '60',
     },
     'logs': {
         'config': '/etc/pulp/logging/basic.cfg',
@@ -79,6 +88,7 @@ _default_values = {
         'user_cert_expiration': '7',
         'consumer_cert_expiration': '3650',
         'serial_number_path': '/var/lib/pulp/sn.dat',
+        'key_pool_watermark': '20',
     },
     'server': {
         'server_name': socket.gethostname(),
@@ -86,11 +96,18 @@ _default_values = {
         'default_password': 'admin',
         'debugging_mode': 'false',
         'storage_dir': '/var/lib/pulp/',
+        'response_cache_size': '100',
+        'compress_responses': 'true',
+        'response_compression_threshold': '1024',
+        'max_decompressed_request_size': '52428800',
     },
     'tasks': {
         'concurrency_threshold': '9',
         'dispatch_interval': '0.5',
         'archived_call_lifetime': '48',
+        'max_wait': '30',
+        'max_waiters': '4',
+        'progress_interval': '1.0',
         'consumer_content_weight': '0',
         'create_weight': '0',
         'publish_weight': '1',
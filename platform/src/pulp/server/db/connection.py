@@ -11,17 +11,21 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import datetime
 import logging
+import sys
+import threading
 import time
 from gettext import gettext as _
 
 import pymongo
 from pymongo.collection import Collection
 from pymongo.errors import AutoReconnect
-from pymongo.son_manipulator import AutoReference, NamespaceInjector
+from pymongo.son_manipulator import AutoReference, NamespaceInjector, SONManipulator
 
 from pulp.server import config
 from pulp.server.compat import wraps
+from pulp.server.db import instrumentation
 from pulp.server.exceptions import PulpException
 
 # globals ----------------------------------------------------------------------
@@ -29,32 +33,177 @@ from pulp.server.exceptions import PulpException
 _connection = None
 _database = None
 
+# read preference and tag sets applied to collections retrieved for
+# eventually consistent reads; None unless secondary reads are configured
+_secondary_read_preference = None
+_secondary_tag_sets = None
+
 _log = logging.getLogger(__name__)
 
+# read routes; reads on the secondary route may be served by a secondary
+# replica set member and so may not reflect the most recent writes
+READ_ROUTE_PRIMARY = 'primary'
+READ_ROUTE_SECONDARY = 'secondary'
+
+# read route of the collections retrieved by the current thread
+_read_route = threading.local()
+
+# High volume collections whose documents bypass the NamespaceInjector and
+# AutoReference manipulators. Their documents are not stored with an _ns field,
+# embedded documents are not replaced by DBRefs and DBRefs are not
+# dereferenced on the way out, so nothing stored in them may rely on
+# auto-referencing. Migration 0005 removes the references and _ns fields
+# stored by earlier versions.
+UNMANIPULATED_COLLECTIONS = frozenset([
+    'archived_calls',
+    'call_resources',
+    'consumer_unit_profiles',
+    'queued_calls',
+    'repo_content_changes',
+    'repo_content_units',
+])
+
+# Content unit collections; see pulp.plugins.types.database.TYPE_COLLECTION_PREFIX
+UNMANIPULATED_COLLECTION_PREFIXES = ('units_',)
+
+# Collections whose writes increment a version counter, stored in the versions
+# collection under the collection's name, so that the webservices can tell
+# whether a response built from them has changed without rebuilding it
+VERSIONED_COLLECTIONS = frozenset([
+    'consumer_bindings',
+    'content_types',
+    'repo_distributors',
+    'repo_importers',
+    'repos',
+])
+
+VERSIONS_COLLECTION = 'collection_versions'
+
+# versioned collections written by the current thread while it defers version
+# bumps; see versions_deferred
+_deferred_versions = threading.local()
+
 # connection api ---------------------------------------------------------------
 
 def initialize(name=None, seeds=None):
     """
     Initialize the connection pool and top-level database for pulp.
     """
-    global _connection, _database
+    global _connection, _database, _secondary_read_preference, _secondary_tag_sets
     try:
         if not name:
             name = config.config.get('database', 'name')
         if not seeds:
             seeds = config.config.get('database', 'seeds')
+        replica_set = config.config.get('database', 'replica_set')
         _log.info("Attempting Database connection with seeds = %s" % (seeds))
-        _connection = pymongo.Connection(seeds)
+        if replica_set:
+            _connection = pymongo.ReplicaSetConnection(seeds, replicaSet=replica_set)
+        else:
+            _connection = pymongo.Connection(seeds)
         _database = getattr(_connection, name)
-        _database.add_son_manipulator(NamespaceInjector())
-        _database.add_son_manipulator(AutoReference(_database))
+        _database.add_son_manipulator(SelectiveManipulator(NamespaceInjector()))
+        _database.add_son_manipulator(SelectiveManipulator(AutoReference(_database)))
         _log.info("Database connection established with: seeds = %s, name = %s" % (seeds, name))
+        _secondary_read_preference, _secondary_tag_sets = _secondary_read_settings(replica_set)
     except Exception:
         _log.critical('Database initialization failed')
         _connection = None
         _database = None
         raise
 
+
+def _secondary_read_settings(replica_set):
+    """
+    Determines the read preference and tag sets for eventually consistent
+    reads from the database configuration.
+
+    @return: tuple of read preference and tag sets; both None when eventually
+             consistent reads are to be served by the primary
+    @rtype:  tuple
+    """
+    if not replica_set or not config.config.getboolean('database', 'secondary_reads'):
+        return None, None
+    # SECONDARY_PREFERRED only exists in pymongo 2.3 and later, where
+    # SECONDARY no longer falls back to the primary
+    read_preference = getattr(pymongo.ReadPreference, 'SECONDARY_PREFERRED', pymongo.ReadPreference.SECONDARY)
+    tag_sets = None
+    tags = config.config.get('database', 'secondary_read_tags')
+    if tags:
+        tag_set = dict(t.strip().split(':', 1) for t in tags.split(','))
+        tag_sets = [tag_set]
+    _log.info(_('Eventually consistent reads routed to secondaries with tags: %(t)s') % {'t': tags})
+    return read_preference, tag_sets
+
+# son manipulation -------------------------------------------------------------
+
+def uses_son_manipulators(collection_name):
+    """
+    @param collection_name: name of a collection
+    @type  collection_name: str
+    @return: True if the documents of the collection are passed through the
+             database's SON manipulators
+    @rtype:  bool
+    """
+    if collection_name in UNMANIPULATED_COLLECTIONS:
+        return False
+    for prefix in UNMANIPULATED_COLLECTION_PREFIXES:
+        if collection_name.startswith(prefix):
+            return False
+    return True
+
+
+class SelectiveManipulator(SONManipulator):
+    """
+    Applies a SON manipulator to the documents of every collection except the
+    ones excluded by uses_son_manipulators, so that their documents aren't
+    walked on every read and write.
+    """
+
+    def __init__(self, manipulator):
+        self.manipulator = manipulator
+
+    def will_copy(self):
+        return self.manipulator.will_copy()
+
+    def transform_incoming(self, son, collection):
+        if not uses_son_manipulators(collection.name):
+            return son
+        return self.manipulator.transform_incoming(son, collection)
+
+    def transform_outgoing(self, son, collection):
+        if not uses_son_manipulators(collection.name):
+            return son
+        return self.manipulator.transform_outgoing(son, collection)
+
+# read routing -----------------------------------------------------------------
+
+def current_read_route():
+    """
+    @return: read route of the collections retrieved by the current thread
+    @rtype:  str
+    """
+    return getattr(_read_route, 'route', None) or READ_ROUTE_PRIMARY
+
+
+def eventually_consistent(method):
+    """
+    Method decorator that marks the reads made by the method as safe to be
+    served by a secondary replica set member, if configured. The collections
+    retrieved while the method runs are routed to secondaries; writes are
+    always sent to the primary. Methods that read back their own writes must
+    not be marked.
+    """
+    @wraps(method)
+    def routed(*args, **kwargs):
+        previous = getattr(_read_route, 'route', None)
+        _read_route.route = READ_ROUTE_SECONDARY
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _read_route.route = previous
+    return routed
+
 # collection wrapper class -----------------------------------------------------
 
 class PulpCollectionFailure(PulpException):
@@ -90,6 +239,69 @@ def _retry_decorator(method):
     return retry
 
 
+def _bump_version(collection):
+    """
+    Increment the version of the given collection, or record it to be
+    incremented if the current thread is deferring version bumps. The bump is
+    not acknowledged and its failures are logged rather than raised, so it
+    neither slows down nor fails the write it follows.
+    """
+    deferred = getattr(_deferred_versions, 'collections', None)
+    if deferred is not None:
+        deferred[collection.name] = collection
+        return
+    try:
+        collection.database[VERSIONS_COLLECTION].update(
+            {'_id': collection.name},
+            {'$inc': {'version': 1}, '$set': {'last_modified': datetime.datetime.utcnow()}},
+            upsert=True, safe=False)
+    except Exception:
+        _log.exception(_('Failed to increment the version of collection %(c)s') %
+                       {'c': collection.name})
+
+
+def _version_decorator(collection, method):
+    """
+    Collection instance method decorator that increments the version of the
+    collection once the write made by the method has completed
+    """
+    @wraps(method)
+    def versioned(*args, **kwargs):
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            # bumped even when the write fails, as it may have been applied
+            exc_info = sys.exc_info()
+            _bump_version(collection)
+            raise exc_info[0], exc_info[1], exc_info[2]
+        _bump_version(collection)
+        return result
+    return versioned
+
+
+def versions_deferred(method):
+    """
+    Method decorator that increments the version of each versioned collection
+    written by the method once, when the method returns, rather than after
+    every write. Meant for operations, such as a sync, that write the same
+    collections many times.
+    """
+    @wraps(method)
+    def deferred(*args, **kwargs):
+        if getattr(_deferred_versions, 'collections', None) is not None:
+            # already deferred by an enclosing operation
+            return method(*args, **kwargs)
+        _deferred_versions.collections = {}
+        try:
+            return method(*args, **kwargs)
+        finally:
+            collections = _deferred_versions.collections
+            _deferred_versions.collections = None
+            for collection in collections.values():
+                _bump_version(collection)
+    return deferred
+
+
 class PulpCollection(Collection):
     """
     pymongo.collection.Collection wrapper that provides support for retries when
@@ -99,13 +311,35 @@ class PulpCollection(Collection):
     _retry_methods = ('insert', 'save', 'update', 'remove', 'drop', 'find',
                       'find_one', 'count', 'create_index', 'ensure_index',
                       'drop_index', 'drop_indexes', 'group', 'rename',
-                      'map_reduce')
+                      'map_reduce', 'find_and_modify')
+
+    # methods recorded when database instrumentation is enabled
+    _instrumented_methods = ('insert', 'save', 'update', 'remove', 'find',
+                             'find_one', 'count', 'group', 'map_reduce',
+                             'find_and_modify')
 
-    def __init__(self, database, name, create=False, retries=0, **kwargs):
+    # methods that increment the version of a versioned collection
+    _versioned_methods = ('insert', 'save', 'update', 'remove', 'drop',
+                          'find_and_modify')
+
+    def __init__(self, database, name, create=False, retries=0, instrument=False,
+                 read_route=READ_ROUTE_PRIMARY, **kwargs):
         super(PulpCollection, self).__init__(database, name, create=create, **kwargs)
         self.retries = retries
+        self.read_route = READ_ROUTE_PRIMARY
+        if read_route == READ_ROUTE_SECONDARY and _secondary_read_preference is not None:
+            self.read_route = READ_ROUTE_SECONDARY
+            self.read_preference = _secondary_read_preference
+            if _secondary_tag_sets is not None:
+                self.tag_sets = _secondary_tag_sets
         for m in self._retry_methods:
             setattr(self, m, _retry_decorator(getattr(self, m)))
+        if name in VERSIONED_COLLECTIONS:
+            for m in self._versioned_methods:
+                setattr(self, m, _version_decorator(self, getattr(self, m)))
+        if instrument:
+            for m in self._instrumented_methods:
+                setattr(self, m, instrumentation.instrument(self, m, getattr(self, m)))
 
     def __getstate__(self):
         return {'name': self.name}
@@ -136,13 +370,32 @@ class PulpCollection(Collection):
 def get_collection(name, create=False):
     """
     Factory function to instantiate PulpConnection objects using configurable
-    parameters.
+    parameters. Collections retrieved within a method marked with the
+    eventually_consistent decorator read from secondaries, if configured.
     """
     global _database
     if _database is None:
         raise PulpCollectionFailure(_('Cannot get collection from uninitialized database'))
     retries = config.config.getint('database', 'operation_retries')
-    return PulpCollection(_database, name, retries=retries, create=create)
+    instrument = instrumentation.is_enabled()
+    return PulpCollection(_database, name, retries=retries, create=create, instrument=instrument,
+                          read_route=current_read_route())
+
+def collection_versions(names):
+    """
+    Look up the versions of the given versioned collections. A collection's
+    version is incremented by every write made to it through a PulpCollection.
+
+    @param names: names of collections in VERSIONED_COLLECTIONS
+    @type  names: list
+    @return: dict of collection name to a tuple of its version and the time of
+             its last write; (0, None) for collections never written to
+    @rtype:  dict
+    """
+    versions = dict((n, (0, None)) for n in names)
+    for v in get_collection(VERSIONS_COLLECTION).find({'_id': {'$in': list(names)}}):
+        versions[v['_id']] = (v['version'], v['last_modified'])
+    return versions
 
 def database():
     """
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Registry of the query shapes the server issues against its collections.
+
+Modules that query a model's collection declare the shape of those queries,
+the fields matched by the spec and the sort, with declare_query at import
+time.
+pulp-manage-db then reconciles the collection indices against the registry,
+creating an index for each declared shape that no existing index supports.
+The registry is also used by the tests to verify, through explain(), that
+none of the declared queries falls back to a collection scan.
+"""
+
+import logging
+from gettext import gettext as _
+
+import pymongo
+
+# -- constants ----------------------------------------------------------------
+
+_LOG = logging.getLogger(__name__)
+
+# Value used for each field of the spec built to explain a shape
+SAMPLE_VALUE = 'sample'
+
+# -- query shapes -------------------------------------------------------------
+
+class QueryShape(object):
+    """
+    Describes a query issued against a model's collection.
+
+    @ivar model: model class whose collection is queried
+    @type model: type
+    @ivar fields: fields matched by the query spec
+    @type fields: tuple of str
+    @ivar sort: fields and directions the results are sorted by
+    @type sort: tuple of (str, int)
+    @ivar source: description of the code issuing the query
+    @type source: str or None
+    """
+
+    def __init__(self, model, fields, sort=None, source=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.sort = tuple(sort or ())
+        self.source = source
+
+    def index_key(self):
+        """
+        @return: key of the index that best supports the query; the matched
+                 fields followed by the sort fields
+        @rtype:  list of (str, int)
+        """
+        key = [(f, pymongo.ASCENDING) for f in self.fields]
+        key.extend(s for s in self.sort if s[0] not in self.fields)
+        return key
+
+    def sample_spec(self):
+        """
+        @return: spec of a query of this shape
+        @rtype:  dict
+        """
+        return dict((f, SAMPLE_VALUE) for f in self.fields)
+
+    def is_supported_by(self, index_key):
+        """
+        Determines if an index supports queries of this shape without scanning
+        the collection or sorting the results in memory. The matched fields
+        must form the prefix of the index, in any order, and be followed by the
+        sort fields, in their direction or all reversed.
+
+        @param index_key: key of an existing index
+        @type  index_key: list of (str, int)
+        @rtype: bool
+        """
+        index_key = list(index_key)
+        prefix = index_key[:len(self.fields)]
+        if set(f for f, d in prefix) != set(self.fields):
+            return False
+
+        sort = [s for s in self.sort if s[0] not in self.fields]
+        if not sort:
+            return True
+        suffix = index_key[len(self.fields):len(self.fields) + len(sort)]
+        if [f for f, d in suffix] != [f for f, d in sort]:
+            return False
+        directions = [d == sd for (f, d), (sf, sd) in zip(suffix, sort)]
+        return all(directions) or not any(directions)
+
+    @property
+    def collection_name(self):
+        return self.model.collection_name
+
+    def __repr__(self):
+        return 'QueryShape(%s, %s, sort=%s)' % (self.collection_name, list(self.fields), list(self.sort))
+
+
+# collection name -> list of QueryShape
+_QUERY_SHAPES = {}
+
+
+def declare_query(model, fields, sort=None, source=None):
+    """
+    Adds the shape of a query issued against a model's collection to the
+    registry.
+    If no index supports the shape, the index created for it lists the
+    matched fields in the given order, so shapes that match on a subset of
+    another shape's fields should see those fields listed first.
+
+    @param model: model class whose collection is queried
+    @type  model: type
+    @param fields: fields matched by the query spec
+    @type  fields: iterable of str
+    @param sort: fields and directions the results are sorted by
+    @type  sort: iterable of (str, int) or None
+    @param source: description of the code issuing the query
+    @type  source: str or None
+    @return: the declared shape
+    @rtype:  QueryShape
+    """
+    shape = QueryShape(model, fields, sort, source)
+    _QUERY_SHAPES.setdefault(model.collection_name, []).append(shape)
+    return shape
+
+
+def declared_queries(collection_name=None):
+    """
+    @param collection_name: only return the shapes for this collection
+    @type  collection_name: str or None
+    @return: declared query shapes
+    @rtype:  list of QueryShape
+    """
+    if collection_name is not None:
+        return list(_QUERY_SHAPES.get(collection_name, ()))
+    shapes = []
+    for name in sorted(_QUERY_SHAPES):
+        shapes.extend(_QUERY_SHAPES[name])
+    return shapes
+
+# -- reconciliation -----------------------------------------------------------
+
+def unsupported_queries(collection_name):
+    """
+    @param collection_name: name of the collection to check
+    @type  collection_name: str
+    @return: the declared shapes for the collection that no existing index
+             supports
+    @rtype:  list of QueryShape
+    """
+    shapes = declared_queries(collection_name)
+    if not shapes:
+        return []
+    # the model's own indices are ensured when its collection is retrieved
+    collection = shapes[0].model.get_collection()
+    index_keys = [i['key'] for i in collection.index_information().values()]
+    return [s for s in declared_queries(collection_name)
+            if not any(s.is_supported_by(k) for k in index_keys)]
+
+
+def reconcile_indices():
+    """
+    Creates an index for each declared query shape that no existing index
+    supports. Shapes are handled longest index first, so that an index
+    created for one shape can support the shapes that form its prefix.
+
+    @return: names of the created indices, by collection name
+    @rtype:  dict
+    """
+    created = {}
+    for collection_name in sorted(_QUERY_SHAPES):
+        shapes = sorted(declared_queries(collection_name), key=lambda s: len(s.index_key()), reverse=True)
+        collection = shapes[0].model.get_collection()
+        index_keys = [i['key'] for i in collection.index_information().values()]
+        for shape in shapes:
+            if any(shape.is_supported_by(k) for k in index_keys):
+                continue
+            key = shape.index_key()
+            name = collection.create_index(key, background=True)
+            index_keys.append(key)
+            created.setdefault(collection_name, []).append(name)
+            msg = _('Created index %(i)s on %(c)s for queries from %(s)s')
+            _LOG.info(msg % {'i': name, 'c': collection_name, 's': shape.source})
+    return created
+
+# -- explain ------------------------------------------------------------------
+
+def explain(shape):
+    """
+    Explains a query of the given shape.
+
+    @param shape: shape of the query
+    @type  shape: QueryShape
+    @return: the database's explanation of the query plan
+    @rtype:  dict
+    """
+    collection = shape.model.get_collection()
+    cursor = collection.find(shape.sample_spec())
+    if shape.sort:
+        cursor.sort(list(shape.sort))
+    return cursor.explain()
+
+
+def is_collection_scan(explanation):
+    """
+    Determines if an explained query scans the whole collection. Handles the
+    explain formats of both the legacy and the query planner based servers.
+
+    @param explanation: value returned by explain()
+    @type  explanation: dict
+    @rtype: bool
+    """
+    if 'cursor' in explanation:
+        return explanation['cursor'].startswith('BasicCursor')
+
+    def _stages(plan):
+        yield plan.get('stage')
+        for child in [plan.get('inputStage')] + plan.get('inputStages', []):
+            if child:
+                for stage in _stages(child):
+                    yield stage
+
+    plan = explanation.get('queryPlanner', {}).get('winningPlan', {})
+    return 'COLLSCAN' in _stages(plan)
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Optional instrumentation of the database operations run through
+PulpCollection. When enabled in the server configuration, the number of
+operations, the documents they touched and their latencies are aggregated by
+collection and operation, and by the read route (primary or secondary) they
+were sent to. The operations are attributed to the web request or dispatch
+task that ran them. Operations slower than the configured
+threshold are logged along with their spec.
+"""
+
+import logging
+import threading
+import time
+from gettext import gettext as _
+
+import web
+from pymongo.cursor import Cursor
+
+from pulp.server import config
+from pulp.server.compat import wraps
+from pulp.server.dispatch import context as dispatch_context
+
+# -- constants ----------------------------------------------------------------
+
+_LOG = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets; slower
+# operations are counted in a final overflow bucket
+HISTOGRAM_BOUNDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Operations are no longer attributed individually to contexts beyond this
+# many; the rest are aggregated under OTHER_CONTEXT
+MAX_CONTEXTS = 500
+
+OTHER_CONTEXT = 'other'
+NO_CONTEXT = 'none'
+
+# Maximum length of a spec included in the slow operation log
+_MAX_SPEC_LENGTH = 1024
+
+# Operations that honor the collection's read preference; all others are
+# sent to the primary
+_READ_OPERATIONS = ('find', 'find_one', 'count', 'group')
+_PRIMARY_ROUTE = 'primary'
+
+# Operations whose first argument is a query spec, and the keyword the spec
+# may be passed as instead
+_SPEC_KEYWORDS = {'find': 'spec', 'find_one': 'spec_or_id', 'count': 'spec',
+                  'update': 'spec', 'remove': 'spec_or_id', 'find_and_modify': 'query'}
+
+# -- configuration ------------------------------------------------------------
+
+def is_enabled():
+    """
+    @return: True if database operations should be instrumented
+    @rtype:  bool
+    """
+    return config.config.getboolean('database', 'instrumentation')
+
+
+def slow_operation_threshold():
+    """
+    @return: duration in seconds above which operations are logged
+    @rtype:  float
+    """
+    return config.config.getfloat('database', 'slow_operation_threshold')
+
+# -- statistics ---------------------------------------------------------------
+
+class OperationStats(object):
+    """
+    Aggregated statistics of a single operation on a single collection.
+
+    @ivar count: number of times the operation ran
+    @type count: int
+    @ivar documents: number of documents returned or modified by the operation
+    @type documents: int
+    @ivar total_time: total number of seconds spent in the operation
+    @type total_time: float
+    @ivar max_time: number of seconds taken by the slowest run
+    @type max_time: float
+    @ivar histogram: number of runs in each bucket of HISTOGRAM_BOUNDS, plus
+                     the overflow bucket
+    @type histogram: list of int
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.documents = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, duration, documents):
+        self.count += 1
+        self.documents += documents
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if duration <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def serialize(self):
+        labels = ['<=%gs' % b for b in HISTOGRAM_BOUNDS] + ['>%gs' % HISTOGRAM_BOUNDS[-1]]
+        return {'count': self.count,
+                'documents': self.documents,
+                'total_time': self.total_time,
+                'max_time': self.max_time,
+                'histogram': dict(zip(labels, self.histogram))}
+
+
+class QueryStats(object):
+    """
+    Thread-safe aggregation of the statistics of database operations, both by
+    collection and operation and by the context that ran them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all of the statistics gathered so far.
+        """
+        self._lock.acquire()
+        try:
+            # collection name -> operation name -> OperationStats
+            self._operations = {}
+            # context -> 'collection.operation' -> count
+            self._contexts = {}
+            # read route -> OperationStats
+            self._routes = {}
+        finally:
+            self._lock.release()
+
+    def record(self, collection_name, operation, duration, documents, context, route=_PRIMARY_ROUTE):
+        """
+        Adds a single run of an operation to the statistics.
+
+        @param collection_name: name of the collection the operation ran against
+        @type  collection_name: str
+        @param operation: name of the collection method that was called
+        @type  operation: str
+        @param duration: number of seconds the operation took
+        @type  duration: float
+        @param documents: number of documents returned or modified
+        @type  documents: int
+        @param context: web request or dispatch task that ran the operation
+        @type  context: str
+        @param route: read route the operation was sent to
+        @type  route: str
+        """
+        self._lock.acquire()
+        try:
+            operations = self._operations.setdefault(collection_name, {})
+            stats = operations.get(operation)
+            if stats is None:
+                stats = operations[operation] = OperationStats()
+            stats.add(duration, documents)
+
+            route_stats = self._routes.get(route)
+            if route_stats is None:
+                route_stats = self._routes[route] = OperationStats()
+            route_stats.add(duration, documents)
+
+            if context not in self._contexts and len(self._contexts) >= MAX_CONTEXTS:
+                context = OTHER_CONTEXT
+            counts = self._contexts.setdefault(context, {})
+            key = '.'.join((collection_name, operation))
+            counts[key] = counts.get(key, 0) + 1
+        finally:
+            self._lock.release()
+
+    def serialize(self):
+        """
+        @return: the statistics gathered so far in a JSON serializable format
+        @rtype:  dict
+        """
+        self._lock.acquire()
+        try:
+            operations = {}
+            for collection_name, collection_operations in self._operations.items():
+                operations[collection_name] = dict((o, s.serialize()) for o, s in collection_operations.items())
+            contexts = dict((c, dict(counts)) for c, counts in self._contexts.items())
+            routes = dict((r, s.serialize()) for r, s in self._routes.items())
+        finally:
+            self._lock.release()
+        return {'collections': operations, 'contexts': contexts, 'routes': routes}
+
+
+STATS = QueryStats()
+
+# -- context ------------------------------------------------------------------
+
+def current_context():
+    """
+    Describes what the current thread is running: the dispatch task if there
+    is one, otherwise the web request if there is one.
+
+    @rtype: str
+    """
+    callable_name = getattr(dispatch_context.CONTEXT, 'callable_name', None)
+    if callable_name is not None:
+        return 'task %s' % callable_name
+    method = getattr(web.ctx, 'method', None)
+    if method is not None:
+        return '%s %s%s' % (method, getattr(web.ctx, 'homepath', ''), getattr(web.ctx, 'path', ''))
+    return NO_CONTEXT
+
+# -- instrumentation ----------------------------------------------------------
+
+# Tracks the operations in progress on each thread; operations that pymongo
+# implements by calling other collection methods (save, find_one) are only
+# recorded once
+_LOCAL = threading.local()
+
+
+def _enter():
+    depth = getattr(_LOCAL, 'depth', 0)
+    _LOCAL.depth = depth + 1
+    return depth == 0
+
+
+def _exit():
+    _LOCAL.depth -= 1
+
+
+def _record(collection_name, operation, duration, documents, spec, threshold, route):
+    STATS.record(collection_name, operation, duration, documents, current_context(), route)
+    if duration > threshold:
+        spec_repr = repr(spec)
+        if len(spec_repr) > _MAX_SPEC_LENGTH:
+            spec_repr = spec_repr[:_MAX_SPEC_LENGTH] + '...'
+        msg = _('Slow database operation: %(c)s.%(o)s took %(d).3fs in [%(x)s]: %(s)s')
+        _LOG.warn(msg % {'c': collection_name, 'o': operation, 'd': duration,
+                         'x': current_context(), 's': spec_repr})
+
+
+def _document_count(operation, args, result):
+    """
+    Determines the number of documents returned or modified by an operation.
+    """
+    if operation == 'insert':
+        if args and isinstance(args[0], (list, tuple)):
+            return len(args[0])
+        return 1
+    if operation in ('find_one', 'find_and_modify', 'save'):
+        return int(result is not None)
+    if operation in ('update', 'remove'):
+        # only reported for safe operations
+        if isinstance(result, dict):
+            return result.get('n', 0)
+        return 0
+    if operation == 'group' and isinstance(result, list):
+        return len(result)
+    return 0
+
+
+def _operation_spec(operation, args, kwargs):
+    """
+    Determines what is logged for a slow operation. Only query specs are
+    logged; documents written by inserts and saves are reduced to their _id
+    so their content never reaches the log.
+    """
+    if operation in _SPEC_KEYWORDS:
+        if args:
+            return args[0]
+        return kwargs.get(_SPEC_KEYWORDS[operation])
+    if operation in ('insert', 'save'):
+        document = args and args[0] or kwargs.get('doc_or_docs') or kwargs.get('to_save')
+        if isinstance(document, dict):
+            return {'_id': document.get('_id')}
+    return None
+
+
+class InstrumentedCursor(Cursor):
+    """
+    Cursor returned by instrumented find calls. Finds are lazy, so the
+    operation is recorded when the cursor is exhausted or discarded, with the
+    time spent retrieving its documents.
+    """
+
+    def _start_instrumentation(self, collection_name, spec, threshold, duration, route):
+        self._instrumentation = {'collection': collection_name, 'spec': spec, 'threshold': threshold,
+                                 'route': route, 'time': duration, 'documents': 0, 'recorded': False}
+
+    def _finish_instrumentation(self):
+        info = getattr(self, '_instrumentation', None)
+        if info is None or info['recorded']:
+            return
+        info['recorded'] = True
+        _record(info['collection'], 'find', info['time'], info['documents'], info['spec'],
+                info['threshold'], info['route'])
+
+    def next(self):
+        info = getattr(self, '_instrumentation', None)
+        if info is None:
+            # clones of an instrumented cursor are not recorded
+            return Cursor.next(self)
+        start = time.time()
+        try:
+            document = Cursor.next(self)
+        except StopIteration:
+            info['time'] += time.time() - start
+            self._finish_instrumentation()
+            raise
+        info['time'] += time.time() - start
+        info['documents'] += 1
+        return document
+
+    def __del__(self):
+        try:
+            self._finish_instrumentation()
+        except Exception:
+            # never raise from a destructor
+            pass
+        if hasattr(Cursor, '__del__'):
+            Cursor.__del__(self)
+
+
+def instrument(collection, operation, method):
+    """
+    Wraps a collection method so its runs are recorded.
+
+    @param collection: collection the method is bound to
+    @type  collection: pymongo.collection.Collection
+    @param operation: name of the method
+    @type  operation: str
+    @param method: bound method to wrap
+    @type  method: callable
+    @return: wrapped method
+    @rtype:  callable
+    """
+    collection_name = collection.name
+    threshold = slow_operation_threshold()
+    route = _PRIMARY_ROUTE
+    if operation in _READ_OPERATIONS:
+        route = getattr(collection, 'read_route', _PRIMARY_ROUTE)
+
+    @wraps(method)
+    def instrumented(*args, **kwargs):
+        if not _enter():
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _exit()
+
+        spec = _operation_spec(operation, args, kwargs)
+        start = time.time()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            _exit()
+        duration = time.time() - start
+
+        if operation == 'find':
+            # the cursor records the operation once it has been iterated;
+            # its class is switched instead of reimplementing the collection's
+            # find, which differs across pymongo versions
+            if type(result) is Cursor:
+                result.__class__ = InstrumentedCursor
+                result._start_instrumentation(collection_name, spec, threshold, duration, route)
+        else:
+            _record(collection_name, operation, duration, _document_count(operation, args, result),
+                    spec, threshold, route)
+        return result
+
+    return instrumented
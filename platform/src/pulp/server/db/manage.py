@@ -16,8 +16,9 @@ import os
 import sys
 
 from pulp.plugins.loader.api import load_content_types
-from pulp.server.db import connection
+from pulp.server.db import connection, indexes
 from pulp.server.db.migrate import models
+from pulp.server.managers import factory as manager_factory
 from pulp.server import config
 
 
@@ -128,6 +129,14 @@ def _auto_manage_db(options):
     print message
     logger.info(message)
 
+    message = _('Reconciling database indices.')
+    print message
+    logger.info(message)
+    reconcile_indices()
+    message = _('Database indices reconciled.')
+    print message
+    logger.info(message)
+
     message = _('Loading content types.')
     print message
     logger.info(message)
@@ -138,6 +147,21 @@ def _auto_manage_db(options):
     return os.EX_OK
 
 
+def reconcile_indices():
+    """
+    Create the indices needed by the query shapes declared by the server's managers that no
+    existing index supports.
+    """
+    # the managers declare their query shapes when they are imported
+    manager_factory.initialize()
+    created = indexes.reconcile_indices()
+    for collection_name, index_names in sorted(created.items()):
+        message = _('Created indices on %(c)s: %(i)s')
+        message = message % {'c': collection_name, 'i': ', '.join(index_names)}
+        print message
+        logger.info(message)
+
+
 def _start_logging():
     """
     Call into Pulp to get the logging started, and set up the logger to be used in this module.
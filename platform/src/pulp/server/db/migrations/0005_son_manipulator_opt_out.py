@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import logging
+from gettext import gettext as _
+
+from pulp.server.compat import DBRef
+from pulp.server.db import connection
+
+
+_LOG = logging.getLogger(__name__)
+
+
+def migrate(*args, **kwargs):
+    """
+    Prepares the collections that no longer go through the SON manipulators.
+    The DBRefs stored in their documents were dereferenced by the AutoReference
+    manipulator when read; they are replaced by the documents they reference,
+    which is what callers received until now. The _ns fields written by the
+    NamespaceInjector are removed. This migration is idempotent.
+    """
+    database = connection.database()
+    for collection_name in database.collection_names():
+        if connection.uses_son_manipulators(collection_name):
+            continue
+        collection = connection.get_collection(collection_name)
+        dereferenced = _dereference_collection(database, collection)
+        if dereferenced:
+            msg = _('Dereferenced %(n)s documents in collection %(c)s')
+            _LOG.info(msg % {'n': dereferenced, 'c': collection_name})
+        collection.update({'_ns': {'$exists': True}}, {'$unset': {'_ns': 1}}, multi=True, safe=True)
+
+
+def _dereference_collection(database, collection):
+    """
+    Replaces the DBRefs in the collection's documents with the documents they
+    reference.
+
+    :return: number of updated documents
+    :rtype:  int
+    """
+    updated = 0
+    for document in collection.find():
+        document, changed = _dereference(database, document)
+        if changed:
+            collection.save(document, safe=True)
+            updated += 1
+    return updated
+
+
+def _dereference(database, value):
+    """
+    Recursively replaces the DBRefs in a value, the same way the AutoReference
+    manipulator did when reading it.
+
+    :return: tuple of the dereferenced value and whether it changed
+    :rtype:  tuple
+    """
+    if isinstance(value, DBRef):
+        referenced = database.dereference(value)
+        if referenced is None:
+            msg = _('Document referenced by %(r)s no longer exists; the reference is removed')
+            _LOG.warn(msg % {'r': value})
+        return referenced, True
+    if isinstance(value, dict):
+        changed = False
+        for key, item in value.items():
+            item, item_changed = _dereference(database, item)
+            if item_changed:
+                value[key] = item
+                changed = True
+        return value, changed
+    if isinstance(value, list):
+        changed = False
+        for i, item in enumerate(value):
+            item, item_changed = _dereference(database, item)
+            if item_changed:
+                value[i] = item
+                changed = True
+        return value, changed
+    return value, False
@@ -96,3 +96,23 @@ class Permission(Model):
 
         self.resource = resource
         self.users = users or {}
+
+
+class CertificateSerialNumber(Model):
+    """
+    Counter the serial numbers of the certificates signed by the Pulp CA are
+    allocated from. Each counter is a single document, updated atomically.
+
+    @ivar value: last allocated serial number
+    @type value: int
+    """
+
+    collection_name = 'certificate_serial_numbers'
+    unique_indices = ()
+
+    def __init__(self, counter_id, value=0):
+        super(CertificateSerialNumber, self).__init__()
+
+        self._id = counter_id
+        self.id = counter_id
+        self.value = value
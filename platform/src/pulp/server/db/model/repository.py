@@ -49,6 +49,10 @@ class Repo(Model):
                     the values may change as the contents of the repo change,
                     either set by the user or by an importer or distributor
     @type metadata: dict
+
+    @ivar last_change_sequence: sequence number of the most recent entry in the
+                                repo's change journal (see RepoContentChange)
+    @type last_change_sequence: int
     """
 
     collection_name = 'repos'
@@ -63,6 +67,7 @@ class Repo(Model):
         self.notes = notes or {}
         self.scratchpad = {} # default to dict in hopes the plugins will just add/remove from it
         self.content_unit_counts = content_unit_counts or {}
+        self.last_change_sequence = 0
 
         # Timeline
         # TODO: figure out how to track repo modified states
@@ -152,6 +157,12 @@ class RepoDistributor(Model):
     @ivar last_publish: timestamp of the last publish (regardless of success or failure)
                         in ISO8601 format
     @type last_publish: str
+
+    @ivar last_published_sequence: sequence number of the last repo change journal
+                                   entry included in the last successful publish;
+                                   None if the distributor was never successfully
+                                   published
+    @type last_published_sequence: int or None
     """
 
     collection_name = 'repo_distributors'
@@ -167,6 +178,7 @@ class RepoDistributor(Model):
         self.auto_publish = auto_publish
         self.scratchpad = None
         self.last_publish = None
+        self.last_published_sequence = None
         self.scheduled_publishes = []
 
 
@@ -241,6 +253,57 @@ class RepoContentUnit(Model):
         self.updated = self.created
 
 
+class RepoContentChange(Model):
+    """
+    Entry in a repository's change journal. An entry is added each time a unit
+    is associated with or removed from a repository, or a unit in the
+    repository is updated. Each entry carries a sequence number that is
+    increasing within the repository, which lets distributors retrieve the
+    changes made since their last publish.
+
+    Entries are removed once every distributor on the repository has published
+    past them.
+
+    @ivar repo_id: identifies the repo
+    @type repo_id: str
+
+    @ivar sequence: position of the change in the repo's journal
+    @type sequence: int
+
+    @ivar action: what happened to the unit; must be one of the ACTION_*
+                  constants in this class
+    @type action: str
+
+    @ivar unit_type_id: identifies the type of the changed unit
+    @type unit_type_id: str
+
+    @ivar unit_id: ID (_id) of the changed unit in its type collection
+    @type unit_id: str
+
+    @ivar timestamp: iso8601 formatted timestamp of when the change was made
+    @type timestamp: str
+    """
+
+    collection_name = 'repo_content_changes'
+    unique_indices = ( ('repo_id', 'sequence'), )
+
+    ACTION_ASSOCIATED = 'associated'
+    ACTION_UNASSOCIATED = 'unassociated'
+    ACTION_UPDATED = 'updated'
+
+    def __init__(self, repo_id, sequence, action, unit_type_id, unit_id):
+        super(RepoContentChange, self).__init__()
+
+        self.repo_id = repo_id
+        self.sequence = sequence
+        self.action = action
+        self.unit_type_id = unit_type_id
+        self.unit_id = unit_id
+
+        timestamp = dateutils.to_utc_datetime(datetime.datetime.utcnow())
+        self.timestamp = dateutils.format_iso8601_datetime(timestamp)
+
+
 class RepoSyncResult(Model):
     """
     Stores the results of a repo sync.
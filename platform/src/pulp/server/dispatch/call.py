@@ -14,6 +14,8 @@
 import itertools
 import logging
 import pickle
+import threading
+import time
 import traceback
 import uuid
 from gettext import gettext as _
@@ -21,6 +23,7 @@ from types import NoneType, TracebackType
 
 from pulp.common import dateutils
 from pulp.common.util import encode_unicode
+from pulp.server.compat import Binary
 from pulp.server.db.model.auth import User
 from pulp.server.dispatch import constants as dispatch_constants
 from pulp.server.managers import factory as managers_factory
@@ -189,10 +192,31 @@ class CallRequest(object):
 
     # call request serialization/deserialization -------------------------------
 
+    # version 1: pickled fields are all stored as ascii (protocol 0) pickles
+    # version 2: pickled fields are stored as binary pickles using the highest
+    #            protocol, and are left out when they hold their default values
+    serialization_version = 2
+
     copied_fields = ('id', 'group_id', 'schedule_id', 'tags', 'resources', 'weight', 'asynchronous', 'archive')
     pickled_fields = ('call', 'args', 'kwargs', 'principal', 'execution_hooks', 'control_hooks')
     all_fields = itertools.chain(copied_fields, pickled_fields)
 
+    def _has_default_value(self, field):
+        """
+        Determine if a pickled field holds the value it would have on a newly
+        constructed call request, so it does not need to be serialized.
+        @param field: name of the pickled field
+        @type  field: str
+        @rtype: bool
+        """
+        value = getattr(self, field)
+        if field in ('args', 'kwargs'):
+            return not value
+        if field in ('execution_hooks', 'control_hooks'):
+            return not any(value)
+        # the call is required and the principal defaults to the current one
+        return False
+
     def serialize(self):
         """
         Serialize the call request into a format that can be stored
@@ -200,14 +224,17 @@ class CallRequest(object):
         @rtype: dict
         """
 
-        data = {'callable_name': self.callable_name()}
+        data = {'callable_name': self.callable_name(),
+                'serialization_version': self.serialization_version}
 
         for field in self.copied_fields:
             data[field] = getattr(self, field)
 
         for field in self.pickled_fields:
+            if self._has_default_value(field):
+                continue
             try:
-                data[field] = pickle.dumps(getattr(self, field))
+                data[field] = Binary(pickle.dumps(getattr(self, field), pickle.HIGHEST_PROTOCOL))
 
             except Exception, e:
                 msg =_('Exception encountered while pickling: %(f)s') % {'f': field}
@@ -232,13 +259,24 @@ class CallRequest(object):
 
         constructor_kwargs = dict(data)
         constructor_kwargs.pop('callable_name') # added for search
+        version = constructor_kwargs.pop('serialization_version', 1)
+
+        if version > cls.serialization_version:
+            msg = _('Unsupported call request serialization version: %(v)s') % {'v': version}
+            _LOG.error(msg)
+            return None
 
         for key, value in constructor_kwargs.items():
             constructor_kwargs[encode_unicode(key)] = constructor_kwargs.pop(key)
 
         try:
             for field in cls.pickled_fields:
-                constructor_kwargs[field] = pickle.loads(data[field].encode('ascii'))
+                if field not in data:
+                    continue
+                if version == 1:
+                    constructor_kwargs[field] = pickle.loads(data[field].encode('ascii'))
+                else:
+                    constructor_kwargs[field] = pickle.loads(str(data[field]))
 
         except Exception, e:
             _LOG.exception(e)
@@ -247,8 +285,8 @@ class CallRequest(object):
         id = constructor_kwargs.pop('id')
         group_id = constructor_kwargs.pop('group_id')
         schedule_id = constructor_kwargs.pop('schedule_id')
-        execution_hooks = constructor_kwargs.pop('execution_hooks')
-        control_hooks = constructor_kwargs.pop('control_hooks')
+        execution_hooks = constructor_kwargs.pop('execution_hooks', None)
+        control_hooks = constructor_kwargs.pop('control_hooks', None)
 
         instance = cls(**constructor_kwargs)
 
@@ -256,14 +294,15 @@ class CallRequest(object):
         instance.group_id = group_id
         instance.schedule_id = schedule_id
 
+        # hooks are only serialized when any have been added
         for key in dispatch_constants.CALL_LIFE_CYCLE_CALLBACKS:
-            if not execution_hooks[key]:
+            if execution_hooks is None or not execution_hooks[key]:
                 continue
             for hook in execution_hooks[key]:
                 instance.add_life_cycle_callback(key, hook)
 
         for key in dispatch_constants.CALL_CONTROL_HOOKS:
-            if control_hooks[key] is None:
+            if control_hooks is None or control_hooks[key] is None:
                 continue
             instance.add_control_hook(key, control_hooks[key])
 
@@ -308,6 +347,8 @@ class CallReport(object):
     @type start_time: datetime.datetime
     @ivar finish_time: time the call in the call request completed
     @type finish_time: datetime.datetime
+    @ivar revision: incremented each time the state or progress changes
+    @type revision: int
     """
 
     @classmethod
@@ -357,6 +398,10 @@ class CallReport(object):
         assert isinstance(traceback, (NoneType, TracebackType))
         assert isinstance(serialize_result, bool)
 
+        # notified whenever the state or progress of this call report changes
+        self._changed_condition = threading.Condition()
+        self.revision = 0
+
         self.call_request_id = call_request_id
         self.call_request_group_id = call_request_group_id
         self.call_request_tags = call_request_tags or []
@@ -379,6 +424,57 @@ class CallReport(object):
         self.start_time = None
         self.finish_time = None
 
+    # change notification ------------------------------------------------------
+
+    def _get_state(self):
+        return self._state
+
+    def _set_state(self, state):
+        self._state = state
+        self._changed()
+
+    state = property(_get_state, _set_state)
+
+    def _get_progress(self):
+        return self._progress
+
+    def _set_progress(self, progress):
+        self._progress = progress
+        self._changed()
+
+    progress = property(_get_progress, _set_progress)
+
+    def _changed(self):
+        self._changed_condition.acquire()
+        try:
+            self.revision += 1
+            self._changed_condition.notifyAll()
+        finally:
+            self._changed_condition.release()
+
+    def wait_for_change(self, revision, timeout):
+        """
+        Block until the state or progress of this call report changes from the
+        given revision, or until the timeout expires.
+        @param revision: revision of the call report last seen by the caller
+        @type revision: int
+        @param timeout: maximum number of seconds to wait
+        @type timeout: float or int
+        @return: True if the call report changed, False if the timeout expired
+        @rtype: bool
+        """
+        deadline = time.time() + timeout
+        self._changed_condition.acquire()
+        try:
+            while self.revision == revision:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._changed_condition.wait(remaining)
+            return True
+        finally:
+            self._changed_condition.release()
+
     def serialize(self):
         """
         Serialize the call report for either the wire or storage in the db.
@@ -392,7 +488,7 @@ class CallReport(object):
 
         for field in ('call_request_id', 'call_request_group_id', 'call_request_tags',
                       'schedule_id', 'principal_login', 'response', 'reasons',
-                      'state', 'progress', 'dependency_failures'):
+                      'state', 'progress', 'dependency_failures', 'revision'):
             data[field] = getattr(self, field)
 
         # legacy fields
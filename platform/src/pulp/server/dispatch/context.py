@@ -29,6 +29,8 @@ class Context(local):
     @type call_request_id: str or None
     @ivar call_request_group_id: unique id of the call request group the call request is part of
     @type call_request_group_id: str or None
+    @ivar callable_name: name of the callable the call request is executing
+    @type callable_name: str or None
     @ivar report_progress: callback to pass progress information into
     @type report_progress: callable
     """
@@ -40,6 +42,7 @@ class Context(local):
     def set_task_attributes(self, task):
         self.call_request_id = task.call_request.id
         self.call_request_group_id = task.call_request.group_id
+        self.callable_name = task.call_request.callable_name()
         self.report_progress = task._report_progress
         self.set_cancel_control_hook = task._set_cancel_control_hook
         self.clear_cancel_control_hook = task._clear_cancel_control_hook
@@ -47,6 +50,7 @@ class Context(local):
     def clear_task_attributes(self):
         self.call_request_id = None
         self.call_request_group_id = None
+        self.callable_name = None
         self.report_progress = self._report_progress
         self.set_cancel_control_hook = self._set_cancel_control_hook
         self.clear_cancel_control_hook = self._clear_cancel_control_hook
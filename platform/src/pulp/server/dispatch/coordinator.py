@@ -14,7 +14,7 @@
 import copy
 import datetime
 import logging
-import time
+import threading
 import types
 import uuid
 from gettext import gettext as _
@@ -23,18 +23,26 @@ from pulp.server.auth.authorization import (
     GrantPermmissionsForTaskV2, RevokePermissionsForTaskV2)
 from pulp.server.db.model.dispatch import QueuedCall, CallResource
 from pulp.server.dispatch import constants as dispatch_constants
+from pulp.server.dispatch import context as dispatch_context
 from pulp.server.dispatch import exceptions as dispatch_exceptions
 from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.dispatch.call import CallRequest
+from pulp.server.dispatch.locks import ResourceLockTable
 from pulp.server.dispatch.task import AsyncTask, Task
 from pulp.server.exceptions import OperationTimedOut
+from pulp.server.managers import factory as managers_factory
 from pulp.server.util import subdict, TopologicalSortError, topological_sort
 
 
 _LOG = logging.getLogger(__name__)
 
+# resources held by the calls in the task queue; module level so that the
+# (pickled) dequeue callback can release them
+_RESOURCE_LOCKS = ResourceLockTable()
+
 _VALID_SEARCH_CRITERIA = frozenset(('call_request_id', 'call_request_group_id',
-                                    'call_request_id_list', 'schedule_id',
+                                    'call_request_id_list', 'call_request_group_id_list',
+                                    'schedule_id',
                                     'state', 'callable_name', 'args', 'kwargs',
                                     'resources', 'tags'))
 
@@ -45,13 +53,20 @@ class Coordinator(object):
     """
     Coordinator class that runs call requests in the task queue and detects and
     resolves conflicting operations on resources.
-    @ivar task_state_poll_interval: sleep interval to use while polling a "synchronous" task
+    @ivar task_state_poll_interval: maximum interval to wait for a change in a "synchronous" task's state
     @type task_state_poll_interval: float
+    @ivar inline_synchronous_calls: run "synchronous" tasks that are ready in the calling thread
+    @type inline_synchronous_calls: bool
+    @ivar max_waiters: maximum number of threads waiting for call report changes at once
+    @type max_waiters: int
     """
 
-    def __init__(self, task_state_poll_interval=0.5):
+    def __init__(self, task_state_poll_interval=0.5, inline_synchronous_calls=False, max_waiters=4):
 
         self.task_state_poll_interval = task_state_poll_interval
+        self.inline_synchronous_calls = inline_synchronous_calls
+        self.max_waiters = max_waiters
+        self._waiters = threading.Semaphore(max(max_waiters, 0))
         self.call_resource_collection = CallResource.get_collection()
 
     # explicit initialization --------------------------------------------------
@@ -62,7 +77,9 @@ class Coordinator(object):
         interrupted tasks.
         """
         # drop all previous knowledge of previous calls
+        _RESOURCE_LOCKS.clear()
         self.call_resource_collection.remove(safe=True)
+        _RESOURCE_LOCKS.start()
 
         # re-start interrupted tasks
         queued_call_collection = QueuedCall.get_collection()
@@ -91,6 +108,13 @@ class Coordinator(object):
                 log_msg = _('Cannot execute call request group: %(g)s' % {'g': call_request.group_id})
                 _LOG.warn('\n'.join((log_msg, str(e))))
 
+    def stop(self):
+        """
+        Stop the coordinator, writing any pending changes to the resources held
+        by calls to the database.
+        """
+        _RESOURCE_LOCKS.stop()
+
     # execution methods --------------------------------------------------------
 
     def execute_call(self, call_request, call_report=None):
@@ -245,7 +269,7 @@ class Coordinator(object):
                 return
 
             if call_resource_list:
-                self.call_resource_collection.insert(call_resource_list, safe=True)
+                _RESOURCE_LOCKS.acquire(call_resource_list)
 
             for task in task_list:
                 task_queue.enqueue(task)
@@ -256,6 +280,8 @@ class Coordinator(object):
     def _run_task(self, task, timeout=None):
         """
         Run a task "synchronously".
+        If the task is ready to run, it is claimed from the task queue and run
+        in the calling thread, otherwise this waits for the task queue to run it.
         @param task: task to run
         @type  task: L{Task} instance
         @param timeout: how much time to wait for a synchronous task to start
@@ -263,6 +289,10 @@ class Coordinator(object):
         @type  timeout: None or datetime.timedelta
         """
         task_queue = dispatch_factory._task_queue()
+
+        if self._run_task_inline(task_queue, task):
+            return
+
         valid_states = [dispatch_constants.CALL_RUNNING_STATE]
         # it's perfectly legitimate for the call to complete before the first poll
         valid_states.extend(dispatch_constants.CALL_COMPLETE_STATES)
@@ -278,6 +308,34 @@ class Coordinator(object):
             wait_for_task(task, dispatch_constants.CALL_COMPLETE_STATES,
                           poll_interval=self.task_state_poll_interval)
 
+    def _run_task_inline(self, task_queue, task):
+        """
+        Run a task in the calling thread, if it can be claimed from the task queue.
+        Calls made from within a running task are never run inline, as running
+        them would clobber the dispatch context of the calling task.
+        @param task_queue: task queue the task was enqueued in
+        @type  task_queue: L{pulp.server.dispatch.taskqueue.TaskQueue} instance
+        @param task: task to run
+        @type  task: L{Task} instance
+        @return: True if the task was run, False otherwise
+        @rtype:  bool
+        """
+        if not self.inline_synchronous_calls:
+            return False
+        if dispatch_context.CONTEXT.call_request_id is not None:
+            return False
+        if not task_queue.claim(task):
+            return False
+
+        # the task sets, then clears, the principal of the thread it runs in
+        principal_manager = managers_factory.principal_manager()
+        principal = principal_manager.get_principal()
+        try:
+            task._run()
+        finally:
+            principal_manager.set_principal(principal)
+        return True
+
     def _generate_call_request_group_id(self):
         """
         Generate a unique call request group id.
@@ -337,12 +395,9 @@ class Coordinator(object):
         rejecting_call_requests = set()
         rejecting_reasons = []
 
-        call_resource_collection = CallResource.get_collection()
         call_resources = resource_dict_to_call_resources(resources)
-        or_query = filter_dicts(call_resources, ('resource_type', 'resource_id'))
-        cursor = call_resource_collection.find({'$or': or_query})
 
-        for call_resource in cursor:
+        for call_resource in _RESOURCE_LOCKS.find(call_resources):
             proposed_operation = resources[call_resource['resource_type']][call_resource['resource_id']]
             queued_operation = call_resource['operation']
 
@@ -410,6 +465,7 @@ class Coordinator(object):
          * call_request_id
          * call_request_group_id
          * call_request_id_list
+         * call_request_group_id_list
          * schedule_id
          * state
          * callable_name
@@ -442,6 +498,7 @@ class Coordinator(object):
          * call_request_id
          * call_request_group_id
          * call_request_id_list
+         * call_request_group_id_list
          * schedule_id
          * state
          * callable_name
@@ -529,6 +586,40 @@ class Coordinator(object):
             return
         task_list[0].call_report.progress = progress
 
+    def wait_for_call_report_change(self, call_request_id, revision, timeout):
+        """
+        Wait for the state or progress of a call to change from the given
+        revision of its call report, or for the timeout to expire. This allows
+        callers to be notified of changes instead of polling for them.
+        Returns immediately if the call report has already changed, the call
+        is already complete or max_waiters threads are already waiting; each
+        waiter holds a web server thread, so they must not be allowed to take
+        up all of them.
+        @param call_request_id: id of the call to wait on
+        @type call_request_id: str
+        @param revision: revision of the call report last seen by the caller
+        @type revision: int
+        @param timeout: maximum number of seconds to wait
+        @type timeout: float or int
+        @return: the call report, or None if the call is not in the task queue
+        @rtype: L{call.CallReport} instance or None
+        """
+        task_list = self._find_tasks(call_request_id=call_request_id)
+        if not task_list:
+            return None
+        call_report = task_list[0].call_report
+        if call_report.state in dispatch_constants.CALL_COMPLETE_STATES:
+            return call_report
+        if not self._waiters.acquire(False):
+            _LOG.debug(_('Maximum of %(m)d waiters reached; not waiting on call %(c)s') %
+                       {'m': self.max_waiters, 'c': call_request_id})
+            return call_report
+        try:
+            call_report.wait_for_change(revision, timeout)
+        finally:
+            self._waiters.release()
+        return call_report
+
 # conflict detection utility functions -----------------------------------------
 
 def filter_dicts(dicts, fields):
@@ -616,7 +707,7 @@ def wait_for_task(task, states, poll_interval=0.5, timeout=None):
     @type  task: L{Task}
     @param states: set of valid states
     @type  states: list or tuple
-    @param poll_interval: time, in seconds, to wait in between polling the task
+    @param poll_interval: maximum time, in seconds, to wait for a change in the task's state
     @type  poll_interval: float or int
     @param timeout: maximum amount of time to poll task, None means indefinitely
     @type  timeout: None or datetime.timedelta
@@ -627,14 +718,20 @@ def wait_for_task(task, states, poll_interval=0.5, timeout=None):
     assert isinstance(timeout, (datetime.timedelta, types.NoneType))
 
     start = datetime.datetime.now()
-    while task.call_report.state not in states:
-        time.sleep(poll_interval)
-        if timeout is None:
-            continue
-        now = datetime.datetime.now()
-        if now - start < timeout:
-            continue
-        raise OperationTimedOut(timeout)
+    while True:
+        # read the revision before the state so that a change in between is not missed
+        revision = task.call_report.revision
+        if task.call_report.state in states:
+            return
+        wait = poll_interval
+        if timeout is not None:
+            remaining = timeout - (datetime.datetime.now() - start)
+            if remaining <= datetime.timedelta(0):
+                raise OperationTimedOut(timeout)
+            wait = min(wait, remaining.days * 86400 + remaining.seconds + remaining.microseconds / 1000000.0)
+        # the poll interval only bounds each wait, changes to the call report
+        # wake the waiting thread immediately
+        task.call_report.wait_for_change(revision, wait)
 
 # query utility functions ------------------------------------------------------
 
@@ -654,6 +751,8 @@ def task_matches_criteria(task, criteria):
         return False
     if 'call_request_id_list' in criteria and task.call_request.id not in criteria['call_request_id_list']:
         return False
+    if 'call_request_group_id_list' in criteria and task.call_request.group_id not in criteria['call_request_group_id_list']:
+        return False
     if 'schedule_id' in criteria and criteria['schedule_id'] != task.call_report.schedule_id:
         return False
     if 'state' in criteria and criteria['state'] != task.call_report.state:
@@ -682,6 +781,5 @@ def coordinator_dequeue_callback(call_request, call_report):
     @param call_report: call report for the call
     @type  call_report: L{call.CallReport} instance
     """
-    collection = CallResource.get_collection()
-    collection.remove({'call_request_id': call_request.id}, safe=True)
+    _RESOURCE_LOCKS.release(call_request.id)
 
@@ -17,6 +17,7 @@ from pulp.server.dispatch import context as dispatch_context
 # globals ----------------------------------------------------------------------
 
 _COORDINATOR = None
+_PROGRESS_REPORTER = None
 _SCHEDULER = None
 _TASK_QUEUE = None
 
@@ -27,10 +28,24 @@ def _initialize_coordinator():
     assert _COORDINATOR is None
     from pulp.server.dispatch.coordinator import Coordinator
     task_state_poll_interval = pulp_config.config.getfloat('coordinator', 'task_state_poll_interval')
-    _COORDINATOR = Coordinator(task_state_poll_interval)
+    inline_synchronous_calls = pulp_config.config.getboolean('coordinator', 'inline_synchronous_calls')
+    max_waiters = pulp_config.config.getint('tasks', 'max_waiters')
+    _COORDINATOR = Coordinator(task_state_poll_interval, inline_synchronous_calls, max_waiters)
     _COORDINATOR.start()
 
 
+def _initialize_progress_reporter():
+    global _PROGRESS_REPORTER
+    assert _PROGRESS_REPORTER is None
+    progress_interval = pulp_config.config.getfloat('tasks', 'progress_interval')
+    if progress_interval <= 0:
+        # progress is reported synchronously
+        return
+    from pulp.server.dispatch.progress import ProgressReporter
+    _PROGRESS_REPORTER = ProgressReporter(progress_interval)
+    _PROGRESS_REPORTER.start()
+
+
 def _initialize_scheduler():
     global _SCHEDULER
     assert _SCHEDULER is None
@@ -54,6 +69,7 @@ def initialize():
     # order sensitive
     from pulp.server.dispatch import pickling
     pickling.initialize()
+    _initialize_progress_reporter()
     _initialize_task_queue()
     _initialize_coordinator()
     _initialize_scheduler()
@@ -63,9 +79,18 @@ def initialize():
 def _finalize_coordinator():
     global _COORDINATOR
     assert _COORDINATOR is not None
+    _COORDINATOR.stop()
     _COORDINATOR = None
 
 
+def _finalize_progress_reporter():
+    global _PROGRESS_REPORTER
+    if _PROGRESS_REPORTER is None:
+        return
+    _PROGRESS_REPORTER.stop()
+    _PROGRESS_REPORTER = None
+
+
 def _finalize_scheduler():
     global _SCHEDULER
     assert _SCHEDULER is not None
@@ -87,6 +112,7 @@ def finalize(clear_queued_calls=False):
     _finalize_scheduler()
     _finalize_coordinator()
     _finalize_task_queue(clear_queued_calls)
+    _finalize_progress_reporter()
 
 # factory functions ------------------------------------------------------------
 
@@ -120,6 +146,17 @@ def scheduler():
     return _SCHEDULER
 
 
+def _progress_reporter():
+    """
+    Dispatch progress reporter factory. Returns the current progress reporter
+    instance, if progress reports are coalesced.
+    NOTE: this should not be used outside of the dispatch package
+    @return: progress reporter for calls, None if progress is reported synchronously
+    @rtype:  L{pulp.server.dispatch.progress.ProgressReporter} or None
+    """
+    return _PROGRESS_REPORTER
+
+
 def _task_queue():
     """
     Dispatch task queue factory. Returns the current task queue instance.
@@ -37,6 +37,12 @@ def find_archived_calls(**criteria):
     Currently supported criteria:
      * call_request_id
      * call_request_group_id
+     * call_request_id_list
+     * call_request_group_id_list
+     * tags
+
+    An optional fields keyword argument limits the fields of the serialized
+    call reports that are returned.
 
     :return: (possibly empty) mongo collection cursor containing the matching archived calls
     :rtype: pymongo.cursor.Cursor
@@ -46,8 +52,18 @@ def find_archived_calls(**criteria):
         query['serialized_call_report.call_request_id'] = criteria['call_request_id']
     if 'call_request_group_id' in criteria:
         query['serialized_call_report.call_request_group_id'] = criteria['call_request_group_id']
+    if 'call_request_id_list' in criteria:
+        query['serialized_call_report.call_request_id'] = {'$in': list(criteria['call_request_id_list'])}
+    if 'call_request_group_id_list' in criteria:
+        query['serialized_call_report.call_request_group_id'] = {'$in': list(criteria['call_request_group_id_list'])}
+    if criteria.get('tags'):
+        query['serialized_call_report.call_request_tags'] = {'$all': list(criteria['tags'])}
+
+    fields = None
+    if criteria.get('fields') is not None:
+        fields = ['serialized_call_report.%s' % f for f in criteria['fields']]
 
     collection = ArchivedCall.get_collection()
-    cursor = collection.find(query)
+    cursor = collection.find(query, fields=fields)
     return cursor
 
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import logging
+import threading
+from gettext import gettext as _
+
+from pulp.server.db.model.dispatch import CallResource
+
+
+_LOG = logging.getLogger(__name__)
+
+# resource lock table ----------------------------------------------------------
+
+class ResourceLockTable(object):
+    """
+    In-memory table of the resources held by the calls in the task queue,
+    used by the coordinator to detect conflicting operations without querying
+    the database. When started, a separate thread mirrors the table in the
+    call resources collection; calls that are released before their resources
+    are written are never written at all. The table isn't mirrored while the
+    thread isn't running.
+    """
+
+    def __init__(self):
+        self.__exit = False
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition(self.__lock)
+        self.__writer = None
+
+        # resource type -> resource id -> call request id -> call resource
+        self.__resources = {}
+        # call request id -> call resources
+        self.__held = {}
+
+        # call request id -> call resources not yet written
+        self.__pending_inserts = {}
+        # call request ids whose written call resources are not yet removed
+        self.__pending_removes = set()
+
+    # lock table ---------------------------------------------------------------
+
+    def find(self, call_resources):
+        """
+        Find the call resources, held by other calls, for the same resources as
+        the given call resources.
+        @param call_resources: call resources to find the held resources for
+        @type  call_resources: list of L{CallResource} instances
+        @return: held call resources
+        @rtype:  list of L{CallResource} instances
+        """
+        self.__lock.acquire()
+        try:
+            held = []
+            for call_resource in call_resources:
+                holders = self.__resources.get(call_resource['resource_type'], {}).get(call_resource['resource_id'], {})
+                held.extend(holders.values())
+            return held
+        finally:
+            self.__lock.release()
+
+    def acquire(self, call_resources):
+        """
+        Add call resources to the table.
+        @param call_resources: call resources with their call request id set
+        @type  call_resources: list of L{CallResource} instances
+        """
+        self.__lock.acquire()
+        try:
+            for call_resource in call_resources:
+                call_request_id = call_resource['call_request_id']
+                holders = self.__resources.setdefault(call_resource['resource_type'], {})
+                holders = holders.setdefault(call_resource['resource_id'], {})
+                holders[call_request_id] = call_resource
+                self.__held.setdefault(call_request_id, []).append(call_resource)
+                if self.__writer is not None:
+                    self.__pending_inserts.setdefault(call_request_id, []).append(call_resource)
+            self.__condition.notify()
+        finally:
+            self.__lock.release()
+
+    def release(self, call_request_id):
+        """
+        Remove all the call resources held by a call from the table.
+        @param call_request_id: id of the call request holding the resources
+        @type  call_request_id: str
+        """
+        self.__lock.acquire()
+        try:
+            for call_resource in self.__held.pop(call_request_id, []):
+                resource_ids = self.__resources[call_resource['resource_type']]
+                holders = resource_ids[call_resource['resource_id']]
+                holders.pop(call_request_id, None)
+                if not holders:
+                    del resource_ids[call_resource['resource_id']]
+                if not resource_ids:
+                    del self.__resources[call_resource['resource_type']]
+            if self.__writer is not None and self.__pending_inserts.pop(call_request_id, None) is None:
+                self.__pending_removes.add(call_request_id)
+            self.__condition.notify()
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        """
+        Remove all the call resources from the table, without writing the
+        removal to the database.
+        """
+        self.__lock.acquire()
+        try:
+            self.__resources = {}
+            self.__held = {}
+            self.__pending_inserts = {}
+            self.__pending_removes = set()
+        finally:
+            self.__lock.release()
+
+    # database mirror ----------------------------------------------------------
+
+    def flush(self):
+        """
+        Write the changes made to the table since the previous flush to the
+        call resources collection.
+        """
+        self.__lock.acquire()
+        try:
+            inserts = []
+            for call_resources in self.__pending_inserts.values():
+                inserts.extend(call_resources)
+            removes = list(self.__pending_removes)
+            self.__pending_inserts = {}
+            self.__pending_removes = set()
+        finally:
+            self.__lock.release()
+
+        if not (inserts or removes):
+            return
+
+        collection = CallResource.get_collection()
+        try:
+            if removes:
+                collection.remove({'call_request_id': {'$in': removes}}, safe=True)
+            if inserts:
+                collection.insert(inserts, safe=True)
+        except Exception:
+            _LOG.exception(_('Exception writing call resources'))
+
+    def __write(self):
+        """
+        Writer thread loop
+        """
+        self.__lock.acquire()
+        try:
+            while True:
+                while not (self.__exit or self.__pending_inserts or self.__pending_removes):
+                    self.__condition.wait()
+                if self.__exit:
+                    break
+                self.__lock.release()
+                try:
+                    self.flush()
+                finally:
+                    self.__lock.acquire()
+        finally:
+            self.__lock.release()
+        self.flush()
+
+    def start(self):
+        """
+        Start the writer thread
+        """
+        assert self.__writer is None
+        self.__lock.acquire()
+        self.__exit = False # needed for re-start
+        try:
+            self.__writer = threading.Thread(target=self.__write)
+            self.__writer.setDaemon(True)
+            self.__writer.start()
+        finally:
+            self.__lock.release()
+
+    def stop(self):
+        """
+        Stop the writer thread, writing any pending changes
+        """
+        assert self.__writer is not None
+        self.__lock.acquire()
+        self.__exit = True
+        self.__condition.notify()
+        self.__lock.release()
+        self.__writer.join()
+        self.__writer = None
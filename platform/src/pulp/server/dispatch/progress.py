@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import logging
+import threading
+from gettext import gettext as _
+
+
+_LOG = logging.getLogger(__name__)
+
+# progress reporter ------------------------------------------------------------
+
+class ProgressReporter(object):
+    """
+    Coalesces the progress reported by running calls. Reporting only records
+    the latest progress of the call; a separate thread hands the latest
+    progress of each call that reported since the previous flush to its
+    callback at a fixed interval, so calls reporting progress at a high rate
+    don't pay for updating their call reports each time.
+    @ivar flush_interval: time, in seconds, between flushes
+    @type flush_interval: float
+    """
+
+    def __init__(self, flush_interval=1.0):
+        self.flush_interval = flush_interval
+
+        self.__exit = False
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition(self.__lock)
+        self.__flusher = None
+        # call request id -> (callback, progress)
+        self.__pending = {}
+
+    # reporting ----------------------------------------------------------------
+
+    def report(self, call_request_id, callback, progress):
+        """
+        Record the latest progress of a call, replacing any progress not yet
+        flushed.
+        @param call_request_id: id of the call reporting progress
+        @type  call_request_id: str
+        @param callback: callable the progress is passed to when flushed
+        @type  callback: callable
+        @param progress: progress of the call
+        @type  progress: dict
+        """
+        self.__lock.acquire()
+        try:
+            self.__pending[call_request_id] = (callback, progress)
+        finally:
+            self.__lock.release()
+
+    def flush(self, call_request_id=None):
+        """
+        Pass the pending progress to the callbacks immediately.
+        @param call_request_id: only flush the progress of this call, if given
+        @type  call_request_id: str or None
+        """
+        self.__lock.acquire()
+        try:
+            if call_request_id is None:
+                pending = self.__pending.values()
+                self.__pending = {}
+            else:
+                entry = self.__pending.pop(call_request_id, None)
+                pending = entry and [entry] or []
+        finally:
+            self.__lock.release()
+
+        # the callbacks are called without holding the lock so that reporting
+        # calls are never blocked by them
+        for callback, progress in pending:
+            try:
+                callback(progress)
+            except Exception:
+                _LOG.exception(_('Exception flushing progress report'))
+
+    # flusher thread -----------------------------------------------------------
+
+    def __flush(self):
+        """
+        Flusher thread loop
+        """
+        self.__lock.acquire()
+        try:
+            while True:
+                self.__condition.wait(timeout=self.flush_interval)
+                if self.__exit:
+                    break
+                self.__lock.release()
+                try:
+                    self.flush()
+                finally:
+                    self.__lock.acquire()
+        finally:
+            self.__lock.release()
+        self.flush()
+
+    def start(self):
+        """
+        Start the flusher thread
+        """
+        assert self.__flusher is None
+        self.__lock.acquire()
+        self.__exit = False # needed for re-start
+        try:
+            self.__flusher = threading.Thread(target=self.__flush)
+            self.__flusher.setDaemon(True)
+            self.__flusher.start()
+        finally:
+            self.__lock.release()
+
+    def stop(self):
+        """
+        Stop the flusher thread, flushing any pending progress
+        """
+        assert self.__flusher is not None
+        self.__lock.acquire()
+        self.__exit = True
+        self.__condition.notify()
+        self.__lock.release()
+        self.__flusher.join()
+        self.__flusher = None
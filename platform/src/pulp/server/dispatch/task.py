@@ -24,6 +24,7 @@ from pulp.server.dispatch import call
 from pulp.server.dispatch import constants as dispatch_constants
 from pulp.server.dispatch import context as dispatch_context
 from pulp.server.dispatch import exceptions as dispatch_exceptions
+from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.dispatch import history as dispatch_history
 from pulp.server.managers import factory as managers_factory
 
@@ -77,9 +78,23 @@ class Task(object):
     def _report_progress(self, progress):
         """
         Progress report callback
+        The progress is handed to the progress reporter, which updates the
+        call report with the latest progress at regular intervals.
         """
+        reporter = dispatch_factory._progress_reporter()
+        if reporter is None:
+            self._set_progress(progress)
+            return
+        reporter.report(self.call_request.id, self._set_progress, progress)
+
+    def _set_progress(self, progress):
         self.call_report.progress = progress
 
+    def _flush_progress(self):
+        reporter = dispatch_factory._progress_reporter()
+        if reporter is not None:
+            reporter.flush(self.call_request.id)
+
     def _set_cancel_control_hook(self, hook):
         self.call_request.add_control_hook(dispatch_constants.CALL_CANCEL_CONTROL_HOOK, hook)
 
@@ -188,6 +203,9 @@ class Task(object):
         """
         assert state in dispatch_constants.CALL_COMPLETE_STATES
 
+        # the final progress is part of the completed call report
+        self._flush_progress()
+
         self.call_report.finish_time = datetime.datetime.now(dateutils.utc_tz())
         self.call_request_exit_state = state
 
@@ -121,6 +121,34 @@ class TaskQueue(object):
         finally:
             self.__lock.release()
 
+    def claim(self, task):
+        """
+        Claim a ready task so that the caller can run it in its own thread
+        instead of waiting for the dispatcher to start it. The task is
+        accounted for as running, exactly as if the dispatcher had started it.
+        NOTE: the caller is responsible for calling the task's _run method
+        @param task: task to be claimed
+        @type  task: pulp.server.dispatch.task.Task
+        @return: True if the task was claimed, False if it isn't ready to run
+        @rtype:  bool
+        """
+        self.__lock.acquire()
+        try:
+            if task not in self.__waiting_tasks:
+                return False
+            if task.call_request.dependencies:
+                return False
+            if task.call_request.weight > self.concurrency_threshold - self.__running_weight:
+                return False
+            self.__waiting_tasks.remove(task)
+            self.__running_tasks.append(task)
+            self.__running_weight += task.call_request.weight
+            task.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+            task.call_life_cycle_callbacks(dispatch_constants.CALL_RUN_LIFE_CYCLE_CALLBACK)
+            return True
+        finally:
+            self.__lock.release()
+
     def _purge_completed_task_cache(self):
         """
         Purge expired tasks from the completed tasks cache.
@@ -81,18 +81,15 @@ class AuthenticationManager(object):
         :return: user corresponding to the credentials
         """
 
-        ldap_uri = config.get('ldap', 'uri')
         ldap_base = config.get('ldap', 'base')
-        ldap_tls = config.getboolean('ldap', 'tls')
         
         ldap_filter = None
         if config.has_option('ldap', 'filter'):
             ldap_filter = config.get('ldap', 'filter')
     
-        ldap_server = ldap_connection.LDAPConnection(server=ldap_uri, tls=ldap_tls)
-        ldap_server.connect()
-        user = ldap_server.authenticate_user(ldap_base, username, password,
-                                             filter=ldap_filter)
+        # the connection comes from, and is returned to, a shared pool
+        user = ldap_connection.authenticate_user(ldap_base, username, password,
+                                                 filter=ldap_filter)
         return user
     
     def check_username_password(self, username, password=None):
@@ -12,10 +12,14 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import logging
-from M2Crypto import X509, EVP, RSA, util
-from threading import RLock
+import os
+from M2Crypto import X509, EVP, RSA, ASN1, util
+from pymongo.errors import DuplicateKeyError
+from threading import Condition, Lock, Thread
 import subprocess
+import time
 
+from pulp.server.db.model.auth import CertificateSerialNumber
 from pulp.server.exceptions import PulpException
 from pulp.server import config
 from pulp.server.util import Singleton
@@ -26,6 +30,16 @@ log = logging.getLogger(__name__)
 ADMIN_PREFIX = 'admin:'
 ADMIN_SPLITTER = ':'
 
+# seconds the key pool waits before generating keys again after a failure
+KEY_POOL_RETRY_INTERVAL = 10
+
+# pool of pre-generated private keys, None when disabled
+_KEY_POOL = None
+
+# CA certificate and key used for signing, keyed by their paths
+_CA = {}
+_CA_LOCK = Lock()
+
 
 class CertGenerationManager(object):
     
@@ -64,9 +78,13 @@ class CertGenerationManager(object):
         #Make a private key
         # Don't use M2Crypto directly as it leads to segfaults when trying to convert
         # the key to a PEM string.  Instead create the key with openssl and return the PEM string
-        # Sorta hacky but necessary.
+        # Sorta hacky but necessary. The keys are generated ahead of time by the key
+        # pool, when enabled, so the request doesn't wait for openssl.
         # rsa = RSA.gen_key(1024, 65537, callback=passphrase_callback)
-        private_key_pem = _make_priv_key()
+        if _KEY_POOL is not None:
+            private_key_pem = _KEY_POOL.get()
+        else:
+            private_key_pem = _make_priv_key()
         rsa = RSA.load_key_string(private_key_pem,
                                   callback=util.no_passphrase_callback)
 
@@ -74,25 +92,11 @@ class CertGenerationManager(object):
         req, pub_key = _make_cert_request(uid, rsa)
 
         # Sign it with the Pulp server CA
-        # We can't do this in m2crypto either so we have to shell out
-
-        ca_cert = config.config.get('security', 'cacert')
-        ca_key = config.config.get('security', 'cakey')
-
         sn = SerialNumber()
         serial = sn.next()
 
-        cmd = 'openssl x509 -req -sha1 -CA %s -CAkey %s -set_serial %s -days %d' % \
-                (ca_cert, ca_key, serial, expiration)
-        p = subprocess.Popen(cmd, shell=True, stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        output = p.communicate(input=req.as_pem())[0]
-        p.wait()
-        exit_code = p.returncode
-        if exit_code != 0:
-            raise Exception("error signing cert request: %s" % output)
-        cert_pem_string = output[output.index("-----BEGIN CERTIFICATE-----"):]
-        return private_key_pem, cert_pem_string
+        cert = _sign_cert_request(req, serial, expiration)
+        return private_key_pem, cert.as_pem()
 
     def verify_cert(self, cert_pem):
         '''
@@ -178,9 +182,15 @@ class CertGenerationManager(object):
 
 
 class SerialNumber:
+    """
+    Allocates the serial numbers of the certificates signed by the Pulp CA
+    from an atomic counter in the database. The first time it's used, the
+    counter is seeded with the value of the serial number file used by
+    earlier versions, so that serial numbers are never reused.
+    """
 
     PATH = config.config.get('security', 'serial_number_path')
-    __mutex = RLock()
+    COUNTER_ID = 'certificate'
     __metaclass__ = Singleton
 
     def next(self):
@@ -189,34 +199,164 @@ class SerialNumber:
         @return: The next serial#
         @rtype: int
         """
-        self.__mutex.acquire()
-        try:
-            fp = open(self.PATH, 'a+')
+        collection = CertificateSerialNumber.get_collection()
+        while True:
+            counter = collection.find_and_modify({'_id' : self.COUNTER_ID},
+                                                 {'$inc' : {'value' : 1}},
+                                                 new=True)
+            if counter is not None:
+                return counter['value']
             try:
-                sn = int(fp.read()) + 1
-            except:
-                sn = 1
-            fp.seek(0)
-            fp.truncate(0)
-            fp.write(str(sn))
-            fp.close()
-            return sn
-        finally:
-            self.__mutex.release()
+                collection.insert(CertificateSerialNumber(self.COUNTER_ID, self._file_value()), safe=True)
+            except DuplicateKeyError:
+                # seeded by another thread or process in the meantime
+                pass
 
     def reset(self):
         """
         Reset the serial number
         """
-        self.__mutex.acquire()
+        collection = CertificateSerialNumber.get_collection()
+        collection.update({'_id' : self.COUNTER_ID}, {'$set' : {'value' : 0}}, upsert=True, safe=True)
+
+    def _file_value(self):
+        """
+        Read the last serial# stored in the serial number file
+        @return: the stored serial#, 0 if there isn't one
+        @rtype: int
+        """
+        try:
+            fp = open(self.PATH)
+            try:
+                return int(fp.read())
+            finally:
+                fp.close()
+        except (IOError, ValueError):
+            return 0
+
+
+class KeyPool(object):
+    """
+    Pool of private keys generated ahead of time by a separate thread, which
+    keeps generating keys while the pool holds fewer than the watermark.
+    @ivar watermark: number of keys to keep in the pool
+    @type watermark: int
+    """
+
+    def __init__(self, watermark):
+        self.watermark = watermark
+
+        self.__exit = False
+        self.__lock = Lock()
+        self.__condition = Condition(self.__lock)
+        self.__keys = []
+        self.__generator = None
+
+    def get(self):
+        """
+        Take a private key from the pool, generating one if the pool is empty.
+        @return: PEM encoded private key
+        @rtype: str
+        """
+        self.__lock.acquire()
         try:
-            fp = open(self.PATH, 'w')
-            fp.write('0')
-            fp.close()
+            key = None
+            if self.__keys:
+                key = self.__keys.pop()
+            self.__condition.notify()
         finally:
-            self.__mutex.release()
+            self.__lock.release()
+        if key is None:
+            key = _make_priv_key()
+        return key
+
+    def size(self):
+        """
+        @return: number of keys in the pool
+        @rtype: int
+        """
+        self.__lock.acquire()
+        try:
+            return len(self.__keys)
+        finally:
+            self.__lock.release()
+
+    def __generate(self):
+        """
+        Generator thread loop
+        """
+        self.__lock.acquire()
+        try:
+            while True:
+                while not self.__exit and len(self.__keys) >= self.watermark:
+                    self.__condition.wait()
+                if self.__exit:
+                    break
+                self.__lock.release()
+                try:
+                    key = _make_priv_key()
+                except Exception:
+                    log.exception('Exception generating private key for the key pool')
+                    key = None
+                self.__lock.acquire()
+                if key is None:
+                    self.__condition.wait(KEY_POOL_RETRY_INTERVAL)
+                    continue
+                self.__keys.append(key)
+        finally:
+            self.__lock.release()
+
+    def start(self):
+        """
+        Start the generator thread
+        """
+        assert self.__generator is None
+        self.__lock.acquire()
+        self.__exit = False # needed for re-start
+        try:
+            self.__generator = Thread(target=self.__generate)
+            self.__generator.setDaemon(True)
+            self.__generator.start()
+        finally:
+            self.__lock.release()
+
+    def stop(self):
+        """
+        Stop the generator thread
+        """
+        assert self.__generator is not None
+        self.__lock.acquire()
+        self.__exit = True
+        self.__condition.notify()
+        self.__lock.release()
+        self.__generator.join()
+        self.__generator = None
+
+
+def initialize():
+    """
+    Instantiate the global key pool and start filling it, unless it's disabled
+    by a watermark of 0.
+    """
+    global _KEY_POOL
+    assert _KEY_POOL is None
+    watermark = config.config.getint('security', 'key_pool_watermark')
+    if watermark <= 0:
+        return
+    _KEY_POOL = KeyPool(watermark)
+    _KEY_POOL.start()
+
+
+def finalize():
+    """
+    Stop and discard the global key pool, if there is one.
+    """
+    global _KEY_POOL
+    if _KEY_POOL is None:
+        return
+    _KEY_POOL.stop()
+    _KEY_POOL = None
 
-    
 #----------------------------------------------------------------------------------------------------
 
 def _make_priv_key():
@@ -249,3 +389,63 @@ def _make_cert_request(uid, rsa):
     pk2 = x.get_pubkey()
     return x, pub_key
 
+
+def _ca():
+    """
+    Get the CA certificate and key used to sign certificates, loading them
+    again only when the configured files change.
+
+    @return: tuple of the CA certificate and private key
+    @rtype:  (M2Crypto.X509.X509, M2Crypto.EVP.PKey)
+    """
+    ca_cert = config.config.get('security', 'cacert')
+    ca_key = config.config.get('security', 'cakey')
+    mtimes = (os.path.getmtime(ca_cert), os.path.getmtime(ca_key))
+
+    _CA_LOCK.acquire()
+    try:
+        cached = _CA.get((ca_cert, ca_key))
+        if cached is None or cached[0] != mtimes:
+            cached = (mtimes,
+                      X509.load_cert(ca_cert),
+                      EVP.load_key(ca_key, callback=util.no_passphrase_callback))
+            _CA[(ca_cert, ca_key)] = cached
+        return cached[1], cached[2]
+    finally:
+        _CA_LOCK.release()
+
+
+def _sign_cert_request(req, serial, expiration):
+    """
+    Sign a certificate request with the Pulp server CA, as
+    "openssl x509 -req -sha1 -CA ... -CAkey ... -set_serial ... -days ..." does.
+
+    @param req: certificate request to sign
+    @type  req: M2Crypto.X509.Request
+    @param serial: serial number of the certificate
+    @type  serial: int
+    @param expiration: number of days the certificate is valid
+    @type  expiration: int
+
+    @return: signed certificate
+    @rtype:  M2Crypto.X509.X509
+    """
+    ca_cert, ca_key = _ca()
+
+    now = long(time.time())
+    not_before = ASN1.ASN1_UTCTIME()
+    not_before.set_time(now)
+    not_after = ASN1.ASN1_UTCTIME()
+    not_after.set_time(now + expiration * 24 * 60 * 60)
+
+    cert = X509.X509()
+    # like openssl x509 -req, which doesn't copy the request's extensions
+    cert.set_version(0)
+    cert.set_serial_number(serial)
+    cert.set_subject(req.get_subject())
+    cert.set_issuer(ca_cert.get_subject())
+    cert.set_not_before(not_before)
+    cert.set_not_after(not_after)
+    cert.set_pubkey(req.get_pubkey())
+    cert.sign(ca_key, 'sha1')
+    return cert
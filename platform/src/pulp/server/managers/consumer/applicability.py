@@ -23,6 +23,7 @@ from pulp.plugins.types import database as content_types_db
 from pulp.plugins.conduits.profiler import ProfilerConduit
 from pulp.plugins.loader import api as plugin_api
 from pulp.plugins.loader import exceptions as plugin_exceptions
+from pulp.server.db import connection
 from pulp.server.exceptions import PulpExecutionException
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 from logging import getLogger
@@ -33,6 +34,7 @@ _LOG = getLogger(__name__)
 
 class ApplicabilityManager(object):
 
+    @connection.eventually_consistent
     def units_applicable(self, consumer_criteria=None, repo_criteria=None, units=None):
         """
         Determine and report which of the specified content units
@@ -94,13 +96,25 @@ class ApplicabilityManager(object):
                 # Get all consumer ids registered to the Pulp server
                 consumer_ids = [c['id'] for c in consumer_query_manager.find_all()]
 
-        # Iterate through each consumer to collect applicability reports
+        # A consumer may be listed once for each of its bindings
+        unique_consumer_ids = []
         for consumer_id in consumer_ids:
-            result[consumer_id] = {}
-            
-            # Find repos bound to a consumer
-            bindings = bind_manager.find_by_consumer(consumer_id)
-            bound_repo_ids = [b['repo_id'] for b in bindings]
+            if consumer_id not in result:
+                result[consumer_id] = {}
+                unique_consumer_ids.append(consumer_id)
+        consumer_ids = unique_consumer_ids
+
+        conduit.prefetch_bindings(consumer_ids)
+        profiles = managers.consumer_profile_manager().find_profiles(consumer_ids)
+
+        # Determine the units to consider for each consumer, keyed by type. The
+        # units only depend on the repos, so consumers bound to the same repos
+        # share them.
+        repo_ids_by_consumer = {}
+        unit_keys_by_repo_set = {}
+        unit_keys_by_type = {}
+        for consumer_id in consumer_ids:
+            bound_repo_ids = conduit.get_bindings(consumer_id)
 
             # If repo_criteria is not specified, use repos bound to the consumer, else take intersection 
             # of repos specified in the criteria and repos bound to the consumer.
@@ -108,22 +122,35 @@ class ApplicabilityManager(object):
                 repo_ids = bound_repo_ids
             else:
                 repo_ids = list(set(bound_repo_ids) & set(repo_criteria_ids))
-
-            plugin_unit_keys = self.__parse_units(units, repo_ids)
-            if plugin_unit_keys:
-                pc = self.__profiled_consumer(consumer_id)
-                for typeid, unit_keys in plugin_unit_keys.items():
-                    # Find a profiler for each type id and find units applicable using that profiler.
-                    profiler, cfg = self.__profiler(typeid)
-                    try: 
-                        report_list = profiler.units_applicable(pc, repo_ids, typeid, unit_keys, cfg, conduit)
-                    except PulpExecutionException:
-                        report_list = None
-
-                    if report_list is not None:
-                        result[consumer_id][typeid] = report_list
-                    else: 
-                        _LOG.warn("Profiler for unit type [%s] is not returning applicability reports" % typeid)
+            repo_ids_by_consumer[consumer_id] = repo_ids
+
+            repo_set = frozenset(repo_ids)
+            if repo_set not in unit_keys_by_repo_set:
+                unit_keys_by_repo_set[repo_set] = self.__parse_units(units, repo_ids)
+            for typeid, unit_keys in unit_keys_by_repo_set[repo_set].items():
+                unit_keys_by_type.setdefault(typeid, {})[consumer_id] = unit_keys
+
+        # Find a profiler for each type id and find units applicable to all
+        # of the consumers using that profiler.
+        for typeid, unit_keys_by_consumer in unit_keys_by_type.items():
+            profiler, cfg = self.__profiler(typeid)
+            consumers = [ProfiledConsumer(consumer_id, profiles.get(consumer_id, {}))
+                         for consumer_id in consumer_ids if consumer_id in unit_keys_by_consumer]
+            try:
+                reports = profiler.units_applicable_many(consumers, repo_ids_by_consumer, typeid,
+                                                         unit_keys_by_consumer, cfg, conduit)
+            except PulpExecutionException:
+                reports = None
+
+            if reports is None:
+                _LOG.warn("Profiler for unit type [%s] is not returning applicability reports" % typeid)
+                continue
+
+            for consumer_id, report_list in reports.items():
+                if report_list is not None:
+                    result[consumer_id][typeid] = report_list
+                else:
+                    _LOG.warn("Profiler for unit type [%s] is not returning applicability reports" % typeid)
 
         return result
 
@@ -146,24 +173,6 @@ class ApplicabilityManager(object):
             cfg = {}
         return PluginWrapper(plugin), cfg
 
-    def __profiled_consumer(self, id):
-        """
-        Get a profiler consumer model object.
-
-        :param id: A consumer ID.
-        :type id: str
-
-        :return: A populated profiler consumer model object.
-        :rtype: L{ProfiledConsumer}
-        """
-        profiles = {}
-        manager = managers.consumer_profile_manager()
-        for p in manager.get_profiles(id):
-            typeid = p['content_type']
-            profile = p['profile']
-            profiles[typeid] = profile
-        return ProfiledConsumer(id, profiles)
-
     def __parse_units(self, user_units, repo_ids):
         """
         Parse units specified by user and return a dictionary of all plugin unit_keys 
@@ -131,7 +131,7 @@ class ProfileManager(object):
         """
         profiles = dict([(c, {}) for c in consumer_ids])
         collection = UnitProfile.get_collection()
-        for p in collection.find({'id':{'$in':profiles.keys()}}):
+        for p in collection.find({'consumer_id':{'$in':profiles.keys()}}):
             key = p['consumer_id']
             typeid = p['content_type']
             profile = p['profile']
@@ -15,6 +15,7 @@ import uuid
 
 from pulp.plugins.types import database as content_types_db
 from pulp.server.exceptions import InvalidValue
+from pulp.server.managers import factory as manager_factory
 
 class ContentManager(object):
     """
@@ -42,19 +43,36 @@ class ContentManager(object):
         collection.insert(unit_doc, safe=True)
         return unit_id
 
-    def update_content_unit(self, content_type, unit_id, unit_metadata_delta):
+    def update_content_unit(self, content_type, unit_id, unit_metadata_delta, existing_unit=None):
         """
         Update a content unit's stored metadata.
+        When the currently stored unit is given, only the fields whose values
+        differ from it are written, and nothing is written or journaled if
+        none do.
         @param content_type: unique id of content collection
         @type content_type: str
         @param unit_id: unique id of content unit
         @type unit_id: str
         @param unit_metadata_delta: metadata fields that have changed
         @type unit_metadata_delta: dict
+        @param existing_unit: currently stored content unit, if already retrieved
+        @type existing_unit: dict or None
+        @return: True if the unit was updated, False if nothing changed
+        @rtype: bool
         """
+        if existing_unit is not None:
+            unit_metadata_delta = dict((k, v) for k, v in unit_metadata_delta.items()
+                                       if k not in existing_unit or existing_unit[k] != v)
+            if not unit_metadata_delta:
+                return False
+
         collection = content_types_db.type_units_collection(content_type)
         collection.update({'_id': unit_id}, {'$set': unit_metadata_delta}, safe=True)
 
+        # repositories holding the unit will need to republish it
+        manager_factory.repo_journal_manager().record_unit_update(content_type, unit_id)
+        return True
+
     def remove_content_unit(self, content_type, unit_id):
         """
         Remove a content unit and its metadata from the corresponding pulp db
@@ -21,11 +21,15 @@ from pulp.plugins.types import database as content_types_db
 from pulp.server import config as pulp_config
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db import connection as db_connection
+from pulp.server.db import indexes
 from pulp.server.db.model.repository import RepoContentUnit
 
 
 _LOG = logging.getLogger(__name__)
 
+indexes.declare_query(RepoContentUnit, ['unit_id'],
+                      source='OrphanManager.generate_orphans_by_type')
+
 
 class OrphanManager(object):
 
@@ -21,6 +21,7 @@ from pulp.plugins.loader import api as plugin_api
 from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.server import config as pulp_config
+from pulp.server.db import connection
 from pulp.server.db.model.repository import RepoContentUnit
 from pulp.server.exceptions import PulpDataException, MissingResource, PulpExecutionException, PulpException
 import pulp.server.managers.factory as manager_factory
@@ -171,6 +172,7 @@ class ContentUploadManager(object):
 
         return True
 
+    @connection.versions_deferred
     def import_uploaded_unit(self, repo_id, unit_type_id, unit_key, unit_metadata, upload_id):
         """
         Called to trigger the importer's handling of an uploaded unit. This
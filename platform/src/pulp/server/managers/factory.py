@@ -59,6 +59,7 @@ TYPE_REPO_GROUP_DISTRIBUTOR = 'repo-group-distributor'
 TYPE_REPO_GROUP_PUBLISH     = 'repo-group-publish'
 TYPE_REPO_GROUP_QUERY       = 'repo-group-query-manager'
 TYPE_REPO_IMPORTER          = 'repo-importer-manager'
+TYPE_REPO_JOURNAL           = 'repo-journal-manager'
 TYPE_REPO_DISTRIBUTOR       = 'repo-distributor-manager'
 TYPE_REPO_PUBLISH           = 'repo-publish-manager'
 TYPE_REPO_QUERY             = 'repo-query-manager'
@@ -313,6 +314,12 @@ def repo_unit_association_query_manager():
     """
     return get_manager(TYPE_REPO_ASSOCIATION_QUERY)
 
+def repo_journal_manager():
+    """
+    @rtype: L{pulp.server.managers.repo.journal.RepoChangeJournalManager}
+    """
+    return get_manager(TYPE_REPO_JOURNAL)
+
 def repo_publish_manager():
     """
     @rtype: L{pulp.server.managers.repo.publish.RepoPublishManager}
@@ -413,6 +420,7 @@ def initialize():
     from pulp.server.managers.repo.group.publish import RepoGroupPublishManager
     from pulp.server.managers.repo.group.query import RepoGroupQueryManager
     from pulp.server.managers.repo.importer import RepoImporterManager
+    from pulp.server.managers.repo.journal import RepoChangeJournalManager
     from pulp.server.managers.repo.publish import RepoPublishManager
     from pulp.server.managers.repo.query import RepoQueryManager
     from pulp.server.managers.repo.sync import RepoSyncManager
@@ -458,6 +466,7 @@ def initialize():
         TYPE_REPO_GROUP_PUBLISH : RepoGroupPublishManager,
         TYPE_REPO_GROUP_QUERY : RepoGroupQueryManager,
         TYPE_REPO_IMPORTER: RepoImporterManager,
+        TYPE_REPO_JOURNAL: RepoChangeJournalManager,
         TYPE_REPO_PUBLISH: RepoPublishManager,
         TYPE_REPO_QUERY: RepoQueryManager,
         TYPE_REPO_SYNC: RepoSyncManager,
@@ -19,6 +19,7 @@ or distributor configuration.
 
 from gettext import gettext as _
 import logging
+from multiprocessing.pool import ThreadPool
 import os
 import re
 import shutil
@@ -39,6 +40,11 @@ _DISTRIBUTOR_ID_REGEX = _REPO_ID_REGEX # for now, use the same constraints
 
 _LOG = logging.getLogger(__name__)
 
+# Repositories per grouping query and number of concurrent queries when
+# rebuilding unit counts; the group command is limited to 20,000 unique keys
+_REBUILD_BATCH_SIZE = 500
+_REBUILD_THREADS = 4
+
 # -- classes ------------------------------------------------------------------
 
 class RepoManager(object):
@@ -267,6 +273,9 @@ class RepoManager(object):
 
             # Remove all associations from the repo
             RepoContentUnit.get_collection().remove({'repo_id' : repo_id}, safe=True)
+
+            # Remove the repo's change journal
+            manager_factory.repo_journal_manager().delete_journal(repo_id)
         except Exception, e:
             _LOG.exception('Error updating one or more database collections while removing repo [%s]' % repo_id)
             error_tuples.append( (_('Database Removal Error'), e.args))
@@ -352,16 +361,37 @@ class RepoManager(object):
         @param delta: amount by which to change the total count
         @type  delta: int
         """
+        RepoManager.update_unit_counts(repo_id, {unit_type_id : delta})
+
+    @staticmethod
+    def update_unit_counts(repo_id, deltas):
+        """
+        Updates the count of units associated with the repo for any number of
+        unit types in a single atomic $inc. Bulk association operations should
+        accumulate their changes and make one call to this method rather than
+        one call to update_unit_count per unit.
+
+        @param repo_id: identifies the repo
+        @type  repo_id: str
+
+        @param deltas: mapping of unit type ID to the amount by which to change
+               the count for that type; zero deltas are ignored
+        @type  deltas: dict of str: int
+        """
+        increments = dict(('content_unit_counts.%s' % type_id, delta)
+                          for type_id, delta in deltas.items() if delta)
+        if not increments:
+            return
+
         spec = {'id' : repo_id}
-        operation = {'$inc' : {'content_unit_counts.%s' % unit_type_id: delta}}
+        operation = {'$inc' : increments}
         repo_coll = Repo.get_collection()
 
-        if delta:
-            try:
-                repo_coll.update(spec, operation, safe=True)
-            except pymongo.errors.OperationFailure:
-                message = 'There was a problem updating repository %s' % repo_id
-                raise PulpExecutionException(message), None, sys.exc_info()[2]
+        try:
+            repo_coll.update(spec, operation, safe=True)
+        except pymongo.errors.OperationFailure:
+            message = 'There was a problem updating repository %s' % repo_id
+            raise PulpExecutionException(message), None, sys.exc_info()[2]
 
     def update_repo_and_plugins(self, repo_id, repo_delta, importer_config,
                                 distributor_configs):
@@ -474,13 +504,15 @@ class RepoManager(object):
         repositories, and recalculate the content unit counts for each content
         type.
 
+        The counts are calculated by the database with one grouping query per
+        batch of repositories; batches are processed concurrently.
+
         This method is called from platform migration 0004, so consult that
         migration before changing this method.
 
         :param repo_ids:    list of repository IDs. DEFAULTS TO ALL REPO IDs!!!
         :type  repo_ids:    list
         """
-        association_collection = RepoContentUnit.get_collection()
         repo_collection = Repo.get_collection()
 
         # default to all repos if none were specified
@@ -489,20 +521,49 @@ class RepoManager(object):
 
         _LOG.info('regenerating content unit counts for %d repositories' % len(repo_ids))
 
-        for repo_id in repo_ids:
-            _LOG.debug('regenerating content unit count for repository "%s"' % repo_id)
-            counts = {}
-            cursor = association_collection.find({'repo_id':repo_id})
-            type_ids = cursor.distinct('unit_type_id')
-            cursor.close()
-            for type_id in type_ids:
-                spec = {'repo_id': repo_id, 'unit_type_id': type_id}
-                counts[type_id] = association_collection.find(spec).count()
-            repo_collection.update({'id': repo_id}, {'$set':{'content_unit_counts': counts}}, safe=True)
+        batches = [repo_ids[i:i + _REBUILD_BATCH_SIZE]
+                   for i in range(0, len(repo_ids), _REBUILD_BATCH_SIZE)]
+
+        if len(batches) > 1:
+            pool = ThreadPool(min(len(batches), _REBUILD_THREADS))
+            try:
+                pool.map(_rebuild_content_unit_counts, batches)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for batch in batches:
+                _rebuild_content_unit_counts(batch)
 
 
 # -- functions ----------------------------------------------------------------
 
+def _rebuild_content_unit_counts(repo_ids):
+    """
+    Recalculates and saves the content unit counts for a batch of repositories
+    using a single grouping query over the association collection.
+
+    :param repo_ids:    list of repository IDs
+    :type  repo_ids:    list
+    """
+    association_collection = RepoContentUnit.get_collection()
+    repo_collection = Repo.get_collection()
+
+    # Repositories without any associations do not show up in the results
+    # but still need their counts reset
+    counts = dict((repo_id, {}) for repo_id in repo_ids)
+
+    results = association_collection.group(['repo_id', 'unit_type_id'],
+                                           {'repo_id' : {'$in' : repo_ids}},
+                                           {'count' : 0},
+                                           'function(obj, prev) { prev.count += 1; }')
+    for result in results:
+        counts[result['repo_id']][result['unit_type_id']] = int(result['count'])
+
+    for repo_id, repo_counts in counts.items():
+        _LOG.debug('regenerating content unit count for repository "%s"' % repo_id)
+        repo_collection.update({'id': repo_id}, {'$set':{'content_unit_counts': repo_counts}}, safe=True)
+
 def is_repo_id_valid(repo_id):
     """
     @return: true if the repo ID is valid; false otherwise
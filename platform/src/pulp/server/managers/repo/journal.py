@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Contains the manager class for the per-repository change journal, which
+records the units added to, removed from and updated in each repository so
+distributors can publish incrementally.
+"""
+
+import logging
+
+import pymongo
+
+from pulp.server.db import indexes
+from pulp.server.db.model.repository import Repo, RepoContentChange, RepoContentUnit, RepoDistributor
+
+# -- constants ----------------------------------------------------------------
+
+_LOG = logging.getLogger(__name__)
+
+# Shadowed here to remove the need for the caller to import RepoContentChange
+# to get access to them
+ACTION_ASSOCIATED = RepoContentChange.ACTION_ASSOCIATED
+ACTION_UNASSOCIATED = RepoContentChange.ACTION_UNASSOCIATED
+ACTION_UPDATED = RepoContentChange.ACTION_UPDATED
+
+# Number of journal entries inserted per call
+_INSERT_BATCH_SIZE = 1000
+
+indexes.declare_query(RepoContentChange, ['repo_id'],
+                      sort=[('sequence', pymongo.ASCENDING)],
+                      source='RepoChangeJournalManager.get_changes_since')
+indexes.declare_query(RepoContentUnit, ['unit_id', 'unit_type_id'],
+                      source='RepoChangeJournalManager.record_unit_update')
+
+# -- manager ------------------------------------------------------------------
+
+class RepoChangeJournalManager(object):
+    """
+    Manager used to record and retrieve the changes made to the units in a
+    repository. Each change is assigned a sequence number that increases
+    within the repository; the last assigned number is stored on the repo.
+    """
+
+    def record_changes(self, repo_id, action, unit_type_id, unit_ids):
+        """
+        Appends an entry to the repository's change journal for each of the
+        given units. The sequence numbers for all of the entries are reserved
+        in a single update to the repository.
+
+        @param repo_id: identifies the repo
+        @type  repo_id: str
+
+        @param action: one of the ACTION_* constants in this module
+        @type  action: str
+
+        @param unit_type_id: identifies the type of the changed units
+        @type  unit_type_id: str
+
+        @param unit_ids: IDs of the changed units
+        @type  unit_ids: list of str
+        """
+        unit_ids = list(unit_ids)
+        if not unit_ids:
+            return
+
+        first_sequence = self._reserve_sequences(repo_id, len(unit_ids))
+        if first_sequence is None:
+            # the repo was removed; there's no journal to maintain
+            return
+
+        changes = [RepoContentChange(repo_id, first_sequence + i, action, unit_type_id, unit_id)
+                   for i, unit_id in enumerate(unit_ids)]
+        self._insert_changes(changes)
+
+    def record_unit_update(self, unit_type_id, unit_id):
+        """
+        Appends an update entry to the change journal of every repository the
+        given unit is associated with.
+
+        @param unit_type_id: identifies the type of the updated unit
+        @type  unit_type_id: str
+
+        @param unit_id: ID of the updated unit
+        @type  unit_id: str
+        """
+        spec = {'unit_type_id' : unit_type_id, 'unit_id' : unit_id}
+        cursor = RepoContentUnit.get_collection().find(spec, fields=['repo_id'])
+        repo_ids = set(a['repo_id'] for a in cursor)
+
+        # each repo's sequence must be reserved atomically on its own, but
+        # the entries for all of the repos are inserted together
+        changes = []
+        for repo_id in sorted(repo_ids):
+            sequence = self._reserve_sequences(repo_id, 1)
+            if sequence is not None:
+                changes.append(RepoContentChange(repo_id, sequence, ACTION_UPDATED, unit_type_id, unit_id))
+        self._insert_changes(changes)
+
+    @staticmethod
+    def _reserve_sequences(repo_id, count):
+        """
+        Reserves the given number of consecutive sequence numbers in the
+        repository's journal.
+
+        @return: first reserved sequence number; None if the repo doesn't exist
+        @rtype:  int or None
+        """
+        repo = Repo.get_collection().find_and_modify({'id' : repo_id},
+                                                     {'$inc' : {'last_change_sequence' : count}},
+                                                     new=True, fields=['last_change_sequence'])
+        if repo is None:
+            return None
+        return repo['last_change_sequence'] - count + 1
+
+    @staticmethod
+    def _insert_changes(changes):
+        collection = RepoContentChange.get_collection()
+        for i in range(0, len(changes), _INSERT_BATCH_SIZE):
+            collection.insert(changes[i:i + _INSERT_BATCH_SIZE], safe=True)
+
+    @staticmethod
+    def current_sequence(repo_id):
+        """
+        Returns the sequence number of the most recent change to the repository.
+
+        @param repo_id: identifies the repo
+        @type  repo_id: str
+
+        @return: last assigned sequence number; 0 if the repo has no changes
+                 or doesn't exist
+        @rtype:  int
+        """
+        repo = Repo.get_collection().find_one({'id' : repo_id}, fields=['last_change_sequence'])
+        if repo is None:
+            return 0
+        return repo.get('last_change_sequence', 0)
+
+    @staticmethod
+    def get_changes_since(repo_id, sequence):
+        """
+        Returns the journal entries for the repository that come after the
+        given sequence number, in the order they were made.
+
+        @param repo_id: identifies the repo
+        @type  repo_id: str
+
+        @param sequence: sequence number of the last change already processed
+                         by the caller
+        @type  sequence: int
+
+        @return: list of journal entries
+        @rtype:  list of dict
+        """
+        spec = {'repo_id' : repo_id, 'sequence' : {'$gt' : sequence}}
+        cursor = RepoContentChange.get_collection().find(spec).sort('sequence', pymongo.ASCENDING)
+        return list(cursor)
+
+    def compact(self, repo_id):
+        """
+        Removes the journal entries every distributor on the repository has
+        already published. Distributors that were never successfully published
+        don't hold back compaction; their first publish has to be a full one.
+
+        @param repo_id: identifies the repo
+        @type  repo_id: str
+        """
+        sequences = []
+        cursor = RepoDistributor.get_collection().find({'repo_id' : repo_id},
+                                                       fields=['last_published_sequence'])
+        for distributor in cursor:
+            sequence = distributor.get('last_published_sequence')
+            if sequence is not None:
+                sequences.append(sequence)
+
+        if sequences:
+            spec = {'repo_id' : repo_id, 'sequence' : {'$lte' : min(sequences)}}
+        else:
+            spec = {'repo_id' : repo_id, 'sequence' : {'$lte' : self.current_sequence(repo_id)}}
+        RepoContentChange.get_collection().remove(spec, safe=True)
+
+    @staticmethod
+    def delete_journal(repo_id):
+        """
+        Removes every journal entry for the repository.
+
+        @param repo_id: identifies the repo
+        @type  repo_id: str
+        """
+        RepoContentChange.get_collection().remove({'repo_id' : repo_id}, safe=True)
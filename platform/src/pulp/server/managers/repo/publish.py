@@ -31,6 +31,7 @@ from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.model import PublishReport
 from pulp.plugins.conduits.repo_publish import RepoPublishConduit
 from pulp.plugins.config import PluginCallConfiguration
+from pulp.server.db import indexes
 from pulp.server.db.model.repository import Repo, RepoDistributor, RepoPublishResult
 from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.exceptions import MissingResource, PulpExecutionException
@@ -41,6 +42,9 @@ from pulp.server.managers.repo import _common as common_utils
 
 _LOG = logging.getLogger(__name__)
 
+indexes.declare_query(RepoPublishResult, ['repo_id', 'distributor_id'],
+                      sort=[('completed', pymongo.DESCENDING)], source='RepoPublishManager.publish_history')
+
 # -- manager ------------------------------------------------------------------
 
 class RepoPublishManager(object):
@@ -116,6 +120,10 @@ class RepoPublishManager(object):
         publish_result_coll = RepoPublishResult.get_collection()
         repo_id = repo['id']
 
+        # Changes made from this point on may not be included in the publish
+        journal_manager = manager_factory.repo_journal_manager()
+        publish_sequence = journal_manager.current_sequence(repo_id)
+
         # Perform the publish
         publish_start_timestamp = _now_timestamp()
         try:
@@ -157,6 +165,13 @@ class RepoPublishManager(object):
             summary = details = _('Unknown')
             result_code = RepoPublishResult.RESULT_SUCCESS
 
+        # Remember which changes were published so the next publish can be
+        # incremental, and drop the ones every distributor has now published
+        if result_code == RepoPublishResult.RESULT_SUCCESS:
+            distributor_coll.update({'repo_id' : repo_id, 'id' : distributor_id},
+                                    {'$set' : {'last_published_sequence' : publish_sequence}}, safe=True)
+            journal_manager.compact(repo_id)
+
         result = RepoPublishResult.expected_result(repo_id, repo_distributor['id'], repo_distributor['distributor_type_id'],
                                                    publish_start_timestamp, publish_end_timestamp, summary, details, result_code)
         publish_result_coll.save(result, safe=True)
@@ -34,6 +34,7 @@ from pulp.plugins.conduits.repo_sync import RepoSyncConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.model import SyncReport
 from pulp.server import config as pulp_config
+from pulp.server.db import connection, indexes
 from pulp.server.db.model.repository import Repo, RepoContentUnit, RepoImporter, RepoSyncResult
 from pulp.server.dispatch import constants as dispatch_constants
 from pulp.server.dispatch import factory as dispatch_factory
@@ -46,6 +47,9 @@ from pulp.server.managers.repo import _common as common_utils
 
 _LOG = logging.getLogger(__name__)
 
+indexes.declare_query(RepoSyncResult, ['repo_id'],
+                      sort=[('completed', pymongo.DESCENDING)], source='RepoSyncManager.sync_history')
+
 # -- manager ------------------------------------------------------------------
 
 class RepoSyncManager(object):
@@ -53,6 +57,7 @@ class RepoSyncManager(object):
     Manager used to handle sync and sync query operations.
     """
 
+    @connection.versions_deferred
     def sync(self, repo_id, sync_config_override=None):
         """
         Performs a synchronize operation on the given repository.
@@ -18,6 +18,7 @@ repositories and content units.
 
 import logging
 import pymongo
+from pymongo.errors import DuplicateKeyError
 import sys
 
 import pulp.plugins.conduits._common as conduit_common_utils
@@ -26,7 +27,8 @@ from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
 import pulp.plugins.types.database as types_db
 from pulp.server.db.model.criteria import UnitAssociationCriteria
-from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.db.model.repository import RepoContentChange, RepoContentUnit
+from pulp.server.db import connection
 import pulp.server.managers.factory as manager_factory
 import pulp.server.exceptions as exceptions
 import pulp.server.managers.repo._common as common_utils
@@ -56,6 +58,9 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Number of association documents inserted per call during a bulk copy
+_COPY_BATCH_SIZE = 1000
+
 # -- manager ------------------------------------------------------------------
 
 class RepoUnitAssociationManager(object):
@@ -110,34 +115,35 @@ class RepoUnitAssociationManager(object):
         if owner_type not in _OWNER_TYPES:
             raise exceptions.InvalidValue(['owner_type'])
 
-        # If the association already exists, no need to do anything else
-        spec = {'repo_id' : repo_id,
-                'unit_id' : unit_id,
-                'unit_type_id' : unit_type_id,
-                'owner_type' : owner_type,
-                'owner_id' : owner_id,}
-        existing_association = RepoContentUnit.get_collection().find_one(spec)
-        if existing_association is not None:
-            return
-
         similar_exists = False
         if update_unit_count:
             similar_exists = self.association_exists(repo_id, unit_id, unit_type_id)
 
-        # Create the database entry
+        # Create the database entry; the unique index rejects the association
+        # if it already exists, in which case there's nothing else to do
         association = RepoContentUnit(repo_id, unit_id, unit_type_id, owner_type, owner_id)
-        RepoContentUnit.get_collection().save(association, safe=True)
+        try:
+            RepoContentUnit.get_collection().insert(association, safe=True)
+        except DuplicateKeyError:
+            return
 
         # update the count of associated units on the repo object
         if update_unit_count and not similar_exists:
             manager = manager_factory.repo_manager()
             manager.update_unit_count(repo_id, unit_type_id, 1)
 
+        # record the unit's addition in the repo's change journal
+        if not similar_exists:
+            manager_factory.repo_journal_manager().record_changes(
+                repo_id, RepoContentChange.ACTION_ASSOCIATED, unit_type_id, [unit_id])
+
     def associate_all_by_ids(self, repo_id, unit_type_id, unit_id_list, owner_type, owner_id):
         """
         Creates multiple associations between the given repo and content units.
 
-        See associate_unit_by_id for semantics.
+        See associate_unit_by_id for semantics. The existing associations are
+        retrieved in a single query, the new ones are inserted in batches and
+        the unit count is updated once at the end.
 
         @param repo_id: identifies the repo
         @type  repo_id: str
@@ -159,21 +165,53 @@ class RepoUnitAssociationManager(object):
         @raise InvalidType: if the given owner type is not of the valid enumeration
         """
 
-        # There may be a way to batch this in mongo which would be ideal for a
-        # bulk operation like this. But for deadline purposes, this call will
-        # simply loop and call the single method.
+        if owner_type not in _OWNER_TYPES:
+            raise exceptions.InvalidValue(['owner_type'])
 
-        unique_count = 0
+        collection = RepoContentUnit.get_collection()
+
+        existing_unit_ids = set()
+        owned_unit_ids = set()
+        spec = {'repo_id' : repo_id,
+                'unit_type_id' : unit_type_id,
+                'unit_id' : {'$in' : list(unit_id_list)}}
+        for association in collection.find(spec, fields=['unit_id', 'owner_type', 'owner_id']):
+            existing_unit_ids.add(association['unit_id'])
+            if association['owner_type'] == owner_type and association['owner_id'] == owner_id:
+                owned_unit_ids.add(association['unit_id'])
+
+        added_unit_ids = []
+        inserted_unit_ids = set()
+        batch = []
         for unit_id in unit_id_list:
-            if not self.association_exists(repo_id, unit_id, unit_type_id):
-                unique_count += 1
-            self.associate_unit_by_id(repo_id, unit_type_id, unit_id, owner_type, owner_id, False)
+            if unit_id in owned_unit_ids:
+                continue
+            owned_unit_ids.add(unit_id)
 
-        # update the count of associated units on the repo object
-        if unique_count:
+            if unit_id not in existing_unit_ids:
+                added_unit_ids.append(unit_id)
+
+            batch.append(RepoContentUnit(repo_id, unit_id, unit_type_id, owner_type, owner_id))
+            if len(batch) >= _COPY_BATCH_SIZE:
+                inserted_unit_ids.update(_insert_associations(batch))
+                batch = []
+
+        if batch:
+            inserted_unit_ids.update(_insert_associations(batch))
+
+        # units whose association was created concurrently by another call
+        # are counted and journaled by that call
+        added_unit_ids = [u for u in added_unit_ids if u in inserted_unit_ids]
+
+        # update the count of associated units on the repo object and record
+        # the additions in its change journal
+        if added_unit_ids:
             manager_factory.repo_manager().update_unit_count(
-                repo_id, unit_type_id, unique_count)
+                repo_id, unit_type_id, len(added_unit_ids))
+            manager_factory.repo_journal_manager().record_changes(
+                repo_id, RepoContentChange.ACTION_ASSOCIATED, unit_type_id, added_unit_ids)
 
+    @connection.versions_deferred
     def associate_from_repo(self, source_repo_id, dest_repo_id, criteria=None, import_config_override=None):
         """
         Creates associations in a repository based on the contents of a source
@@ -190,6 +228,11 @@ class RepoUnitAssociationManager(object):
         importer. It is the job of the importer to make the associate calls
         back into Pulp where applicable.
 
+        The exception is an importer that indicates it supports a bulk copy
+        (see Importer.supports_bulk_copy). In that case the associations are
+        copied by Pulp directly in the database using only the unit IDs, and
+        the importer is informed of the copied IDs afterwards.
+
         If criteria is None, the effect of this call is to copy the source
         repository's associations into the destination repository.
 
@@ -230,10 +273,21 @@ class RepoUnitAssociationManager(object):
         # returns a dict with the types under key "types" for some reason.
         supported_type_ids = plugin_api.list_importer_types(dest_repo_importer['importer_type_id'])['types']
 
+        # Load the importer now; it determines how the units are copied
+        importer_instance, plugin_config = plugin_api.get_importer_by_id(dest_repo_importer['importer_type_id'])
+        call_config = PluginCallConfiguration(plugin_config, dest_repo_importer['config'], import_config_override)
+
+        # Importers that simply associate the source units can have the copy
+        # done entirely in the database, without loading the units' metadata
+        bulk_copy = importer_instance.supports_bulk_copy(call_config)
+
         # If criteria is specified, retrieve the list of units now
         associate_us = None
         if criteria is not None:
-            associate_us = load_associated_units(source_repo_id, criteria)
+            if bulk_copy:
+                associate_us = load_associated_unit_ids(source_repo_id, criteria)
+            else:
+                associate_us = load_associated_units(source_repo_id, criteria)
 
             # If units were supposed to be filtered but none matched, we're done
             if len(associate_us) is 0:
@@ -251,7 +305,7 @@ class RepoUnitAssociationManager(object):
         # Convert all of the units into the plugin standard representation if
         # a filter was specified
         transfer_units = None
-        if associate_us is not None:
+        if associate_us is not None and not bulk_copy:
             transfer_units = create_transfer_units(associate_us, associated_unit_type_ids)
 
         # Convert the two repos into the plugin API model
@@ -263,14 +317,24 @@ class RepoUnitAssociationManager(object):
         transfer_source_repo.working_dir = common_utils.importer_working_dir(source_repo_importer['importer_type_id'],
                                                                              source_repo['id'], mkdir=True)
 
-        # Invoke the importer
-        importer_instance, plugin_config = plugin_api.get_importer_by_id(dest_repo_importer['importer_type_id'])
-
-        call_config = PluginCallConfiguration(plugin_config, dest_repo_importer['config'], import_config_override)
         login = manager_factory.principal_manager().get_principal()['login']
         conduit = ImportUnitConduit(source_repo_id, dest_repo_id, source_repo_importer['id'],
                                     dest_repo_importer['id'], RepoContentUnit.OWNER_TYPE_USER, login)
 
+        if bulk_copy:
+            copied_unit_ids = self.copy_associations(source_repo_id, dest_repo_id, associated_unit_type_ids,
+                                                     RepoContentUnit.OWNER_TYPE_USER, login,
+                                                     unit_ids_by_type=associate_us)
+            try:
+                importer_instance.units_copied(transfer_source_repo, transfer_dest_repo, conduit,
+                                               call_config, copied_unit_ids)
+            except Exception:
+                _LOG.exception('Exception from importer [%s] while copying units into repository [%s]' %
+                               (dest_repo_importer['importer_type_id'], dest_repo_id))
+                raise exceptions.PulpExecutionException(), None, sys.exc_info()[2]
+
+            return create_id_dicts(copied_unit_ids)
+
         try:
             copied_units = importer_instance.import_units(transfer_source_repo, transfer_dest_repo, conduit,
                                                           call_config, units=transfer_units)
@@ -281,6 +345,112 @@ class RepoUnitAssociationManager(object):
                            (dest_repo_importer['importer_type_id'], dest_repo_id))
             raise exceptions.PulpExecutionException(), None, sys.exc_info()[2]
 
+    def copy_associations(self, source_repo_id, dest_repo_id, unit_type_ids, owner_type, owner_id,
+                          unit_ids_by_type=None):
+        """
+        Copies the associations of the given unit types from the source
+        repository into the destination repository. The copy is done by type
+        in batches; only the unit IDs are ever loaded from the database.
+
+        The semantics match associate_unit_by_id: units already associated
+        with the destination by the same owner are skipped and the unit counts
+        are only increased for units not previously in the destination at all.
+
+        @param source_repo_id: identifies the source repository
+        @type  source_repo_id: str
+
+        @param dest_repo_id: identifies the destination repository
+        @type  dest_repo_id: str
+
+        @param unit_type_ids: types of units to copy
+        @type  unit_type_ids: iterable of str
+
+        @param owner_type: category of the caller making the association;
+                           must be one of the OWNER_* variables in this module
+        @type  owner_type: str
+
+        @param owner_id: identifies the caller making the association, either
+                         the importer ID or user login
+        @type  owner_id: str
+
+        @param unit_ids_by_type: optional; if specified, only these units will
+               be copied instead of every unit of each type in the source
+        @type  unit_ids_by_type: dict of str: list of str
+
+        @return: mapping of unit type ID to the IDs of the units newly
+                 associated by this call
+        @rtype:  dict of str: list of str
+
+        @raise InvalidValue: if the given owner type is not of the valid enumeration
+        """
+
+        if owner_type not in _OWNER_TYPES:
+            raise exceptions.InvalidValue(['owner_type'])
+
+        collection = RepoContentUnit.get_collection()
+        journal_manager = manager_factory.repo_journal_manager()
+
+        copied_unit_ids = {}
+        unit_count_deltas = {}
+
+        for type_id in unit_type_ids:
+
+            # Determine what is already in the destination so the copy is
+            # idempotent and the unit count stays accurate
+            dest_spec = {'repo_id' : dest_repo_id, 'unit_type_id' : type_id}
+            dest_unit_ids = set()
+            owned_unit_ids = set()
+            for association in collection.find(dest_spec, fields=['unit_id', 'owner_type', 'owner_id']):
+                dest_unit_ids.add(association['unit_id'])
+                if association['owner_type'] == owner_type and association['owner_id'] == owner_id:
+                    owned_unit_ids.add(association['unit_id'])
+
+            if unit_ids_by_type is not None:
+                source_unit_ids = unit_ids_by_type.get(type_id, [])
+            else:
+                source_spec = {'repo_id' : source_repo_id, 'unit_type_id' : type_id}
+                cursor = collection.find(source_spec, fields=['unit_id'])
+                source_unit_ids = (a['unit_id'] for a in cursor)
+
+            new_unit_ids = []
+            added_unit_ids = []
+            inserted_unit_ids = set()
+            batch = []
+            for unit_id in source_unit_ids:
+                # Multiple source associations to the same unit are collapsed
+                # into one here as well
+                if unit_id in owned_unit_ids:
+                    continue
+                owned_unit_ids.add(unit_id)
+
+                if unit_id not in dest_unit_ids:
+                    added_unit_ids.append(unit_id)
+
+                new_unit_ids.append(unit_id)
+                batch.append(RepoContentUnit(dest_repo_id, unit_id, type_id, owner_type, owner_id))
+                if len(batch) >= _COPY_BATCH_SIZE:
+                    inserted_unit_ids.update(_insert_associations(batch))
+                    batch = []
+
+            if batch:
+                inserted_unit_ids.update(_insert_associations(batch))
+
+            # units whose association was created concurrently by another
+            # call are counted and journaled by that call
+            added_unit_ids = [u for u in added_unit_ids if u in inserted_unit_ids]
+
+            unit_count_deltas[type_id] = len(added_unit_ids)
+            journal_manager.record_changes(dest_repo_id, RepoContentChange.ACTION_ASSOCIATED,
+                                           type_id, added_unit_ids)
+
+            if new_unit_ids:
+                copied_unit_ids[type_id] = new_unit_ids
+
+        # update the counts for all of the types at once
+        manager_factory.repo_manager().update_unit_counts(dest_repo_id, unit_count_deltas)
+
+        return copied_unit_ids
+
     def unassociate_unit_by_id(self, repo_id, unit_type_id, unit_id, owner_type, owner_id, notify_plugins=True):
         """
         Removes the association between a repo and the given unit. Only the
@@ -348,6 +518,7 @@ class RepoUnitAssociationManager(object):
         return self.unassociate_by_criteria(repo_id, criteria, owner_type, owner_id,
                                             notify_plugins=notify_plugins)
 
+    @connection.versions_deferred
     def unassociate_by_criteria(self, repo_id, criteria, owner_type, owner_id, notify_plugins=True):
         """
         Unassociate units that are matched by the given criteria.
@@ -376,6 +547,7 @@ class RepoUnitAssociationManager(object):
 
         collection = RepoContentUnit.get_collection()
         repo_manager = manager_factory.repo_manager()
+        journal_manager = manager_factory.repo_journal_manager()
 
         for unit_type_id, unit_ids in unit_map.items():
             spec = {'repo_id': repo_id,
@@ -385,12 +557,18 @@ class RepoUnitAssociationManager(object):
                     'owner_id': owner_id}
             collection.remove(spec, safe=True)
 
-            unique_count = sum(1 for unit_id in unit_ids
-                               if not self.association_exists(repo_id, unit_id, unit_type_id))
-            if not unique_count:
+            # Units still associated through another owner remain counted
+            remaining_spec = {'repo_id': repo_id,
+                              'unit_type_id': unit_type_id,
+                              'unit_id': {'$in': unit_ids}}
+            remaining_unit_ids = set(a['unit_id'] for a in collection.find(remaining_spec, fields=['unit_id']))
+            removed_unit_ids = set(unit_ids) - remaining_unit_ids
+            if not removed_unit_ids:
                 continue
 
-            repo_manager.update_unit_count(repo_id, unit_type_id, -unique_count)
+            repo_manager.update_unit_count(repo_id, unit_type_id, -len(removed_unit_ids))
+            journal_manager.record_changes(repo_id, RepoContentChange.ACTION_UNASSOCIATED,
+                                           unit_type_id, removed_unit_ids)
 
         # Convert the units into transfer units. This happens regardless of whether or not
         # the plugin will be notified as it's used to generate the return result,
@@ -447,20 +625,52 @@ def load_associated_units(source_repo_id, criteria):
 
     return associate_us
 
+def load_associated_unit_ids(source_repo_id, criteria):
+    """
+    Variant of load_associated_units that only retrieves the IDs of the
+    matching units.
+
+    @return: mapping of unit type ID to list of unit IDs
+    @rtype:  dict of str: list of str
+    """
+    criteria.association_fields = ['unit_id', 'unit_type_id', 'created']
+    criteria.unit_fields = ['_id']
+
+    association_query_manager = manager_factory.repo_unit_association_query_manager()
+    associations = association_query_manager.get_units(source_repo_id, criteria=criteria)
+
+    unit_ids_by_type = {}
+    for association in associations:
+        # Units not matching the unit filters come back without metadata
+        if association.get('metadata', {}) is None:
+            continue
+        unit_ids_by_type.setdefault(association['unit_type_id'], []).append(association['unit_id'])
+
+    return unit_ids_by_type
+
 def calculate_associated_type_ids(source_repo_id, associated_units):
-    if associated_units is not None:
+    if isinstance(associated_units, dict):
+        associated_unit_type_ids = set(associated_units)
+    elif associated_units is not None:
         associated_unit_type_ids = set([u['unit_type_id'] for u in associated_units])
     else:
-        association_query_manager = manager_factory.repo_unit_association_query_manager()
-
-        # We may want to make a call here that only retrieves the unique
-        # type IDs instead of all of the units, but for now it doesn't exist
-        # and I'm not entirely sure this will be a huge problem.
-        all_units = association_query_manager.get_units(source_repo_id)
-        associated_unit_type_ids = set(u['unit_type_id'] for u in all_units)
+        associated_unit_type_ids = set(count_associations_by_type(source_repo_id))
 
     return associated_unit_type_ids
 
+def count_associations_by_type(repo_id):
+    """
+    Counts the associations in the given repository for each unit type in a
+    single grouping query run by the database, rather than loading them.
+
+    @return: mapping of unit type ID to number of associations of that type
+    @rtype:  dict of str: int
+    """
+    collection = RepoContentUnit.get_collection()
+    results = collection.group(['unit_type_id'], {'repo_id' : repo_id}, {'count' : 0},
+                               'function(obj, prev) { prev.count += 1; }')
+    return dict((r['unit_type_id'], int(r['count'])) for r in results)
+
 def create_transfer_units(associate_units, associated_unit_type_ids):
     type_defs = {}
     for def_id in associated_unit_type_ids:
@@ -475,6 +685,52 @@ def create_transfer_units(associate_units, associated_unit_type_ids):
 
     return transfer_units
 
+def create_id_dicts(unit_ids_by_type):
+    """
+    Builds the same identity dicts as pulp.plugins.model.Unit.to_id_dict for
+    the given units, retrieving only the unit key fields from the database.
+
+    @param unit_ids_by_type: mapping of unit type ID to list of unit IDs
+    @type  unit_ids_by_type: dict of str: list of str
+
+    @rtype: list of dict
+    """
+    id_dicts = []
+    for type_id, unit_ids in unit_ids_by_type.items():
+        unit_key_fields = types_db.type_units_unit_key(type_id)
+        collection = types_db.type_units_collection(type_id)
+
+        for i in range(0, len(unit_ids), _COPY_BATCH_SIZE):
+            spec = {'_id' : {'$in' : unit_ids[i:i + _COPY_BATCH_SIZE]}}
+            for unit in collection.find(spec, fields=unit_key_fields):
+                unit_key = dict((k, unit.get(k)) for k in unit_key_fields)
+                id_dicts.append({'type_id' : type_id, 'unit_key' : unit_key})
+
+    return id_dicts
+
+def _insert_associations(associations):
+    """
+    Inserts a batch of new association documents. Associations created
+    concurrently by another call are rejected by the unique index and skipped
+    without failing the rest of the batch.
+
+    @param associations: list of associations to insert
+    @type  associations: list of L{RepoContentUnit}
+
+    @return: IDs of the units whose associations were inserted by this call
+    @rtype:  set
+    """
+    collection = RepoContentUnit.get_collection()
+    try:
+        collection.insert(associations, safe=True, continue_on_error=True)
+    except DuplicateKeyError:
+        _LOG.debug('Skipped %d associations, some already existed' % len(associations))
+        # the associations' IDs are assigned here, so the ones found were
+        # inserted by this call and not a concurrent one
+        spec = {'_id' : {'$in' : [a['_id'] for a in associations]}}
+        return set(a['unit_id'] for a in collection.find(spec, fields=['unit_id']))
+    return set(a['unit_id'] for a in associations)
+
 def remove_from_importer(repo_id, transfer_units):
 
     # Retrieve the repo from the database and convert to the transfer repo
@@ -20,6 +20,7 @@ import logging
 import pymongo
 
 import pulp.plugins.types.database as types_db
+from pulp.server.db import indexes
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 from pulp.server.db.model.repository import RepoContentUnit
 
@@ -41,6 +42,13 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+indexes.declare_query(RepoContentUnit, ['repo_id'],
+                      sort=[('unit_type_id', SORT_ASCENDING), ('created', SORT_ASCENDING)],
+                      source='RepoUnitAssociationQueryManager.get_units (default sort)')
+# repo memberships of content units, as looked up by the content search API
+indexes.declare_query(RepoContentUnit, ['unit_id', 'unit_type_id'],
+                      source='RepoUnitAssociationQueryManager.find_by_criteria')
+
 # -- manager ------------------------------------------------------------------
 
 class RepoUnitAssociationQueryManager(object):
@@ -40,6 +40,9 @@ import datetime
 from functools import partial
 import hashlib
 import os
+import Queue
+import sys
+import threading
 import uuid
 
 from pymongo import ASCENDING, DESCENDING
@@ -101,6 +104,17 @@ V2_DISTRO_FILE_DIR = '/var/lib/pulp/content/distribution/%s/%s/'
 # be being written in the first place, so I'm willing to cut corners.
 SKIP_FILES = False
 
+# Number of documents sent to the database in a single insert
+BATCH_SIZE = 1000
+
+# Number of upgrade steps for the different unit types run concurrently
+WORKER_COUNT = 4
+
+# Collection in the v2 database in which each step records its progress, so
+# that an interrupted upgrade resumes where it stopped. It is dropped once
+# every step has succeeded.
+CHECKPOINT_COLLECTION = 'upgrade_unit_checkpoints'
+
 
 # Type definition constants located at the end of this file for readability
 
@@ -118,21 +132,78 @@ def upgrade(v1_database, v2_database):
     init_types_success = _initialize_content_types(v2_database)
     init_associations_success = _initialize_association_collection(v2_database)
 
-    rpms_success = _rpms(v1_database, v2_database, report)
-    srpms_success = _srpms(v1_database, v2_database, report)
-    drpms_success = _drpms(v1_database, v2_database, report)
-    errata_success = _errata(v1_database, v2_database, report)
-    groups_success = _package_groups(v1_database, v2_database, report)
-    categories_success = _package_group_categories(v1_database, v2_database, report)
-    distributions_success = _distributions(v1_database, v2_database, report)
-    iso_success = _isos(v1_database, v2_database, report)
+    # The unit types don't depend on each other, so once the collections are
+    # initialized their steps are run concurrently.
+    unit_steps = (_rpms, _srpms, _drpms, _errata, _package_groups,
+                  _package_group_categories, _distributions, _isos)
+    units_success = _run_steps(unit_steps, v1_database, v2_database, report)
 
     report.success = (init_types_success and init_associations_success and
-                      rpms_success and srpms_success and drpms_success and
-                      groups_success and categories_success and
-                      errata_success and distributions_success and iso_success)
+                      units_success)
+
+    if report.success:
+        v2_database.drop_collection(CHECKPOINT_COLLECTION)
+
     return report
 
+
+def _run_steps(steps, v1_database, v2_database, report):
+    """
+    Runs the given upgrade steps across WORKER_COUNT threads. Steps that were
+    completed by a previous run of the upgrade are skipped. If a step raises an
+    exception, the workers don't start any further steps and the exception is
+    re-raised once the running steps have finished.
+
+    :param steps: upgrade step methods, each accepting the v1 database, the v2
+                  database and the report
+    :type  steps: list
+
+    :return: True if all of the steps succeeded
+    :rtype:  bool
+    """
+
+    pending = Queue.Queue()
+    for step in steps:
+        pending.put(step)
+
+    results = []
+    errors = []
+
+    def _worker():
+        while not errors:
+            try:
+                step = pending.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                results.append(_run_step(step, v1_database, v2_database, report))
+            except Exception:
+                errors.append(sys.exc_info())
+
+    workers = [threading.Thread(target=_worker) for i in range(min(WORKER_COUNT, len(steps)))]
+    for worker in workers:
+        worker.setDaemon(True)
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    if errors:
+        exc_type, exc_value, exc_traceback = errors[0]
+        raise exc_type, exc_value, exc_traceback
+
+    return all(results)
+
+
+def _run_step(step, v1_database, v2_database, report):
+    step_name = step.__name__.lstrip('_')
+    if _checkpoint(v2_database, step_name).get('completed'):
+        return True
+
+    success = step(v1_database, v2_database, report)
+    if success:
+        _save_checkpoint(v2_database, step_name, completed=True)
+    return success
+
 # -- upgrade steps ------------------------------------------------------------
 
 def _initialize_content_types(v2_database):
@@ -213,126 +284,110 @@ def _initialize_association_collection(v2_database):
 
 def _rpms(v1_database, v2_database, report):
     rpm_coll = v2_database.units_rpm
-    all_rpms = v1_database.packages.find({'arch' : {'$ne' : 'src'}})
-    return _packages(v1_database, v2_database, rpm_coll, all_rpms, 'rpm', report)
+    v1_spec = {'arch' : {'$ne' : 'src'}}
+    return _packages(v1_database, v2_database, rpm_coll, v1_spec, 'rpm', 'rpms', report)
 
 
 def _srpms(v1_database, v2_database, report):
     srpm_coll = v2_database.units_srpm
-    all_srpms = v1_database.packages.find({'arch' : 'src'})
-    return _packages(v1_database, v2_database, srpm_coll, all_srpms, 'srpm', report)
+    v1_spec = {'arch' : 'src'}
+    return _packages(v1_database, v2_database, srpm_coll, v1_spec, 'srpm', 'srpms', report)
 
 
-def _packages(v1_database, v2_database, package_coll, all_v1_packages,
-              unit_type_id, report):
+def _packages(v1_database, v2_database, package_coll, v1_spec, unit_type_id,
+              step_name, report):
 
     # In v1, both RPMs and SRPMs are stored in the packages collection.
     # The differentiating factor is the arch which will be 'src' for SRPMs and,
     # well, not src for normal RPMs. This call handles both cases, with the
     # differentiator being done by the parameters.
 
-    # Idempotency: This one is ugly. The unique key for an RPM/SRPM in v2
-    # is NEVRA, checksumtype, and checksum. It's less efficient but way simpler
-    # to iterate over each package in v1 and attempt to insert it, letting
-    # mongo's uniqueness check prevent a duplicate.
-
-    for v1_rpm in all_v1_packages:
-        new_rpm_id = str(uuid.uuid4())
-        v2_rpm = {
-            'name' : v1_rpm['name'],
-            'epoch' : v1_rpm['epoch'],
-            'version' : v1_rpm['version'],
-            'release' : v1_rpm['release'],
-            'arch' : v1_rpm['arch'],
-            'description' : v1_rpm['description'],
-            'vendor' : v1_rpm['vendor'],
-            'filename' : v1_rpm['filename'],
-            'requires' : v1_rpm['requires'],
-            'provides' : v1_rpm['provides'],
-            'buildhost' : v1_rpm['buildhost'],
-            'license' : v1_rpm['license'],
-
-            '_id' : new_rpm_id,
-            '_content_type_id' : unit_type_id
-        }
-
-        # Checksum is weird, it's stored as a dict of checksum type to the
-        # checksum value. In practice the data should never contain multiple
-        # entries (instead, multiple documents would be created in the packages
-        # collection), so if we encouter it warn the user and only store the
-        # first entry.
-        if len(v1_rpm['checksum']) > 1:
-            warning = _('Multiple checksums found for the RPM %(filename)s,'
-                        'only the checksum of type %(type)s will be saved')
-            report.warning(warning % {'filename' : v1_rpm['filename'], 'type' : v1_rpm['checksum'].keys()[0]})
-
-        v2_rpm['checksumtype'] = v1_rpm['checksum'].keys()[0]
-        v2_rpm['checksum'] = v1_rpm['checksum'][v2_rpm['checksumtype']]
-
-        # Relative path will be set during the associations. That information
-        # is only obtainable from a repo itself in v1. Not ideal, but so far
-        # one of the very few places where it's a multi-step process to upgrade
-        # a data type.
+    # Idempotency: The unique key for an RPM/SRPM in v2 is NEVRA, checksumtype,
+    # and checksum. The packages are inserted in batches, letting mongo's
+    # uniqueness check reject the ones already added without stopping the rest
+    # of the batch. The batches themselves are checkpointed so an interrupted
+    # upgrade doesn't start over from the first package.
 
-        # Storage path
-        rpm_path = PACKAGE_PATH_TEMPLATE % v2_rpm
-        storage_path = os.path.join(DIR_RPMS, rpm_path)
-        v2_rpm['_storage_path'] = storage_path
-
-        try:
-            package_coll.insert(v2_rpm, safe=True)
-        except DuplicateKeyError:
-            # I really dislike this pattern, but it's easiest. This is the
-            # idempotency check and isn't a problem that needs to be handled.
+    unit_key_fields = ('name', 'epoch', 'version', 'release', 'arch',
+                       'checksumtype', 'checksum')
+    v2_ass_coll = v2_database.repo_content_units
+    repo_ids_by_package = _v1_repo_ids_by_unit(v1_database, 'packages')
 
-            # Still should try to do the association in the event the unit
-            # was added but the association failed.
-            unit_key_fields = ('name', 'epoch', 'version', 'release', 'arch',
-                               'checksumtype', 'checksum')
-            query = dict([ (k, v2_rpm[k]) for k in unit_key_fields ])
-            existing = package_coll.find_one(query, {'_id' : 1})
-            new_rpm_id = existing['_id']
+    for v1_batch in _v1_batches(v1_database.packages, v1_spec, v2_database, step_name):
+        v2_batch = [_package(v1_rpm, unit_type_id, report) for v1_rpm in v1_batch]
+        v2_ids = _insert_units(package_coll, v2_batch, unit_key_fields)
 
-        _associate_package(v1_database, v2_database, v1_rpm['_id'], new_rpm_id, unit_type_id)
+        new_associations = []
+        for v1_rpm, v2_id in zip(v1_batch, v2_ids):
+            for repo_id in repo_ids_by_package.get(v1_rpm['_id'], ()):
+                new_associations.append(_association(repo_id, v2_id, unit_type_id))
+        _insert_associations(v2_ass_coll, new_associations)
 
     return True
 
 
-def _associate_package(v1_database, v2_database, v1_id, v2_id, unit_type):
+def _package(v1_rpm, unit_type_id, report):
+    new_rpm_id = str(uuid.uuid4())
+    v2_rpm = {
+        'name' : v1_rpm['name'],
+        'epoch' : v1_rpm['epoch'],
+        'version' : v1_rpm['version'],
+        'release' : v1_rpm['release'],
+        'arch' : v1_rpm['arch'],
+        'description' : v1_rpm['description'],
+        'vendor' : v1_rpm['vendor'],
+        'filename' : v1_rpm['filename'],
+        'requires' : v1_rpm['requires'],
+        'provides' : v1_rpm['provides'],
+        'buildhost' : v1_rpm['buildhost'],
+        'license' : v1_rpm['license'],
+
+        '_id' : new_rpm_id,
+        '_content_type_id' : unit_type_id
+    }
 
-    v1_coll = v1_database.repos
-    v2_coll = v2_database.repo_content_units
+    # Checksum is weird, it's stored as a dict of checksum type to the
+    # checksum value. In practice the data should never contain multiple
+    # entries (instead, multiple documents would be created in the packages
+    # collection), so if we encouter it warn the user and only store the
+    # first entry.
+    if len(v1_rpm['checksum']) > 1:
+        warning = _('Multiple checksums found for the RPM %(filename)s,'
+                    'only the checksum of type %(type)s will be saved')
+        report.warning(warning % {'filename' : v1_rpm['filename'], 'type' : v1_rpm['checksum'].keys()[0]})
 
-    # Idempotency: Easiest to let mongo handle it on insert
+    v2_rpm['checksumtype'] = v1_rpm['checksum'].keys()[0]
+    v2_rpm['checksum'] = v1_rpm['checksum'][v2_rpm['checksumtype']]
 
-    repos_with_package = v1_coll.find({'packages' : v1_id}, {'id' : 1})
+    # Relative path will be set during the associations. That information
+    # is only obtainable from a repo itself in v1. Not ideal, but so far
+    # one of the very few places where it's a multi-step process to upgrade
+    # a data type.
 
-    for repo in repos_with_package:
-        new_association = {
-            '_id' : ObjectId(),
-            'repo_id' : repo['id'],
-            'unit_id' : v2_id,
-            'unit_type_id' : unit_type,
-            'owner_type' : DEFAULT_OWNER_TYPE,
-            'owner_id' : DEFAULT_OWNER_ID,
-            'created' : DEFAULT_CREATED,
-            'updated' : DEFAULT_UPDATED,
-        }
-        try:
-            v2_coll.insert(new_association, safe=True)
-        except DuplicateKeyError:
-            # Still hate this model, still the simplest
-            pass
+    # Storage path
+    rpm_path = PACKAGE_PATH_TEMPLATE % v2_rpm
+    storage_path = os.path.join(DIR_RPMS, rpm_path)
+    v2_rpm['_storage_path'] = storage_path
+
+    return v2_rpm
 
 
 def _drpms(v1_database, v2_database, report):
     v2_coll = v2_database.units_drpm
-    v1_coll = v1_database.repos
     v2_ass_coll = v2_database.repo_content_units
-    repos = v1_coll.find()
-    for repo in repos:
+
+    # Idempotency: Same as for RPMs, the DRPMs of each repository are inserted
+    # in batches and mongo's uniqueness check rejects those already added. The
+    # presto metadata is parsed per repository, so each repository is its
+    # own checkpoint.
+
+    unit_key_fields = ('epoch', 'version', 'release', 'filename',
+                       'checksumtype', 'checksum')
+
+    for repos in _v1_batches(v1_database.repos, {}, v2_database, 'drpms', batch_size=1):
+        repo = repos[0]
         deltarpms = presto_parser.get_deltas(repo)
-        new_associations = []
+        new_drpms = []
         for nevra, dpkg in deltarpms.items():
             for drpm in dpkg.deltas.values():
                 drpm_id = str(uuid.uuid4())
@@ -351,27 +406,12 @@ def _drpms(v1_database, v2_database, report):
                     "release" : drpm.release,
                     "size" : drpm.size,
                     }
-                try:
-                    v2_coll.insert(new_drpm, safe=True)
-                except DuplicateKeyError:
-                    # Still hate this model, still the simplest
-                    pass
-                new_association = {
-                    '_id' : ObjectId(),
-                    'repo_id' : repo['id'],
-                    'unit_id' : drpm_id,
-                    'unit_type_id' : 'drpm',
-                    'owner_type' : DEFAULT_OWNER_TYPE,
-                    'owner_id' : DEFAULT_OWNER_ID,
-                    'created' : DEFAULT_CREATED,
-                    'updated' : DEFAULT_UPDATED,
-                }
-                new_associations.append(new_association)
-        if new_associations:
-            try:
-                v2_ass_coll.insert(new_associations, safe=True)
-            except DuplicateKeyError, e:
-                pass
+                new_drpms.append(new_drpm)
+
+        drpm_ids = _insert_units(v2_coll, new_drpms, unit_key_fields)
+        new_associations = [_association(repo['id'], drpm_id, 'drpm') for drpm_id in drpm_ids]
+        _insert_associations(v2_ass_coll, new_associations)
+
     return True
 
 
@@ -382,61 +422,49 @@ def _errata(v1_database, v2_database, report):
     v2_ass_coll = v2_database.repo_content_units
 
     # Idempotency: We're lucky here, the uniqueness is just by ID, so we can
-    # do a pre-fetch and determine what needs to be added.
+    # do a pre-fetch and determine what needs to be added. The errata of a
+    # batch that was interrupted are caught by the uniqueness check and their
+    # existing IDs used for the associations.
 
     v2_errata_ids = [x['id'] for x in v2_coll.find({}, {'id' : 1})]
-    missing_v1_errata = v1_coll.find({'id' : {'$nin' : v2_errata_ids}})
-
-    for v1_erratum in missing_v1_errata:
-        erratum_id = str(uuid.uuid4())
-        new_erratum = {
-            '_id' : erratum_id,
-            '_storage_path' : None,
-            '_content_type_id' : 'erratum',
-
-            'description' : v1_erratum['description'],
-            'from_str' : v1_erratum['from_str'],
-            'id' : v1_erratum['id'],
-            'issued' : v1_erratum['issued'],
-            'pkglist' : v1_erratum.get('pkglist', []),
-            'pushcount' : v1_erratum['pushcount'],
-            'reboot_suggested' : v1_erratum['reboot_suggested'],
-            'references' : v1_erratum['references'],
-            'release' : v1_erratum['release'],
-            'rights' : v1_erratum['rights'],
-            'severity' : v1_erratum['severity'],
-            'solution' : v1_erratum['solution'],
-            'status' : v1_erratum['status'],
-            'summary' : v1_erratum['summary'],
-            'title' : v1_erratum['title'],
-            'type' : v1_erratum['type'],
-            'updated' : v1_erratum['updated'],
-            'version' : v1_erratum['version'],
-        }
-        v2_coll.insert(new_erratum, safe=True)
-
-        # Throughout most of the upgrade scripts, they can be cancelled and
-        # resumed at any point and it will do the right thing. In this case,
-        # it's a nightmare to cross-reference the v1 erratum against the v2
-        # _id field. So adding the association here isn't 100% safe in the event
-        # the user ctrl+c's the upgrade (which they shouldn't do anyway) but
-        # it's close enough.
-        new_associations = []
-        for repo_id in v1_erratum['repoids']:
-            new_association = {
-                '_id' : ObjectId(),
-                'repo_id' : repo_id,
-                'unit_id' : erratum_id,
-                'unit_type_id' : 'erratum',
-                'owner_type' : DEFAULT_OWNER_TYPE,
-                'owner_id' : DEFAULT_OWNER_ID,
-                'created' : DEFAULT_CREATED,
-                'updated' : DEFAULT_UPDATED,
+    v1_spec = {'id' : {'$nin' : v2_errata_ids}}
+
+    for v1_batch in _v1_batches(v1_coll, v1_spec, v2_database, 'errata'):
+        new_errata = []
+        for v1_erratum in v1_batch:
+            new_erratum = {
+                '_id' : str(uuid.uuid4()),
+                '_storage_path' : None,
+                '_content_type_id' : 'erratum',
+
+                'description' : v1_erratum['description'],
+                'from_str' : v1_erratum['from_str'],
+                'id' : v1_erratum['id'],
+                'issued' : v1_erratum['issued'],
+                'pkglist' : v1_erratum.get('pkglist', []),
+                'pushcount' : v1_erratum['pushcount'],
+                'reboot_suggested' : v1_erratum['reboot_suggested'],
+                'references' : v1_erratum['references'],
+                'release' : v1_erratum['release'],
+                'rights' : v1_erratum['rights'],
+                'severity' : v1_erratum['severity'],
+                'solution' : v1_erratum['solution'],
+                'status' : v1_erratum['status'],
+                'summary' : v1_erratum['summary'],
+                'title' : v1_erratum['title'],
+                'type' : v1_erratum['type'],
+                'updated' : v1_erratum['updated'],
+                'version' : v1_erratum['version'],
             }
-            new_associations.append(new_association)
+            new_errata.append(new_erratum)
+
+        erratum_ids = _insert_units(v2_coll, new_errata, ('id',))
 
-        if new_associations:
-            v2_ass_coll.insert(new_associations, safe=True)
+        new_associations = []
+        for v1_erratum, erratum_id in zip(v1_batch, erratum_ids):
+            for repo_id in v1_erratum['repoids']:
+                new_associations.append(_association(repo_id, erratum_id, 'erratum'))
+        _insert_associations(v2_ass_coll, new_associations)
 
     return True
 
@@ -696,7 +724,6 @@ def _package_group_categories(v1_database, v2_database, report):
 
 def _isos(v1_database, v2_database, report):
 
-    v1_repo_coll = v1_database.repos
     v2_ass_coll = v2_database.repo_content_units
     v2_iso_coll = v2_database.units_iso
 
@@ -704,55 +731,148 @@ def _isos(v1_database, v2_database, report):
     # is to attempt the insert and let the uniqueness check kick out anything
     # that's already been added.
 
-    v1_files = v1_database.file.find()
-    for v1_file in v1_files:
-        new_iso_id = str(uuid.uuid4())
+    repo_ids_by_file = _v1_repo_ids_by_unit(v1_database, 'files')
 
-        v2_iso = {
-            '_id' : new_iso_id,
-            '_content_type_id' : 'iso',
+    for v1_batch in _v1_batches(v1_database.file, {}, v2_database, 'isos'):
+        new_isos = []
+        for v1_file in v1_batch:
+            v2_iso = {
+                '_id' : str(uuid.uuid4()),
+                '_content_type_id' : 'iso',
 
-            'name' : v1_file['filename'],
-            'size' : v1_file['size'],
-        }
+                'name' : v1_file['filename'],
+                'size' : v1_file['size'],
+            }
 
-        # Checksum is stored as a dict from type to checksum, but in v1 we
-        # only ever used sha256. The model has been flattened in 2.0 to just
-        # store the checksum itself.
-        v2_iso['checksum'] = v1_file['checksum'].values()[0]
+            # Checksum is stored as a dict from type to checksum, but in v1 we
+            # only ever used sha256. The model has been flattened in 2.0 to just
+            # store the checksum itself.
+            v2_iso['checksum'] = v1_file['checksum'].values()[0]
+            new_isos.append(v2_iso)
 
-        try:
-            v2_iso_coll.insert(v2_iso, safe=True)
-        except DuplicateKeyError:
-            # Still try to do the association in the event the unit already
-            # existed, so find the existing unit for its ID.
-            spec = dict([ (k, v2_iso[k]) for k in v2_iso if k in ('name', 'checksum', 'size')])
-            existing = v2_iso_coll.find_one(spec)
-            new_iso_id = existing['_id']
-
-        repos_with_iso = v1_repo_coll.find({'files' : v1_file['_id']}, {'id' : 1})
-        for v1_repo in repos_with_iso:
-            new_association = {
-                '_id' : ObjectId(),
-                'repo_id' : v1_repo['id'],
-                'unit_id' : new_iso_id,
-                'unit_type_id' : 'iso',
-                'owner_type' : DEFAULT_OWNER_TYPE,
-                'owner_id' : DEFAULT_OWNER_ID,
-                'created' : DEFAULT_CREATED,
-                'updated' : DEFAULT_UPDATED,
-                }
-            try:
-                v2_ass_coll.insert(new_association, safe=True)
-            except DuplicateKeyError:
-                # Still hate this model, still the simplest
-                pass
+        # Still try to do the association in the event the unit already
+        # existed, which is handled by looking up the ID of the existing unit.
+        iso_ids = _insert_units(v2_iso_coll, new_isos, ('name', 'checksum', 'size'))
+
+        new_associations = []
+        for v1_file, iso_id in zip(v1_batch, iso_ids):
+            for repo_id in repo_ids_by_file.get(v1_file['_id'], ()):
+                new_associations.append(_association(repo_id, iso_id, 'iso'))
+        _insert_associations(v2_ass_coll, new_associations)
 
     return True
 
 
 # -- really private -----------------------------------------------------------
 
+def _v1_repo_ids_by_unit(v1_database, field):
+    """
+    The v1 repositories list the IDs of the units in them under the given
+    field. Rather than querying for the repositories containing each unit, a
+    single pass is made over the repositories to map the ID of each unit to
+    the IDs of the repositories it is in.
+
+    :return: dict of v1 unit ID to list of repository IDs
+    :rtype:  dict
+    """
+
+    repo_ids_by_unit = {}
+    for v1_repo in v1_database.repos.find({}, {'id' : 1, field : 1}):
+        for unit_id in v1_repo.get(field) or ():
+            repo_ids_by_unit.setdefault(unit_id, []).append(v1_repo['id'])
+    return repo_ids_by_unit
+
+
+def _v1_batches(v1_coll, v1_spec, v2_database, step_name, batch_size=BATCH_SIZE):
+    """
+    Generates the v1 documents matching the spec in lists of batch_size, in
+    _id order. The _id of the last document of each batch is checkpointed
+    once the caller is done with the batch, and a later run of the same step
+    starts after the last checkpointed document.
+    """
+
+    v1_spec = dict(v1_spec)
+    last_id = _checkpoint(v2_database, step_name).get('last_id')
+    if last_id is not None:
+        v1_spec['_id'] = {'$gt' : last_id}
+
+    batch = []
+    for v1_document in v1_coll.find(v1_spec).sort('_id', ASCENDING):
+        batch.append(v1_document)
+        if len(batch) == batch_size:
+            yield batch
+            _save_checkpoint(v2_database, step_name, last_id=batch[-1]['_id'])
+            batch = []
+
+    if batch:
+        yield batch
+        _save_checkpoint(v2_database, step_name, last_id=batch[-1]['_id'])
+
+
+def _insert_units(v2_coll, new_units, unit_key_fields):
+    """
+    Inserts a batch of units. Units already in the collection are rejected by
+    its uniqueness check without stopping the insert of the rest of the batch.
+
+    :return: the _id of each unit in the order given; for the rejected units,
+             the _id of the unit already in the collection
+    :rtype:  list
+    """
+
+    if not new_units:
+        return []
+
+    try:
+        v2_coll.insert(new_units, safe=True, continue_on_error=True)
+    except DuplicateKeyError:
+        new_ids = [u['_id'] for u in new_units]
+        inserted_ids = set(u['_id'] for u in v2_coll.find({'_id' : {'$in' : new_ids}}, {'_id' : 1}))
+        for unit in new_units:
+            if unit['_id'] in inserted_ids:
+                continue
+            query = dict([ (k, unit[k]) for k in unit_key_fields ])
+            existing = v2_coll.find_one(query, {'_id' : 1})
+            unit['_id'] = existing['_id']
+
+    return [u['_id'] for u in new_units]
+
+
+def _insert_associations(v2_ass_coll, new_associations):
+
+    # Idempotency: Associations added by a previous run are rejected by the
+    # uniqueness check without stopping the insert of the rest of the batch.
+
+    for i in range(0, len(new_associations), BATCH_SIZE):
+        try:
+            v2_ass_coll.insert(new_associations[i:i + BATCH_SIZE], safe=True,
+                               continue_on_error=True)
+        except DuplicateKeyError:
+            pass
+
+
+def _association(repo_id, unit_id, unit_type_id):
+    return {
+        '_id' : ObjectId(),
+        'repo_id' : repo_id,
+        'unit_id' : unit_id,
+        'unit_type_id' : unit_type_id,
+        'owner_type' : DEFAULT_OWNER_TYPE,
+        'owner_id' : DEFAULT_OWNER_ID,
+        'created' : DEFAULT_CREATED,
+        'updated' : DEFAULT_UPDATED,
+    }
+
+
+def _checkpoint(v2_database, step_name):
+    checkpoint = v2_database[CHECKPOINT_COLLECTION].find_one({'_id' : step_name})
+    return checkpoint or {}
+
+
+def _save_checkpoint(v2_database, step_name, **fields):
+    v2_database[CHECKPOINT_COLLECTION].update({'_id' : step_name}, {'$set' : fields},
+                                              upsert=True, safe=True)
+
+
 def _units_collection_name(type_id):
     # Again, the pulp.server code for generating this isn't used to prevent
     # issues if this scheme changes in the future (such a change will be applied
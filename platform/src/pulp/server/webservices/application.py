@@ -47,10 +47,12 @@ from pulp.server.db import reaper
 from pulp.server.debugging import StacktraceDumper
 from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.auth.cert import cert_generator
 from pulp.server.db.migrate import models as migration_models
 from pulp.server.webservices.controllers import (
     agent, consumer_groups, consumers, contents, dispatch, events, permissions,
     plugins, repo_groups, repositories, roles, root_actions, status, users)
+from pulp.server.webservices.middleware.compression import GzipMiddleware
 from pulp.server.webservices.middleware.exception import ExceptionHandlerMiddleware
 from pulp.server.webservices.middleware.postponed import PostponedOperationMiddleware
 
@@ -140,6 +142,9 @@ def _initialize_pulp():
     # database document reaper
     reaper.initialize()
 
+    # pre-generated private keys for consumer and user certificates
+    cert_generator.initialize()
+
     # agent services
     AgentServices.start()
 
@@ -159,7 +164,8 @@ def wsgi_application():
     @return: wsgi application callable
     """
     application = web.subdir_application(URLS).wsgifunc()
-    stack_components = [application, PostponedOperationMiddleware, ExceptionHandlerMiddleware]
+    stack_components = [application, PostponedOperationMiddleware, ExceptionHandlerMiddleware,
+                        GzipMiddleware]
     stack = reduce(lambda a, m: m(a), stack_components)
 
     # The following intentionally don't raise the exception. The logging writes
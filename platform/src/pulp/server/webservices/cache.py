@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+In-process cache of serialized responses. Responses are cached under their
+request uri and entity tag, so a cached response is never served once the
+data it was built from has changed.
+"""
+
+import threading
+
+from pulp.server.config import config
+
+# response cache shared by the requests, created on first use
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Bounded cache of response bodies. The cache is emptied when full; entries
+    for superseded entity tags are never read again and go with it.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.__lock = threading.Lock()
+        # (uri, entity tag) -> response body
+        self.__entries = {}
+
+    def get(self, uri, etag):
+        """
+        @return: cached response body or None
+        """
+        self.__lock.acquire()
+        try:
+            return self.__entries.get((uri, etag))
+        finally:
+            self.__lock.release()
+
+    def put(self, uri, etag, body):
+        self.__lock.acquire()
+        try:
+            if len(self.__entries) >= self.size:
+                self.__entries.clear()
+            self.__entries[(uri, etag)] = body
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        self.__lock.acquire()
+        try:
+            self.__entries.clear()
+        finally:
+            self.__lock.release()
+
+
+def response_cache():
+    """
+    Get the shared response cache, creating it from the server configuration
+    on first use
+    @return: response cache or None if the cache is disabled
+    @rtype: L{ResponseCache} or None
+    """
+    global _CACHE
+    _CACHE_LOCK.acquire()
+    try:
+        if _CACHE is None:
+            size = config.getint('server', 'response_cache_size')
+            if size <= 0:
+                return None
+            _CACHE = ResponseCache(size)
+        return _CACHE
+    finally:
+        _CACHE_LOCK.release()
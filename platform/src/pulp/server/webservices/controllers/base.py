@@ -186,6 +186,14 @@ class JSONController(object):
         http.status_no_content()
         return self._output(None)
 
+    def not_modified(self):
+        """
+        Return a not modified response, which has no body
+        @return: empty response
+        """
+        http.status_not_modified()
+        return ''
+
     def partial_content(self, data):
         '''
         Returns a partial content response. Typically, the returned data should
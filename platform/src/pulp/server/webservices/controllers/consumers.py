@@ -23,6 +23,7 @@ import pulp.server.managers.factory as managers
 from pulp.common.tags import action_tag, resource_tag
 from pulp.server import config as pulp_config
 from pulp.server.auth.authorization import READ, CREATE, UPDATE, DELETE
+from pulp.server.db import connection
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.dispatch import constants as dispatch_constants
 from pulp.server.dispatch import factory as dispatch_factory
@@ -35,7 +36,7 @@ from pulp.server.itineraries.bind import (
     bind_itinerary, unbind_itinerary, forced_unbind_itinerary)
 from pulp.server.webservices.controllers.search import SearchController
 from pulp.server.webservices.controllers.base import JSONController
-from pulp.server.webservices.controllers.decorators import auth_required
+from pulp.server.webservices.controllers.decorators import auth_required, conditional
 from pulp.server.webservices import execution
 from pulp.server.webservices import serialization
 
@@ -83,6 +84,7 @@ def expand_consumers(options, consumers):
 class Consumers(JSONController):
 
     @auth_required(READ)
+    @connection.eventually_consistent
     def GET(self):
         params = web.input()
         manager = managers.consumer_query_manager()
@@ -210,6 +212,7 @@ class Bindings(JSONController):
     """
 
     #@auth_required(READ)
+    @conditional('consumer_bindings', 'repos', 'repo_distributors')
     def GET(self, consumer_id, repo_id=None):
         """
         Fetch all bind objects referencing the
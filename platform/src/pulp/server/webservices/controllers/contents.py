@@ -17,6 +17,7 @@ import web
 
 from pulp.common.tags import action_tag, resource_tag
 from pulp.server.auth.authorization import CREATE, READ, UPDATE, DELETE, EXECUTE
+from pulp.server.db import connection
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.dispatch import constants as dispatch_constants
 from pulp.server.dispatch.call import CallRequest
@@ -24,7 +25,7 @@ from pulp.server.exceptions import MissingResource, InvalidValue
 from pulp.server.managers import factory
 from pulp.server.webservices import execution, serialization
 from pulp.server.webservices.controllers.base import JSONController
-from pulp.server.webservices.controllers.decorators import auth_required
+from pulp.server.webservices.controllers.decorators import auth_required, conditional
 
 # content types controller classes ---------------------------------------------
 from pulp.server.webservices.controllers.search import SearchController
@@ -32,6 +33,7 @@ from pulp.server.webservices.controllers.search import SearchController
 class ContentTypesCollection(JSONController):
 
     @auth_required(READ)
+    @conditional('content_types')
     def GET(self):
         """
         List the available content types.
@@ -76,6 +78,7 @@ class ContentUnitsCollection(JSONController):
         return unit
 
     @auth_required(READ)
+    @connection.eventually_consistent
     def GET(self, type_id):
         """
         List all the available content units.
@@ -114,6 +117,7 @@ class ContentUnitsSearch(SearchController):
             self._type_id, criteria)
 
     @staticmethod
+    @connection.eventually_consistent
     def _add_repo_memberships(units, type_id):
         """
         For a list of units, find what repos each is a member of, and add a list
@@ -17,15 +17,20 @@ pulp.server.webservices.controllers.base.JSONController classes, it is assumed
 that certain other methods will exist.
 """
 
+import hashlib
 import logging
 from gettext import gettext as _
 
+import web
+
 from pulp.common.util import encode_unicode
 from pulp.server.config import config
 from pulp.server.compat import wraps
+from pulp.server.db.connection import collection_versions
 from pulp.server.managers import factory
 from pulp.server.managers.auth.permission.cud import PermissionManager
 from pulp.server.webservices import http
+from pulp.server.webservices.cache import response_cache
 
 # -- constants ----------------------------------------------------------------
 
@@ -234,3 +239,85 @@ def auth_required(operation=None, super_user_only=False):
 
         return _auth_decorator
     return _auth_required
+
+
+def entity_tag(versions):
+    """
+    Build the entity tag of a resource from the versions of the collections
+    it is built from.
+
+    :type versions: dict
+    :param versions: collection name to version and last write time, as
+                     returned by pulp.server.db.connection.collection_versions
+
+    :rtype: str
+    :return: quoted entity tag
+    """
+    digest = hashlib.md5()
+    for name in sorted(versions):
+        version, last_modified = versions[name]
+        # the write time keeps tags apart should the counters be reset
+        digest.update('%s:%d:%s;' % (name, version, last_modified))
+    return '"%s"' % digest.hexdigest()
+
+
+def _validator_headers(etag, last_modified):
+    http.header('ETag', etag)
+    if last_modified is not None:
+        http.header('Last-Modified', http.http_date(last_modified))
+
+
+def conditional(*collection_names):
+    """
+    Controller method wrapper for GET requests on resources built only from
+    the documents of the given versioned collections. The resource is tagged
+    with an ETag and a Last-Modified header derived from the collection
+    versions. A 304 is returned when the client's copy is current, without
+    calling the controller, and otherwise the response is served from the
+    response cache when it holds the current version.
+
+    It must be applied beneath auth_required so that requests are always
+    authenticated and authorized, cached or not.
+
+    :type collection_names: str
+    :param collection_names: names of collections in
+                             pulp.server.db.connection.VERSIONED_COLLECTIONS
+    """
+    def _conditional(method):
+        """
+        Closure method for decorator.
+        """
+        @wraps(method)
+        def _conditional_decorator(self, *args, **kwargs):
+            # the versions are read before the resource is built, so a
+            # resource is never tagged as newer than the data it holds
+            versions = collection_versions(collection_names)
+            etag = entity_tag(versions)
+            modified = [m for v, m in versions.values() if m is not None]
+            last_modified = modified and max(modified) or None
+
+            if http.is_fresh(etag, last_modified):
+                _validator_headers(etag, last_modified)
+                return self.not_modified()
+
+            cache = response_cache()
+            # the full path, query string included, identifies the response
+            uri = web.ctx.fullpath
+            if cache is not None:
+                body = cache.get(uri, etag)
+                if body is not None:
+                    http.status_ok()
+                    http.header('Content-Type', 'application/json')
+                    http.header('Content-Length', len(body))
+                    _validator_headers(etag, last_modified)
+                    return body
+
+            body = method(self, *args, **kwargs)
+            if web.ctx.status.startswith('200'):
+                _validator_headers(etag, last_modified)
+                if cache is not None:
+                    cache.put(uri, etag, body)
+            return body
+
+        return _conditional_decorator
+    return _conditional
@@ -13,15 +13,18 @@
 
 import httplib
 import logging
+import sys
 from gettext import gettext as _
 
 import web
 
+from pulp.server import config as pulp_config
 from pulp.server.auth import authorization
 from pulp.server.db.model.dispatch import QueuedCall
 from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.dispatch import history as dispatch_history
-from pulp.server.exceptions import MissingResource, PulpExecutionException
+from pulp.server.exceptions import InvalidValue, MissingResource, PulpExecutionException
+from pulp.server.util import subdict
 from pulp.server.webservices import serialization
 from pulp.server.webservices.controllers.base import JSONController
 from pulp.server.webservices.controllers.decorators import auth_required
@@ -30,6 +33,12 @@ from pulp.server.webservices.controllers.decorators import auth_required
 
 _LOG = logging.getLogger(__name__)
 
+# call report fields returned by a task search when no fields are requested;
+# enough to tell where each task stands without its progress or result
+TASK_SEARCH_FIELDS = ('call_request_id', 'call_request_group_id', 'call_request_tags',
+                      'state', 'response', 'reasons', 'start_time', 'finish_time',
+                      'exception', 'revision')
+
 # exceptions -------------------------------------------------------------------
 
 class TaskNotFound(MissingResource):
@@ -82,12 +91,71 @@ class TaskCollection(JSONController):
         return self.ok(serialized_call_reports)
 
 
+class TaskSearch(JSONController):
+
+    @auth_required(authorization.READ)
+    def POST(self):
+        """
+        Retrieves the reports for many tasks in a single request.
+
+        All of the following parameters are optional:
+         * ids: list of task ids the tasks must be one of
+         * group_ids: list of task group ids the tasks must belong to one of
+         * tags: list of tags the tasks must all have
+         * fields: list of report fields to return; defaults to TASK_SEARCH_FIELDS
+
+        Completed tasks that are no longer in the queue are included when ids
+        or group_ids are specified.
+        """
+        params = self.params()
+        criteria = {'tags': params.get('tags', None) or []}
+        for param, criterion in (('ids', 'call_request_id_list'),
+                                 ('group_ids', 'call_request_group_id_list')):
+            if params.get(param) is not None:
+                criteria[criterion] = params[param]
+        fields = params.get('fields', None) or TASK_SEARCH_FIELDS
+
+        for value in (criteria.values() + [fields]):
+            if not isinstance(value, (list, tuple)):
+                raise InvalidValue(['ids', 'group_ids', 'tags', 'fields'])
+
+        coordinator = dispatch_factory.coordinator()
+        call_reports = coordinator.find_call_reports(**criteria)
+        found_call_request_ids = set(c.call_request_id for c in call_reports)
+        serialized_call_reports = [subdict(c.serialize(), fields) for c in call_reports]
+
+        if 'call_request_id_list' in criteria or 'call_request_group_id_list' in criteria:
+            # the call request id is needed to weed out calls that completed
+            # after the queue was searched
+            archived_fields = set(fields) | set(['call_request_id'])
+            archived_calls = dispatch_history.find_archived_calls(fields=archived_fields, **criteria)
+            for archived_call in archived_calls:
+                serialized_call_report = archived_call['serialized_call_report']
+                if serialized_call_report['call_request_id'] in found_call_request_ids:
+                    continue
+                found_call_request_ids.add(serialized_call_report['call_request_id'])
+                serialized_call_reports.append(subdict(serialized_call_report, fields))
+
+        return self.ok(serialized_call_reports)
+
+
 class TaskResource(JSONController):
 
     @auth_required(authorization.READ)
     def GET(self, call_request_id):
         link = serialization.link.link_obj('/pulp/api/v2/tasks/%s/' % call_request_id)
         coordinator = dispatch_factory.coordinator()
+        # long poll: with a wait and the last revision seen by the client,
+        # hold the request until the task changes instead of having the
+        # client poll repeatedly
+        filters = self.filters(['wait', 'revision'])
+        if 'wait' in filters and 'revision' in filters:
+            try:
+                revision = int(filters['revision'][0])
+                wait = min(float(filters['wait'][0]), pulp_config.config.getfloat('tasks', 'max_wait'))
+            except ValueError:
+                raise InvalidValue(['wait', 'revision']), None, sys.exc_info()[2]
+            coordinator.wait_for_call_report_change(call_request_id, revision, wait)
         call_reports = coordinator.find_call_reports(call_request_id=call_request_id)
         if call_reports:
             serialized_call_report = call_reports[0].serialize()
@@ -215,6 +283,7 @@ class TaskGroupResource(JSONController):
 
 TASK_URLS = (
     '/', TaskCollection,
+    '/search/', TaskSearch,
     '/([^/]+)/', TaskResource,
 )
 
@@ -23,7 +23,7 @@ from pulp.server.exceptions import MissingResource
 import pulp.server.managers.factory as manager_factory
 from pulp.server.webservices.serialization import link
 from pulp.server.webservices.controllers.base import JSONController
-from pulp.server.webservices.controllers.decorators import auth_required
+from pulp.server.webservices.controllers.decorators import auth_required, conditional
 
 # -- constants ----------------------------------------------------------------
 
@@ -36,6 +36,7 @@ class Types(JSONController):
     # GET: Return all type definitions
 
     @auth_required(READ)
+    @conditional('content_types')
     def GET(self):
         manager = manager_factory.plugin_manager()
         type_defs = manager.types()
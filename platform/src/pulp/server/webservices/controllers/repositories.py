@@ -28,6 +28,7 @@ from pulp.server.itineraries.repository import (
 from pulp.common.tags import action_tag, resource_tag
 from pulp.server import config as pulp_config
 from pulp.server.auth.authorization import CREATE, READ, DELETE, EXECUTE, UPDATE
+from pulp.server.db import connection
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 from pulp.server.db.model.repository import RepoContentUnit, Repo
 from pulp.server.dispatch import constants as dispatch_constants
@@ -38,7 +39,7 @@ from pulp.server.itineraries.repo import (
 from pulp.server.webservices import execution
 from pulp.server.webservices import serialization
 from pulp.server.webservices.controllers.base import JSONController
-from pulp.server.webservices.controllers.decorators import auth_required
+from pulp.server.webservices.controllers.decorators import auth_required, conditional
 from pulp.server.webservices.controllers.search import SearchController
 
 # -- constants ----------------------------------------------------------------
@@ -129,6 +130,7 @@ class RepoCollection(JSONController):
         return repos
 
     @auth_required(READ)
+    @conditional('repos', 'repo_importers', 'repo_distributors')
     def GET(self):
         """
         Looks for query parameters 'importers' and 'distributors', and will add
@@ -550,6 +552,7 @@ class RepoDistributors(JSONController):
     # POST:   Add Distributor
 
     @auth_required(READ)
+    @conditional('repos', 'repo_distributors')
     def GET(self, repo_id):
         distributor_manager = manager_factory.repo_distributor_manager()
 
@@ -1003,6 +1006,7 @@ class RepoUnitAdvancedSearch(JSONController):
     # POST:  Advanced search for repo unit associations
 
     @auth_required(READ)
+    @connection.eventually_consistent
     def POST(self, repo_id):
         # Params
         params = self.params()
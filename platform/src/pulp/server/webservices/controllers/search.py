@@ -14,6 +14,7 @@
 import web
 
 from pulp.server.auth.authorization import READ
+from pulp.server.db import connection
 from pulp.server.db.model.criteria import Criteria
 import pulp.server.exceptions as exceptions
 from pulp.server.webservices.controllers.base import JSONController
@@ -58,10 +59,12 @@ class SearchController(JSONController):
 
         return self.ok(self._get_query_results_from_post())
 
+    @connection.eventually_consistent
     def _get_query_results_from_get(self, ignore_fields=None, is_user_search=False):
         """
         Looks for query parameters that define a Criteria, and returns the
-        results of a search based on that Criteria.
+        results of a search based on that Criteria. Searches may be served by
+        secondary database members.
 
         @param ignore_fields:   Field names to ignore. All other fields will be
                                 used in an attempt to generate a Criteria
@@ -96,10 +99,12 @@ class SearchController(JSONController):
         criteria = Criteria.from_client_input(input)
         return list(self.query_method(criteria))
 
+    @connection.eventually_consistent
     def _get_query_results_from_post(self, is_user_search=False):
         """
         Looks for a Criteria passed as a POST parameter on ket 'criteria', and
-        returns the results of a search based on that Criteria.
+        returns the results of a search based on that Criteria. Searches may be
+        served by secondary database members.
 
         @return:    list of documents from the DB that match the given criteria
                     for the collection associated with this controller
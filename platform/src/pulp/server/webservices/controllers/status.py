@@ -13,11 +13,15 @@
 
 """
 Unauthenticated status API so that other can make sure we're up (to no good).
+The database operation statistics require authentication.
 """
 
 import web
 
+from pulp.server.auth import authorization
+from pulp.server.db import instrumentation
 from pulp.server.webservices.controllers.base import JSONController
+from pulp.server.webservices.controllers.decorators import auth_required
 
 # status controller ------------------------------------------------------------
 
@@ -27,8 +31,23 @@ class StatusController(JSONController):
         status_data = {'api_version': '2'}
         return self.ok(status_data)
 
+
+class DatabaseStatusController(JSONController):
+
+    @auth_required(authorization.READ)
+    def GET(self):
+        status_data = {'instrumentation_enabled': instrumentation.is_enabled()}
+        status_data.update(instrumentation.STATS.serialize())
+        return self.ok(status_data)
+
+    @auth_required(authorization.DELETE)
+    def DELETE(self):
+        instrumentation.STATS.reset()
+        return self.ok(None)
+
 # web.py application -----------------------------------------------------------
 
-URLS = ('/', StatusController)
+URLS = ('/', StatusController,
+        '/database/', DatabaseStatusController)
 
 application = web.application(URLS, globals())
@@ -16,6 +16,8 @@ HTTP utilities to help Pulp web services with HTTP using the web.py framework
 """
 
 import base64
+import calendar
+import email.utils
 import httplib
 import os
 import re
@@ -270,6 +272,42 @@ def ensure_ending_slash(uri_or_path):
         uri_or_path += '/'
     return uri_or_path
 
+def http_date(dt):
+    """
+    Format a UTC datetime as an HTTP date.
+    @type dt: datetime.datetime
+    @param dt: naive datetime in UTC
+    @rtype: str
+    @return: RFC 1123 formatted date
+    """
+    return email.utils.formatdate(calendar.timegm(dt.utctimetuple()), usegmt=True)
+
+
+def is_fresh(etag, last_modified=None):
+    """
+    Determine if the copy of the resource the client made the request with,
+    as described by its If-None-Match or If-Modified-Since headers, is
+    current. If-Modified-Since is only considered when there is no
+    If-None-Match header.
+    @type etag: str
+    @param etag: quoted entity tag of the current resource
+    @type last_modified: datetime.datetime or None
+    @param last_modified: time, in UTC, the resource last changed
+    @rtype: bool
+    @return: True if the client's copy is current
+    """
+    if_none_match = request_info('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(',')]
+        return '*' in tags or etag in tags or 'W/' + etag in tags
+    if_modified_since = request_info('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since is None or last_modified is None:
+        return False
+    since = email.utils.parsedate_tz(if_modified_since)
+    if since is None:
+        return False
+    return calendar.timegm(last_modified.utctimetuple()) <= email.utils.mktime_tz(since)
+
 # response functions ----------------------------------------------------------
 
 def header(hdr, value, unique=True):
@@ -321,6 +359,13 @@ def status_created():
     _status(httplib.CREATED)
 
 
+def status_not_modified():
+    """
+    Set response code to not modified
+    """
+    _status(httplib.NOT_MODIFIED)
+
+
 def status_no_content():
     """
     Set response code to no content
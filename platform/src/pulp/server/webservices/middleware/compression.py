@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import httplib
+import logging
+import zlib
+from cStringIO import StringIO
+from gettext import gettext as _
+
+from pulp.server.compat import json, http_responses
+from pulp.server.config import config
+
+
+_LOG = logging.getLogger(__name__)
+
+# zlib window bits selecting the gzip container rather than the zlib one
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# content encodings already applied to a response by the middleware beneath
+# this one; the utf-8 "encoding" is really a charset and isn't compressed
+IDENTITY_ENCODINGS = ('', 'identity', 'utf-8')
+
+
+def accepts_gzip(environ):
+    """
+    @return: True if the request's Accept-Encoding header allows gzip
+    @rtype:  bool
+    """
+    for coding in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        parts = [p.strip() for p in coding.split(';')]
+        if parts[0].lower() not in ('gzip', 'x-gzip', '*'):
+            continue
+        if 'q=0' in parts or 'q=0.0' in parts:
+            continue
+        return True
+    return False
+
+
+class GzipMiddleware(object):
+    """
+    Gzip compress the responses of clients that accept it and decompress
+    request bodies the client compressed. Responses whose Content-Length is
+    under the threshold are sent as they are; the others are compressed as
+    the application produces them, so the body is never held in memory.
+    """
+
+    def __init__(self, app, threshold=None, level=6, max_request_size=None):
+        self.app = app
+        self.enabled = config.getboolean('server', 'compress_responses')
+        if threshold is None:
+            threshold = config.getint('server', 'response_compression_threshold')
+        self.threshold = threshold
+        self.level = level
+        if max_request_size is None:
+            max_request_size = config.getint('server', 'max_decompressed_request_size')
+        self.max_request_size = max_request_size
+
+    def __call__(self, environ, start_response):
+
+        if environ.get('HTTP_CONTENT_ENCODING', '').lower() in ('gzip', 'x-gzip'):
+            try:
+                decompressed = self._decompress_request(environ)
+            except zlib.error, e:
+                _LOG.info(_('Invalid gzip request body: %(e)s') % {'e': e})
+                return self._error(start_response, httplib.BAD_REQUEST, str(e))
+            if not decompressed:
+                msg = _('Decompressed request body exceeds %(s)d bytes') % {'s': self.max_request_size}
+                _LOG.info(msg)
+                return self._error(start_response, httplib.REQUEST_ENTITY_TOO_LARGE, msg)
+
+        if not self.enabled or not accepts_gzip(environ):
+            return self.app(environ, start_response)
+
+        compress = []
+
+        def _start_response(status, headers, exc_info=None):
+            if self._compressible(status, headers):
+                compress.append(True)
+                headers = self._compressed_headers(headers)
+            else:
+                headers = list(headers) + [('Vary', 'Accept-Encoding')]
+            return start_response(status, headers, exc_info)
+
+        body = self.app(environ, _start_response)
+        if not compress:
+            return body
+        return self._compress(body)
+
+    def _decompress_request(self, environ):
+        """
+        Replace a gzip compressed request body with its decompressed content.
+        The request is decompressed before it is authenticated, so no more
+        than max_request_size bytes are ever inflated.
+        @return: False if the decompressed body would exceed max_request_size
+        @rtype:  bool
+        """
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        data = environ['wsgi.input'].read(length)
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        data = decompressor.decompress(data, self.max_request_size + 1)
+        if len(data) > self.max_request_size or decompressor.unconsumed_tail:
+            return False
+        data += decompressor.flush()
+        if len(data) > self.max_request_size:
+            return False
+        environ['wsgi.input'] = StringIO(data)
+        environ['CONTENT_LENGTH'] = str(len(data))
+        del environ['HTTP_CONTENT_ENCODING']
+        return True
+
+    def _error(self, start_response, code, msg):
+        body = json.dumps({'error_message': msg, 'http_status': code})
+        start_response('%d %s' % (code, http_responses[code]),
+                       [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+        return [body]
+
+    def _compressible(self, status, headers):
+        if not status.startswith('2') or status.startswith('204'):
+            return False
+        for name, value in headers:
+            name = name.lower()
+            if name == 'content-encoding' and value.lower() not in IDENTITY_ENCODINGS:
+                return False
+            if name == 'content-length':
+                try:
+                    if int(value) < self.threshold:
+                        return False
+                except ValueError:
+                    pass
+        return True
+
+    def _compressed_headers(self, headers):
+        compressed = []
+        for name, value in headers:
+            if name.lower() in ('content-length', 'content-encoding'):
+                continue
+            # the compressed entity is only equivalent to the identity one
+            if name.lower() == 'etag' and not value.startswith('W/'):
+                value = 'W/' + value
+            compressed.append((name, value))
+        compressed.append(('Content-Encoding', 'gzip'))
+        compressed.append(('Vary', 'Accept-Encoding'))
+        return compressed
+
+    def _compress(self, body):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, GZIP_WBITS)
+        try:
+            for chunk in body:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
@@ -25,6 +25,7 @@ import mock
 from pulp.plugins.loader import api as plugin_api
 from pulp.plugins.loader import exceptions as plugin_exceptions
 from pulp.plugins.model import SyncReport, PublishReport, ApplicabilityReport
+from pulp.plugins.profiler import Profiler
 
 # -- constants ----------------------------------------------------------------
 
@@ -63,12 +64,17 @@ class MockGroupDistributor(mock.Mock):
 
 class MockProfiler(mock.Mock):
 
+    # batches are handed to the mocked units_applicable
+    units_applicable_many = Profiler.__dict__['units_applicable_many']
+
     @classmethod
     def metadata(cls):
         return {'types' : ['mock-type', 'type-1', 'errata']}
 
 class MockRpmProfiler(mock.Mock):
 
+    units_applicable_many = Profiler.__dict__['units_applicable_many']
+
     @classmethod
     def metadata(cls):
         return {'types' : ['rpm']}
@@ -200,6 +206,7 @@ def install():
     # By default, have the plugins indicate configurations are valid
     MOCK_IMPORTER.validate_config.return_value = True, None
     MOCK_IMPORTER.sync_repo.return_value = SyncReport(True, 10, 5, 1, 'Summary of the sync', 'Details of the sync')
+    MOCK_IMPORTER.supports_bulk_copy.return_value = False
 
     MOCK_GROUP_IMPORTER.validate_config.return_value = True, None
 
@@ -14,7 +14,7 @@
 import base
 import mock_plugins
 
-from mock import Mock
+from mock import Mock, patch
 from pulp.plugins.loader import api as plugins
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model.consumer import Consumer, UnitProfile
@@ -86,3 +86,35 @@ class ApplicabilityManagerTests(base.PulpServerTests):
         result = manager.units_applicable(self.CONSUMER_CRITERIA, self.REPO_CRITERIA, units)
         self.assertTrue('test-1' in result.keys())
         self.assertTrue('test-2' in result.keys())
+
+    def test_units_applicable_many(self):
+        # Setup
+        self.populate()
+        profiler, cfg = plugins.get_profiler_by_type('rpm')
+        profiler.units_applicable_many = Mock(side_effect=lambda c,r,t,u,cfg,x:
+            dict((consumer.id, [ApplicabilityReport(consumer.profiles['rpm'], t)]) for consumer in c))
+        manager = factory.consumer_applicability_manager()
+        # the consumers aren't bound, so provide the units to consider directly
+        unit_keys = {'rpm': [{'name':'zsh'}]}
+        parse_units = patch.object(manager, '_ApplicabilityManager__parse_units', return_value=unit_keys)
+        parse_units.start()
+        try:
+            # Test
+            result = manager.units_applicable(self.CONSUMER_CRITERIA, self.REPO_CRITERIA, unit_keys)
+            # Verify
+            # a single batch for all the consumers
+            self.assertEqual(1, profiler.units_applicable_many.call_count)
+            consumers, repo_ids_by_consumer, type_id, unit_keys_by_consumer = \
+                profiler.units_applicable_many.call_args[0][:4]
+            self.assertEqual(sorted(self.CONSUMER_IDS), sorted(c.id for c in consumers))
+            self.assertEqual('rpm', type_id)
+            for consumer_id in self.CONSUMER_IDS:
+                self.assertEqual([], repo_ids_by_consumer[consumer_id])
+                self.assertEqual(unit_keys['rpm'], unit_keys_by_consumer[consumer_id])
+                report = result[consumer_id]['rpm'][0]
+                self.assertEqual(self.PROFILE, report.summary)
+                self.assertEqual('rpm', report.details)
+        finally:
+            parse_units.stop()
+            # the mock profiler is shared by the other tests
+            del profiler.units_applicable_many
@@ -17,7 +17,8 @@ import unittest
 import pycurl
 
 from pulp.common.download.config import DownloaderConfig
-from pulp.common.download.downloaders.curl import HTTPCurlDownloader
+from pulp.common.download.downloaders.curl import CurlDownloadProgressFunctor, HTTPCurlDownloader
+from pulp.common.download.report import DownloadReport
 
 from test_common_download import DownloadTests, mock_curl_easy_factory, mock_curl_multi_factory, MockObjFactory
 
@@ -196,6 +197,22 @@ class TestAddConnectionConfiguration(unittest.TestCase):
         self.assertTrue(pycurl.MAX_RECV_SPEED_LARGE not in setopt_setting_args)
 
 
+class TestProgressFunctor(unittest.TestCase):
+
+    def test_only_changes_reported(self):
+        report = DownloadReport('http://fake/url', '/fake/destination')
+        callback = mock.Mock()
+        functor = CurlDownloadProgressFunctor(report, callback)
+
+        functor(0, 0, 0, 0)
+        functor(100, 10, 0, 0)
+        functor(100, 10, 0, 0)
+        functor(100, 50, 0, 0)
+
+        self.assertEqual(3, callback.call_count)
+        self.assertEqual(50, report.bytes_downloaded)
+
+
 class TestDownload(DownloadTests):
     """
     This suite of tests are for the HTTPCurlDownloader.download() method.
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import pickle
+import unittest
+
+from pulp.plugins.conduits import _common as common_utils
+from pulp.plugins.model import AssociatedUnit, Unit
+
+# -- constants ----------------------------------------------------------------
+
+TYPE_DEF = {'id' : 'mock-type', 'unit_key' : ['key-1']}
+
+# -- test cases ---------------------------------------------------------------
+
+class ToPluginUnitTests(unittest.TestCase):
+
+    def test_to_plugin_unit(self):
+        # Setup
+        pulp_unit = {'_id' : 'unit-1', 'key-1' : 'a', '_storage_path' : '/a', 'm' : 'm1'}
+
+        # Test
+        unit = common_utils.to_plugin_unit(pulp_unit, TYPE_DEF)
+
+        # Verify
+        self.assertTrue(isinstance(unit, Unit))
+        self.assertEqual('unit-1', unit.id)
+        self.assertEqual('mock-type', unit.type_id)
+        self.assertEqual({'key-1' : 'a'}, unit.unit_key)
+        self.assertEqual('/a', unit.storage_path)
+        self.assertEqual({'m' : 'm1'}, unit.metadata)
+
+        # the original document is left intact
+        self.assertEqual(4, len(pulp_unit))
+
+    def test_to_plugin_associated_unit(self):
+        # Setup
+        pulp_unit = {'unit_id' : 'unit-1', 'created' : 'c', 'updated' : 'u',
+                     'owner_type' : 'importer', 'owner_id' : 'imp',
+                     'metadata' : {'_id' : 'unit-1', 'key-1' : 'a', '_storage_path' : '/a', 'm' : 'm1'}}
+
+        # Test
+        unit = common_utils.to_plugin_associated_unit(pulp_unit, TYPE_DEF)
+
+        # Verify
+        self.assertTrue(isinstance(unit, AssociatedUnit))
+        self.assertEqual('unit-1', unit.id)
+        self.assertEqual({'key-1' : 'a'}, unit.unit_key)
+        self.assertEqual('/a', unit.storage_path)
+        self.assertEqual({'_id' : 'unit-1', 'm' : 'm1'}, unit.metadata)
+        self.assertEqual(('c', 'u', 'importer', 'imp'),
+                         (unit.created, unit.updated, unit.owner_type, unit.owner_id))
+        self.assertEqual(4, len(pulp_unit['metadata']))
+
+    def test_metadata_changes_not_reflected_in_document(self):
+        pulp_unit = {'_id' : 'unit-1', 'key-1' : 'a', 'm' : 'm1'}
+        unit = common_utils.to_plugin_unit(pulp_unit, TYPE_DEF)
+
+        unit.metadata['m'] = 'm2'
+
+        self.assertEqual('m2', unit.metadata['m'])
+        self.assertEqual('m1', pulp_unit['m'])
+
+
+class UnitTests(unittest.TestCase):
+
+    def test_deferred_metadata(self):
+        unit = Unit('mock-type', {'key-1' : 'a'}, None, None)
+        unit.defer_metadata({'key-1' : 'a', 'm' : 'm1'}, frozenset(['key-1']))
+
+        self.assertEqual({'m' : 'm1'}, unit.metadata)
+        # built once and kept
+        self.assertTrue(unit.metadata is unit.metadata)
+
+    def test_set_metadata_replaces_deferred(self):
+        unit = Unit('mock-type', {'key-1' : 'a'}, None, None)
+        unit.defer_metadata({'key-1' : 'a', 'm' : 'm1'}, frozenset(['key-1']))
+
+        unit.metadata = {'m' : 'm2'}
+
+        self.assertEqual({'m' : 'm2'}, unit.metadata)
+
+    def test_to_dict(self):
+        unit = AssociatedUnit('mock-type', {'key-1' : 'a'}, None, '/a', 'c', 'u', 'user', 'admin')
+        unit.defer_metadata({'key-1' : 'a', 'm' : 'm1'}, frozenset(['key-1']))
+
+        self.assertEqual({'type_id' : 'mock-type', 'unit_key' : {'key-1' : 'a'},
+                          'metadata' : {'m' : 'm1'}, 'storage_path' : '/a'}, unit.to_dict())
+
+    def test_no_instance_dict(self):
+        unit = AssociatedUnit('mock-type', {'key-1' : 'a'}, {}, None, None, None, None, None)
+        self.assertFalse(hasattr(unit, '__dict__'))
+
+    def test_pickle(self):
+        unit = AssociatedUnit('mock-type', {'key-1' : 'a'}, None, '/a', 'c', 'u', 'user', 'admin')
+        unit.defer_metadata({'key-1' : 'a', 'm' : 'm1'}, frozenset(['key-1']))
+        unit.id = 'unit-1'
+
+        copied = pickle.loads(pickle.dumps(unit))
+
+        self.assertTrue(isinstance(copied, AssociatedUnit))
+        self.assertEqual('unit-1', copied.id)
+        self.assertEqual({'key-1' : 'a'}, copied.unit_key)
+        self.assertEqual({'m' : 'm1'}, copied.metadata)
+        self.assertEqual('/a', copied.storage_path)
+        self.assertEqual('admin', copied.owner_id)
@@ -450,6 +450,8 @@ class AddUnitMixinTests(unittest.TestCase):
         # Verify
         self.assertEqual(1, mock_get.call_count)
         self.assertEqual(1, mock_update.call_count)
+        # the stored unit is passed along so unchanged units aren't rewritten
+        self.assertEqual({'_id' : 'existing'}, mock_update.call_args[0][3])
         self.assertEqual(0, mock_add.call_count)
         self.assertEqual(1, mock_associate.call_count)
         self.assertEqual(0, self.mixin._added_count)
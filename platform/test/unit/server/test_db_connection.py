@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import mock
+import pymongo
+
+import base
+
+from pulp.server import config
+from pulp.server.db import connection
+
+# -- test cases ---------------------------------------------------------------
+
+class ReadRouteTests(base.PulpServerTests):
+
+    def test_default_route(self):
+        self.assertEqual(connection.READ_ROUTE_PRIMARY, connection.current_read_route())
+        self.assertEqual(connection.READ_ROUTE_PRIMARY, connection.get_collection('test').read_route)
+
+    def test_eventually_consistent(self):
+        # Setup
+        @connection.eventually_consistent
+        def nested():
+            return connection.current_read_route()
+
+        @connection.eventually_consistent
+        def read():
+            return connection.current_read_route(), nested(), connection.current_read_route()
+
+        # Test
+        routes = read()
+
+        # Verify
+        self.assertEqual((connection.READ_ROUTE_SECONDARY,) * 3, routes)
+        self.assertEqual(connection.READ_ROUTE_PRIMARY, connection.current_read_route())
+
+    def test_route_reset_on_error(self):
+        @connection.eventually_consistent
+        def read():
+            raise ValueError()
+
+        self.assertRaises(ValueError, read)
+        self.assertEqual(connection.READ_ROUTE_PRIMARY, connection.current_read_route())
+
+    def test_no_secondary_reads_configured(self):
+        # without a replica set, reads on the secondary route go to the primary
+        collection = connection.eventually_consistent(connection.get_collection)('test')
+        self.assertEqual(connection.READ_ROUTE_PRIMARY, collection.read_route)
+
+    @mock.patch.object(connection, '_secondary_tag_sets', [{'use' : 'reporting'}])
+    @mock.patch.object(connection, '_secondary_read_preference', pymongo.ReadPreference.SECONDARY)
+    def test_secondary_collection(self):
+        collection = connection.eventually_consistent(connection.get_collection)('test')
+
+        self.assertEqual(connection.READ_ROUTE_SECONDARY, collection.read_route)
+        self.assertEqual(pymongo.ReadPreference.SECONDARY, collection.read_preference)
+        self.assertEqual([{'use' : 'reporting'}], collection.tag_sets)
+
+
+class SONManipulatorTests(base.PulpServerTests):
+
+    def tearDown(self):
+        super(SONManipulatorTests, self).tearDown()
+        connection.get_collection('repo_content_units').remove({'unit_id' : 'manipulated'}, safe=True)
+        connection.get_collection('repos').remove({'id' : 'manipulated'}, safe=True)
+
+    def test_uses_son_manipulators(self):
+        self.assertTrue(connection.uses_son_manipulators('repos'))
+        self.assertFalse(connection.uses_son_manipulators('repo_content_units'))
+        self.assertFalse(connection.uses_son_manipulators('units_rpm'))
+
+    def test_manipulated(self):
+        collection = connection.get_collection('repos')
+        collection.insert({'id' : 'manipulated'}, safe=True)
+        self.assertEqual('repos', collection.find_one({'id' : 'manipulated'})['_ns'])
+
+    def test_not_manipulated(self):
+        # Setup
+        repo = {'id' : 'manipulated'}
+        connection.get_collection('repos').insert(repo, safe=True)
+        collection = connection.get_collection('repo_content_units')
+
+        # Test
+        collection.insert({'unit_id' : 'manipulated', 'repo' : repo}, safe=True)
+
+        # Verify
+        association = collection.find_one({'unit_id' : 'manipulated'})
+        self.assertTrue('_id' in association)
+        self.assertFalse('_ns' in association)
+        # the repo is embedded as is rather than replaced with a reference
+        self.assertEqual(repo, association['repo'])
+
+
+class SecondaryReadSettingsTests(base.PulpServerTests):
+
+    def tearDown(self):
+        super(SecondaryReadSettingsTests, self).tearDown()
+        config.config.set('database', 'secondary_reads', 'false')
+        config.config.set('database', 'secondary_read_tags', '')
+
+    def test_no_replica_set(self):
+        config.config.set('database', 'secondary_reads', 'true')
+        self.assertEqual((None, None), connection._secondary_read_settings(''))
+
+    def test_disabled(self):
+        self.assertEqual((None, None), connection._secondary_read_settings('rs0'))
+
+    def test_tags(self):
+        config.config.set('database', 'secondary_reads', 'true')
+        config.config.set('database', 'secondary_read_tags', 'use:reporting, dc:east')
+
+        read_preference, tag_sets = connection._secondary_read_settings('rs0')
+
+        self.assertTrue(read_preference is not None)
+        self.assertEqual([{'use' : 'reporting', 'dc' : 'east'}], tag_sets)
+
+
+class VersionedCollectionTests(base.PulpServerTests):
+
+    def tearDown(self):
+        super(VersionedCollectionTests, self).tearDown()
+        connection.get_collection('repos').remove({'id' : 'versioned'}, safe=True)
+        connection.get_collection(connection.VERSIONS_COLLECTION).remove(safe=True)
+
+    def test_never_written(self):
+        self.assertEqual({'repos' : (0, None)}, connection.collection_versions(['repos']))
+
+    def test_write_increments_version(self):
+        collection = connection.get_collection('repos')
+        collection.insert({'id' : 'versioned'}, safe=True)
+        collection.update({'id' : 'versioned'}, {'$set' : {'notes' : {}}}, safe=True)
+
+        versions = connection.collection_versions(['repos', 'repo_importers'])
+        self.assertEqual(2, versions['repos'][0])
+        self.assertTrue(versions['repos'][1] is not None)
+        self.assertEqual((0, None), versions['repo_importers'])
+
+    def test_read_does_not_increment_version(self):
+        connection.get_collection('repos').find_one({'id' : 'versioned'})
+        self.assertEqual((0, None), connection.collection_versions(['repos'])['repos'])
+
+    def test_unversioned_collection(self):
+        connection.get_collection('test').insert({'id' : 'versioned'}, safe=True)
+        connection.get_collection('test').remove(safe=True)
+        self.assertEqual(0, connection.get_collection(connection.VERSIONS_COLLECTION).find().count())
+
+    def test_failed_write_increments_version(self):
+        collection = connection.get_collection('repos')
+        collection.insert({'_id' : 'versioned', 'id' : 'versioned'}, safe=True)
+        self.assertRaises(pymongo.errors.DuplicateKeyError, collection.insert,
+                          {'_id' : 'versioned', 'id' : 'versioned'}, safe=True)
+        self.assertEqual(2, connection.collection_versions(['repos'])['repos'][0])
+
+    @mock.patch.object(connection, '_log')
+    def test_failed_bump_not_raised(self, mock_log):
+        collection = mock.MagicMock()
+        collection.database.__getitem__.side_effect = pymongo.errors.AutoReconnect()
+        connection._bump_version(collection)
+        self.assertEqual(1, mock_log.exception.call_count)
+
+    def test_versions_deferred(self):
+        collection = connection.get_collection('repos')
+
+        @connection.versions_deferred
+        def write():
+            collection.insert({'id' : 'versioned'}, safe=True)
+            for i in range(3):
+                collection.update({'id' : 'versioned'}, {'$inc' : {'content_unit_counts.rpm' : 1}}, safe=True)
+                self.assertEqual(0, connection.collection_versions(['repos'])['repos'][0])
+
+        write()
+        self.assertEqual(1, connection.collection_versions(['repos'])['repos'][0])
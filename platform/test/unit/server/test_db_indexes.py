@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import mock
+import pymongo
+
+import base
+
+from pulp.server.db import indexes
+from pulp.server.db.model.base import Model
+from pulp.server.managers import factory as manager_factory
+
+# -- constants ----------------------------------------------------------------
+
+ASC = pymongo.ASCENDING
+DESC = pymongo.DESCENDING
+
+# -- models -------------------------------------------------------------------
+
+class IndexedModel(Model):
+    collection_name = 'test_indexed_models'
+    unique_indices = ('id',)
+    search_indices = (('a', 'b'),)
+
+# -- test cases ---------------------------------------------------------------
+
+class QueryShapeTests(base.PulpServerTests):
+
+    def test_index_key(self):
+        shape = indexes.QueryShape(IndexedModel, ['a', 'b'], sort=[('c', DESC)])
+        self.assertEqual([('a', ASC), ('b', ASC), ('c', DESC)], shape.index_key())
+
+    def test_supported_by_prefix(self):
+        shape = indexes.QueryShape(IndexedModel, ['b', 'a'])
+        self.assertTrue(shape.is_supported_by([('a', DESC), ('b', DESC), ('c', DESC)]))
+        self.assertFalse(shape.is_supported_by([('a', DESC), ('c', DESC), ('b', DESC)]))
+        self.assertFalse(shape.is_supported_by([('b', DESC)]))
+
+    def test_supported_by_sort(self):
+        shape = indexes.QueryShape(IndexedModel, ['a'], sort=[('b', ASC), ('c', DESC)])
+        self.assertTrue(shape.is_supported_by([('a', ASC), ('b', ASC), ('c', DESC)]))
+        # the index can be traversed backwards
+        self.assertTrue(shape.is_supported_by([('a', ASC), ('b', DESC), ('c', ASC)]))
+        self.assertFalse(shape.is_supported_by([('a', ASC), ('b', ASC), ('c', ASC)]))
+        self.assertFalse(shape.is_supported_by([('a', ASC), ('c', DESC), ('b', ASC)]))
+
+    def test_is_collection_scan(self):
+        self.assertTrue(indexes.is_collection_scan({'cursor' : 'BasicCursor'}))
+        self.assertFalse(indexes.is_collection_scan({'cursor' : 'BtreeCursor a_-1'}))
+        collscan = {'queryPlanner' : {'winningPlan' : {'stage' : 'SORT', 'inputStage' : {'stage' : 'COLLSCAN'}}}}
+        self.assertTrue(indexes.is_collection_scan(collscan))
+        ixscan = {'queryPlanner' : {'winningPlan' : {'stage' : 'FETCH', 'inputStage' : {'stage' : 'IXSCAN'}}}}
+        self.assertFalse(indexes.is_collection_scan(ixscan))
+
+
+class ReconcileTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(ReconcileTests, self).setUp()
+        self.shapes = {}
+        self.patcher = mock.patch.object(indexes, '_QUERY_SHAPES', self.shapes)
+        self.patcher.start()
+
+    def tearDown(self):
+        super(ReconcileTests, self).tearDown()
+        self.patcher.stop()
+        IndexedModel.get_collection().drop()
+
+    def test_reconcile(self):
+        # Setup
+        indexes.declare_query(IndexedModel, ['a'])
+        indexes.declare_query(IndexedModel, ['c'])
+        indexes.declare_query(IndexedModel, ['c', 'd'], sort=[('e', DESC)])
+        self.assertEqual(2, len(indexes.unsupported_queries(IndexedModel.collection_name)))
+
+        # Test
+        created = indexes.reconcile_indices()
+
+        # Verify
+        # the shape on c is supported by the index created for c, d, e
+        self.assertEqual(1, len(created[IndexedModel.collection_name]))
+        self.assertEqual([], indexes.unsupported_queries(IndexedModel.collection_name))
+        self.assertEqual({}, indexes.reconcile_indices())
+
+
+class DeclaredQueryTests(base.PulpServerTests):
+    """
+    Explains each query shape declared by the server's managers against the
+    test database, after reconciling its indices as pulp-manage-db does.
+    """
+
+    def setUp(self):
+        super(DeclaredQueryTests, self).setUp()
+        manager_factory.initialize()
+        indexes.reconcile_indices()
+
+    def test_no_collection_scans(self):
+        shapes = indexes.declared_queries()
+        self.assertTrue(shapes)
+
+        for shape in shapes:
+            # the query planner doesn't consider indices for empty collections
+            collection = shape.model.get_collection()
+            seed = dict((f, 'seed') for f, d in shape.index_key())
+            seed_id = collection.insert(seed, safe=True)
+            try:
+                explanation = indexes.explain(shape)
+            finally:
+                collection.remove({'_id' : seed_id}, safe=True)
+
+            self.assertFalse(indexes.is_collection_scan(explanation),
+                             '%r from %s scans the collection' % (shape, shape.source))
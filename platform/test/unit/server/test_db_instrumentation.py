@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import mock
+
+import base
+
+from pulp.server.db import connection, instrumentation
+from pulp.server.db.model.repository import Repo
+from pulp.server.dispatch import context as dispatch_context
+
+# -- test cases ---------------------------------------------------------------
+
+class QueryStatsTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(QueryStatsTests, self).setUp()
+        self.stats = instrumentation.QueryStats()
+
+    def test_record(self):
+        # Test
+        self.stats.record('repos', 'find', 0.002, 3, 'GET /v2/repositories/')
+        self.stats.record('repos', 'find', 10.0, 1, 'task sync')
+        self.stats.record('repos', 'update', 0.0001, 1, 'task sync')
+
+        # Verify
+        data = self.stats.serialize()
+        find = data['collections']['repos']['find']
+        self.assertEqual(2, find['count'])
+        self.assertEqual(4, find['documents'])
+        self.assertEqual(10.0, find['max_time'])
+        self.assertEqual(1, find['histogram']['<=0.005s'])
+        self.assertEqual(1, find['histogram']['>5s'])
+        self.assertEqual(1, data['collections']['repos']['update']['histogram']['<=0.001s'])
+        self.assertEqual({'repos.find' : 1, 'repos.update' : 1}, data['contexts']['task sync'])
+
+    def test_reset(self):
+        self.stats.record('repos', 'find', 0.002, 3, 'task sync')
+        self.stats.reset()
+        self.assertEqual({'collections' : {}, 'contexts' : {}, 'routes' : {}}, self.stats.serialize())
+
+    @mock.patch.object(instrumentation, 'MAX_CONTEXTS', 2)
+    def test_max_contexts(self):
+        # Test
+        for i in range(4):
+            self.stats.record('repos', 'find', 0.002, 1, 'task %d' % i)
+        self.stats.record('repos', 'find', 0.002, 1, 'task 0')
+
+        # Verify
+        contexts = self.stats.serialize()['contexts']
+        self.assertEqual(set(['task 0', 'task 1', instrumentation.OTHER_CONTEXT]), set(contexts))
+        self.assertEqual(2, contexts['task 0']['repos.find'])
+        self.assertEqual(2, contexts[instrumentation.OTHER_CONTEXT]['repos.find'])
+
+
+class CurrentContextTests(base.PulpServerTests):
+
+    def tearDown(self):
+        super(CurrentContextTests, self).tearDown()
+        dispatch_context.CONTEXT.callable_name = None
+
+    def test_task_context(self):
+        dispatch_context.CONTEXT.callable_name = 'sync'
+        self.assertEqual('task sync', instrumentation.current_context())
+
+    def test_no_context(self):
+        self.assertEqual(instrumentation.NO_CONTEXT, instrumentation.current_context())
+
+
+class InstrumentTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(InstrumentTests, self).setUp()
+        instrumentation.STATS.reset()
+        self.collection = mock.Mock()
+        self.collection.name = 'repos'
+        self.collection.read_route = 'primary'
+
+    def tearDown(self):
+        super(InstrumentTests, self).tearDown()
+        instrumentation.STATS.reset()
+
+    def test_instrument(self):
+        # Setup
+        method = mock.Mock(return_value={'n' : 2})
+        update = instrumentation.instrument(self.collection, 'update', method)
+
+        # Test
+        result = update({'id' : 'repo-1'}, {'$set' : {'a' : 1}}, safe=True)
+
+        # Verify
+        self.assertEqual({'n' : 2}, result)
+        method.assert_called_once_with({'id' : 'repo-1'}, {'$set' : {'a' : 1}}, safe=True)
+        stats = instrumentation.STATS.serialize()['collections']['repos']['update']
+        self.assertEqual(1, stats['count'])
+        self.assertEqual(2, stats['documents'])
+
+    def test_nested_operations_recorded_once(self):
+        # Setup
+        find_one = instrumentation.instrument(self.collection, 'find_one', mock.Mock(return_value=None))
+        save = instrumentation.instrument(self.collection, 'save', lambda doc: find_one({'_id' : 1}))
+
+        # Test
+        save({'_id' : 1})
+
+        # Verify
+        self.assertEqual(['save'], instrumentation.STATS.serialize()['collections']['repos'].keys())
+
+    @mock.patch.object(instrumentation, '_LOG')
+    @mock.patch.object(instrumentation, 'slow_operation_threshold', return_value=-1)
+    def test_slow_operation_logged(self, mock_threshold, mock_log):
+        insert = instrumentation.instrument(self.collection, 'insert', mock.Mock())
+
+        insert({'_id' : 'repo-1', 'notes' : 'x' * 2048})
+
+        self.assertEqual(1, mock_log.warn.call_count)
+        message = mock_log.warn.call_args[0][0]
+        self.assertTrue('repos.insert' in message)
+        self.assertTrue("{'_id': 'repo-1'}" in message)
+        self.assertFalse('notes' in message)
+
+    @mock.patch.object(instrumentation, '_LOG')
+    @mock.patch.object(instrumentation, 'slow_operation_threshold', return_value=-1)
+    def test_slow_operation_logs_query_only(self, mock_threshold, mock_log):
+        find_and_modify = instrumentation.instrument(self.collection, 'find_and_modify', mock.Mock())
+
+        find_and_modify(query={'id' : 'repo-1'}, update={'$set' : {'notes' : 'secret'}})
+
+        message = mock_log.warn.call_args[0][0]
+        self.assertTrue("{'id': 'repo-1'}" in message)
+        self.assertFalse('secret' in message)
+
+    def test_exception_not_recorded(self):
+        insert = instrumentation.instrument(self.collection, 'insert', mock.Mock(side_effect=ValueError()))
+
+        self.assertRaises(ValueError, insert, {})
+        self.assertEqual({}, instrumentation.STATS.serialize()['collections'])
+
+    def test_read_route(self):
+        # Setup
+        self.collection.read_route = 'secondary'
+        find_one = instrumentation.instrument(self.collection, 'find_one', mock.Mock(return_value={}))
+        update = instrumentation.instrument(self.collection, 'update', mock.Mock(return_value=None))
+
+        # Test
+        find_one({'id' : 'repo-1'})
+        update({'id' : 'repo-1'}, {'$set' : {'a' : 1}})
+
+        # Verify
+        routes = instrumentation.STATS.serialize()['routes']
+        self.assertEqual(1, routes['secondary']['count'])
+        # writes always go to the primary
+        self.assertEqual(1, routes['primary']['count'])
+
+
+class InstrumentedCollectionTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(InstrumentedCollectionTests, self).setUp()
+        instrumentation.STATS.reset()
+        self.collection = connection.PulpCollection(connection._database, Repo.collection_name,
+                                                    instrument=True)
+
+    def tearDown(self):
+        super(InstrumentedCollectionTests, self).tearDown()
+        self.collection.remove(safe=True)
+        instrumentation.STATS.reset()
+
+    def test_find(self):
+        # Setup
+        self.collection.insert([{'id' : 'repo-1'}, {'id' : 'repo-2'}], safe=True)
+
+        # Test
+        found = list(self.collection.find())
+
+        # Verify
+        self.assertEqual(2, len(found))
+        stats = instrumentation.STATS.serialize()['collections'][Repo.collection_name]
+        self.assertEqual(1, stats['find']['count'])
+        self.assertEqual(2, stats['find']['documents'])
+        self.assertEqual(2, stats['insert']['documents'])
+
@@ -11,6 +11,9 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import pickle
+import threading
+
 import base
 
 from pulp.server.dispatch import constants as dispatch_constants
@@ -138,8 +141,68 @@ class CallRequestTests(base.PulpServerTests):
         self.assertTrue(isinstance(call_request_2, CallRequest))
         self.assertTrue(call_request_2.execution_hooks[key][0] == function)
 
+    def test_serialize_omits_defaults(self):
+        call_request = CallRequest(function)
+        data = call_request.serialize()
+        self.assertEqual(data['serialization_version'], CallRequest.serialization_version)
+        for field in ('args', 'kwargs', 'execution_hooks', 'control_hooks'):
+            self.assertFalse(field in data, field)
+        call_request_2 = CallRequest.deserialize(data)
+        self.assertEqual(call_request_2.args, [])
+        self.assertEqual(call_request_2.kwargs, {})
+        self.assertEqual(call_request_2.execution_hooks, call_request.execution_hooks)
+        self.assertEqual(call_request_2.control_hooks, call_request.control_hooks)
+
+    def test_deserialize_version_1(self):
+        args = ['fee', 'fie']
+        kwargs = {'one': 'foo'}
+        call_request = CallRequest(function, args, kwargs)
+        data = call_request.serialize()
+        # rebuild the data the way version 1 serialized it
+        data.pop('serialization_version')
+        for field in CallRequest.pickled_fields:
+            data[field] = unicode(pickle.dumps(getattr(call_request, field)))
+        call_request_2 = CallRequest.deserialize(data)
+        self.assertTrue(isinstance(call_request_2, CallRequest))
+        self.assertEqual(call_request_2.id, call_request.id)
+        self.assertEqual(call_request_2.args, args)
+        self.assertEqual(call_request_2.kwargs, kwargs)
+
+    def test_deserialize_unsupported_version(self):
+        data = CallRequest(function).serialize()
+        data['serialization_version'] = CallRequest.serialization_version + 1
+        self.assertTrue(CallRequest.deserialize(data) is None)
+
     def test_call_report_instantiation(self):
         try:
             call_report = CallReport()
         except Exception, e:
             self.fail(e.message)
+
+    def test_call_report_revision(self):
+        call_report = CallReport()
+        revision = call_report.revision
+        call_report.progress = {'step': 1}
+        self.assertEqual(call_report.revision, revision + 1)
+        call_report.state = dispatch_constants.CALL_RUNNING_STATE
+        self.assertEqual(call_report.revision, revision + 2)
+        self.assertEqual(call_report.serialize()['revision'], revision + 2)
+
+    def test_call_report_wait_for_change(self):
+        call_report = CallReport()
+        revision = call_report.revision
+        timer = threading.Timer(0.1, setattr, [call_report, 'progress', {'step': 1}])
+        timer.start()
+        try:
+            self.assertTrue(call_report.wait_for_change(revision, 5))
+        finally:
+            timer.cancel()
+        self.assertEqual(call_report.progress, {'step': 1})
+
+    def test_call_report_wait_for_change_timeout(self):
+        call_report = CallReport()
+        self.assertFalse(call_report.wait_for_change(call_report.revision, 0.01))
+
+    def test_call_report_wait_for_change_already_changed(self):
+        call_report = CallReport()
+        self.assertTrue(call_report.wait_for_change(call_report.revision - 1, 0))
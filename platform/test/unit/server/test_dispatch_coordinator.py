@@ -12,6 +12,8 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import datetime
+import threading
+import time
 import traceback
 import unittest
 
@@ -27,6 +29,7 @@ from pulp.server.dispatch import coordinator
 from pulp.server.dispatch import factory as dispatch_factory
 from pulp.server.dispatch.task import Task
 from pulp.server.exceptions import OperationTimedOut
+from pulp.server.managers import factory as managers_factory
 from pulp.server.util import CycleExists, topological_sort
 
 # coordinator instantiation tests ----------------------------------------------
@@ -57,6 +60,7 @@ class CoordinatorTests(base.PulpServerTests):
         self._task_queue_factory = None
         self.collection.drop()
         self.collection = None
+        coordinator._RESOURCE_LOCKS.clear()
         QueuedCall.get_collection().drop()
         ArchivedCall.get_collection().drop()
 
@@ -206,7 +210,7 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
 
         call_resources = coordinator.resource_dict_to_call_resources(resources)
         coordinator.set_call_request_id_on_call_resources(task_id, call_resources)
-        self.collection.insert(call_resources, safe=True)
+        coordinator._RESOURCE_LOCKS.acquire(call_resources)
 
         response, blockers, reasons, call_resources = self.coordinator._find_conflicts(resources)
 
@@ -229,7 +233,7 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         }
         existing_task_resources = coordinator.resource_dict_to_call_resources(existing_resources)
         coordinator.set_call_request_id_on_call_resources(task_id, existing_task_resources)
-        self.collection.insert(existing_task_resources, safe=True)
+        coordinator._RESOURCE_LOCKS.acquire(existing_task_resources)
 
         # delete on content unit is postponed by read
 
@@ -276,8 +280,8 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         task_2_resources = coordinator.resource_dict_to_call_resources(bind_2_resources)
         coordinator.set_call_request_id_on_call_resources(call_2_id, task_2_resources)
 
-        self.collection.insert(task_1_resources, safe=True)
-        self.collection.insert(task_2_resources, safe=True)
+        coordinator._RESOURCE_LOCKS.acquire(task_1_resources)
+        coordinator._RESOURCE_LOCKS.acquire(task_2_resources)
 
         # deleting the repository should be postponed by both binds
 
@@ -305,7 +309,7 @@ class CoordinatorCollisionDetectionTests(CoordinatorTests):
         }
         deletion_task_resources = coordinator.resource_dict_to_call_resources(deletion_resources)
         coordinator.set_call_request_id_on_call_resources(task_id, deletion_task_resources)
-        self.collection.insert(deletion_task_resources, safe=True)
+        coordinator._RESOURCE_LOCKS.acquire(deletion_task_resources)
 
         # a cds sync should be rejected by the deletion
 
@@ -354,6 +358,27 @@ class CoordinatorRunTaskTests(CoordinatorTests):
         self.coordinator._run_task(task)
         self.assertTrue(coordinator.wait_for_task.call_count == 2, coordinator.wait_for_task.call_count)
 
+    def test_run_task_inline(self):
+        self.coordinator.inline_synchronous_calls = True
+        dispatch_factory._task_queue().claim.return_value = True
+        task = Task(call.CallRequest(dummy_call, [None, None, None]))
+        self.coordinator._process_tasks([task])
+        # claiming the task puts it in the running state
+        task.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+        principal = managers_factory.principal_manager().get_principal()
+        self.coordinator._run_task(task)
+        self.assertEqual(coordinator.wait_for_task.call_count, 0)
+        self.assertEqual(task.call_report.state, dispatch_constants.CALL_FINISHED_STATE)
+        self.assertTrue(managers_factory.principal_manager().get_principal() is principal)
+
+    def test_run_task_inline_not_claimed(self):
+        self.coordinator.inline_synchronous_calls = True
+        dispatch_factory._task_queue().claim.return_value = False
+        task = Task(call.CallRequest(dummy_call))
+        self.coordinator._process_tasks([task])
+        self.coordinator._run_task(task)
+        self.assertEqual(coordinator.wait_for_task.call_count, 2)
+
 
 class CoordinatorWaitForTaskTests(CoordinatorTests):
 
@@ -364,6 +389,53 @@ class CoordinatorWaitForTaskTests(CoordinatorTests):
                           self.coordinator._run_task,
                           task, timeout)
 
+    def test_wait_for_task_woken_by_change(self):
+        task = Task(call.CallRequest(dummy_call))
+        timer = threading.Timer(0.1, setattr, [task.call_report, 'state', dispatch_constants.CALL_RUNNING_STATE])
+        timer.start()
+        start = time.time()
+        # the wait returns as soon as the state changes, not after the poll interval
+        coordinator.wait_for_task(task, [dispatch_constants.CALL_RUNNING_STATE], poll_interval=10)
+        self.assertTrue(time.time() - start < 5)
+        timer.join()
+
+
+class CoordinatorWaitForCallReportChangeTests(CoordinatorTests):
+
+    def setUp(self):
+        super(CoordinatorWaitForCallReportChangeTests, self).setUp()
+        self.call_report = mock.Mock()
+        self.call_report.state = dispatch_constants.CALL_RUNNING_STATE
+        task = mock.Mock()
+        task.call_report = self.call_report
+        self.coordinator._find_tasks = mock.Mock(return_value=[task])
+
+    def test_wait(self):
+        self.coordinator._waiters = threading.Semaphore(1)
+
+        for i in range(2):
+            result = self.coordinator.wait_for_call_report_change('call', 3, 5)
+
+        self.assertTrue(result is self.call_report)
+        # the waiter slot is released once each wait is over
+        self.assertEqual(2, self.call_report.wait_for_change.call_count)
+        self.call_report.wait_for_change.assert_called_with(3, 5)
+
+    def test_max_waiters_reached(self):
+        self.coordinator._waiters = threading.Semaphore(0)
+
+        result = self.coordinator.wait_for_call_report_change('call', 3, 5)
+
+        self.assertTrue(result is self.call_report)
+        self.assertEqual(0, self.call_report.wait_for_change.call_count)
+
+    def test_complete_call(self):
+        self.call_report.state = dispatch_constants.CALL_FINISHED_STATE
+
+        self.coordinator.wait_for_call_report_change('call', 3, 5)
+
+        self.assertEqual(0, self.call_report.wait_for_change.call_count)
+
 
 class CoordinatorCallExecutionTests(CoordinatorTests):
 
@@ -553,3 +625,14 @@ class CoordinatorFindCallReportsTests(CoordinatorTests):
         self.assertEqual(len(call_report_list), 1)
         self.assertEqual(call_report_list[0].call_request_id, call_request.id)
 
+    def test_find_by_call_request_group_id_list(self):
+        call_request_1 = call.CallRequest(find_dummy_call)
+        call_request_1.group_id = 'group-1'
+        call_request_2 = call.CallRequest(find_dummy_call)
+        call_request_2.group_id = 'group-2'
+        self.set_task_queue([Task(call_request_1), Task(call_request_2)])
+
+        call_report_list = self.coordinator.find_call_reports(call_request_group_id_list=['group-2', 'group-3'])
+        self.assertEqual(len(call_report_list), 1)
+        self.assertEqual(call_report_list[0].call_request_id, call_request_2.id)
+
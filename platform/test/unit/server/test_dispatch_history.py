@@ -62,3 +62,30 @@ class ArchivedCallCreateTests(ArchivedCallTests):
         archived_calls = history.find_archived_calls(call_request_group_id='123')
         self.assertEqual(archived_calls.count(), 1)
 
+    def test_find_archived_calls_by_task_id_list(self):
+        call_request_1, call_report_1 = self._generate_request_and_report()
+        call_request_2, call_report_2 = self._generate_request_and_report()
+        history.archive_call(call_request_1, call_report_1)
+        history.archive_call(call_request_2, call_report_2)
+        archived_calls = history.find_archived_calls(call_request_id_list=[call_report_2.call_request_id, 'missing'])
+        self.assertEqual(archived_calls.count(), 1)
+        self.assertEqual(archived_calls[0]['serialized_call_report']['call_request_id'],
+                         call_report_2.call_request_id)
+
+    def test_find_archived_calls_by_task_group_id_list_and_tags(self):
+        call_request, call_report = self._generate_request_and_report()
+        call_request.group_id = call_report.call_request_group_id = '123'
+        call_request.tags = call_report.call_request_tags = ['a', 'b']
+        history.archive_call(call_request, call_report)
+        archived_calls = history.find_archived_calls(call_request_group_id_list=['123'], tags=['a'])
+        self.assertEqual(archived_calls.count(), 1)
+        archived_calls = history.find_archived_calls(call_request_group_id_list=['123'], tags=['a', 'c'])
+        self.assertEqual(archived_calls.count(), 0)
+
+    def test_find_archived_calls_fields(self):
+        call_request, call_report = self._generate_request_and_report()
+        history.archive_call(call_request, call_report)
+        archived_calls = history.find_archived_calls(call_request_id=call_report.call_request_id,
+                                                     fields=['state'])
+        serialized_call_report = archived_calls[0]['serialized_call_report']
+        self.assertEqual(serialized_call_report.keys(), ['state'])
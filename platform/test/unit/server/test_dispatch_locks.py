@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import base
+
+from pulp.server.db.model.dispatch import CallResource
+from pulp.server.dispatch import constants as dispatch_constants
+from pulp.server.dispatch.locks import ResourceLockTable
+
+# resource lock table tests ----------------------------------------------------
+
+REPO = dispatch_constants.RESOURCE_REPOSITORY_TYPE
+READ = dispatch_constants.RESOURCE_READ_OPERATION
+UPDATE = dispatch_constants.RESOURCE_UPDATE_OPERATION
+
+
+class ResourceLockTableTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(ResourceLockTableTests, self).setUp()
+        self.table = ResourceLockTable()
+        self.collection = CallResource.get_collection()
+
+    def tearDown(self):
+        super(ResourceLockTableTests, self).tearDown()
+        try:
+            self.table.stop()
+        except AssertionError:
+            pass
+        self.collection.drop()
+
+    def test_find(self):
+        self.table.acquire([CallResource('call-1', REPO, 'repo-1', READ),
+                            CallResource('call-1', REPO, 'repo-2', UPDATE)])
+        self.table.acquire([CallResource('call-2', REPO, 'repo-1', READ)])
+
+        held = self.table.find([CallResource(None, REPO, 'repo-1', UPDATE)])
+        self.assertEqual(sorted(r['call_request_id'] for r in held), ['call-1', 'call-2'])
+        self.assertEqual(self.table.find([CallResource(None, REPO, 'repo-3', UPDATE)]), [])
+
+    def test_release(self):
+        self.table.acquire([CallResource('call-1', REPO, 'repo-1', READ),
+                            CallResource('call-1', REPO, 'repo-2', UPDATE)])
+        self.table.acquire([CallResource('call-2', REPO, 'repo-1', READ)])
+        self.table.release('call-1')
+
+        held = self.table.find([CallResource(None, REPO, 'repo-1', UPDATE),
+                                CallResource(None, REPO, 'repo-2', UPDATE)])
+        self.assertEqual([r['call_request_id'] for r in held], ['call-2'])
+
+    def test_mirror(self):
+        self.table.start()
+        self.table.acquire([CallResource('call-1', REPO, 'repo-1', READ)])
+        self.table.acquire([CallResource('call-2', REPO, 'repo-2', READ)])
+        # stopping writes the pending changes
+        self.table.stop()
+        self.assertEqual(self.collection.find().count(), 2)
+
+        self.table.start()
+        self.table.release('call-1')
+        self.table.stop()
+        self.assertEqual([r['call_request_id'] for r in self.collection.find()], ['call-2'])
+
+    def test_mirror_released(self):
+        self.table.start()
+        self.table.acquire([CallResource('call-1', REPO, 'repo-1', READ)])
+        self.table.release('call-1')
+        self.table.stop()
+        self.assertEqual(self.collection.find().count(), 0)
+
+    def test_not_mirrored_when_stopped(self):
+        self.table.acquire([CallResource('call-1', REPO, 'repo-1', READ)])
+        self.table.flush()
+        self.assertEqual(self.collection.find().count(), 0)
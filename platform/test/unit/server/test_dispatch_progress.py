@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import mock
+import unittest
+
+import base
+
+from pulp.server.dispatch import factory as dispatch_factory
+from pulp.server.dispatch.call import CallReport, CallRequest
+from pulp.server.dispatch.progress import ProgressReporter
+from pulp.server.dispatch.task import Task
+
+# progress reporter tests ------------------------------------------------------
+
+class ProgressReporterTests(unittest.TestCase):
+
+    def setUp(self):
+        super(ProgressReporterTests, self).setUp()
+        self.reporter = ProgressReporter(flush_interval=60)
+
+    def test_latest_progress_wins(self):
+        callback = mock.Mock()
+
+        for i in range(100):
+            self.reporter.report('call-1', callback, {'step' : i})
+        self.assertEqual(0, callback.call_count)
+
+        self.reporter.flush()
+
+        callback.assert_called_once_with({'step' : 99})
+
+    def test_flush_call(self):
+        callback_1 = mock.Mock()
+        callback_2 = mock.Mock()
+        self.reporter.report('call-1', callback_1, {'step' : 1})
+        self.reporter.report('call-2', callback_2, {'step' : 2})
+
+        self.reporter.flush('call-1')
+
+        callback_1.assert_called_once_with({'step' : 1})
+        self.assertEqual(0, callback_2.call_count)
+
+    def test_flushed_once(self):
+        callback = mock.Mock()
+        self.reporter.report('call-1', callback, {})
+
+        self.reporter.flush()
+        self.reporter.flush()
+
+        self.assertEqual(1, callback.call_count)
+
+    def test_callback_exception(self):
+        failing = mock.Mock(side_effect=ValueError())
+        callback = mock.Mock()
+        self.reporter.report('call-1', failing, {})
+        self.reporter.report('call-2', callback, {})
+
+        self.reporter.flush()
+
+        self.assertEqual(1, callback.call_count)
+
+    def test_stop_flushes(self):
+        callback = mock.Mock()
+        self.reporter.start()
+        self.reporter.report('call-1', callback, {'step' : 1})
+
+        self.reporter.stop()
+
+        callback.assert_called_once_with({'step' : 1})
+
+
+class TaskProgressTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(TaskProgressTests, self).setUp()
+        self.reporter = ProgressReporter(flush_interval=60)
+        self.patcher = mock.patch.object(dispatch_factory, '_PROGRESS_REPORTER', self.reporter)
+        self.patcher.start()
+
+    def tearDown(self):
+        super(TaskProgressTests, self).tearDown()
+        self.patcher.stop()
+
+    def test_report_progress_coalesced(self):
+        task = Task(CallRequest(mock.Mock()), CallReport())
+        revision = task.call_report.revision
+
+        task._report_progress({'step' : 1})
+        task._report_progress({'step' : 2})
+
+        self.assertEqual({}, task.call_report.progress)
+        self.assertEqual(revision, task.call_report.revision)
+
+        self.reporter.flush()
+
+        self.assertEqual({'step' : 2}, task.call_report.progress)
+        self.assertEqual(revision + 1, task.call_report.revision)
+
+    def test_complete_flushes_progress(self):
+        def call():
+            task._report_progress({'step' : 'done'})
+
+        task = Task(CallRequest(call, archive=False), CallReport())
+        task._run()
+
+        self.assertEqual({'step' : 'done'}, task.call_report.progress)
+
+    def test_synchronous_without_reporter(self):
+        task = Task(CallRequest(mock.Mock()), CallReport())
+        dispatch_factory._PROGRESS_REPORTER = None
+
+        task._report_progress({'step' : 1})
+
+        self.assertEqual({'step' : 1}, task.call_report.progress)
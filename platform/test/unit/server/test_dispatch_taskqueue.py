@@ -284,6 +284,40 @@ class TaskQueueControlFlowTests(TaskQueueTests):
         self.wait_for_task_to_complete(task_2)
         self.assertEqual(task_2.call_request_exit_state, dispatch_constants.CALL_SKIPPED_STATE)
 
+    def test_claim_task(self):
+        task = self.gen_task(call_with_result)
+        hook = NamedMock()
+        task.call_request.add_life_cycle_callback(dispatch_constants.CALL_RUN_LIFE_CYCLE_CALLBACK, hook)
+        self.queue.enqueue(task)
+        self.assertTrue(self.queue.claim(task))
+        self.assertTrue(task in self.queue.running_tasks())
+        self.assertEqual(task.call_report.state, dispatch_constants.CALL_RUNNING_STATE)
+        self.assertEqual(hook.call_count, 1)
+        task._run()
+        self.assertEqual(CALL_RESULT, task.call_report.result)
+        self.assertFalse(task in self.queue.all_tasks())
+        self.assertEqual(self.queue._TaskQueue__running_weight, 0)
+
+    def test_claim_task_blocked(self):
+        task_1 = self.gen_task()
+        task_2 = self.gen_task()
+        task_2.call_request.dependencies[task_1.call_request.id] = dispatch_constants.CALL_COMPLETE_STATES
+        self.queue.enqueue(task_1)
+        self.queue.enqueue(task_2)
+        self.assertFalse(self.queue.claim(task_2))
+        self.assertTrue(task_2 in self.queue.waiting_tasks())
+        self.assertTrue(self.queue.claim(task_1))
+
+    def test_claim_task_over_threshold(self):
+        task_1 = self.gen_task()
+        task_2 = self.gen_task()
+        task_1.call_request.weight = 2
+        self.queue.enqueue(task_1)
+        self.queue.enqueue(task_2)
+        self.assertTrue(self.queue.claim(task_1))
+        self.assertFalse(self.queue.claim(task_2))
+        self.assertFalse(self.queue.claim(task_1))
+
     def test_task_dequeue(self):
         task = self.gen_task()
         self.queue.enqueue(task)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import ldap
+import mock
+
+import base
+
+from pulp.server.auth import ldap_connection
+
+# -- constants ----------------------------------------------------------------
+
+BASE = 'dc=example,dc=com'
+USER_ENTRY = ('uid=jdoe,dc=example,dc=com', {'gecos' : 'John Doe'})
+
+# -- test cases ---------------------------------------------------------------
+
+class LookupCacheTests(base.PulpServerTests):
+
+    def test_get_put(self):
+        cache = ldap_connection.LookupCache(60, 60)
+        self.assertEqual((False, None), cache.get('jdoe'))
+        cache.put('jdoe', USER_ENTRY)
+        self.assertEqual((True, USER_ENTRY), cache.get('jdoe'))
+
+    def test_negative(self):
+        cache = ldap_connection.LookupCache(60, 60)
+        cache.put('nobody', None)
+        self.assertEqual((True, None), cache.get('nobody'))
+
+    def test_negative_disabled(self):
+        cache = ldap_connection.LookupCache(60, 0)
+        cache.put('nobody', None)
+        self.assertEqual((False, None), cache.get('nobody'))
+
+    @mock.patch('time.time')
+    def test_expiration(self, mock_time):
+        mock_time.return_value = 1000
+        cache = ldap_connection.LookupCache(60, 10)
+        cache.put('jdoe', USER_ENTRY)
+        cache.put('nobody', None)
+
+        mock_time.return_value = 1030
+        self.assertEqual((True, USER_ENTRY), cache.get('jdoe'))
+        self.assertEqual((False, None), cache.get('nobody'))
+
+        mock_time.return_value = 1060
+        self.assertEqual((False, None), cache.get('jdoe'))
+
+    def test_size(self):
+        cache = ldap_connection.LookupCache(60, 60, size=2)
+        cache.put('a', USER_ENTRY)
+        cache.put('b', USER_ENTRY)
+        cache.put('c', USER_ENTRY)
+        self.assertEqual((True, USER_ENTRY), cache.get('c'))
+
+
+class LDAPConnectionPoolTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(LDAPConnectionPoolTests, self).setUp()
+        self.patcher = mock.patch('ldap.initialize')
+        self.mock_initialize = self.patcher.start()
+        self.mock_initialize.side_effect = lambda uri: mock.Mock()
+        self.pool = ldap_connection.LDAPConnectionPool(2, lookup_cache=ldap_connection.LookupCache(60, 60))
+
+    def tearDown(self):
+        super(LDAPConnectionPoolTests, self).tearDown()
+        self.patcher.stop()
+
+    def test_reuse(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertTrue(self.pool.acquire() is connection)
+        self.assertEqual(1, self.mock_initialize.call_count)
+
+    def test_bounded(self):
+        connection_1 = self.pool.acquire()
+        connection_2 = self.pool.acquire()
+        self.assertFalse(connection_1 is connection_2)
+        self.pool.release(connection_1)
+        self.pool.release(connection_2)
+        # releasing more connections than the pool holds is an error
+        self.assertRaises(ValueError, self.pool.release, connection_2)
+
+    def test_discard(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection, discard=True)
+        self.assertFalse(self.pool.acquire() is connection)
+        self.assertEqual(2, self.mock_initialize.call_count)
+
+    def test_liveness_check(self):
+        connection = self.pool.acquire()
+        connection.lconn.whoami_s.side_effect = ldap.SERVER_DOWN()
+        self.pool.release(connection)
+        connection.last_used -= ldap_connection.LIVENESS_CHECK_INTERVAL
+
+        self.assertFalse(self.pool.acquire() is connection)
+        self.assertEqual(1, connection.lconn.whoami_s.call_count)
+
+    def test_bind_failure(self):
+        self.mock_initialize.side_effect = None
+        self.mock_initialize.return_value.simple_bind_s.side_effect = ldap.SERVER_DOWN()
+        self.assertTrue(self.pool.acquire() is None)
+
+    def test_cached_lookup(self):
+        connection = self.pool.acquire()
+        connection.lconn.search_s.return_value = [USER_ENTRY]
+        self.assertEqual(USER_ENTRY, connection.lookup_user(BASE, 'jdoe'))
+        self.assertEqual(USER_ENTRY, connection.lookup_user(BASE, 'jdoe'))
+        self.assertEqual(1, connection.lconn.search_s.call_count)
+
+        connection.lconn.search_s.return_value = []
+        self.assertTrue(connection.lookup_user(BASE, 'nobody') is None)
+        self.assertTrue(connection.lookup_user(BASE, 'nobody') is None)
+        self.assertEqual(2, connection.lconn.search_s.call_count)
+
+    def test_authenticate_rebinds(self):
+        connection = self.pool.acquire()
+        connection.lconn.search_s.return_value = [USER_ENTRY]
+        connection.lconn.simple_bind_s.reset_mock()
+        connection.lconn.simple_bind_s.side_effect = [ldap.INVALID_CREDENTIALS(), None]
+
+        self.assertTrue(connection.authenticate_user(BASE, 'jdoe', 'wrong') is None)
+
+        # bound with the user's credentials, then anonymously again
+        self.assertEqual(2, connection.lconn.simple_bind_s.call_count)
+        self.assertEqual((), connection.lconn.simple_bind_s.call_args[0])
+        self.assertTrue(connection.bound)
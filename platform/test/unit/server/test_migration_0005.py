@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+from pulp.server.compat import DBRef
+from pulp.server.db import connection
+from pulp.server.db.migrate.models import MigrationModule
+from pulp.server.db.model.repository import Repo, RepoContentUnit
+import base
+
+
+class TestMigrationSONManipulatorOptOut(base.PulpServerTests):
+
+    def setUp(self):
+        super(TestMigrationSONManipulatorOptOut, self).setUp()
+        self.module = MigrationModule('pulp.server.db.migrations.0005_son_manipulator_opt_out')._module
+
+    def tearDown(self):
+        super(TestMigrationSONManipulatorOptOut, self).tearDown()
+        Repo.get_collection().remove(safe=True)
+        RepoContentUnit.get_collection().remove(safe=True)
+
+    def test_with_db(self):
+        # Setup
+        repo_collection = Repo.get_collection()
+        repo_id = repo_collection.insert({'id' : 'repo-1'}, safe=True)
+        # documents as stored through the manipulators by earlier versions
+        assoc_collection = RepoContentUnit.get_collection()
+        assoc_collection.insert({'unit_id' : 'unit-1', '_ns' : RepoContentUnit.collection_name,
+                                 'details' : [DBRef(Repo.collection_name, repo_id),
+                                              DBRef(Repo.collection_name, 'missing')]}, safe=True)
+        assoc_collection.insert({'unit_id' : 'unit-2', '_ns' : RepoContentUnit.collection_name}, safe=True)
+
+        # Test
+        self.module.migrate()
+        # idempotent
+        self.module.migrate()
+
+        # Verify
+        unit_1 = assoc_collection.find_one({'unit_id' : 'unit-1'})
+        self.assertFalse('_ns' in unit_1)
+        self.assertEqual('repo-1', unit_1['details'][0]['id'])
+        self.assertEqual(None, unit_1['details'][1])
+        self.assertFalse('_ns' in assoc_collection.find_one({'unit_id' : 'unit-2'}))
+        # collections that still use the manipulators are left alone
+        self.assertEqual(Repo.collection_name, repo_collection.find_one({'id' : 'repo-1'})['_ns'])
@@ -128,3 +128,27 @@ class BaseProfilerConduitTests(base.PulpServerTests):
         units = conduit.get_units(self.REPO_ID, criteria)
         # Verify
         self.assertEquals(len(units), 9)
+
+    def test_prefetch_bindings(self):
+        # Setup
+        self.populate()
+        # Test
+        conduit = ProfilerConduit()
+        conduit.prefetch_bindings([self.CONSUMER_ID, 'unbound-consumer'])
+        Bind.get_collection().remove()
+        # Verify
+        self.assertEquals([self.REPO_ID], conduit.get_bindings(self.CONSUMER_ID))
+        self.assertEquals([], conduit.get_bindings('unbound-consumer'))
+
+    def test_get_repo_set_units(self):
+        # Setup
+        self.populate()
+        # Test
+        conduit = ProfilerConduit()
+        units = conduit.get_repo_set_units([self.REPO_ID, self.REPO_ID], self.TYPE_1_DEF.id)
+        RepoContentUnit.get_collection().remove()
+        cached = conduit.get_repo_set_units([self.REPO_ID], self.TYPE_1_DEF.id)
+        # Verify
+        self.assertEquals(len(units), 9)
+        self.assertTrue(units is cached)
+        self.assertTrue(all(u.type_id == self.TYPE_1_DEF.id for u in units))
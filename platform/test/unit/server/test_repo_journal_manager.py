@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import base
+import mock_plugins
+
+from pulp.plugins.types import database, model
+from pulp.server.db.model.repository import Repo, RepoContentChange, RepoContentUnit, RepoDistributor
+import pulp.server.managers.content.cud as content_cud_manager
+import pulp.server.managers.repo.cud as repo_manager
+import pulp.server.managers.repo.distributor as distributor_manager
+import pulp.server.managers.repo.journal as journal_manager
+import pulp.server.managers.repo.unit_association as association_manager
+from pulp.server.managers.repo.unit_association import OWNER_TYPE_IMPORTER, OWNER_TYPE_USER
+
+# -- constants ----------------------------------------------------------------
+
+MOCK_TYPE_DEF = model.TypeDefinition('mock-type', 'Mock Type', 'Used by the mock importer',
+                                     ['key-1'], [], [])
+
+# -- test cases ---------------------------------------------------------------
+
+class RepoChangeJournalManagerTests(base.PulpAsyncServerTests):
+
+    def clean(self):
+        super(RepoChangeJournalManagerTests, self).clean()
+        database.clean()
+        Repo.get_collection().remove()
+        RepoDistributor.get_collection().remove()
+        RepoContentUnit.get_collection().remove()
+        RepoContentChange.get_collection().remove()
+
+    def setUp(self):
+        super(RepoChangeJournalManagerTests, self).setUp()
+        database.update_database([MOCK_TYPE_DEF])
+        mock_plugins.install()
+
+        self.manager = journal_manager.RepoChangeJournalManager()
+        self.repo_manager = repo_manager.RepoManager()
+        self.distributor_manager = distributor_manager.RepoDistributorManager()
+        self.association_manager = association_manager.RepoUnitAssociationManager()
+
+        self.repo_manager.create_repo('repo-1')
+
+    def tearDown(self):
+        super(RepoChangeJournalManagerTests, self).tearDown()
+        mock_plugins.reset()
+
+    def _sequences(self, repo_id='repo-1'):
+        return [c['sequence'] for c in self.manager.get_changes_since(repo_id, 0)]
+
+    def test_record_changes(self):
+        # Test
+        self.manager.record_changes('repo-1', journal_manager.ACTION_ASSOCIATED, 'mock-type', ['a', 'b'])
+        self.manager.record_changes('repo-1', journal_manager.ACTION_UPDATED, 'mock-type', ['b'])
+
+        # Verify
+        changes = self.manager.get_changes_since('repo-1', 0)
+        self.assertEqual([1, 2, 3], [c['sequence'] for c in changes])
+        self.assertEqual(['a', 'b', 'b'], [c['unit_id'] for c in changes])
+        self.assertEqual(journal_manager.ACTION_UPDATED, changes[2]['action'])
+        self.assertEqual(3, self.manager.current_sequence('repo-1'))
+
+        self.assertEqual([3], [c['sequence'] for c in self.manager.get_changes_since('repo-1', 2)])
+
+    def test_record_changes_no_units(self):
+        self.manager.record_changes('repo-1', journal_manager.ACTION_ASSOCIATED, 'mock-type', [])
+        self.assertEqual(0, self.manager.current_sequence('repo-1'))
+        self.assertEqual(0, RepoContentChange.get_collection().count())
+
+    def test_record_changes_missing_repo(self):
+        self.manager.record_changes('missing', journal_manager.ACTION_ASSOCIATED, 'mock-type', ['a'])
+        self.assertEqual(0, RepoContentChange.get_collection().count())
+
+    def test_record_unit_update(self):
+        # Setup
+        self.repo_manager.create_repo('repo-2')
+        self.repo_manager.create_repo('repo-3')
+        self.association_manager.associate_unit_by_id('repo-1', 'mock-type', 'a', OWNER_TYPE_USER, 'admin')
+        self.association_manager.associate_unit_by_id('repo-1', 'mock-type', 'a', OWNER_TYPE_IMPORTER, 'imp')
+        self.association_manager.associate_unit_by_id('repo-2', 'mock-type', 'a', OWNER_TYPE_USER, 'admin')
+
+        # Test
+        self.manager.record_unit_update('mock-type', 'a')
+
+        # Verify
+        for repo_id in ('repo-1', 'repo-2'):
+            changes = self.manager.get_changes_since(repo_id, 0)
+            self.assertEqual([journal_manager.ACTION_ASSOCIATED, journal_manager.ACTION_UPDATED],
+                             [c['action'] for c in changes])
+        self.assertEqual([], self._sequences('repo-3'))
+
+    def test_content_update_recorded(self):
+        # Setup
+        content_manager = content_cud_manager.ContentManager()
+        content_manager.add_content_unit('mock-type', 'a', {'key-1' : 'a'})
+        self.association_manager.associate_unit_by_id('repo-1', 'mock-type', 'a', OWNER_TYPE_USER, 'admin')
+
+        # Test
+        content_manager.update_content_unit('mock-type', 'a', {'key-1' : 'b'})
+
+        # Verify
+        changes = self.manager.get_changes_since('repo-1', 1)
+        self.assertEqual(1, len(changes))
+        self.assertEqual(journal_manager.ACTION_UPDATED, changes[0]['action'])
+
+    def test_unchanged_content_update_not_recorded(self):
+        # Setup
+        content_manager = content_cud_manager.ContentManager()
+        content_manager.add_content_unit('mock-type', 'a', {'key-1' : 'a', 'm' : 1})
+        self.association_manager.associate_unit_by_id('repo-1', 'mock-type', 'a', OWNER_TYPE_USER, 'admin')
+        existing = database.type_units_collection('mock-type').find_one({'_id' : 'a'})
+
+        # Test
+        updated = content_manager.update_content_unit('mock-type', 'a', {'key-1' : 'a', 'm' : 1}, existing)
+
+        # Verify
+        self.assertFalse(updated)
+        self.assertEqual([], self.manager.get_changes_since('repo-1', 1))
+
+    def test_changed_content_update_recorded(self):
+        # Setup
+        content_manager = content_cud_manager.ContentManager()
+        content_manager.add_content_unit('mock-type', 'a', {'key-1' : 'a', 'm' : 1})
+        self.association_manager.associate_unit_by_id('repo-1', 'mock-type', 'a', OWNER_TYPE_USER, 'admin')
+        existing = database.type_units_collection('mock-type').find_one({'_id' : 'a'})
+
+        # Test
+        updated = content_manager.update_content_unit('mock-type', 'a', {'key-1' : 'a', 'm' : 2}, existing)
+
+        # Verify
+        self.assertTrue(updated)
+        changes = self.manager.get_changes_since('repo-1', 1)
+        self.assertEqual([journal_manager.ACTION_UPDATED], [c['action'] for c in changes])
+
+    def test_associations_recorded(self):
+        # Setup
+        content_manager = content_cud_manager.ContentManager()
+        content_manager.add_content_unit('mock-type', 'a', {'key-1' : 'a'})
+        content_manager.add_content_unit('mock-type', 'b', {'key-1' : 'b'})
+
+        # Test
+        self.association_manager.associate_all_by_ids('repo-1', 'mock-type', ['a', 'b'], OWNER_TYPE_USER, 'admin')
+        # a second owner doesn't add the units to the repo again
+        self.association_manager.associate_all_by_ids('repo-1', 'mock-type', ['a'], OWNER_TYPE_IMPORTER, 'imp')
+        # the unit stays in the repo through the importer's association
+        self.association_manager.unassociate_unit_by_id('repo-1', 'mock-type', 'a', OWNER_TYPE_USER, 'admin',
+                                                        notify_plugins=False)
+        self.association_manager.unassociate_unit_by_id('repo-1', 'mock-type', 'b', OWNER_TYPE_USER, 'admin',
+                                                        notify_plugins=False)
+
+        # Verify
+        changes = self.manager.get_changes_since('repo-1', 0)
+        self.assertEqual([(journal_manager.ACTION_ASSOCIATED, 'a'),
+                          (journal_manager.ACTION_ASSOCIATED, 'b'),
+                          (journal_manager.ACTION_UNASSOCIATED, 'b')],
+                         [(c['action'], c['unit_id']) for c in changes])
+
+    def test_compact(self):
+        # Setup
+        self.distributor_manager.add_distributor('repo-1', 'mock-distributor', {}, False, distributor_id='dist-1')
+        self.distributor_manager.add_distributor('repo-1', 'mock-distributor-2', {}, False, distributor_id='dist-2')
+        self.manager.record_changes('repo-1', journal_manager.ACTION_ASSOCIATED, 'mock-type', ['a', 'b', 'c'])
+
+        collection = RepoDistributor.get_collection()
+        collection.update({'id' : 'dist-1'}, {'$set' : {'last_published_sequence' : 3}}, safe=True)
+        collection.update({'id' : 'dist-2'}, {'$set' : {'last_published_sequence' : 1}}, safe=True)
+
+        # Test
+        self.manager.compact('repo-1')
+
+        # Verify
+        self.assertEqual([2, 3], self._sequences())
+
+    def test_compact_unpublished(self):
+        # Setup
+        self.distributor_manager.add_distributor('repo-1', 'mock-distributor', {}, False, distributor_id='dist-1')
+        self.manager.record_changes('repo-1', journal_manager.ACTION_ASSOCIATED, 'mock-type', ['a', 'b'])
+
+        # Test
+        self.manager.compact('repo-1')
+
+        # Verify
+        self.assertEqual([], self._sequences())
+
+    def test_delete_repo(self):
+        # Setup
+        self.manager.record_changes('repo-1', journal_manager.ACTION_ASSOCIATED, 'mock-type', ['a'])
+
+        # Test
+        self.repo_manager.delete_repo('repo-1')
+
+        # Verify
+        self.assertEqual(0, RepoContentChange.get_collection().count())
@@ -21,7 +21,7 @@ import mock
 
 from   pulp.common.util import encode_unicode
 from pulp.plugins.loader import api as plugin_api
-from   pulp.server.db.model.repository import Repo, RepoImporter, RepoDistributor
+from   pulp.server.db.model.repository import Repo, RepoImporter, RepoDistributor, RepoContentUnit
 import pulp.server.managers.repo.cud as repo_manager
 import pulp.server.managers.factory as manager_factory
 import pulp.server.managers.repo._common as common_utils
@@ -50,6 +50,7 @@ class RepoManagerTests(base.PulpAsyncServerTests):
         Repo.get_collection().remove()
         RepoImporter.get_collection().remove()
         RepoDistributor.get_collection().remove()
+        RepoContentUnit.get_collection().remove()
 
     @mock.patch('pulp.server.db.model.repository.Repo.get_collection')
     @mock.patch('pulp.server.db.model.repository.RepoContentUnit.get_collection')
@@ -57,18 +58,16 @@ class RepoManagerTests(base.PulpAsyncServerTests):
         # platform migration 0004 has a test for this that uses live data
 
         repo_col = mock_get_repo_col.return_value
-        find = mock_get_assoc_col.return_value.find
-        cursor = find.return_value
-        cursor.distinct.return_value = ['rpm', 'srpm']
-        cursor.count.return_value = 6
+        group = mock_get_assoc_col.return_value.group
+        group.return_value = [{'repo_id': 'repo1', 'unit_type_id': 'rpm', 'count': 6.0},
+                              {'repo_id': 'repo1', 'unit_type_id': 'srpm', 'count': 6.0}]
 
         self.manager.rebuild_content_unit_counts(['repo1'])
 
-        # once to get the type_ids, then once more for each of the 2 types
-        self.assertEqual(find.call_count, 3)
-        find.assert_any_call({'repo_id': 'repo1'})
-        find.assert_any_call({'repo_id': 'repo1', 'unit_type_id': 'rpm'})
-        find.assert_any_call({'repo_id': 'repo1', 'unit_type_id': 'srpm'})
+        # a single grouping query covers all of the types
+        self.assertEqual(group.call_count, 1)
+        self.assertEqual(group.call_args[0][0], ['repo_id', 'unit_type_id'])
+        self.assertEqual(group.call_args[0][1], {'repo_id': {'$in': ['repo1']}})
 
         self.assertEqual(repo_col.update.call_count, 1)
         repo_col.update.assert_called_once_with(
@@ -85,14 +84,37 @@ class RepoManagerTests(base.PulpAsyncServerTests):
 
         assoc_col = mock_get_assoc_col.return_value
         # don't return any type IDs
-        assoc_col.find.return_value.distinct.return_value = []
+        assoc_col.group.return_value = []
 
         self.manager.rebuild_content_unit_counts()
 
         # makes sure it found these 2 repos and tried to operate on them
-        assoc_col.find.assert_any_call({'repo_id': 'repo1'})
-        assoc_col.find.assert_any_call({'repo_id': 'repo2'})
-        self.assertEqual(assoc_col.find.call_count, 2)
+        self.assertEqual(assoc_col.group.call_count, 1)
+        self.assertEqual(assoc_col.group.call_args[0][1], {'repo_id': {'$in': ['repo1', 'repo2']}})
+        repo_col.update.assert_any_call({'id': 'repo1'}, {'$set': {'content_unit_counts': {}}}, safe=True)
+        repo_col.update.assert_any_call({'id': 'repo2'}, {'$set': {'content_unit_counts': {}}}, safe=True)
+
+    @mock.patch.object(repo_manager, '_REBUILD_BATCH_SIZE', 2)
+    def test_rebuild_content_unit_counts_with_db(self):
+        # more repos than a single batch so they are processed concurrently
+        repo_ids = ['repo-%d' % i for i in range(5)]
+        for repo_id in repo_ids:
+            self.manager.create_repo(repo_id)
+
+        association_col = RepoContentUnit.get_collection()
+        for i, repo_id in enumerate(repo_ids):
+            for j in range(i):
+                association_col.insert(RepoContentUnit(repo_id, 'unit-%d' % j, 'rpm', 'user', 'admin'), safe=True)
+        association_col.insert(RepoContentUnit('repo-1', 'unit-0', 'srpm', 'user', 'admin'), safe=True)
+
+        self.manager.rebuild_content_unit_counts()
+
+        repo = Repo.get_collection().find_one({'id': 'repo-0'})
+        self.assertEqual(repo['content_unit_counts'], {})
+        repo = Repo.get_collection().find_one({'id': 'repo-1'})
+        self.assertEqual(repo['content_unit_counts'], {'rpm': 1, 'srpm': 1})
+        repo = Repo.get_collection().find_one({'id': 'repo-4'})
+        self.assertEqual(repo['content_unit_counts'], {'rpm': 4})
 
     def test_create(self):
         """
@@ -574,6 +596,20 @@ class RepoManagerTests(base.PulpAsyncServerTests):
         repo = Repo.get_collection().find_one({'id' : REPO_ID})
         self.assertEqual(repo['content_unit_counts']['rpm'], 3)
 
+    @mock.patch.object(Repo, 'get_collection')
+    def test_update_unit_counts(self, mock_get_collection):
+        mock_update = mock_get_collection.return_value.update
+
+        self.manager.update_unit_counts('repo-123', {'rpm': 7, 'srpm': -2, 'errata': 0})
+
+        expected = {'$inc': {'content_unit_counts.rpm': 7, 'content_unit_counts.srpm': -2}}
+        mock_update.assert_called_once_with({'id': 'repo-123'}, expected, safe=True)
+
+    @mock.patch.object(Repo, 'get_collection')
+    def test_update_unit_counts_no_changes(self, mock_get_collection):
+        self.manager.update_unit_counts('repo-123', {'rpm': 0})
+        self.assertEqual(mock_get_collection.return_value.update.call_count, 0)
+
 
 class UtilityMethodsTests(unittest.TestCase):
 
@@ -21,8 +21,9 @@ import mock_plugins
 from pulp.common import dateutils
 from pulp.plugins.conduits.mixins import DistributorConduitException
 from pulp.plugins.conduits.repo_publish import RepoPublishConduit, RepoGroupPublishConduit
+from pulp.plugins.model import UnitChange
 from pulp.server.db.model.repo_group import RepoGroup, RepoGroupDistributor
-from pulp.server.db.model.repository import Repo, RepoDistributor
+from pulp.server.db.model.repository import Repo, RepoContentChange, RepoDistributor
 from pulp.server.managers import factory as manager_factory
 
 # -- test cases ---------------------------------------------------------------
@@ -36,6 +37,7 @@ class RepoPublishConduitTests(base.PulpServerTests):
 
         Repo.get_collection().remove()
         RepoDistributor.get_collection().remove()
+        RepoContentChange.get_collection().remove()
 
     def setUp(self):
         super(RepoPublishConduitTests, self).setUp()
@@ -85,6 +87,43 @@ class RepoPublishConduitTests(base.PulpServerTests):
         # Test
         self.assertRaises(DistributorConduitException, self.conduit.last_publish)
 
+    def test_last_published_sequence(self):
+        # Test - Unpublished
+        self.assertTrue(self.conduit.last_published_sequence() is None)
+
+        # Setup - Previous publish
+        RepoDistributor.get_collection().update({'repo_id' : 'repo-1', 'id' : 'dist-1'},
+                                                {'$set' : {'last_published_sequence' : 4}}, safe=True)
+
+        # Test - Published
+        self.assertEqual(self.conduit.last_published_sequence(), 4)
+
+    def test_get_changes_since(self):
+        # Setup
+        journal_manager = manager_factory.repo_journal_manager()
+        journal_manager.record_changes('repo-1', RepoContentChange.ACTION_ASSOCIATED, 'mock-type', ['a', 'b'])
+        journal_manager.record_changes('repo-1', RepoContentChange.ACTION_UNASSOCIATED, 'mock-type', ['a'])
+
+        # Test
+        changes = self.conduit.get_changes_since(1)
+
+        # Verify
+        self.assertEqual(2, len(changes))
+        self.assertTrue(isinstance(changes[0], UnitChange))
+        self.assertEqual([2, 3], [c.sequence for c in changes])
+        self.assertEqual([UnitChange.ACTION_ASSOCIATED, UnitChange.ACTION_UNASSOCIATED],
+                         [c.action for c in changes])
+        self.assertEqual(['b', 'a'], [c.unit_id for c in changes])
+        self.assertEqual('mock-type', changes[0].type_id)
+
+    @mock.patch('pulp.server.managers.repo.journal.RepoChangeJournalManager.get_changes_since')
+    def test_get_changes_since_with_error(self, mock_call):
+        # Setup
+        mock_call.side_effect = Exception()
+
+        # Test
+        self.assertRaises(DistributorConduitException, self.conduit.get_changes_since, 0)
+
 class RepoGroupPublishConduitTests(base.PulpServerTests):
     def clean(self):
         super(RepoGroupPublishConduitTests, self).clean()
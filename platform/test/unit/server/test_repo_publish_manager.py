@@ -19,9 +19,10 @@ import mock_plugins
 
 from pulp.common import dateutils
 from pulp.plugins.model import PublishReport
-from pulp.server.db.model.repository import Repo, RepoDistributor, RepoPublishResult
+from pulp.server.db.model.repository import Repo, RepoContentChange, RepoDistributor, RepoPublishResult
 import pulp.server.managers.repo.cud as repo_manager
 import pulp.server.managers.repo.distributor as distributor_manager
+import pulp.server.managers.repo.journal as journal_manager
 import pulp.server.managers.repo.publish as publish_manager
 
 # -- test cases ---------------------------------------------------------------
@@ -46,6 +47,29 @@ class RepoSyncManagerTests(base.PulpAsyncServerTests):
         Repo.get_collection().remove()
         RepoDistributor.get_collection().remove()
         RepoPublishResult.get_collection().remove()
+        RepoContentChange.get_collection().remove()
+
+    @mock.patch('pulp.server.managers.event.fire.EventFireManager.fire_repo_publish_started')
+    @mock.patch('pulp.server.managers.event.fire.EventFireManager.fire_repo_publish_finished')
+    def test_publish_records_sequence(self, mock_finished, mock_started):
+        """
+        Tests a successful publish stores the last journal sequence on the
+        distributor and compacts the journal.
+        """
+
+        # Setup
+        self.repo_manager.create_repo('repo-1')
+        self.distributor_manager.add_distributor('repo-1', 'mock-distributor', {}, False, distributor_id='dist-1')
+        journal = journal_manager.RepoChangeJournalManager()
+        journal.record_changes('repo-1', journal_manager.ACTION_ASSOCIATED, 'mock-type', ['a', 'b'])
+
+        # Test
+        self.publish_manager.publish('repo-1', 'dist-1', None)
+
+        # Verify
+        repo_distributor = RepoDistributor.get_collection().find_one({'repo_id' : 'repo-1', 'id' : 'dist-1'})
+        self.assertEqual(2, repo_distributor['last_published_sequence'])
+        self.assertEqual(0, RepoContentChange.get_collection().find({'repo_id' : 'repo-1'}).count())
 
     @mock.patch('pulp.server.managers.event.fire.EventFireManager.fire_repo_publish_started')
     @mock.patch('pulp.server.managers.event.fire.EventFireManager.fire_repo_publish_finished')
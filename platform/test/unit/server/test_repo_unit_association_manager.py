@@ -391,6 +391,103 @@ class RepoUnitAssociationManagerTests(base.PulpServerTests):
         except exceptions.MissingResource, e:
             self.assertTrue('missing' == e.resources['repo_id'])
 
+    def test_associate_from_repo_bulk_copy(self):
+        # Setup
+        source_repo_id = 'source-repo'
+        dest_repo_id = 'dest-repo'
+
+        self.repo_manager.create_repo(source_repo_id)
+        self.importer_manager.set_importer(source_repo_id, 'mock-importer', {})
+
+        self.repo_manager.create_repo(dest_repo_id)
+        self.importer_manager.set_importer(dest_repo_id, 'mock-importer', {})
+
+        self.content_manager.add_content_unit('mock-type', 'unit-1', {'key-1' : 'unit-1'})
+        self.content_manager.add_content_unit('mock-type', 'unit-2', {'key-1' : 'unit-2'})
+        self.content_manager.add_content_unit('mock-type', 'unit-3', {'key-1' : 'unit-3'})
+
+        self.manager.associate_unit_by_id(source_repo_id, 'mock-type', 'unit-1', OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(source_repo_id, 'mock-type', 'unit-2', OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(source_repo_id, 'mock-type', 'unit-2', OWNER_TYPE_IMPORTER, 'imp')
+        self.manager.associate_unit_by_id(source_repo_id, 'mock-type', 'unit-3', OWNER_TYPE_USER, 'admin')
+
+        # Already in the destination by the importer; the count should not change for it
+        self.manager.associate_unit_by_id(dest_repo_id, 'mock-type', 'unit-3', OWNER_TYPE_IMPORTER, 'imp')
+
+        fake_user = User('associate-user', '')
+        manager_factory.principal_manager().set_principal(principal=fake_user)
+
+        mock_plugins.MOCK_IMPORTER.supports_bulk_copy.return_value = True
+
+        # Test
+        associated = self.manager.associate_from_repo(source_repo_id, dest_repo_id)
+
+        # Verify
+        self.assertEqual(3, len(associated))
+        unit_keys = sorted([a['unit_key']['key-1'] for a in associated])
+        self.assertEqual(unit_keys, ['unit-1', 'unit-2', 'unit-3'])
+
+        self.assertEqual(0, mock_plugins.MOCK_IMPORTER.import_units.call_count)
+        self.assertEqual(1, mock_plugins.MOCK_IMPORTER.units_copied.call_count)
+        copied_ids = mock_plugins.MOCK_IMPORTER.units_copied.call_args[0][4]
+        self.assertEqual(sorted(copied_ids['mock-type']), ['unit-1', 'unit-2', 'unit-3'])
+
+        spec = {'repo_id' : dest_repo_id, 'owner_id' : fake_user.login}
+        self.assertEqual(3, RepoContentUnit.get_collection().find(spec).count())
+
+        dest_repo = Repo.get_collection().find_one({'id' : dest_repo_id})
+        self.assertEqual(dest_repo['content_unit_counts'], {'mock-type' : 3})
+
+        # Running it again is a no-op
+        associated = self.manager.associate_from_repo(source_repo_id, dest_repo_id)
+        self.assertEqual(0, len(associated))
+
+        dest_repo = Repo.get_collection().find_one({'id' : dest_repo_id})
+        self.assertEqual(dest_repo['content_unit_counts'], {'mock-type' : 3})
+
+        # Clean Up
+        manager_factory.principal_manager().set_principal(principal=None)
+
+    def test_associate_from_repo_bulk_copy_with_criteria(self):
+        # Setup
+        source_repo_id = 'source-repo'
+        dest_repo_id = 'dest-repo'
+
+        self.repo_manager.create_repo(source_repo_id)
+        self.importer_manager.set_importer(source_repo_id, 'mock-importer', {})
+
+        self.repo_manager.create_repo(dest_repo_id)
+        self.importer_manager.set_importer(dest_repo_id, 'mock-importer', {})
+
+        self.content_manager.add_content_unit('mock-type', 'unit-1', {'key-1' : 'unit-1'})
+        self.content_manager.add_content_unit('mock-type', 'unit-2', {'key-1' : 'unit-2'})
+
+        self.manager.associate_unit_by_id(source_repo_id, 'mock-type', 'unit-1', OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(source_repo_id, 'mock-type', 'unit-2', OWNER_TYPE_USER, 'admin')
+
+        mock_plugins.MOCK_IMPORTER.supports_bulk_copy.return_value = True
+
+        # Test
+        criteria = UnitAssociationCriteria(type_ids=['mock-type'], unit_filters={'key-1' : 'unit-2'})
+        associated = self.manager.associate_from_repo(source_repo_id, dest_repo_id, criteria=criteria)
+
+        # Verify
+        self.assertEqual(associated, [{'type_id' : 'mock-type', 'unit_key' : {'key-1' : 'unit-2'}}])
+        copied_ids = mock_plugins.MOCK_IMPORTER.units_copied.call_args[0][4]
+        self.assertEqual(copied_ids, {'mock-type' : ['unit-2']})
+
+    def test_count_associations_by_type(self):
+        # Setup
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'unit-1', OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'unit-2', OWNER_TYPE_USER, 'admin')
+        self.manager.associate_unit_by_id(self.repo_id, 'type-2', 'unit-1', OWNER_TYPE_USER, 'admin')
+
+        # Test
+        counts = association_manager.count_associations_by_type(self.repo_id)
+
+        # Verify
+        self.assertEqual(counts, {'type-1' : 2, 'type-2' : 1})
+
     @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
     def test_associate_by_id_calls_update_unit_count(self, mock_call):
         self.manager.associate_unit_by_id(
@@ -443,6 +540,27 @@ class RepoUnitAssociationManagerTests(base.PulpServerTests):
 
         mock_call.assert_called_once_with(self.repo_id, 'type-1', 2)
 
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
+    def test_associate_all_concurrent(self, mock_call):
+        """
+        Makes sure an association created by a concurrent call between the
+        existence check and the insert is counted by that call only.
+        """
+        IDS = ('foo', 'bar', 'baz')
+        insert_associations = association_manager._insert_associations
+
+        def concurrent_insert(associations):
+            association = RepoContentUnit(self.repo_id, 'bar', 'type-1', OWNER_TYPE_USER, 'admin')
+            RepoContentUnit.get_collection().insert(association, safe=True)
+            return insert_associations(associations)
+
+        with mock.patch.object(association_manager, '_insert_associations', concurrent_insert):
+            self.manager.associate_all_by_ids(
+                self.repo_id, 'type-1', IDS, OWNER_TYPE_USER, 'admin')
+
+        mock_call.assert_called_once_with(self.repo_id, 'type-1', 2)
+        self.assertEqual(3, RepoContentUnit.get_collection().find({'repo_id' : self.repo_id}).count())
+
     def test_unassociate_all(self):
         """
         Tests unassociating multiple units in a single call.
@@ -13,6 +13,8 @@
 
 import base
 
+from pulp.server.db import instrumentation
+
 
 class StatusControllerTests(base.PulpWebserviceTests):
 
@@ -22,3 +24,24 @@ class StatusControllerTests(base.PulpWebserviceTests):
 
         self.assertEqual(status, 200)
         self.assertTrue('api_version' in body)
+
+    def test_get_database(self):
+        # Setup
+        instrumentation.STATS.record('repos', 'find', 0.01, 1, 'GET /v2/repositories/')
+
+        # Test
+        status, body = self.get('/v2/status/database/')
+
+        # Verify
+        self.assertEqual(status, 200)
+        self.assertTrue('instrumentation_enabled' in body)
+        self.assertEqual(1, body['collections']['repos']['find']['count'])
+        self.assertEqual({'repos.find' : 1}, body['contexts']['GET /v2/repositories/'])
+
+    def test_delete_database(self):
+        instrumentation.STATS.record('repos', 'find', 0.01, 1, 'GET /v2/repositories/')
+
+        status, body = self.delete('/v2/status/database/')
+
+        self.assertEqual(status, 200)
+        self.assertEqual({}, instrumentation.STATS.serialize()['collections'])
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import datetime
+import unittest
+
+import mock
+import web
+
+from pulp.server.webservices import http
+from pulp.server.webservices.cache import ResponseCache
+from pulp.server.webservices.controllers import decorators
+
+# -- constants ----------------------------------------------------------------
+
+VERSIONS = {'repos' : (3, datetime.datetime(2013, 3, 1, 12, 30, 15))}
+
+# -- test cases ---------------------------------------------------------------
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = ResponseCache(10)
+        self.assertTrue(cache.get('/repositories/', '"a"') is None)
+        cache.put('/repositories/', '"a"', '[]')
+        self.assertEqual('[]', cache.get('/repositories/', '"a"'))
+        self.assertTrue(cache.get('/repositories/', '"b"') is None)
+
+    def test_size(self):
+        cache = ResponseCache(2)
+        cache.put('/a/', '"a"', '[]')
+        cache.put('/b/', '"a"', '[]')
+        cache.put('/c/', '"a"', '[]')
+        self.assertEqual('[]', cache.get('/c/', '"a"'))
+
+
+class Controller(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def not_modified(self):
+        http.status_not_modified()
+        return ''
+
+    @decorators.conditional('repos')
+    def GET(self):
+        self.calls += 1
+        http.status_ok()
+        return '[]'
+
+
+class ConditionalTests(unittest.TestCase):
+
+    def setUp(self):
+        web.ctx.status = None
+        web.ctx.headers = []
+        web.ctx.fullpath = '/v2/repositories/'
+        self.headers = {}
+        self.cache = ResponseCache(10)
+        self.patchers = [
+            mock.patch.object(decorators, 'collection_versions', return_value=VERSIONS),
+            mock.patch.object(decorators, 'response_cache', return_value=self.cache),
+            mock.patch.object(http, 'request_info', lambda key: self.headers.get(key)),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.controller = Controller()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def header(self, name):
+        return dict(web.ctx.headers).get(name)
+
+    def test_validators(self):
+        self.assertEqual('[]', self.controller.GET())
+        self.assertEqual(decorators.entity_tag(VERSIONS), self.header('ETag'))
+        self.assertEqual('Fri, 01 Mar 2013 12:30:15 GMT', self.header('Last-Modified'))
+
+    def test_not_modified(self):
+        self.headers['HTTP_IF_NONE_MATCH'] = decorators.entity_tag(VERSIONS)
+        self.assertEqual('', self.controller.GET())
+        self.assertTrue(web.ctx.status.startswith('304'))
+        self.assertEqual(0, self.controller.calls)
+
+    def test_cached(self):
+        self.controller.GET()
+        self.assertEqual('[]', self.controller.GET())
+        self.assertEqual(1, self.controller.calls)
+        self.assertEqual('2', self.header('Content-Length'))
+
+    def test_changed(self):
+        self.controller.GET()
+        versions = {'repos' : (4, datetime.datetime(2013, 3, 1, 12, 31, 0))}
+        decorators.collection_versions.return_value = versions
+        self.controller.GET()
+        self.assertEqual(2, self.controller.calls)
+        self.assertEqual(decorators.entity_tag(versions), self.header('ETag'))
+
+    def test_entity_tag(self):
+        reset = {'repos' : (3, datetime.datetime(2013, 4, 1))}
+        self.assertNotEqual(decorators.entity_tag(VERSIONS), decorators.entity_tag(reset))
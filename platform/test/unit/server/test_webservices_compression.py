@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import zlib
+from cStringIO import StringIO
+
+import base
+
+from pulp.bindings.server import compress
+from pulp.server.webservices.middleware.compression import accepts_gzip, GzipMiddleware, GZIP_WBITS
+
+# -- constants ----------------------------------------------------------------
+
+BODY = '[' + ', '.join(['{"id": "repo"}'] * 100) + ']'
+
+# -- test cases ---------------------------------------------------------------
+
+class GzipMiddlewareTests(base.PulpServerTests):
+
+    def setUp(self):
+        super(GzipMiddlewareTests, self).setUp()
+        self.request_body = None
+        self.status = None
+        self.headers = None
+
+    def app(self, environ, start_response):
+        self.request_body = environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+        start_response('200 OK', [('Content-Type', 'application/json'),
+                                  ('Content-Length', str(len(BODY))),
+                                  ('ETag', '"abc"')])
+        return [BODY]
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = status
+        self.headers = dict(headers)
+
+    def call(self, threshold=1024, max_request_size=0x100000, **environ):
+        environ.setdefault('wsgi.input', StringIO(''))
+        middleware = GzipMiddleware(self.app, threshold=threshold, max_request_size=max_request_size)
+        return ''.join(middleware(environ, self.start_response))
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip({'HTTP_ACCEPT_ENCODING' : 'deflate, gzip;q=0.5'}))
+        self.assertFalse(accepts_gzip({'HTTP_ACCEPT_ENCODING' : 'gzip;q=0'}))
+        self.assertFalse(accepts_gzip({}))
+
+    def test_compressed(self):
+        body = self.call(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(BODY, zlib.decompress(body, GZIP_WBITS))
+        self.assertEqual('gzip', self.headers['Content-Encoding'])
+        self.assertEqual('W/"abc"', self.headers['ETag'])
+        self.assertFalse('Content-Length' in self.headers)
+
+    def test_not_accepted(self):
+        self.assertEqual(BODY, self.call())
+        self.assertFalse('Content-Encoding' in self.headers)
+
+    def test_under_threshold(self):
+        self.assertEqual(BODY, self.call(threshold=len(BODY) + 1, HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertFalse('Content-Encoding' in self.headers)
+        self.assertEqual('Accept-Encoding', self.headers['Vary'])
+
+    def test_compressed_request(self):
+        data = compress(BODY)
+        self.call(**{'wsgi.input' : StringIO(data), 'CONTENT_LENGTH' : str(len(data)),
+                     'HTTP_CONTENT_ENCODING' : 'gzip'})
+        self.assertEqual(BODY, self.request_body)
+
+    def test_invalid_compressed_request(self):
+        self.call(**{'wsgi.input' : StringIO('not gzip'), 'CONTENT_LENGTH' : '8',
+                     'HTTP_CONTENT_ENCODING' : 'gzip'})
+        self.assertTrue(self.status.startswith('400'))
+        self.assertTrue(self.request_body is None)
+
+    def test_compressed_request_too_large(self):
+        data = compress('x' * 0x200000)
+        self.call(**{'wsgi.input' : StringIO(data), 'CONTENT_LENGTH' : str(len(data)),
+                     'HTTP_CONTENT_ENCODING' : 'gzip'})
+        self.assertTrue(self.status.startswith('413'))
+        self.assertTrue(self.request_body is None)
+
+    def test_compressed_request_at_limit(self):
+        data = compress('x' * 0x100000)
+        self.call(**{'wsgi.input' : StringIO(data), 'CONTENT_LENGTH' : str(len(data)),
+                     'HTTP_CONTENT_ENCODING' : 'gzip'})
+        self.assertEqual(0x100000, len(self.request_body))
@@ -11,6 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import datetime
 import unittest
 
 import mock
@@ -39,3 +40,38 @@ class TestHTTP(unittest.TestCase):
         self.assertEqual(mock_path.call_count, 0)
         self.assertEqual(ret, '/base/uri/repo1/')
 
+
+
+class TestConditional(unittest.TestCase):
+
+    LAST_MODIFIED = datetime.datetime(2013, 3, 1, 12, 30, 15)
+
+    def request_info(self, headers):
+        return lambda key: headers.get(key)
+
+    def test_http_date(self):
+        self.assertEqual('Fri, 01 Mar 2013 12:30:15 GMT', http.http_date(self.LAST_MODIFIED))
+
+    def test_if_none_match(self):
+        headers = {'HTTP_IF_NONE_MATCH' : '"a", "b"'}
+        with mock.patch.object(http, 'request_info', self.request_info(headers)):
+            self.assertTrue(http.is_fresh('"b"'))
+            self.assertFalse(http.is_fresh('"c"'))
+
+    def test_if_none_match_precedence(self):
+        headers = {'HTTP_IF_NONE_MATCH' : '"a"',
+                   'HTTP_IF_MODIFIED_SINCE' : 'Fri, 01 Mar 2013 12:30:15 GMT'}
+        with mock.patch.object(http, 'request_info', self.request_info(headers)):
+            self.assertFalse(http.is_fresh('"b"', self.LAST_MODIFIED))
+
+    def test_if_modified_since(self):
+        headers = {'HTTP_IF_MODIFIED_SINCE' : 'Fri, 01 Mar 2013 12:30:15 GMT'}
+        with mock.patch.object(http, 'request_info', self.request_info(headers)):
+            self.assertTrue(http.is_fresh('"a"', self.LAST_MODIFIED))
+            later = self.LAST_MODIFIED + datetime.timedelta(seconds=1)
+            self.assertFalse(http.is_fresh('"a"', later))
+            self.assertFalse(http.is_fresh('"a"'))
+
+    def test_unconditional(self):
+        with mock.patch.object(http, 'request_info', self.request_info({})):
+            self.assertFalse(http.is_fresh('"a"', self.LAST_MODIFIED))
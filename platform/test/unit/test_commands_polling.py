@@ -10,6 +10,8 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import threading
+
 import mock
 
 import base
@@ -17,6 +19,7 @@ import base
 from pulp.bindings.responses import (STATE_WAITING, STATE_CANCELED, STATE_ERROR, STATE_FINISHED,
                                      STATE_RUNNING, STATE_SKIPPED, RESPONSE_POSTPONED, RESPONSE_REJECTED)
 from pulp.client.commands.polling import PollingCommand, RESULT_ABORTED, RESULT_REJECTED, FLAG_BACKGROUND, RESULT_BACKGROUND
+from pulp.client.commands.polling import SERVER_WAIT_IN_SECONDS
 from pulp.devel.unit.task_simulator import TaskSimulator
 
 
@@ -76,8 +79,8 @@ class PollingCommandTests(base.PulpClientTests):
         expected_tags = ['abort', 'delayed-spinner', 'delayed-spinner', 'succeeded']
         self.assertEqual(self.prompt.get_write_tags(), expected_tags)
 
-        self.assertEqual(4, mock_sleep.call_count) # 2 for waiting, 2 for running
-        self.assertEqual(mock_sleep.call_args_list[0][0][0], 0)  # frequency passed to sleep
+        # the server holds each request, so with a frequency of 0 there is nothing left to sleep
+        self.assertEqual(0, mock_sleep.call_count)
 
         self.assertEqual(3, mock_progress_call.call_count) # 2 running, 1 final
 
@@ -85,6 +88,61 @@ class PollingCommandTests(base.PulpClientTests):
         self.assertEqual(1, len(completed_tasks))
         self.assertEqual(STATE_FINISHED, completed_tasks[0].state)
 
+    @mock.patch('time.sleep')
+    @mock.patch('time.time')
+    def test_wait_for_change(self, mock_time, mock_sleep):
+        # Setup
+        self.command.poll_frequency_in_seconds = 1
+        mock_time.side_effect = [10.0, 10.25]
+
+        task = mock.MagicMock()
+        task.task_id = '123'
+        task.revision = 4
+
+        new_task = mock.MagicMock()
+        new_task.is_completed.return_value = False
+
+        mock_get_task = mock.MagicMock()
+        mock_get_task.return_value.response_body = new_task
+        self.bindings.tasks.get_task = mock_get_task
+
+        # Test
+        result = self.command._wait_for_change(task)
+
+        # Verify
+        self.assertTrue(result is new_task)
+        mock_get_task.assert_called_once_with('123', wait=SERVER_WAIT_IN_SECONDS, revision=4)
+        mock_sleep.assert_called_once_with(0.75) # remainder of the poll frequency
+
+    def test_wait_for_change_refresh(self):
+        # Setup
+        self.command.poll_frequency_in_seconds = .01
+        task = mock.MagicMock()
+        new_task = mock.MagicMock()
+        new_task.is_completed.return_value = True
+
+        # the server holds the request until the display has been refreshed
+        refreshed = threading.Event()
+        def get_task(*args, **kwargs):
+            refreshed.wait(5)
+            return mock.MagicMock(response_body=new_task)
+        self.bindings.tasks.get_task = mock.MagicMock(side_effect=get_task)
+        refresh = mock.MagicMock(side_effect=refreshed.set)
+
+        # Test
+        result = self.command._wait_for_change(task, refresh)
+
+        # Verify
+        self.assertTrue(result is new_task)
+        self.assertTrue(refresh.call_count >= 1)
+
+    def test_wait_for_change_error(self):
+        # Setup
+        self.bindings.tasks.get_task = mock.MagicMock(side_effect=ValueError())
+
+        # Test
+        self.assertRaises(ValueError, self.command._wait_for_change, mock.MagicMock())
+
     def test_poll_task_list(self):
         """
         Task Count: 3
@@ -13,7 +13,9 @@
 
 # Python
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 import mock
@@ -208,3 +210,91 @@ class ExtensionLoaderTests(unittest.TestCase):
             pass
         self.assertEqual(getattr(foo, loader.PRIORITY_VAR), loader.DEFAULT_PRIORITY)
 
+
+
+class SectionIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        super(SectionIndexTests, self).setUp()
+
+        self.working_dir = tempfile.mkdtemp(prefix='extensions-index-')
+        self.index_filename = os.path.join(self.working_dir, 'index.json')
+        self.cli = self._cli()
+
+    def tearDown(self):
+        super(SectionIndexTests, self).tearDown()
+        shutil.rmtree(self.working_dir)
+
+    def _cli(self):
+        prompt = PulpPrompt()
+        cli = PulpCli(prompt)
+        self.context = ClientContext(None, None, None, prompt, None, cli=cli)
+        return cli
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_load_extensions_writes_index(self, mock_entry):
+        # Test
+        loader.load_extensions(VALID_SET, self.context, 'admin', index_filename=self.index_filename)
+
+        # Verify
+        index = loader._read_index(self.index_filename)
+        expected = {'section-1' : ['ext1'], 'section-2' : ['ext2'], 'section-3' : ['ext3']}
+        self.assertEqual(expected, index['sections'])
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_load_section_extensions(self, mock_entry):
+        # Setup
+        loader.load_extensions(VALID_SET, self.context, 'admin', index_filename=self.index_filename)
+        cli = self._cli()
+
+        # Test
+        partial = loader.load_section_extensions(VALID_SET, self.context, 'admin', 'section-2',
+                                                 self.index_filename)
+
+        # Verify
+        self.assertTrue(partial)
+        self.assertTrue(cli.root_section.find_subsection('section-2') is not None)
+        self.assertTrue(cli.root_section.find_subsection('section-1') is None)
+        self.assertTrue(cli.root_section.find_subsection('section-3') is None)
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_load_section_extensions_unknown_section(self, mock_entry):
+        # Setup
+        loader.load_extensions(VALID_SET, self.context, 'admin', index_filename=self.index_filename)
+        cli = self._cli()
+
+        # Test
+        partial = loader.load_section_extensions(VALID_SET, self.context, 'admin', 'section-9',
+                                                 self.index_filename)
+
+        # Verify
+        self.assertFalse(partial)
+        self.assertTrue(cli.root_section.find_subsection('section-1') is not None)
+        self.assertTrue(cli.root_section.find_subsection('section-2') is not None)
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_load_section_extensions_stale_index(self, mock_entry):
+        # Setup
+        loader._write_index(self.index_filename, [['ext1', 0]], {'section-1' : ['ext1']})
+
+        # Test
+        partial = loader.load_section_extensions(VALID_SET, self.context, 'admin', 'section-1',
+                                                 self.index_filename)
+
+        # Verify
+        self.assertFalse(partial)
+        self.assertTrue(self.cli.root_section.find_subsection('section-2') is not None)
+
+        # the index is rewritten by the full load
+        index = loader._read_index(self.index_filename)
+        self.assertEqual(['ext2'], index['sections']['section-2'])
+
+    @mock.patch('pkg_resources.iter_entry_points', return_value=())
+    def test_load_section_extensions_missing_index(self, mock_entry):
+        # Test
+        partial = loader.load_section_extensions(VALID_SET, self.context, 'admin', 'section-1',
+                                                 self.index_filename)
+
+        # Verify
+        self.assertFalse(partial)
+        self.assertTrue(os.path.exists(self.index_filename))
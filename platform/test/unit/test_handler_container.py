@@ -15,6 +15,7 @@
 
 import unittest
 
+from threading import Thread
 from mock import Mock
 from pprint import pprint
 from mock_handlers import MockDeployer
@@ -206,6 +207,99 @@ class TestDispatcher(unittest.TestCase):
         xxx = report.details['xxx']
         self.assertFalse(xxx['succeeded'])
 
+    def install_concurrently(self, dispatcher, requests):
+        reports = {}
+        def install(n, units, options):
+            reports[n] = dispatcher.install(Conduit(), units, options)
+        threads = []
+        for n, (units, options) in enumerate(requests):
+            threads.append(Thread(target=install, args=(n, units, options)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return [reports[n] for n in range(len(requests))]
+
+    def test_install_coalesced(self):
+        # Setup
+        dispatcher = Dispatcher(self.container(), coalesce_window=0.5)
+        handler = dispatcher.container.find('rpm')
+        handler.install = Mock(side_effect=handler.install)
+        requests = [
+            ([dict(type_id='rpm', unit_key=dict(name='zsh'))], {}),
+            ([dict(type_id='rpm', unit_key=dict(name='ksh')),
+              dict(type_id='xxx', unit_key=dict(name='abc'))], {}),
+        ]
+        # Test
+        reports = self.install_concurrently(dispatcher, requests)
+        # Verify
+        self.assertEqual(handler.install.call_count, 1)
+        self.assertEqual(len(handler.install.call_args[0][1]), 2)
+        self.assertTrue(reports[0].succeeded)
+        self.assertEqual(reports[0].details.keys(), ['rpm'])
+        self.assertEqual(reports[0].num_changes, 2)
+        self.assertFalse(reports[1].succeeded)
+        self.assertTrue(reports[1].details['rpm']['succeeded'])
+        self.assertFalse(reports[1].details['xxx']['succeeded'])
+
+    def test_install_coalesced_details(self):
+        # Setup
+        dispatcher = Dispatcher(self.container(), coalesce_window=0.5)
+        handler = dispatcher.container.find('rpm')
+        def install(conduit, units, options):
+            conduit.update_progress('installing')
+            report = HandlerReport()
+            resolved = [dict(name=u['name'], version='1.0') for u in units]
+            deps = [dict(name='dep1', version='1.0'), dict(name='dep2', version='1.0')]
+            report.set_succeeded(dict(resolved=resolved, deps=deps), len(resolved) + len(deps))
+            return report
+        handler.install = install
+        conduits = [Conduit(), Conduit()]
+        for conduit in conduits:
+            conduit.update_progress = Mock()
+        requests = [
+            [dict(type_id='rpm', unit_key=dict(name='zsh'))],
+            [dict(type_id='rpm', unit_key=dict(name='ksh')),
+             dict(type_id='rpm', unit_key=dict(name='csh'))],
+        ]
+        reports = {}
+        def run(n):
+            reports[n] = dispatcher.install(conduits[n], requests[n], {})
+        threads = [Thread(target=run, args=(n,)) for n in range(2)]
+        # Test
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Verify
+        details = reports[0].details['rpm']['details']
+        self.assertEqual([u['name'] for u in details['resolved']], ['zsh'])
+        self.assertEqual([u['name'] for u in details['deps']], ['dep1', 'dep2'])
+        self.assertEqual(reports[0].num_changes, 3)
+        details = reports[1].details['rpm']['details']
+        self.assertEqual([u['name'] for u in details['resolved']], ['ksh', 'csh'])
+        self.assertEqual([u['name'] for u in details['deps']], ['dep1', 'dep2'])
+        self.assertEqual(reports[1].num_changes, 4)
+        for conduit in conduits:
+            conduit.update_progress.assert_called_once_with('installing')
+
+    def test_install_not_coalesced(self):
+        # Setup
+        dispatcher = Dispatcher(self.container(), coalesce_window=0.5)
+        handler = dispatcher.container.find('rpm')
+        handler.install = Mock(side_effect=handler.install)
+        requests = [
+            ([dict(type_id='rpm', unit_key=dict(name='zsh'))], {}),
+            ([dict(type_id='rpm', unit_key=dict(name='ksh'))], dict(importkeys=True)),
+        ]
+        # Test
+        reports = self.install_concurrently(dispatcher, requests)
+        # Verify
+        self.assertEqual(handler.install.call_count, 2)
+        for report in reports:
+            self.assertTrue(report.succeeded)
+            self.assertEqual(report.num_changes, 1)
+
     def test_update(self):
         # Setup
         dispatcher = Dispatcher(self.container())
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+import mock
+
+from pulp.bindings.responses import Task
+from pulp.bindings.tasks import TasksAPI
+
+
+class TestTaskSearchAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.api = TasksAPI(mock.MagicMock())
+
+    @property
+    def body(self):
+        return self.api.server.POST.call_args[0][1]
+
+    def test_path(self):
+        self.api.search_tasks(task_ids=['a'])
+        path = self.api.server.POST.call_args[0][0]
+        self.assertEqual(path, '/v2/tasks/search/')
+
+    def test_search_tasks(self):
+        self.api.search_tasks(task_ids=('a', 'b'), task_group_ids=['g'], tags=['t'], fields=['state'])
+        self.assertEqual(self.body, {'ids': ['a', 'b'], 'group_ids': ['g'],
+                                     'tags': ['t'], 'fields': ['state']})
+
+    def test_search_tasks_no_criteria(self):
+        self.api.search_tasks()
+        self.assertEqual(self.body, {})
+
+    def test_get_tasks(self):
+        slim_report = {'call_request_id': 'a', 'call_request_group_id': None,
+                       'call_request_tags': [], 'state': 'running', 'response': 'accepted',
+                       'reasons': [], 'start_time': None, 'finish_time': None,
+                       'exception': None, 'revision': 3}
+        self.api.server.POST.return_value.response_body = [slim_report]
+
+        response = self.api.get_tasks(['a'])
+
+        self.assertEqual(self.body, {'ids': ['a']})
+        self.assertEqual(len(response.response_body), 1)
+        task = response.response_body[0]
+        self.assertTrue(isinstance(task, Task))
+        self.assertEqual(task.task_id, 'a')
+        self.assertTrue(task.is_running())
+        self.assertEqual(task.revision, 3)
+        self.assertEqual(task.progress, None)
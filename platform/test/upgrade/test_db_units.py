@@ -120,6 +120,44 @@ class PackagesUpgradeTests(BaseDbUpgradeTests):
 
         self._assert_associations(self.tmp_test_db.database.units_rpm, 'rpm', {'arch' : {'$ne' : 'src'}})
 
+    def test_rpms_resume(self):
+        # Setup
+        first_rpm = self.v1_test_db.database.packages.find({'arch' : {'$ne' : 'src'}}).sort('_id').limit(1)[0]
+        units._save_checkpoint(self.tmp_test_db.database, 'rpms', last_id=first_rpm['_id'])
+
+        # Test
+        report = UpgradeStepReport()
+        result = units._rpms(self.v1_test_db.database, self.tmp_test_db.database, report)
+
+        # Verify
+        self.assertTrue(result)
+
+        v1_rpms = self.v1_test_db.database.packages.find({'arch' : {'$ne' : 'src'}})
+        v2_rpms = self.tmp_test_db.database.units_rpm
+        self.assertEqual(v1_rpms.count() - 1, v2_rpms.find().count())
+        self.assertEqual(None, v2_rpms.find_one({'filename' : first_rpm['filename'],
+                                                 'arch' : first_rpm['arch']}))
+
+    def test_rpms_existing_units(self):
+        # Setup
+        report = UpgradeStepReport()
+        units._rpms(self.v1_test_db.database, self.tmp_test_db.database, report)
+        self.tmp_test_db.database.repo_content_units.remove(safe=True)
+        self.tmp_test_db.database.drop_collection(units.CHECKPOINT_COLLECTION)
+
+        # Test
+        result = units._rpms(self.v1_test_db.database, self.tmp_test_db.database, report)
+
+        # Verify
+        self.assertTrue(result)
+
+        v1_rpms = self.v1_test_db.database.packages.find({'arch' : {'$ne' : 'src'}})
+        v2_rpms = self.tmp_test_db.database.units_rpm.find()
+        self.assertEqual(v1_rpms.count(), v2_rpms.count())
+
+        # The associations reference the units added by the first run
+        self._assert_associations(self.tmp_test_db.database.units_rpm, 'rpm', {'arch' : {'$ne' : 'src'}})
+
     def test_srpms(self):
         # Test
         report = UpgradeStepReport()
@@ -669,3 +707,49 @@ class ISOUpgradeTests(BaseDbUpgradeTests):
         v2_count = self.tmp_test_db.database.units_iso.find().count()
 
         self.assertEqual(v1_count, v2_count)
+
+
+class RunStepsTests(BaseDbUpgradeTests):
+
+    def setUp(self):
+        super(RunStepsTests, self).setUp()
+        self.report = UpgradeStepReport()
+        self.called = []
+
+    def _step(self, v1_database, v2_database, report):
+        self.called.append(report)
+        return True
+
+    def _failed_step(self, v1_database, v2_database, report):
+        return False
+
+    def _error_step(self, v1_database, v2_database, report):
+        raise ValueError()
+
+    def test_run_steps(self):
+        # Test
+        steps = (self._step, self._step, self._step, self._failed_step, self._step)
+        result = units._run_steps(steps, self.v1_test_db.database,
+                                  self.tmp_test_db.database, self.report)
+
+        # Verify
+        self.assertFalse(result)
+        self.assertEqual(4, len(self.called))
+        self.assertTrue(units._checkpoint(self.tmp_test_db.database, 'step')['completed'])
+        self.assertEqual({}, units._checkpoint(self.tmp_test_db.database, 'failed_step'))
+
+    def test_run_steps_skips_completed(self):
+        # Setup
+        units._save_checkpoint(self.tmp_test_db.database, 'step', completed=True)
+
+        # Test
+        result = units._run_steps((self._step,), self.v1_test_db.database,
+                                  self.tmp_test_db.database, self.report)
+
+        # Verify
+        self.assertTrue(result)
+        self.assertEqual(0, len(self.called))
+
+    def test_run_steps_error(self):
+        self.assertRaises(ValueError, units._run_steps, (self._step, self._error_step),
+                          self.v1_test_db.database, self.tmp_test_db.database, self.report)
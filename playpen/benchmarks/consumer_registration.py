@@ -0,0 +1,94 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the number of consumer registrations per second, each of which
+generates and signs a consumer certificate, from a number of concurrent
+threads as happens when many hosts are provisioned at once. The run is made
+with the private key pool disabled and with the key pool filled to the given
+watermark beforehand.
+
+The CA certificate and key configured in the security section of the server
+configuration must be readable. The scratch database is dropped when the run
+completes. Run from a checkout with platform/src on the PYTHONPATH, against a
+running mongod:
+
+  PYTHONPATH=platform/src python playpen/benchmarks/consumer_registration.py [registrations] [threads] [watermark]
+"""
+
+import sys
+import threading
+import time
+
+from pulp.server import config as pulp_config
+from pulp.server.db import connection
+from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.auth.cert import cert_generator
+
+DATABASE_NAME = 'pulp_consumer_registration_benchmark'
+
+
+def register(prefix, registrations, threads):
+    consumer_manager = manager_factory.consumer_manager()
+
+    def worker(index):
+        for i in range(index, registrations, threads):
+            consumer_manager.register('%s-%d' % (prefix, i))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return registrations / (time.time() - start)
+
+
+def measure(prefix, registrations, threads, watermark):
+    pulp_config.config.set('security', 'key_pool_watermark', str(watermark))
+    cert_generator.initialize()
+    try:
+        if cert_generator._KEY_POOL is not None:
+            # registrations arrive once the pool has been filled
+            while cert_generator._KEY_POOL.size() < watermark:
+                time.sleep(0.1)
+        return register(prefix, registrations, threads)
+    finally:
+        cert_generator.finalize()
+
+
+def main():
+    registrations = 200
+    threads = 8
+    watermark = 200
+    if len(sys.argv) > 1:
+        registrations = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        threads = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        watermark = int(sys.argv[3])
+
+    connection.initialize(name=DATABASE_NAME)
+    manager_factory.initialize()
+    try:
+        rate = measure('no-pool', registrations, threads, 0)
+        print '%-25s %8.1f registrations/second' % ('without key pool', rate)
+        rate = measure('pool', registrations, threads, watermark)
+        print '%-25s %8.1f registrations/second' % ('key pool of %d' % watermark, rate)
+    finally:
+        connection._connection.drop_database(DATABASE_NAME)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the client start up time spent loading extensions, comparing a full
+load against loading only the extensions of each top-level section through
+the extensions index, as pulp-admin does for a command such as
+"pulp-admin repo list". Each load runs in a fresh interpreter so the cost of
+importing the extensions is included.
+
+No server is needed. Run from a checkout with platform/src on the PYTHONPATH:
+
+  PYTHONPATH=platform/src python playpen/benchmarks/extension_loading.py [extensions_dir] [runs]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_EXTENSIONS_DIR = '/usr/lib/pulp/admin/extensions'
+
+
+def child(extensions_dir, index_filename, section_name):
+    # Runs in the spawned interpreter; the imports are part of the measurement
+    from pulp.client.extensions import loader
+    from pulp.client.extensions.core import ClientContext, PulpCli, PulpPrompt
+
+    prompt = PulpPrompt()
+    context = ClientContext(None, None, None, prompt, None, cli=PulpCli(prompt))
+    if section_name:
+        loader.load_section_extensions(extensions_dir, context, 'admin', section_name, index_filename)
+    else:
+        loader.load_extensions(extensions_dir, context, 'admin', index_filename=index_filename)
+
+
+def measure(extensions_dir, index_filename, section_name, runs):
+    args = [sys.executable, __file__, '--child', extensions_dir, index_filename, section_name]
+    elapsed = []
+    for i in range(runs):
+        start = time.time()
+        subprocess.check_call(args)
+        elapsed.append(time.time() - start)
+    return min(elapsed), sum(elapsed) / len(elapsed)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(*sys.argv[2:5])
+        return 0
+
+    extensions_dir = DEFAULT_EXTENSIONS_DIR
+    if len(sys.argv) > 1:
+        extensions_dir = sys.argv[1]
+    runs = 5
+    if len(sys.argv) > 2:
+        runs = int(sys.argv[2])
+
+    working_dir = tempfile.mkdtemp(prefix='extension-loading-')
+    index_filename = os.path.join(working_dir, 'extensions_index.json')
+    try:
+        # the full load also writes the index used by the section loads
+        best, average = measure(extensions_dir, index_filename, '', runs)
+        print '%-30s best: %.3fs  average: %.3fs' % ('all extensions', best, average)
+
+        from pulp.client.extensions import loader
+        sections = loader._read_index(index_filename)['sections']
+        for section_name in sorted(sections):
+            best, average = measure(extensions_dir, index_filename, section_name, runs)
+            print '%-30s best: %.3fs  average: %.3fs  (%s)' % \
+                  (section_name, best, average, ', '.join(sections[section_name]))
+    finally:
+        shutil.rmtree(working_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
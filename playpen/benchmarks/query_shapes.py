@@ -0,0 +1,88 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Explains every query shape declared in pulp.server.db.indexes against a
+scratch database seeded with documents, before and after the indices are
+reconciled as pulp-manage-db does, and reports the number of documents each
+query scans. Exits non-zero if any shape still scans its whole collection
+after reconciliation.
+
+The scratch database is dropped when the run completes. Run from a checkout
+with platform/src on the PYTHONPATH, against a running mongod:
+
+  PYTHONPATH=platform/src python playpen/benchmarks/query_shapes.py [count]
+"""
+
+import random
+import sys
+
+from pulp.server.db import connection, indexes
+from pulp.server.managers import factory as manager_factory
+
+DATABASE_NAME = 'pulp_query_shapes_benchmark'
+
+
+def seed(shapes, count):
+    seeded = set()
+    for shape in shapes:
+        if shape.collection_name in seeded:
+            continue
+        seeded.add(shape.collection_name)
+        fields = set()
+        for s in shapes:
+            if s.collection_name == shape.collection_name:
+                fields.update(f for f, d in s.index_key())
+        documents = []
+        for i in range(count):
+            document = dict((f, 'value-%d' % random.randint(0, count / 10)) for f in fields)
+            # keep the models' unique indices satisfied
+            document.update({'id' : str(i), 'unit_id' : str(i), 'sequence' : i})
+            documents.append(document)
+        shape.model.get_collection().insert(documents, safe=True)
+
+
+def report(title, shapes):
+    print title
+    scans = 0
+    for shape in shapes:
+        explanation = indexes.explain(shape)
+        scanned = explanation.get('nscanned',
+                                  explanation.get('executionStats', {}).get('totalDocsExamined'))
+        scan = indexes.is_collection_scan(explanation)
+        scans += int(scan)
+        print '  %-70r scanned: %-8s %s' % (shape, scanned, scan and 'COLLECTION SCAN' or '')
+    return scans
+
+
+def main():
+    count = 10000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    connection.initialize(name=DATABASE_NAME)
+    manager_factory.initialize()
+    shapes = indexes.declared_queries()
+    try:
+        seed(shapes, count)
+        report('Before reconciliation:', shapes)
+        created = indexes.reconcile_indices()
+        print 'Created indices: %s' % created
+        scans = report('After reconciliation:', shapes)
+    finally:
+        connection._connection.drop_database(DATABASE_NAME)
+    return scans and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the latency of a no-op call executed synchronously through the
+coordinator, as the execute_sync_ok and execute_sync_created REST helpers do,
+with synchronous calls run inline in the calling thread and with them left to
+the task queue's dispatcher.
+
+The scratch database is dropped when the run completes. Run from a checkout
+with platform/src on the PYTHONPATH, against a running mongod:
+
+  PYTHONPATH=platform/src python playpen/benchmarks/sync_call_latency.py [calls]
+"""
+
+import sys
+import time
+
+from pulp.server import config as pulp_config
+from pulp.server.db import connection
+from pulp.server.dispatch import factory as dispatch_factory
+from pulp.server.dispatch.call import CallRequest
+from pulp.server.managers import factory as manager_factory
+
+DATABASE_NAME = 'pulp_sync_call_latency_benchmark'
+
+
+def no_op():
+    pass
+
+
+def measure(inline, calls):
+    pulp_config.config.set('coordinator', 'inline_synchronous_calls', str(inline).lower())
+    dispatch_factory.initialize()
+    try:
+        coordinator = dispatch_factory.coordinator()
+        elapsed = []
+        for i in range(calls):
+            start = time.time()
+            coordinator.execute_call_synchronously(CallRequest(no_op))
+            elapsed.append(time.time() - start)
+    finally:
+        dispatch_factory.finalize(clear_queued_calls=True)
+    elapsed.sort()
+    return elapsed[0], sum(elapsed) / len(elapsed), elapsed[len(elapsed) / 2], elapsed[-1]
+
+
+def main():
+    calls = 100
+    if len(sys.argv) > 1:
+        calls = int(sys.argv[1])
+
+    connection.initialize(name=DATABASE_NAME)
+    manager_factory.initialize()
+    try:
+        for inline in (True, False):
+            title = inline and 'inline' or 'task queue dispatcher'
+            best, average, median, worst = measure(inline, calls)
+            print '%-25s best: %.4fs  average: %.4fs  median: %.4fs  worst: %.4fs' % \
+                  (title, best, average, median, worst)
+    finally:
+        connection._connection.drop_database(DATABASE_NAME)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Measures the memory held by the plugin representation of content units, as
+built by the conduits from database documents, comparing the previous
+dict-based units (which copied each document's metadata up front) with the
+current slot-based units whose metadata is built on first access.
+
+Only the memory added on top of the database documents is counted, since the
+documents are loaded either way. Run from a checkout with platform/src on the
+PYTHONPATH:
+
+  PYTHONPATH=platform/src python playpen/benchmarks/unit_memory.py [count]
+"""
+
+import sys
+
+from pulp.plugins.conduits import _common as common_utils
+
+
+TYPE_DEF = {'id' : 'rpm', 'unit_key' : ['name', 'epoch', 'version', 'release', 'arch', 'checksumtype', 'checksum']}
+
+
+class LegacyUnit(object):
+    """
+    Copy of the unit class before slots and deferred metadata were added.
+    """
+
+    def __init__(self, type_id, unit_key, metadata, storage_path):
+        self.type_id = type_id
+        self.unit_key = unit_key
+        self.metadata = metadata
+        self.storage_path = storage_path
+        self.id = None
+
+
+def legacy_to_plugin_unit(pulp_unit, type_def):
+    pulp_unit = dict(pulp_unit)
+    unit_key = {}
+    for k in type_def['unit_key']:
+        unit_key[k] = pulp_unit.pop(k)
+    storage_path = pulp_unit.pop('_storage_path', None)
+    unit_id = pulp_unit.pop('_id', None)
+    u = LegacyUnit(type_def['id'], unit_key, pulp_unit, storage_path)
+    u.id = unit_id
+    return u
+
+
+def documents(count):
+    for i in xrange(count):
+        yield {'_id' : 'unit-%d' % i, '_content_type_id' : 'rpm',
+               '_storage_path' : '/var/lib/pulp/content/rpm/pkg-%d.rpm' % i,
+               'name' : 'pkg-%d' % i, 'epoch' : '0', 'version' : '1.0', 'release' : '1',
+               'arch' : 'noarch', 'checksumtype' : 'sha256', 'checksum' : '%064d' % i,
+               'filename' : 'pkg-%d.rpm' % i, 'size' : 1024, 'license' : 'GPLv2',
+               'description' : 'package', 'requires' : [], 'provides' : []}
+
+
+def unit_overhead(unit):
+    """
+    Bytes held by a unit that are not part of its source document.
+    """
+    size = sys.getsizeof(unit) + sys.getsizeof(unit.unit_key)
+    if isinstance(unit, LegacyUnit):
+        # instance dictionary plus the up front copy of the metadata
+        size += sys.getsizeof(unit.__dict__) + sys.getsizeof(unit.metadata)
+    else:
+        # reference to the document until the metadata is accessed
+        size += sys.getsizeof(unit._metadata_source)
+    return size
+
+
+def measure(convert, docs):
+    return sum(unit_overhead(convert(d, TYPE_DEF)) for d in docs)
+
+
+def main():
+    count = 100000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    docs = list(documents(count))
+
+    legacy = measure(legacy_to_plugin_unit, docs)
+    current = measure(common_utils.to_plugin_unit, docs)
+
+    def per_unit(total):
+        return float(total) / count
+
+    print 'Units: %d' % count
+    print 'Before: %.1f MB (%d bytes per unit)' % (legacy / 1048576.0, per_unit(legacy))
+    print 'After:  %.1f MB (%d bytes per unit)' % (current / 1048576.0, per_unit(current))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the License
+# (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied, including the
+# implied warranties of MERCHANTABILITY, NON-INFRINGEMENT, or FITNESS FOR A
+# PARTICULAR PURPOSE.
+# You should have received a copy of GPLv2 along with this software; if not,
+# see http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt
+
+"""
+Compares the pulp.common.download downloaders against a local server, so the
+runs are repeatable and need no network. The server runs in its own process
+and each downloader in another one, so the CPU time and peak RSS reported are
+those of the downloader alone. Run from a checkout with platform/src on the
+PYTHONPATH:
+
+  PYTHONPATH=platform/src python playpen/download_benchmarks/main.py [options] [downloader ...]
+
+The eventlet downloader doesn't configure SSL yet, so it is only run against
+the plain HTTP server.
+"""
+
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+from pulp.common.download.config import DownloaderConfig
+from pulp.common.download.listener import DownloadEventListener
+from pulp.common.download.request import DownloadRequest
+
+import server
+
+
+def curl_downloader(config, listener):
+    from pulp.common.download.downloaders.curl import HTTPSCurlDownloader
+    # the https downloader also handles http urls
+    return HTTPSCurlDownloader(config, listener)
+
+
+def eventlet_downloader(config, listener):
+    from pulp.common.download.downloaders.event import HTTPEventletDownloader
+    return HTTPEventletDownloader(config, listener)
+
+
+DOWNLOADERS = {
+    # name: (factory, supports https)
+    'curl': (curl_downloader, True),
+    'eventlet': (eventlet_downloader, False),
+}
+
+
+class TimingListener(DownloadEventListener):
+
+    def __init__(self):
+        self.latencies = []
+        self.bytes_downloaded = 0
+        self.failed = 0
+
+    def download_succeeded(self, report):
+        self.latencies.append(self._elapsed(report))
+        self.bytes_downloaded += report.bytes_downloaded
+
+    def download_failed(self, report):
+        self.failed += 1
+
+    def _elapsed(self, report):
+        if report.start_time is None or report.finish_time is None:
+            return 0.0
+        delta = report.finish_time - report.start_time
+        return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(round(p / 100.0 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def run_downloader(name, urls, options, queue):
+    """
+    Download the urls with the named downloader and put its results on the
+    queue. Runs in a process of its own.
+    """
+    download_dir = tempfile.mkdtemp(prefix='download-benchmark-%s-' % name)
+    try:
+        config = DownloaderConfig(max_concurrent=options.concurrency, ssl_verify_host=0, ssl_verify_peer=0)
+        listener = TimingListener()
+        downloader = DOWNLOADERS[name][0](config, listener)
+        request_list = [DownloadRequest(url, os.path.join(download_dir, str(i)))
+                        for i, url in enumerate(urls)]
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.time()
+        downloader.download(request_list)
+        run_time = time.time() - start
+        end_usage = resource.getrusage(resource.RUSAGE_SELF)
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
+    cpu_time = (end_usage.ru_utime - usage.ru_utime) + (end_usage.ru_stime - usage.ru_stime)
+    queue.put({
+        'downloader': name,
+        'files': len(listener.latencies),
+        'failed': listener.failed,
+        'seconds': run_time,
+        'mb_per_second': listener.bytes_downloaded / run_time / 0x100000,
+        'files_per_second': len(listener.latencies) / run_time,
+        'p50_ms': percentile(listener.latencies, 50) * 1000,
+        'p99_ms': percentile(listener.latencies, 99) * 1000,
+        'cpu_seconds': cpu_time,
+        'max_rss_mb': end_usage.ru_maxrss / 1024.0,
+    })
+
+
+def benchmark(name, urls, options):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_downloader, args=(name, urls, options, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def parse_options():
+    parser = OptionParser(usage='%prog [options] [downloader ...]')
+    parser.add_option('--files', type='int', default=500, help='number of files to download')
+    parser.add_option('--size', type='int', default=0x40000, help='typical file size in bytes')
+    parser.add_option('--distribution', choices=sorted(server.DISTRIBUTIONS), default='rpm',
+                      help='file size distribution: %s' % ', '.join(sorted(server.DISTRIBUTIONS)))
+    parser.add_option('--seed', type='int', default=0, help='seed for the file sizes')
+    parser.add_option('--latency', type='float', default=0.0, help='seconds before each response')
+    parser.add_option('--bandwidth', type='int', default=0, help='bytes per second on each connection')
+    parser.add_option('--error-rate', type='float', default=0.0, help='fraction of requests failed with a 503')
+    parser.add_option('--concurrency', type='int', default=None, help='max_concurrent downloader setting')
+    parser.add_option('--https', action='store_true', default=False, help='serve the files over https')
+    parser.add_option('--json', action='store_true', default=False, help='print the results as json')
+    return parser.parse_args()
+
+
+def main():
+    options, names = parse_options()
+    names = names or sorted(DOWNLOADERS)
+    for name in names:
+        if name not in DOWNLOADERS:
+            print >> sys.stderr, 'unknown downloader: %s' % name
+            return 1
+    if options.https:
+        names = [n for n in names if DOWNLOADERS[n][1]]
+
+    cert_dir = cert_path = key_path = None
+    if options.https:
+        cert_dir, cert_path, key_path = server.self_signed_cert()
+    try:
+        httpd = server.BenchmarkServer(options.latency, options.bandwidth, options.error_rate,
+                                       cert_path, key_path)
+        server_process = multiprocessing.Process(target=httpd.serve_forever)
+        server_process.daemon = True
+        server_process.start()
+        httpd.server_close()
+        urls = [httpd.base_url + path for path in
+                server.file_paths(options.distribution, options.files, options.size, options.seed)]
+        try:
+            results = [benchmark(name, urls, options) for name in names]
+        finally:
+            server_process.terminate()
+            server_process.join()
+    finally:
+        if cert_dir is not None:
+            shutil.rmtree(cert_dir)
+
+    if options.json:
+        print json.dumps(results, indent=2)
+        return 0
+    print '%-10s %6s %6s %8s %8s %9s %9s %8s %8s' % (
+        'downloader', 'files', 'failed', 'MB/s', 'files/s', 'p50 ms', 'p99 ms', 'cpu s', 'rss MB')
+    for r in results:
+        print '%-10s %6d %6d %8.1f %8.1f %9.1f %9.1f %8.2f %8.1f' % (
+            r['downloader'], r['files'], r['failed'], r['mb_per_second'], r['files_per_second'],
+            r['p50_ms'], r['p99_ms'], r['cpu_seconds'], r['max_rss_mb'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
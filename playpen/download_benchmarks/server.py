@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the License
+# (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied, including the
+# implied warranties of MERCHANTABILITY, NON-INFRINGEMENT, or FITNESS FOR A
+# PARTICULAR PURPOSE.
+# You should have received a copy of GPLv2 along with this software; if not,
+# see http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt
+
+"""
+Local stand-in for a content server. Files are not stored anywhere: the size
+of each file is part of its path, /<size>/<name>, and its body is generated
+from a block of random bytes. The server can delay each response, cap the
+bandwidth of each connection and fail a fraction of the requests. The same
+paths always fail, so every downloader sees the same errors.
+"""
+
+import BaseHTTPServer
+import SocketServer
+import math
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import tempfile
+import time
+import zlib
+
+
+BLOCK = os.urandom(0x10000) # 64KB
+CHUNK_SIZE = 0x4000 # 16KB
+
+# -- file sizes ----------------------------------------------------------------
+
+def fixed_sizes(count, size, rand):
+    return [size] * count
+
+
+def uniform_sizes(count, size, rand):
+    return [rand.randint(1, 2 * size) for i in range(count)]
+
+
+def rpm_sizes(count, size, rand):
+    # package sizes are roughly log-normal: mostly small with a long tail
+    return [min(int(rand.lognormvariate(math.log(size), 1.0)) + 1, 64 * size) for i in range(count)]
+
+
+DISTRIBUTIONS = {
+    'fixed': fixed_sizes,
+    'uniform': uniform_sizes,
+    'rpm': rpm_sizes,
+}
+
+
+def file_paths(distribution, count, size, seed=0):
+    """
+    Paths of the files to download, their sizes drawn from the named
+    distribution around the given size in bytes.
+    """
+    sizes = DISTRIBUTIONS[distribution](count, size, random.Random(seed))
+    return ['/%d/%d.bin' % (s, i) for i, s in enumerate(sizes)]
+
+# -- server --------------------------------------------------------------------
+
+class BenchmarkRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        try:
+            size = int(self.path.split('/')[1])
+        except (IndexError, ValueError):
+            self.send_error(404)
+            return
+        if server.fails(self.path):
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+        self.write_body(size)
+
+    def write_body(self, size):
+        bandwidth = self.server.bandwidth
+        start = time.time()
+        sent = 0
+        while sent < size:
+            offset = sent % len(BLOCK)
+            chunk = BLOCK[offset:offset + min(CHUNK_SIZE, size - sent)]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if bandwidth:
+                delay = start + float(sent) / bandwidth - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchmarkServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Threaded HTTP server, or HTTPS server when given a certificate and key.
+    @ivar latency: seconds to wait before each response
+    @ivar bandwidth: maximum bytes per second sent on each connection, or 0
+    @ivar error_rate: fraction of the paths answered with a 503
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency=0, bandwidth=0, error_rate=0, cert_path=None, key_path=None):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), BenchmarkRequestHandler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.scheme = 'http'
+        if cert_path is not None:
+            self.socket = ssl.wrap_socket(self.socket, keyfile=key_path, certfile=cert_path, server_side=True)
+            self.scheme = 'https'
+
+    @property
+    def base_url(self):
+        return '%s://127.0.0.1:%d' % (self.scheme, self.server_address[1])
+
+    def fails(self, path):
+        return (zlib.crc32(path) & 0xffffffff) % 10000 < self.error_rate * 10000
+
+
+def self_signed_cert():
+    """
+    Create a throw-away certificate and key for localhost with openssl.
+    @return: temporary directory, certificate path and key path
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='download-benchmark-')
+    cert_path = os.path.join(tmp_dir, 'server.crt')
+    key_path = os.path.join(tmp_dir, 'server.key')
+    devnull = open(os.devnull, 'w')
+    try:
+        subprocess.check_call(['openssl', 'req', '-x509', '-nodes', '-days', '1', '-newkey', 'rsa:2048',
+                               '-subj', '/CN=localhost', '-keyout', key_path, '-out', cert_path],
+                              stdout=devnull, stderr=devnull)
+    except Exception:
+        shutil.rmtree(tmp_dir)
+        raise
+    finally:
+        devnull.close()
+    return tmp_dir, cert_path, key_path
@@ -44,6 +44,7 @@ TASK_TEMPLATE = {
     "result": None,
     "progress": {},
     "response": None,
+    "revision": 0,
 }
 
 
@@ -117,9 +118,11 @@ class TaskSimulator(object):
 
     # -- task bindings api ----------------------------------------------------------------------------------
 
-    def get_task(self, task_id):
+    def get_task(self, task_id, wait=None, revision=None):
         """
-        Returns the next state for the given task.
+        Returns the next state for the given task. The wait and revision
+        arguments are accepted for compatibility with the bindings but have
+        no effect; the next state is always returned immediately.
 
         :return: response object as if the bindings had contacted the server
         :rtype:  pulp.bindings.response.Response